@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+自适应并发控制
+
+标签页数量原来写死在各个爬虫里（max_tabs=5、max_workers=3……），
+在 2 核的 VPS 上会把机器拖到交换，在 32 核的机器上又大量闲置。
+这里按主机资源给出标签页数量的上限，运行时再根据三个信号调整实际使用的标签页数：
+
+- 每个标签页的渲染内存（浏览器进程树总 RSS / 活跃标签页数）与主机可用内存
+- CPU 余量（psutil.cpu_percent，未安装 psutil 时用 loadavg 估算）
+- 最近一段时间的失败率（超时、异常、Cloudflare 验证未通过都算失败）
+
+失败率过高时减半（遇到验证一般是请求过密），资源不足时减一，
+各项指标都宽裕时加一，每次调整都会记录原因。调整之间有冷却时间，
+调整后的新并发度要积累足够的样本才会再次按失败率判断。
+
+标签页按上限一次创建好，超出当前并发度的标签页停在空白页，不领取任务。
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Callable, Optional
+from loguru import logger
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# ---------- 主机资源 ----------
+
+def cpu_count() -> int:
+    return os.cpu_count() or 1
+
+
+def cpu_percent() -> Optional[float]:
+    """主机 CPU 使用率（0-100），无法获取时返回 None"""
+    if psutil is not None:
+        try:
+            return psutil.cpu_percent(interval=None)
+        except Exception:
+            pass
+    try:
+        return min(100.0, os.getloadavg()[0] / cpu_count() * 100)
+    except (AttributeError, OSError):
+        return None
+
+
+def available_memory_mb() -> Optional[float]:
+    """主机可用内存（MB），无法获取时返回 None"""
+    if psutil is not None:
+        try:
+            return psutil.virtual_memory().available / 1024 / 1024
+        except Exception:
+            pass
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def suggest_max_tabs(tab_memory_mb: float = 350.0, reserve_memory_mb: float = 1024.0,
+                     tabs_per_cpu: int = 2, hard_cap: int = 16) -> int:
+    """按 CPU 核数和可用内存估算标签页数量上限"""
+    limit = min(cpu_count() * tabs_per_cpu, hard_cap)
+    available = available_memory_mb()
+    if available is not None:
+        limit = min(limit, int((available - reserve_memory_mb) // tab_memory_mb))
+    return max(1, limit)
+
+
+# ---------- 控制器 ----------
+
+class AdaptiveConcurrency:
+    """运行时调整活跃标签页数量
+
+    由调度器调用 record() 上报每个任务的结果，并定期调用 maybe_adjust()。
+
+    Args:
+        min_tabs / max_tabs: 活跃标签页数量的范围，max_tabs 为 None 时按主机资源估算
+        initial: 初始并发度，默认取范围中点，之后再按指标增减
+        memory_fn: 返回浏览器进程树总 RSS（MB）的函数，例如 TabLifecycleManager.total_rss_mb
+        tab_memory_mb: 每个标签页内存的初始估计（MB），有 memory_fn 时按实测值修正
+        reserve_memory_mb: 给系统和其他进程保留的内存（MB）
+        cpu_high / cpu_low: CPU 使用率高于 cpu_high 时减少，低于 cpu_low 才允许增加
+        failure_high / failure_low: 失败率高于 failure_high 时减半，低于 failure_low 才允许增加
+        window: 计算失败率的滑动窗口大小
+        min_samples: 按失败率判断前至少需要的样本数
+        adjust_interval: 两次调整之间的最短间隔（秒）
+    """
+
+    def __init__(self, min_tabs: int = 1,
+                 max_tabs: Optional[int] = None,
+                 initial: Optional[int] = None,
+                 memory_fn: Optional[Callable[[], Optional[float]]] = None,
+                 tab_memory_mb: float = 350.0,
+                 reserve_memory_mb: float = 1024.0,
+                 cpu_high: float = 85.0,
+                 cpu_low: float = 60.0,
+                 failure_high: float = 0.3,
+                 failure_low: float = 0.1,
+                 window: int = 50,
+                 min_samples: int = 10,
+                 adjust_interval: float = 30.0):
+        self.max_tabs = max(1, max_tabs or suggest_max_tabs(tab_memory_mb, reserve_memory_mb))
+        self.min_tabs = max(1, min(min_tabs, self.max_tabs))
+        self.memory_fn = memory_fn
+        self.tab_memory_mb = tab_memory_mb
+        self.reserve_memory_mb = reserve_memory_mb
+        self.cpu_high = cpu_high
+        self.cpu_low = cpu_low
+        self.failure_high = failure_high
+        self.failure_low = failure_low
+        self.min_samples = min_samples
+        self.adjust_interval = adjust_interval
+
+        if initial is None:
+            initial = (self.min_tabs + self.max_tabs + 1) // 2
+        self.limit = self._clamp(initial)
+
+        self.lock = threading.Lock()
+        self.outcomes = deque(maxlen=max(window, min_samples))
+        self.changes = 0
+        self._last_change = time.monotonic()
+
+        if psutil is not None:
+            psutil.cpu_percent(interval=None)  # 第一次调用只建立基准
+
+        logger.info(f"🎚️ 自适应并发: 范围 {self.min_tabs}-{self.max_tabs}，初始 {self.limit} "
+                    f"(CPU {cpu_count()} 核，可用内存 {_fmt_mb(available_memory_mb())})")
+
+    @classmethod
+    def from_env(cls, max_tabs: Optional[int] = None, **kwargs) -> 'AdaptiveConcurrency':
+        """按环境变量创建，显式传入的 max_tabs 优先于 CRAWLER_MAX_TABS"""
+        env_max = os.getenv('CRAWLER_MAX_TABS')
+        env_min = os.getenv('CRAWLER_MIN_TABS')
+        env_tab_mb = os.getenv('CRAWLER_TAB_MEMORY_MB')
+        if max_tabs is None and env_max:
+            max_tabs = int(env_max)
+        if env_min:
+            kwargs.setdefault('min_tabs', int(env_min))
+        if env_tab_mb:
+            kwargs.setdefault('tab_memory_mb', float(env_tab_mb))
+        return cls(max_tabs=max_tabs, **kwargs)
+
+    def record(self, success: bool):
+        """上报一个任务的结果"""
+        with self.lock:
+            self.outcomes.append(bool(success))
+
+    def failure_rate(self) -> Optional[float]:
+        with self.lock:
+            if len(self.outcomes) < self.min_samples:
+                return None
+            return self.outcomes.count(False) / len(self.outcomes)
+
+    def maybe_adjust(self) -> int:
+        """按当前指标调整并发度，返回调整后的值；冷却时间内直接返回当前值"""
+        now = time.monotonic()
+        if now - self._last_change < self.adjust_interval:
+            return self.limit
+
+        failure = self.failure_rate()
+        cpu = cpu_percent()
+        available = available_memory_mb()
+        self._update_tab_memory()
+
+        target, reason = self.limit, None
+        if failure is not None and failure >= self.failure_high:
+            target = self.limit // 2
+            reason = f"失败率 {failure:.0%} ≥ {self.failure_high:.0%}"
+        elif cpu is not None and cpu >= self.cpu_high:
+            target = self.limit - 1
+            reason = f"CPU {cpu:.0f}% ≥ {self.cpu_high:.0f}%"
+        elif available is not None and available < self.reserve_memory_mb:
+            target = self.limit - 1
+            reason = f"可用内存 {available:.0f}MB < 保留 {self.reserve_memory_mb:.0f}MB"
+        elif (failure is not None and failure <= self.failure_low
+              and (cpu is None or cpu < self.cpu_low)
+              and (available is None or available - self.tab_memory_mb >= self.reserve_memory_mb)):
+            target = self.limit + 1
+            reason = (f"失败率 {failure:.0%}，CPU {_fmt_pct(cpu)}，可用内存 {_fmt_mb(available)}，"
+                      f"每标签页约 {self.tab_memory_mb:.0f}MB")
+
+        target = self._clamp(target)
+        if target != self.limit:
+            arrow = "⬆️" if target > self.limit else "⬇️"
+            logger.info(f"{arrow} 并发度 {self.limit} → {target}：{reason}")
+            self.limit = target
+            self.changes += 1
+            self._last_change = now
+            with self.lock:
+                # 新并发度下重新积累样本
+                self.outcomes.clear()
+        return self.limit
+
+    def status(self) -> str:
+        failure = self.failure_rate()
+        return (f"并发度 {self.limit}/{self.max_tabs} 失败率 "
+                f"{'-' if failure is None else f'{failure:.0%}'} 调整 {self.changes} 次")
+
+    # ---------- 内部实现 ----------
+
+    def _clamp(self, value: int) -> int:
+        return max(self.min_tabs, min(self.max_tabs, value))
+
+    def _update_tab_memory(self):
+        """用实测的浏览器总 RSS 修正每个标签页的内存估计"""
+        if self.memory_fn is None:
+            return
+        try:
+            total = self.memory_fn()
+        except Exception:
+            total = None
+        if total:
+            measured = total / max(self.limit, 1)
+            self.tab_memory_mb = 0.5 * self.tab_memory_mb + 0.5 * measured
+
+
+def _fmt_mb(value: Optional[float]) -> str:
+    return '未知' if value is None else f"{value:.0f}MB"
+
+
+def _fmt_pct(value: Optional[float]) -> str:
+    return '未知' if value is None else f"{value:.0f}%"
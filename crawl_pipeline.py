@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+抓取 → 解析 → 持久化 三段式流水线
+
+批量爬虫原来在每个标签页线程里依次完成导航、BeautifulSoup 解析和写文件，
+解析期间标签页处于空闲状态，而且解析会和其他标签页的 CDP 调用争抢 GIL。
+这里把三个阶段拆开，用有界队列连接：
+
+- 抓取：每个标签页一个线程，只负责导航并取回 HTML 和最终 URL
+- 解析：ProcessPoolExecutor 中运行 parse_movie_page 等解析函数，不占用主进程 GIL
+- 持久化：按数量或时间攒批，一次写入 JSONL 或 Postgres
+
+队列都是有界的，下游变慢时上游会阻塞（背压），内存占用不随任务数量增长。
+监控线程定期输出每个阶段的队列深度和计数。
+
+解析函数必须是模块级函数（可被 pickle），参数为 FetchedPage：
+返回 dict 表示最终结果，返回 None 表示页面不完整需要重新抓取。
+"""
+
+import json
+import time
+import queue
+import threading
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from loguru import logger
+
+_STOP = object()
+
+
+@dataclass
+class FetchedPage:
+    """抓取阶段的产出，会被发送到解析进程，只包含可 pickle 的数据"""
+    item: Any
+    html: str
+    final_url: str
+    attempt: int = 1
+    fetched_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class PipelineStats:
+    """流水线计数"""
+    submitted: int = 0
+    fetched: int = 0
+    fetch_errors: int = 0
+    parsed: int = 0
+    parse_errors: int = 0
+    retried: int = 0
+    failed: int = 0
+    persisted: int = 0
+    status_counts: Counter = field(default_factory=Counter)
+    started_at: float = field(default_factory=time.time)
+
+    def summary(self) -> str:
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        return (f"提交={self.submitted} 抓取={self.fetched} 解析={self.parsed} "
+                f"重试={self.retried} 失败={self.failed} 已保存={self.persisted} "
+                f"速度={self.persisted / elapsed * 60:.1f}部/分钟")
+
+
+class JsonlSink:
+    """把结果追加到 JSONL 文件，每批只打开一次文件"""
+
+    def __init__(self, output_file):
+        self.output_file = Path(output_file)
+
+    def write_batch(self, records: List[dict]):
+        with open(self.output_file, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records))
+
+    def close(self):
+        pass
+
+
+class PostgresSink:
+    """用 COPY + 集合合并把结果直接写入 movie_info / magnets
+
+    复用 jsonl_bulk_loader 的记录规范化和合并 SQL，每批一个事务。
+    """
+
+    def __init__(self, db_url, language='ja'):
+        from sqlalchemy import create_engine
+        import jsonl_bulk_loader
+
+        self._loader = jsonl_bulk_loader
+        self.language = language
+        self.engine = create_engine(db_url)
+        self.conn = self.engine.raw_connection()
+        cursor = self.conn.cursor()
+        cursor.execute(jsonl_bulk_loader.SETUP_SQL)
+        self.conn.commit()
+        self._line_no = 0
+
+    def write_batch(self, records: List[dict]):
+        rows = []
+        for record in records:
+            self._line_no += 1
+            normalized = self._loader.normalize_record(record, self.language)
+            if normalized:
+                rows.append((self._line_no, normalized))
+        if not rows:
+            return
+        try:
+            self._loader.merge_records(self.conn.cursor(), rows)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def close(self):
+        try:
+            self.conn.close()
+        finally:
+            self.engine.dispose()
+
+
+class CrawlPipeline:
+    """三段式爬取流水线
+
+    Args:
+        tabs: 标签页列表，每个标签页一个抓取线程
+        fetch_fn: fetch_fn(tab, item) -> (html, final_url)，在标签页线程中执行
+        parse_fn: parse_fn(FetchedPage) -> Optional[dict]，在解析进程中执行
+        sinks: 持久化目标，需实现 write_batch(records) 和 close()
+        failure_fn: failure_fn(item, error) -> dict，重试耗尽后生成失败占位记录，为 None 时丢弃
+        parse_workers: 解析进程数
+        max_retries: 每个任务最多抓取次数
+        input_queue_size / parse_queue_size / persist_queue_size: 各阶段队列容量
+        persist_batch_size / persist_interval: 攒批的数量和最长等待秒数
+        report_interval: 队列深度日志的输出间隔（秒）
+        concurrency: 可选的 AdaptiveConcurrency，序号超出当前并发度的标签页暂停抓取
+    """
+
+    def __init__(self, tabs: Sequence[Any],
+                 fetch_fn: Callable[[Any, Any], tuple],
+                 parse_fn: Callable[[FetchedPage], Optional[dict]],
+                 sinks: Sequence[Any],
+                 failure_fn: Optional[Callable[[Any, str], dict]] = None,
+                 parse_workers: int = 2,
+                 max_retries: int = 3,
+                 input_queue_size: Optional[int] = None,
+                 parse_queue_size: Optional[int] = None,
+                 persist_queue_size: int = 200,
+                 persist_batch_size: int = 50,
+                 persist_interval: float = 2.0,
+                 report_interval: float = 10.0,
+                 pool_initializer: Optional[Callable] = None,
+                 pool_initargs: tuple = (),
+                 concurrency: Optional[Any] = None):
+        if not tabs:
+            raise ValueError("至少需要一个标签页")
+        self.tabs = list(tabs)
+        self.fetch_fn = fetch_fn
+        self.parse_fn = parse_fn
+        self.sinks = list(sinks)
+        self.failure_fn = failure_fn
+        self.parse_workers = max(1, parse_workers)
+        self.max_retries = max(1, max_retries)
+        self.persist_batch_size = max(1, persist_batch_size)
+        self.persist_interval = persist_interval
+        self.report_interval = report_interval
+        self.pool_initializer = pool_initializer
+        self.pool_initargs = pool_initargs
+        self.concurrency = concurrency
+
+        self.input_queue = queue.Queue(maxsize=input_queue_size or len(self.tabs) * 2)
+        self.parse_queue = queue.Queue(maxsize=parse_queue_size or self.parse_workers * 2)
+        self.persist_queue = queue.Queue(maxsize=persist_queue_size)
+        # 重试任务优先于新任务，容量受在途任务数限制，不会无限增长
+        self.retry_queue = deque()
+
+        self.stats = PipelineStats()
+        self.lock = threading.Lock()
+        self._outstanding = 0
+        self._feeding_done = threading.Event()
+        self._stopped = threading.Event()
+        self._inflight_parse = 0
+        self._pool = None
+
+    # ---------- 公共接口 ----------
+
+    def run(self, items: Iterable[Any]) -> PipelineStats:
+        """处理全部任务，所有结果都持久化后返回"""
+        self.stats = PipelineStats()
+        self._pool = self._create_pool()
+
+        feeder = threading.Thread(target=self._feed, args=(items,), name="pipeline-feed", daemon=True)
+        fetchers = [
+            threading.Thread(target=self._fetch_worker, args=(i, tab), name=f"pipeline-fetch-{i+1}", daemon=True)
+            for i, tab in enumerate(self.tabs)
+        ]
+        dispatcher = threading.Thread(target=self._parse_dispatcher, name="pipeline-parse", daemon=True)
+        persister = threading.Thread(target=self._persist_worker, name="pipeline-persist", daemon=True)
+        monitor = threading.Thread(target=self._monitor, name="pipeline-monitor", daemon=True)
+
+        for t in [feeder, *fetchers, dispatcher, persister, monitor]:
+            t.start()
+
+        try:
+            feeder.join()
+            for t in fetchers:
+                t.join()
+            self.parse_queue.put(_STOP)
+            dispatcher.join()
+            self.persist_queue.put(_STOP)
+            persister.join()
+        finally:
+            self._stopped.set()
+            self._pool.shutdown(wait=True)
+            for sink in self.sinks:
+                try:
+                    sink.close()
+                except Exception as e:
+                    logger.warning(f"关闭持久化目标失败: {e}")
+
+        logger.info(f"📊 流水线完成: {self.stats.summary()}")
+        return self.stats
+
+    def queue_depths(self) -> Dict[str, int]:
+        """各阶段当前的队列深度"""
+        return {
+            'input': self.input_queue.qsize(),
+            'retry': len(self.retry_queue),
+            'parse': self.parse_queue.qsize(),
+            'parsing': self._inflight_parse,
+            'persist': self.persist_queue.qsize(),
+        }
+
+    # ---------- 各阶段 ----------
+
+    def _create_pool(self):
+        return ProcessPoolExecutor(max_workers=self.parse_workers,
+                                   initializer=self.pool_initializer,
+                                   initargs=self.pool_initargs)
+
+    def _feed(self, items):
+        try:
+            for item in items:
+                with self.lock:
+                    self._outstanding += 1
+                    self.stats.submitted += 1
+                self.input_queue.put(item)
+        finally:
+            self._feeding_done.set()
+
+    def _all_done(self):
+        with self.lock:
+            return self._feeding_done.is_set() and self._outstanding == 0
+
+    def _next_item(self):
+        """取下一个任务，返回 (item, attempt)；没有剩余任务时返回 None"""
+        while True:
+            try:
+                return self.retry_queue.popleft()
+            except IndexError:
+                pass
+            try:
+                return self.input_queue.get(timeout=0.5), 1
+            except queue.Empty:
+                if self._all_done():
+                    return None
+
+    def _fetch_worker(self, index, tab):
+        parked = False
+        while True:
+            if self.concurrency is not None and index >= self.concurrency.limit:
+                # 超出当前并发度，暂停抓取
+                if not parked:
+                    parked = True
+                    park = getattr(tab, 'park', None)
+                    if callable(park):
+                        try:
+                            park()
+                        except Exception:
+                            pass
+                if self._all_done():
+                    return
+                time.sleep(1.0)
+                continue
+            parked = False
+
+            task = self._next_item()
+            if task is None:
+                return
+            item, attempt = task
+            try:
+                html, final_url = self.fetch_fn(tab, item)
+            except Exception as e:
+                with self.lock:
+                    self.stats.fetch_errors += 1
+                logger.warning(f"⚠️ [标签页{index+1}] 抓取失败 (第{attempt}次): {item} - {e}")
+                self._record(False)
+                self._retry_or_fail(item, attempt, str(e))
+                continue
+            with self.lock:
+                self.stats.fetched += 1
+            self.parse_queue.put(FetchedPage(item=item, html=html or '', final_url=final_url or '', attempt=attempt))
+
+    def _parse_dispatcher(self):
+        pending = {}
+        upstream_done = False
+        max_inflight = self.parse_workers * 2
+        while True:
+            while not upstream_done and len(pending) < max_inflight:
+                try:
+                    page = self.parse_queue.get(timeout=0.1 if pending else 0.5)
+                except queue.Empty:
+                    break
+                if page is _STOP:
+                    upstream_done = True
+                    break
+                pending[self._submit_parse(page)] = page
+            self._inflight_parse = len(pending)
+
+            if not pending:
+                if upstream_done:
+                    return
+                continue
+
+            done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in done:
+                page = pending.pop(future)
+                self._handle_parsed(future, page)
+            self._inflight_parse = len(pending)
+
+    def _submit_parse(self, page):
+        try:
+            return self._pool.submit(self.parse_fn, page)
+        except BrokenProcessPool:
+            logger.error("💥 解析进程池已损坏，重新创建")
+            self._pool.shutdown(wait=False)
+            self._pool = self._create_pool()
+            return self._pool.submit(self.parse_fn, page)
+
+    def _handle_parsed(self, future, page):
+        try:
+            result = future.result()
+        except Exception as e:
+            with self.lock:
+                self.stats.parse_errors += 1
+            logger.error(f"❌ 解析出错: {page.item} - {e}")
+            self._retry_or_fail(page.item, page.attempt, f"parse error: {e}")
+            return
+
+        with self.lock:
+            self.stats.parsed += 1
+        self._record(result is not None)
+        if result is None:
+            self._retry_or_fail(page.item, page.attempt, "incomplete page")
+        else:
+            self._finish(result)
+
+    def _record(self, success):
+        if self.concurrency is not None:
+            self.concurrency.record(success)
+
+    def _retry_or_fail(self, item, attempt, error):
+        if attempt < self.max_retries:
+            with self.lock:
+                self.stats.retried += 1
+            self.retry_queue.append((item, attempt + 1))
+            return
+        with self.lock:
+            self.stats.failed += 1
+        logger.error(f"💀 {self.max_retries}次尝试均失败: {item} - {error}")
+        if self.failure_fn is not None:
+            self._finish(self.failure_fn(item, error))
+        else:
+            self._done_one()
+
+    def _finish(self, record):
+        self.persist_queue.put(record)
+        self._done_one()
+
+    def _done_one(self):
+        with self.lock:
+            self._outstanding -= 1
+
+    def _persist_worker(self):
+        batch = []
+        deadline = time.time() + self.persist_interval
+        while True:
+            timeout = max(0.0, deadline - time.time())
+            try:
+                record = self.persist_queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+
+            if record is _STOP:
+                self._flush(batch)
+                return
+            if record is not None:
+                batch.append(record)
+            if len(batch) >= self.persist_batch_size or time.time() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = time.time() + self.persist_interval
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        for sink in self.sinks:
+            try:
+                sink.write_batch(batch)
+            except Exception as e:
+                logger.error(f"❌ 持久化失败 ({type(sink).__name__}, {len(batch)}条): {e}")
+        with self.lock:
+            self.stats.persisted += len(batch)
+            self.stats.status_counts.update(r.get('status', 'unknown') for r in batch)
+
+    def _monitor(self):
+        while not self._stopped.wait(self.report_interval):
+            if self.concurrency is not None:
+                self.concurrency.maybe_adjust()
+            depths = self.queue_depths()
+            logger.info(
+                f"📈 队列深度 输入={depths['input']}/{self.input_queue.maxsize} 重试={depths['retry']} "
+                f"待解析={depths['parse']}/{self.parse_queue.maxsize} 解析中={depths['parsing']} "
+                f"待保存={depths['persist']}/{self.persist_queue.maxsize} | {self.stats.summary()}"
+                + (f" | {self.concurrency.status()}" if self.concurrency is not None else "")
+            )
+
@@ -17,6 +17,8 @@ import threading
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from bs4 import BeautifulSoup
+from crawl_pipeline import CrawlPipeline, JsonlSink
+from concurrency_controller import AdaptiveConcurrency
 
 # 添加src路径以导入测试模块
 src_path = Path(__file__).parent / "src"
@@ -32,8 +34,10 @@ except ImportError:
 class DatabaseParallelCrawler:
     """数据库并行爬虫"""
     
-    def __init__(self, max_tabs=5, batch_size=5):
-        self.max_tabs = max_tabs
+    def __init__(self, max_tabs=None, batch_size=5):
+        # max_tabs 为 None 时按主机CPU和内存估算上限，流水线模式下按资源和失败率调整实际并发度
+        self.concurrency = AdaptiveConcurrency.from_env(max_tabs=max_tabs)
+        self.max_tabs = self.concurrency.max_tabs
         self.batch_size = batch_size
         self.browser = None
         self.tabs = []
@@ -150,7 +154,8 @@ class DatabaseParallelCrawler:
         logger.info(f"🎯 成功创建 {len(self.tabs)} 个标签页")
         return len(self.tabs)
     
-    def extract_movie_info_from_html(self, html, movie_id, movie_code, url):
+    @staticmethod
+    def extract_movie_info_from_html(html, movie_id, movie_code, url):
         """使用parse_movie_page方法提取电影信息"""
         try:
             if HAS_DRISSION_CRAWLER:
@@ -223,28 +228,9 @@ class DatabaseParallelCrawler:
                 logger.info(f"📍 [标签页{tab_index+1}] 尝试 {attempt+1}/{self.max_retries}: ID={movie_id}, {movie_code}")
 
                 # 访问页面
-                tab.get(movie_url)
-
-                # 快速检查加载状态
-                for check in range(3):
-                    time.sleep(1)
-                    html = tab.html
-                    html_length = len(html) if html else 0
-
-                    if html_length > 50000:
-                        logger.info(f"✅ [标签页{tab_index+1}] ID={movie_id} 页面已加载 ({html_length} 字符)")
-                        break
-
-                # 快速滚动
-                try:
-                    tab.scroll(500)
-                    time.sleep(0.3)
-                    tab.scroll(0)
-                except:
-                    pass
+                html, _ = fetch_movie_page(tab, movie_data)
 
                 # 提取信息
-                html = tab.html
                 if html and len(html) > 10000:
                     movie_info = self.extract_movie_info_from_html(html, movie_id, movie_code, movie_url)
 
@@ -384,6 +370,94 @@ class DatabaseParallelCrawler:
         logger.info(f"平均速度: {total_time/len(movies):.1f} 秒/部")
         logger.info(f"输出文件: {self.output_file}")
 
+    def run_pipeline_crawl(self, limit=None, parse_workers=2):
+        """流水线模式运行：标签页只负责抓取，解析在进程池中进行，结果攒批写入JSONL"""
+        logger.info("🚀 开始数据库流水线爬取")
+
+        start_id = self.get_last_processed_id()
+        movies = self.get_movies_from_database(start_id, limit)
+        if not movies:
+            logger.info("📭 没有找到待处理的电影")
+            return
+
+        if self.create_browser_with_tabs() == 0:
+            logger.error("❌ 无法创建标签页")
+            return
+
+        pipeline = CrawlPipeline(
+            tabs=self.tabs,
+            fetch_fn=fetch_movie_page,
+            parse_fn=parse_fetched_page,
+            sinks=[JsonlSink(self.output_file)],
+            parse_workers=parse_workers,
+            max_retries=self.max_retries,
+            concurrency=self.concurrency,
+        )
+
+        try:
+            stats = pipeline.run(movies)
+        finally:
+            if self.browser:
+                try:
+                    self.browser.quit()
+                    logger.info("🔒 浏览器已关闭")
+                except:
+                    pass
+
+        total_time = time.time() - stats.started_at
+        logger.info(f"\n{'='*50}")
+        logger.info("📊 数据库爬取完成")
+        logger.info(f"总数: {len(movies)}")
+        logger.info(f"成功: {stats.persisted}")
+        logger.info(f"失败: {stats.failed}")
+        logger.info(f"成功率: {stats.persisted/len(movies)*100:.1f}%")
+        logger.info(f"总时间: {total_time/60:.1f} 分钟")
+        logger.info(f"平均速度: {total_time/len(movies):.1f} 秒/部")
+        logger.info(f"输出文件: {self.output_file}")
+
+
+def fetch_movie_page(tab, movie_data):
+    """在标签页中打开电影页面，等待加载并快速滚动，返回 (html, 最终URL)"""
+    movie_id, movie_url = movie_data
+    tab.get(movie_url)
+
+    # 快速检查加载状态
+    for check in range(3):
+        time.sleep(1)
+        html = tab.html
+        html_length = len(html) if html else 0
+
+        if html_length > 50000:
+            logger.info(f"✅ ID={movie_id} 页面已加载 ({html_length} 字符)")
+            break
+
+    # 快速滚动
+    try:
+        tab.scroll(500)
+        time.sleep(0.3)
+        tab.scroll(0)
+    except:
+        pass
+
+    return tab.html, tab.url
+
+
+def parse_fetched_page(page):
+    """流水线解析阶段，在解析进程中执行；页面不完整时返回None以便重新抓取"""
+    movie_id, movie_url = page.item
+    if not page.html or len(page.html) <= 10000:
+        logger.warning(f"⚠️ ID={movie_id}: 页面内容不足，尝试重试")
+        return None
+
+    movie_code = movie_url.split('/')[-1] if '/' in movie_url else "unknown"
+    movie_info = DatabaseParallelCrawler.extract_movie_info_from_html(page.html, movie_id, movie_code, movie_url)
+    if movie_info and movie_info.get('title') and movie_info.get('title') != "未知标题":
+        return movie_info
+
+    logger.warning(f"⚠️ ID={movie_id}: 信息提取不完整，尝试重试")
+    return None
+
+
 def main():
     """主函数"""
     
@@ -407,6 +481,9 @@ def main():
     else:
         logger.info("📊 将处理所有待处理电影")
     
+    # 流水线模式：抓取、解析、保存分阶段并行
+    use_pipeline = input("\n⚙️ 使用流水线模式（进程池解析）? [y/N]: ").strip().lower() == 'y'
+
     # 确认开始
     start = input(f"\n🚀 开始数据库爬取? [y/n]: ").lower()
     if start != 'y':
@@ -414,8 +491,11 @@ def main():
         return
     
     # 创建爬虫并开始
-    crawler = DatabaseParallelCrawler(max_tabs=5, batch_size=5)
-    crawler.run_database_crawl(limit=limit)
+    crawler = DatabaseParallelCrawler(batch_size=5)
+    if use_pipeline:
+        crawler.run_pipeline_crawl(limit=limit)
+    else:
+        crawler.run_database_crawl(limit=limit)
 
 if __name__ == "__main__":
     main()
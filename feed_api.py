@@ -12,6 +12,8 @@ from pydantic import BaseModel
 from feed_service import FeedService
 from loguru import logger
 import traceback
+import base64
+import json
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
@@ -63,6 +65,25 @@ class MoviesListResponse(BaseModel):
     limit: int
     offset: int
     movies: List[MovieResponse]
+    next_cursor: Optional[str] = None
+
+def encode_cursor(original_id: int, code: str) -> str:
+    """把 (original_id, code) 编码成不透明的游标"""
+    raw = json.dumps([original_id, code], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """解析游标，格式不正确时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        original_id, code = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        return int(original_id), str(code)
+    except Exception as e:
+        raise ValueError(f"无效的游标: {cursor}") from e
+
+def movie_sort_key(movie: Dict[str, Any]) -> tuple:
+    """游标分页的排序键：original_id 倒序（新的在前），code 作为第二关键字"""
+    return (movie.get('original_id') or 0, movie.get('code') or '')
 
 @app.get("/", summary="健康检查", description="检查API服务状态")
 async def health_check():
@@ -104,16 +125,31 @@ async def process_feed_movies(request: ProcessFeedRequest):
 @app.get("/api/feed/movies", response_model=MoviesListResponse, summary="获取电影列表", description="分页获取所有电影数据")
 async def get_movies(
     limit: int = Query(50, ge=1, le=1000, description="每页数量，1-1000之间"),
-    offset: int = Query(0, ge=0, description="偏移量，从0开始")
+    offset: int = Query(0, ge=0, description="偏移量，从0开始（兼容旧客户端，建议使用cursor）"),
+    cursor: Optional[str] = Query(None, description="游标分页：第一页传空字符串，之后传上一页返回的next_cursor")
 ):
     """获取所有电影"""
     try:
         # 获取所有电影
         all_movies = feed_service.get_all_movies()
         total = len(all_movies)
+        next_cursor = None
         
-        # 分页处理
-        movies_slice = all_movies[offset:offset + limit]
+        if cursor is not None:
+            # 游标分页：按 (original_id, code) 倒序，新抓取的电影不会让后续页面漂移
+            try:
+                last_key = decode_cursor(cursor) if cursor else None
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"参数错误: {e}")
+            ordered = sorted(all_movies, key=movie_sort_key, reverse=True)
+            if last_key is not None:
+                ordered = [m for m in ordered if movie_sort_key(m) < last_key]
+            movies_slice = ordered[:limit]
+            if len(ordered) > limit:
+                next_cursor = encode_cursor(*movie_sort_key(movies_slice[-1]))
+        else:
+            # 分页处理
+            movies_slice = all_movies[offset:offset + limit]
         
         # 转换为响应格式
         movies_data = []
@@ -137,9 +173,12 @@ async def get_movies(
             count=len(movies_data),
             limit=limit,
             offset=offset,
-            movies=movies_data
+            movies=movies_data,
+            next_cursor=next_cursor
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"获取电影列表时出错: {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取失败: {str(e)}")
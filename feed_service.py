@@ -11,11 +11,15 @@ import logging
 from typing import List, Set, Optional, Dict, Any
 from dataclasses import dataclass, field
 from datetime import datetime
-import requests
 from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 import json
 import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "src"))
+from common.utils.http_clients import http_clients
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -221,13 +225,14 @@ class FeedService:
             logger.warning("CloudflareLoginService不可用，将仅使用Playwright登录服务")
             self.cloudflare_login_service = None
         
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36'
-        })
+        # 共享 "feed" 配置的连接池，cookie 按请求放在请求头中
+        self.session = http_clients.session("feed")
         
         # 模拟数据库存储
         self.movies_db: List[Movie] = []
+        # 已入库电影的索引（原始ID、规范化代码），插入时同步更新，避免逐条线性查找
+        self._movies_by_original_id: Dict[int, Movie] = {}
+        self._known_codes: Set[str] = set()
         
         # 记录使用的cookie类型
         if self.manual_cookie:
@@ -539,8 +544,13 @@ class FeedService:
         if not movies:
             return 0
         
+        # 先按索引批量过滤掉已入库的电影
+        new_movies = [movie for movie in movies if not self.is_known_movie(movie)]
+        if len(new_movies) < len(movies):
+            logger.info(f"索引过滤掉 {len(movies) - len(new_movies)} 个已存在的电影")
+        
         saved_count = 0
-        for movie in movies:
+        for movie in new_movies:
             try:
                 # 模拟事务保证persist()在一个事务中执行
                 # 即使这个方法失败，也只会回滚这一个电影的事务
@@ -557,13 +567,13 @@ class FeedService:
         """保存单个电影 - 模拟数据库操作"""
         try:
             # 检查是否已存在
-            existing = next((m for m in self.movies_db if m.original_id == movie.original_id), None)
-            if existing:
+            if self.is_known_movie(movie):
                 logger.info(f"电影 {movie.code} 已存在，跳过")
                 return False
             
             # 添加到模拟数据库
             self.movies_db.append(movie)
+            self._index_movie(movie)
             logger.info(f"成功保存电影: {movie.code} - {movie.title}")
             return True
             
@@ -576,9 +586,27 @@ class FeedService:
         if not movie_ids:
             return 0
         
-        existing_count = sum(1 for movie in self.movies_db if movie.original_id in movie_ids)
+        existing_count = sum(1 for movie_id in movie_ids if movie_id in self._movies_by_original_id)
         return existing_count
     
+    @staticmethod
+    def _normalize_code(code: Optional[str]) -> Optional[str]:
+        return code.strip().upper() if code and code.strip() else None
+    
+    def is_known_movie(self, movie: Movie) -> bool:
+        """按原始ID或规范化代码判断电影是否已入库"""
+        if movie.original_id and movie.original_id in self._movies_by_original_id:
+            return True
+        code = self._normalize_code(movie.code)
+        return bool(code and code in self._known_codes)
+    
+    def _index_movie(self, movie: Movie):
+        if movie.original_id:
+            self._movies_by_original_id[movie.original_id] = movie
+        code = self._normalize_code(movie.code)
+        if code:
+            self._known_codes.add(code)
+    
     def extract_movie_from_element(self, html_content: str) -> List[Movie]:
         """从HTML元素提取电影信息"""
         movies = []
@@ -738,7 +766,7 @@ class FeedService:
     
     def get_movie_by_id(self, original_id: int) -> Optional[Dict[str, Any]]:
         """根据ID获取电影"""
-        movie = next((m for m in self.movies_db if m.original_id == original_id), None)
+        movie = self._movies_by_original_id.get(original_id)
         return movie.to_dict() if movie else None
 
 # 全局服务实例
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+JSONL 批量导入工具
+把批量爬虫（simple_database_crawler.py / database_parallel_crawler.py /
+linux_crawler.py / DirectMovieCrawler）输出的 JSONL 结果导入 Postgres。
+
+流程：
+1. 按块流式读取 JSONL，校验并规范化每条记录
+2. 用 COPY 写入临时暂存表（每行一个 jsonb）
+3. 用集合操作合并到 movie_info（INSERT ... ON CONFLICT (code, language)）和 magnets
+4. 在同一个事务里记录文件的字节偏移，中断后从上次提交的位置继续
+
+多个文件并行导入，每个文件一个进程。
+"""
+
+import os
+import io
+import re
+import csv
+import sys
+import json
+import uuid
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from loguru import logger
+from sqlalchemy import create_engine
+
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+SETUP_SQL = """
+CREATE TABLE IF NOT EXISTS bulk_load_progress (
+    file_path TEXT PRIMARY KEY,
+    byte_offset BIGINT NOT NULL DEFAULT 0,
+    lines_loaded BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+-- 按 code+language 合并依赖唯一索引；多个导入进程同时启动时用事务级咨询锁串行创建
+SELECT pg_advisory_xact_lock(hashtext('movie_info_code_language'));
+CREATE UNIQUE INDEX IF NOT EXISTS ux_movie_info_code_language ON movie_info (code, language);
+CREATE TEMP TABLE IF NOT EXISTS movie_info_staging (
+    line_no BIGINT NOT NULL,
+    payload JSONB NOT NULL
+) ON COMMIT DELETE ROWS;
+"""
+
+# 同一块中同一个 code+language 只保留最后一行
+MERGE_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS movie_info_src ON COMMIT DROP AS
+SELECT DISTINCT ON (payload->>'code', payload->>'language')
+    payload->>'code' AS code,
+    payload->>'language' AS language,
+    (payload->>'movie_uuid')::uuid AS movie_uuid,
+    NULLIF(payload->>'movie_id', '')::int AS movie_id,
+    payload->>'title' AS title,
+    payload->>'description' AS description,
+    ARRAY(SELECT jsonb_array_elements_text(payload->'tags')) AS tags,
+    ARRAY(SELECT jsonb_array_elements_text(payload->'genres')) AS genres,
+    payload->>'director' AS director,
+    payload->>'maker' AS maker,
+    ARRAY(SELECT jsonb_array_elements_text(payload->'actresses')) AS actresses,
+    (payload->>'release_date')::date AS release_date,
+    (payload->>'duration')::int AS duration,
+    payload->>'cover_url' AS cover_url,
+    payload->>'series' AS series,
+    payload->>'label' AS label,
+    ARRAY(SELECT jsonb_array_elements_text(payload->'m3u8_info')) AS m3u8_info,
+    payload->'magnets' AS magnets
+FROM movie_info_staging
+ORDER BY payload->>'code', payload->>'language', line_no DESC;
+
+-- 与其他导入进程或爬虫同时写入同一部电影时由唯一索引保证只有一行；
+-- 时间统一写 UTC，与 ORM 的 datetime.utcnow() 一致（movie_link_normalizer 按 updated_at 扫描）
+INSERT INTO movie_info (
+    code, movie_uuid, language, title, description, tags, genres, director, maker,
+    actresses, release_date, duration, cover_url, series, label, m3u8_info,
+    source, created_at, updated_at
+)
+SELECT
+    src.code, src.movie_uuid, src.language, src.title, src.description, src.tags, src.genres,
+    src.director, src.maker, src.actresses, src.release_date, src.duration, src.cover_url,
+    src.series, src.label, src.m3u8_info, 'missav', now() AT TIME ZONE 'UTC', now() AT TIME ZONE 'UTC'
+FROM movie_info_src src
+ON CONFLICT (code, language) DO UPDATE SET
+    title = EXCLUDED.title,
+    description = EXCLUDED.description,
+    tags = EXCLUDED.tags,
+    genres = EXCLUDED.genres,
+    director = EXCLUDED.director,
+    maker = EXCLUDED.maker,
+    actresses = EXCLUDED.actresses,
+    release_date = EXCLUDED.release_date,
+    duration = EXCLUDED.duration,
+    cover_url = EXCLUDED.cover_url,
+    series = EXCLUDED.series,
+    label = EXCLUDED.label,
+    m3u8_info = CASE WHEN cardinality(EXCLUDED.m3u8_info) > 0 THEN EXCLUDED.m3u8_info ELSE movie_info.m3u8_info END,
+    updated_at = EXCLUDED.updated_at;
+
+INSERT INTO magnets (movie_id, url, name, size, created_date)
+SELECT DISTINCT ON (m.id, mg->>'url')
+    m.id, mg->>'url', mg->>'title', mg->>'size', CAST(NULLIF(mg->>'date', '') AS date)
+FROM movie_info_src src
+JOIN movies m ON m.id = COALESCE(src.movie_id, (SELECT id FROM movies WHERE code = src.code LIMIT 1))
+CROSS JOIN LATERAL jsonb_array_elements(src.magnets) AS mg
+WHERE COALESCE(mg->>'url', '') <> ''
+ON CONFLICT (movie_id, url) DO UPDATE SET name = EXCLUDED.name, size = EXCLUDED.size;
+"""
+
+SAVE_PROGRESS_SQL = """
+INSERT INTO bulk_load_progress (file_path, byte_offset, lines_loaded, updated_at)
+VALUES (%s, %s, %s, now())
+ON CONFLICT (file_path) DO UPDATE SET
+    byte_offset = EXCLUDED.byte_offset,
+    lines_loaded = bulk_load_progress.lines_loaded + EXCLUDED.lines_loaded,
+    updated_at = now()
+"""
+
+
+def setup_logging():
+    """配置日志
+
+    只在命令行运行时调用，被 crawl_pipeline 等模块导入时沿用调用方的日志配置。
+    """
+    logger.remove()
+    logger.add(
+        "src/logs/bulk_loader.log",
+        rotation="10 MB",
+        retention=5,
+        level="INFO",
+        format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{line} - {message}",
+        enqueue=True,
+        encoding="utf-8"
+    )
+    logger.add(
+        sys.stderr,
+        level="INFO",
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+    )
+
+
+def get_db_url():
+    """获取数据库连接URL"""
+    db_host = os.getenv('DB_HOST', 'localhost')
+    db_port = os.getenv('DB_PORT', '5432')
+    db_name = os.getenv('DB_NAME', 'movie_crawler')
+    db_user = os.getenv('DB_USER', 'postgres')
+    db_password = os.getenv('DB_PASSWORD', '123456')
+
+    return f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+
+
+def _text_list(value):
+    if not isinstance(value, list):
+        return []
+    return [str(v).strip() for v in value if v is not None and str(v).strip()]
+
+
+def normalize_record(record, language='ja'):
+    """校验并规范化一条爬虫结果，无效记录（404占位、无标题、无代码）返回None"""
+    if not isinstance(record, dict):
+        return None
+    if record.get('status') == '404' or record.get('title') in (None, '', 'NOT_FOUND'):
+        return None
+
+    # simple_database_crawler 的 id 是 movies.id，DirectMovieCrawler 的 id 是电影代码
+    record_id = record.get('id')
+    movie_id = record_id if isinstance(record_id, int) else None
+    code = record.get('code') or (record_id if isinstance(record_id, str) else None)
+    if not code and record.get('url'):
+        code = record['url'].rstrip('/').split('/')[-1]
+    if not code:
+        return None
+    code = code.split('/')[-1].strip()
+
+    release_date = str(record.get('release_date') or '').strip()
+    duration = record.get('duration_seconds')
+
+    magnets = []
+    for magnet in record.get('magnets') or []:
+        if not isinstance(magnet, dict) or not magnet.get('url'):
+            continue
+        date = str(magnet.get('date') or '').strip()
+        magnets.append({
+            'url': magnet['url'],
+            'title': magnet.get('title') or '',
+            'size': magnet.get('size') or '',
+            'date': date if DATE_PATTERN.match(date) else '',
+        })
+
+    return {
+        'code': code,
+        'language': record.get('language') or language,
+        'movie_uuid': str(uuid.uuid4()),
+        'movie_id': movie_id,
+        'title': str(record['title']).strip(),
+        'description': record.get('description') or '',
+        'tags': _text_list(record.get('tags')),
+        'genres': _text_list(record.get('genres')),
+        'director': record.get('director') or '',
+        'maker': record.get('studio') or record.get('maker') or '',
+        'actresses': _text_list(record.get('actresses')),
+        'release_date': release_date if DATE_PATTERN.match(release_date) else None,
+        'duration': duration if isinstance(duration, int) else None,
+        'cover_url': record.get('cover_url') or '',
+        'series': record.get('series') or '',
+        'label': record.get('label') or '',
+        'm3u8_info': _text_list(record.get('m3u8_urls') or record.get('m3u8_links')),
+        'magnets': magnets,
+    }
+
+
+def read_chunks(file_path, start_offset, chunk_size, language):
+    """从指定字节偏移开始按块读取JSONL
+
+    Yields:
+        (规范化后的记录列表[(行号, 记录)], 本块读取的行数, 本块结束后的字节偏移)
+    末尾不完整的一行（文件仍在写入）不会被消费。
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(start_offset)
+        offset = start_offset
+        records, lines = [], 0
+        while True:
+            raw = f.readline()
+            if not raw or not raw.endswith(b'\n'):
+                break
+            offset += len(raw)
+            lines += 1
+            line = raw.decode('utf-8', errors='replace').strip()
+            if line:
+                try:
+                    normalized = normalize_record(json.loads(line), language)
+                    if normalized:
+                        records.append((lines, normalized))
+                except json.JSONDecodeError:
+                    logger.warning(f"跳过无法解析的行: {file_path} @ {offset - len(raw)}")
+            if lines >= chunk_size:
+                yield records, lines, offset
+                records, lines = [], 0
+        if lines:
+            yield records, lines, offset
+
+
+def merge_records(cursor, records):
+    """把一块规范化后的记录 COPY 到暂存表并合并到 movie_info / magnets，由调用方提交事务
+
+    Args:
+        cursor: psycopg2 游标，所在连接已执行过 SETUP_SQL
+        records: [(行号, 规范化记录)]，同一 code+language 以行号最大的为准
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for line_no, record in records:
+        writer.writerow([line_no, json.dumps(record, ensure_ascii=False)])
+    buffer.seek(0)
+    cursor.copy_expert("COPY movie_info_staging (line_no, payload) FROM STDIN WITH (FORMAT csv)", buffer)
+    cursor.execute(MERGE_SQL)
+
+
+def load_file(file_path, db_url, chunk_size=5000, language='ja'):
+    """导入单个JSONL文件，返回本次导入的有效记录数"""
+    file_path = str(Path(file_path).resolve())
+    engine = create_engine(db_url)
+    conn = engine.raw_connection()
+    loaded = 0
+    try:
+        cursor = conn.cursor()
+        cursor.execute(SETUP_SQL)
+        cursor.execute("SELECT byte_offset FROM bulk_load_progress WHERE file_path = %s", (file_path,))
+        row = cursor.fetchone()
+        start_offset = row[0] if row else 0
+        conn.commit()
+
+        if start_offset:
+            logger.info(f"📍 {file_path} 从偏移 {start_offset} 继续导入")
+
+        for records, lines, offset in read_chunks(file_path, start_offset, chunk_size, language):
+            if records:
+                merge_records(cursor, records)
+            cursor.execute(SAVE_PROGRESS_SQL, (file_path, offset, lines))
+            conn.commit()
+            loaded += len(records)
+            logger.info(f"✅ {Path(file_path).name}: 已提交 {lines} 行（有效 {len(records)}），偏移 {offset}")
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"❌ 导入 {file_path} 失败: {e}")
+        raise
+    finally:
+        conn.close()
+        engine.dispose()
+    return loaded
+
+
+def load_files(file_paths, db_url, workers=4, chunk_size=5000, language='ja'):
+    """并行导入多个文件，每个文件一个进程"""
+    total = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(file_paths)))) as executor:
+        futures = {
+            executor.submit(load_file, path, db_url, chunk_size, language): path
+            for path in file_paths
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                count = future.result()
+                total += count
+                logger.info(f"🎉 {path} 导入完成: {count} 条")
+            except Exception as e:
+                logger.error(f"❌ {path} 导入失败，可重新运行从断点继续: {e}")
+    return total
+
+
+def main():
+    setup_logging()
+    parser = argparse.ArgumentParser(description='JSONL爬虫结果批量导入')
+    parser.add_argument('files', nargs='+', help='JSONL文件路径')
+    parser.add_argument('--workers', type=int, default=4, help='并行导入的文件数')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='每个事务导入的行数')
+    parser.add_argument('--language', default='ja', choices=['ja', 'en', 'zh'], help='记录中没有语言字段时使用的语言')
+
+    args = parser.parse_args()
+
+    files = [f for f in args.files if Path(f).is_file()]
+    missing = set(args.files) - set(files)
+    for f in missing:
+        logger.warning(f"⚠️ 文件不存在: {f}")
+
+    total = load_files(files, get_db_url(), workers=args.workers,
+                       chunk_size=args.chunk_size, language=args.language)
+    logger.info(f"📊 全部完成，共导入 {total} 条有效记录")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,20 @@ import os
 import sys
 import time
 import json
-import random
 import argparse
+import threading
+from functools import partial
 from pathlib import Path
 from loguru import logger
 from DrissionPage import ChromiumPage, ChromiumOptions
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
+from crawl_pipeline import CrawlPipeline, JsonlSink
+from tab_scheduler import TabScheduler
+from tab_lifecycle import TabLifecycleManager
+from concurrency_controller import AdaptiveConcurrency
+from page_status import NotFoundCache, open_movie_page
+from url_resolution import UrlResolutionCache
 
 # 配置日志
 logger.remove()
@@ -36,9 +43,11 @@ logger.add(
 class LinuxMovieCrawler:
     """Linux服务器版电影爬虫"""
     
-    def __init__(self, headless=True, max_workers=3):
+    def __init__(self, headless=True, max_workers=None):
         self.headless = headless
-        self.max_workers = max_workers
+        # max_workers 为 None 时按主机CPU和内存估算上限，运行中按资源和失败率调整实际并发度
+        self.concurrency = AdaptiveConcurrency.from_env(max_tabs=max_workers)
+        self.max_workers = self.concurrency.max_tabs
         self.output_file = "crawl_results.jsonl"
         
         # 数据库配置
@@ -46,9 +55,15 @@ class LinuxMovieCrawler:
         self.engine = create_engine(self.db_url)
         self.Session = sessionmaker(bind=self.engine)
         
+        # 已确认不存在的代码（TTL 由 NOT_FOUND_TTL_DAYS 控制），不再占用标签页
+        self.not_found_cache = NotFoundCache(self.engine)
+        # 原始代码 → 最终地址，重复爬取时直接打开最终地址
+        self.url_cache = UrlResolutionCache(self.engine)
+        
         # 浏览器配置
         self.browser = None
         self.tabs = []
+        self.lifecycle = None
         
         logger.info("🚀 Linux电影爬虫初始化完成")
     
@@ -63,8 +78,8 @@ class LinuxMovieCrawler:
         
         return f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
     
-    def setup_browser(self):
-        """设置浏览器"""
+    def launch_browser(self):
+        """创建浏览器并建立会话（标签页生命周期管理器重启浏览器时也会调用）"""
         options = ChromiumOptions()
         
         if self.headless:
@@ -79,32 +94,45 @@ class LinuxMovieCrawler:
         options.set_argument('--window-size=1920,1080')
         options.set_argument('--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
         
+        browser = ChromiumPage(addr_or_opts=options)
+        logger.info("✅ 浏览器创建成功")
+        
+        # 建立会话
+        browser.get("https://missav.ai/")
+        time.sleep(3)
+        return browser
+
+    def setup_browser(self):
+        """设置浏览器
+
+        标签页交给 TabLifecycleManager 管理：按导航次数和内存回收标签页，
+        浏览器总内存超出预算时带着cookie重启，保证长时间运行时内存不持续增长。
+        self.tabs 中保存的是 TabSlot，需要通过 self.lifecycle.wrap/use 取出标签页。
+        """
         try:
-            self.browser = ChromiumPage(addr_or_opts=options)
-            logger.info("✅ 浏览器创建成功")
-            
-            # 建立会话
-            self.browser.get("https://missav.ai/")
-            time.sleep(3)
-            
-            # 创建多个标签页
-            self.tabs = [self.browser]
-            for i in range(self.max_workers - 1):
-                try:
-                    new_tab = self.browser.new_tab()
-                    self.tabs.append(new_tab)
-                    logger.info(f"✅ 创建标签页 {i+2}/{self.max_workers}")
-                    time.sleep(1)
-                except Exception as e:
-                    logger.warning(f"⚠️ 创建标签页失败: {e}")
-                    break
-            
-            logger.info(f"🎯 成功创建 {len(self.tabs)} 个标签页")
+            self.lifecycle = TabLifecycleManager(
+                self.launch_browser,
+                tab_count=self.max_workers,
+                max_navigations=int(os.getenv('TAB_MAX_NAVIGATIONS', '200')),
+                max_tab_heap_mb=float(os.getenv('TAB_MAX_HEAP_MB', '512')),
+                max_total_rss_mb=float(os.getenv('BROWSER_MAX_RSS_MB', '4096')),
+                restart_drain_timeout=float(os.getenv('BROWSER_RESTART_DRAIN_SECONDS', '60')),
+            )
+            self.tabs = self.lifecycle.start()
+            self.browser = self.lifecycle.browser
+            self.concurrency.memory_fn = self.lifecycle.total_rss_mb
             return True
             
         except Exception as e:
             logger.error(f"❌ 浏览器创建失败: {e}")
             return False
+
+    def close_browser(self):
+        """关闭浏览器（包括重启后的新实例）"""
+        if self.lifecycle:
+            self.lifecycle.stop()
+            self.lifecycle = None
+        self.browser = None
     
     def get_movies_from_db(self, limit=None, offset_id=None):
         """从数据库获取电影列表"""
@@ -148,7 +176,8 @@ class LinuxMovieCrawler:
         finally:
             session.close()
     
-    def extract_movie_info(self, html, movie_id, movie_code, url):
+    @staticmethod
+    def extract_movie_info(html, movie_id, movie_code, url):
         """提取电影信息（简化版）"""
         try:
             import re
@@ -215,33 +244,13 @@ class LinuxMovieCrawler:
         try:
             logger.info(f"📍 开始爬取: ID={movie_id}, {movie_code}")
             
-            # 访问页面
-            tab.get(movie_url)
-            
-            # 等待加载
-            for check in range(5):
-                time.sleep(1)
-                html = tab.html
-                current_url = tab.url
-                
-                if html and len(html) > 50000:
-                    logger.info(f"✅ 页面已加载: ID={movie_id} ({len(html)} 字符)")
-                    break
-                elif check == 4:
-                    logger.warning(f"⏳ 页面加载超时: ID={movie_id}")
-            
-            # 检查重定向
-            final_movie_code = movie_code
-            if current_url != movie_url:
-                try:
-                    final_movie_code = current_url.split('/')[-1]
-                    logger.info(f"🔄 重定向: {movie_code} → {final_movie_code}")
-                except:
-                    pass
+            # 访问页面并等待加载
+            html, current_url = fetch_movie_page(tab, (movie_id, movie_url, movie_code),
+                                                 self.not_found_cache, self.url_cache)
             
             # 提取信息
             if html and len(html) > 10000:
-                movie_info = self.extract_movie_info(html, movie_id, final_movie_code, current_url)
+                movie_info = process_page(html, current_url, (movie_id, movie_url, movie_code))
                 
                 if movie_info:
                     # 保存到JSONL
@@ -259,43 +268,50 @@ class LinuxMovieCrawler:
             return 'exception', f"{movie_code}: {str(e)}"
     
     def run_batch(self, movies):
-        """批量处理电影"""
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        
+        """批量处理电影
+
+        标签页共享一个队列，做完一个立刻取下一个；movies 可以是惰性迭代器。
+        单部电影超时会重新分配给其他标签页，不阻塞其他标签页。
+        """
         results = {
             'success': 0,
             'partial_success': 0,
             'failed': 0,
-            'total': len(movies)
+            'total': 0
         }
-        
-        with ThreadPoolExecutor(max_workers=len(self.tabs)) as executor:
-            # 提交任务
-            futures = []
-            for i, (movie_id, movie_url, movie_code) in enumerate(movies):
-                tab = self.tabs[i % len(self.tabs)]
-                future = executor.submit(self.crawl_movie, tab, movie_id, movie_url, movie_code)
-                futures.append((future, movie_id, movie_code))
-            
-            # 收集结果
-            for future, movie_id, movie_code in futures:
-                try:
-                    status, message = future.result(timeout=60)
-                    
-                    if status in ['success_with_m3u8']:
-                        results['success'] += 1
-                        logger.info(f"✅ ID={movie_id}: {message}")
-                    elif status in ['partial_success_magnet_only']:
-                        results['partial_success'] += 1
-                        logger.info(f"⚠️ ID={movie_id}: {message}")
-                    else:
-                        results['failed'] += 1
-                        logger.warning(f"🚫 ID={movie_id}: {message}")
-                        
-                except Exception as e:
+        lock = threading.Lock()
+
+        def record(movie_data, outcome):
+            movie_id = movie_data[0]
+            status, message = outcome
+            with lock:
+                results['total'] += 1
+                if status in ['success_with_m3u8']:
+                    results['success'] += 1
+                    logger.info(f"✅ ID={movie_id}: {message}")
+                elif status in ['partial_success_magnet_only']:
+                    results['partial_success'] += 1
+                    logger.info(f"⚠️ ID={movie_id}: {message}")
+                else:
                     results['failed'] += 1
-                    logger.error(f"💥 ID={movie_id}: 处理异常: {e}")
-        
+                    logger.warning(f"🚫 ID={movie_id}: {message}")
+
+        def record_failure(movie_data, error):
+            logger.error(f"💥 ID={movie_data[0]}: 处理异常: {error}")
+            record(movie_data, ('exception', error))
+
+        scheduler = TabScheduler(
+            tabs=self.tabs,
+            work_fn=self.lifecycle.wrap(lambda tab, movie_data: self.crawl_movie(tab, *movie_data)),
+            on_result=record,
+            on_failure=record_failure,
+            item_timeout=120,
+            max_attempts=2,
+            pause_range=(0.5, 1.5),
+            concurrency=self.concurrency,
+            success_fn=lambda outcome: outcome[0] not in ('exception', 'extraction_failed', '404_or_empty'),
+        )
+        scheduler.run(movies)
         return results
     
     def run(self, batch_size=10, max_movies=None):
@@ -308,42 +324,8 @@ class LinuxMovieCrawler:
             last_id = self.get_last_processed_id()
             logger.info(f"📍 从ID {last_id} 开始处理")
             
-            total_results = {
-                'success': 0,
-                'partial_success': 0,
-                'failed': 0,
-                'total': 0
-            }
-            
-            processed = 0
-            while True:
-                # 获取一批电影
-                movies = self.get_movies_from_db(limit=batch_size, offset_id=last_id)
-                
-                if not movies:
-                    logger.info("📊 没有更多电影需要处理")
-                    break
-                
-                # 处理这批电影
-                logger.info(f"🎬 处理批次: {len(movies)} 部电影")
-                batch_results = self.run_batch(movies)
-                
-                # 累计结果
-                for key in total_results:
-                    total_results[key] += batch_results[key]
-                
-                processed += len(movies)
-                last_id = movies[-1][0]  # 更新最后处理的ID
-                
-                logger.info(f"📊 批次完成: 成功={batch_results['success']}, 部分成功={batch_results['partial_success']}, 失败={batch_results['failed']}")
-                
-                # 检查是否达到最大处理数量
-                if max_movies and processed >= max_movies:
-                    logger.info(f"📊 达到最大处理数量: {max_movies}")
-                    break
-                
-                # 批次间隔
-                time.sleep(random.uniform(5, 10))
+            # 按批次从数据库读取，但所有标签页连续处理，不在批次之间等待
+            total_results = self.run_batch(self.iter_movies(batch_size, max_movies, last_id))
             
             # 输出最终统计
             logger.info("=" * 50)
@@ -352,6 +334,7 @@ class LinuxMovieCrawler:
             logger.info(f"✅ 成功: {total_results['success']}")
             logger.info(f"⚠️ 部分成功: {total_results['partial_success']}")
             logger.info(f"🚫 失败: {total_results['failed']}")
+            logger.info(f"⏭️ 跳过已知404: {self.not_found_cache.skipped}")
             
             if total_results['total'] > 0:
                 success_rate = (total_results['success'] + total_results['partial_success']) / total_results['total'] * 100
@@ -360,32 +343,146 @@ class LinuxMovieCrawler:
             return True
             
         finally:
-            if self.browser:
-                self.browser.quit()
-                logger.info("🔒 浏览器已关闭")
-    
+            self.close_browser()
+
+    def iter_movies(self, batch_size=100, max_movies=None, start_id=None):
+        """按ID顺序分页读取待处理电影，供流水线模式按需消费；跳过404缓存中的电影"""
+        self.not_found_cache.load()
+        self.url_cache.load()
+        produced = 0
+        for movie in self.not_found_cache.skip_dead(self._iter_db_movies(batch_size, start_id),
+                                                    lambda m: m[2]):
+            yield movie
+            produced += 1
+            if max_movies and produced >= max_movies:
+                return
+
+    def _iter_db_movies(self, batch_size, start_id):
+        last_id = start_id
+        while True:
+            movies = self.get_movies_from_db(limit=batch_size, offset_id=last_id)
+            if not movies:
+                return
+            yield from movies
+            last_id = movies[-1][0]
+
+    def run_pipeline(self, batch_size=100, max_movies=None, parse_workers=2):
+        """流水线模式运行：标签页只负责抓取，解析在进程池中进行，结果攒批写入JSONL"""
+        if not self.setup_browser():
+            return False
+
+        try:
+            last_id = self.get_last_processed_id()
+            logger.info(f"📍 从ID {last_id} 开始处理（流水线模式，解析进程: {parse_workers}）")
+
+            pipeline = CrawlPipeline(
+                tabs=self.tabs,
+                fetch_fn=self.lifecycle.wrap(partial(fetch_movie_page, not_found_cache=self.not_found_cache,
+                                                     url_cache=self.url_cache)),
+                parse_fn=parse_fetched_page,
+                sinks=[JsonlSink(self.output_file)],
+                parse_workers=parse_workers,
+                max_retries=1,
+                input_queue_size=batch_size,
+                concurrency=self.concurrency,
+            )
+            stats = pipeline.run(self.iter_movies(batch_size, max_movies, last_id))
+
+            counts = stats.status_counts
+            logger.info("=" * 50)
+            logger.info("📊 爬取完成")
+            logger.info(f"总数: {stats.submitted}")
+            logger.info(f"✅ 成功: {counts.get('success_with_m3u8', 0)}")
+            logger.info(f"⚠️ 部分成功: {counts.get('partial_success_magnet_only', 0)}")
+            logger.info(f"🚫 失败: {stats.submitted - counts.get('success_with_m3u8', 0) - counts.get('partial_success_magnet_only', 0)}")
+            logger.info(f"⏭️ 跳过已知404: {self.not_found_cache.skipped}")
+            return True
+
+        finally:
+            self.close_browser()
+
     def get_last_processed_id(self):
-        """获取最后处理的ID"""
+        """获取最后处理的ID
+
+        流水线模式下结果按完成顺序写入，取文件中最大的ID而不是最后一行。
+        """
         try:
+            last_id = 0
             if os.path.exists(self.output_file):
                 with open(self.output_file, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    if lines:
-                        last_line = lines[-1].strip()
-                        if last_line:
-                            data = json.loads(last_line)
-                            return data.get('id', 0)
-            return 0
+                    for line in f:
+                        line = line.strip()
+                        if line:
+                            data = json.loads(line)
+                            if isinstance(data.get('id'), int):
+                                last_id = max(last_id, data['id'])
+            return last_id
         except:
             return 0
 
+
+def fetch_movie_page(tab, movie_data, not_found_cache=None, url_cache=None):
+    """在标签页中打开电影页面并等待加载，返回 (html, 最终URL)
+
+    主文档返回404或被重定向到首页时立即返回空HTML，不再等待渲染。
+    """
+    movie_id, movie_url, movie_code = movie_data
+    if not_found_cache and not_found_cache.is_dead(movie_code):
+        return '', movie_url
+
+    nav = open_movie_page(tab, movie_url, movie_code, not_found_cache, url_cache)
+    if nav.dead:
+        logger.info(f"🚫 ID={movie_id} {nav.reason}，跳过渲染")
+        return '', nav.final_url
+
+    html, current_url = None, movie_url
+    for check in range(5):
+        time.sleep(1)
+        html = tab.html
+        current_url = tab.url
+
+        if html and len(html) > 50000:
+            logger.info(f"✅ 页面已加载: ID={movie_id} ({len(html)} 字符)")
+            break
+        elif check == 4:
+            logger.warning(f"⏳ 页面加载超时: ID={movie_id}")
+
+    return html, current_url
+
+
+def process_page(html, current_url, movie_data):
+    """处理重定向并提取电影信息"""
+    movie_id, movie_url, movie_code = movie_data
+
+    # 检查重定向
+    final_movie_code = movie_code
+    if current_url != movie_url:
+        try:
+            final_movie_code = current_url.split('/')[-1]
+            logger.info(f"🔄 重定向: {movie_code} → {final_movie_code}")
+        except:
+            pass
+
+    return LinuxMovieCrawler.extract_movie_info(html, movie_id, final_movie_code, current_url)
+
+
+def parse_fetched_page(page):
+    """流水线解析阶段，在解析进程中执行；页面内容不足时返回None"""
+    if not page.html or len(page.html) <= 10000:
+        logger.warning(f"🚫 ID={page.item[0]}: 页面内容不足")
+        return None
+    return process_page(page.html, page.final_url, page.item)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Linux电影爬虫')
     parser.add_argument('--headless', action='store_true', default=True, help='无头模式')
-    parser.add_argument('--workers', type=int, default=3, help='并发数')
+    parser.add_argument('--workers', type=int, default=None, help='最大并发数（默认按CPU和内存自动估算，运行中自适应调整）')
     parser.add_argument('--batch-size', type=int, default=10, help='批次大小')
     parser.add_argument('--max-movies', type=int, help='最大处理数量')
     parser.add_argument('--daemon', action='store_true', help='守护进程模式')
+    parser.add_argument('--pipeline', action='store_true', help='流水线模式（抓取/解析/保存分阶段并行）')
+    parser.add_argument('--parse-workers', type=int, default=2, help='流水线模式的解析进程数')
     
     args = parser.parse_args()
     
@@ -403,12 +500,18 @@ def main():
         max_workers=args.workers
     )
     
+    def run_once():
+        if args.pipeline:
+            return crawler.run_pipeline(batch_size=args.batch_size, max_movies=args.max_movies,
+                                        parse_workers=args.parse_workers)
+        return crawler.run(batch_size=args.batch_size, max_movies=args.max_movies)
+
     if args.daemon:
         # 守护进程模式 - 持续运行
         while True:
             try:
                 logger.info("🔄 开始新一轮爬取...")
-                crawler.run(batch_size=args.batch_size, max_movies=args.max_movies)
+                run_once()
                 logger.info("😴 等待下一轮...")
                 time.sleep(3600)  # 等待1小时
             except KeyboardInterrupt:
@@ -419,7 +522,7 @@ def main():
                 time.sleep(300)  # 等待5分钟后重试
     else:
         # 单次运行模式
-        crawler.run(batch_size=args.batch_size, max_movies=args.max_movies)
+        run_once()
 
 if __name__ == "__main__":
     main()
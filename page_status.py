@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+主文档 HTTP 状态检测与 404 负缓存
+
+原来的 404 检测（SimpleDatabaseCrawler.check_404_or_not_found）要等页面完全渲染、
+再解析 HTML 才能判断，已知不存在的电影每次运行都要重新占用一个标签页。
+
+- open_with_status: 导航时通过 CDP 网络事件拿到主文档的 HTTP 状态码和最终 URL，
+  404/410 或被重定向到首页时立即停止加载，不再等待渲染
+- NotFoundCache: 把确认不存在的代码持久化到 movie_not_found 表，
+  TTL 内直接跳过，过期后重新验证一次（页面恢复时自动移出缓存）
+
+只按 HTTP 层面的证据写入缓存；按页面内容判断的 404 曾有误判（见 test_404_movies.py），不写入。
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, NamedTuple, Optional
+from urllib.parse import urlparse
+from loguru import logger
+from sqlalchemy import text
+
+# 视为页面不存在的主文档状态码
+DEAD_STATUSES = (404, 410)
+
+
+class NavigationResult(NamedTuple):
+    status: Optional[int]  # 主文档 HTTP 状态码，拿不到时为 None
+    final_url: str
+    dead: bool
+    reason: str = ''
+
+
+def is_home_url(url: str) -> bool:
+    """URL 是否为首页（只有语言前缀或没有路径），电影不存在时站点会重定向到这里"""
+    parts = [p for p in urlparse(url or '').path.split('/') if p]
+    return len(parts) <= 1
+
+
+def open_with_status(tab, url: str, timeout: float = 15.0) -> NavigationResult:
+    """打开页面并读取主文档的 HTTP 状态
+
+    页面不存在时立即停止加载并返回 dead=True；否则等待文档加载完成后返回，
+    之后可以照常读取 tab.html。当前 DrissionPage 版本不支持监听时退回普通导航。
+    """
+    try:
+        tab.listen.start(res_type='Document')
+    except Exception as e:
+        logger.debug(f"无法监听主文档响应，使用普通导航: {e}")
+        tab.get(url)
+        return NavigationResult(None, tab.url, False)
+
+    packet = None
+    try:
+        # 不等待页面加载，拿到主文档响应头就返回
+        tab.set.load_mode.none()
+        tab.get(url)
+        packet = tab.listen.wait(timeout=timeout)
+    finally:
+        try:
+            tab.listen.stop()
+        except Exception:
+            pass
+        tab.set.load_mode.normal()
+
+    if not packet:
+        # 没等到响应（例如 Cloudflare 验证中），按原来的方式等待加载
+        tab.wait.doc_loaded(timeout=timeout)
+        return NavigationResult(None, tab.url, False)
+
+    status = packet.response.status
+    final_url = packet.url or tab.url
+    reason = ''
+    if status in DEAD_STATUSES:
+        reason = f"HTTP {status}"
+    elif is_home_url(final_url) and not is_home_url(url):
+        reason = f"重定向到首页 {final_url}"
+
+    if reason:
+        tab.stop_loading()
+        return NavigationResult(status, final_url, True, reason)
+
+    tab.wait.doc_loaded(timeout=timeout)
+    return NavigationResult(status, final_url, False)
+
+
+def open_movie_page(tab, movie_url: str, movie_code: str,
+                    not_found_cache: Optional['NotFoundCache'] = None,
+                    url_cache=None) -> NavigationResult:
+    """打开电影页面：先查 URL 解析缓存直接打开最终地址，再按主文档状态更新404缓存
+
+    缓存的地址失效时删除缓存并按原始地址重新打开一次。
+    url_cache 为 url_resolution.UrlResolutionCache。
+    """
+    target_url = url_cache.resolve(movie_code, movie_url) if url_cache else movie_url
+    nav = open_with_status(tab, target_url)
+    if nav.dead and target_url != movie_url:
+        logger.info(f"🧭 {movie_code} 缓存的地址已失效（{nav.reason}），按原始地址重试")
+        url_cache.forget(movie_code)
+        nav = open_with_status(tab, movie_url)
+
+    if not_found_cache:
+        not_found_cache.record(movie_code, nav)
+    if url_cache and not nav.dead:
+        url_cache.record(movie_code, movie_url, nav.final_url)
+    return nav
+
+
+class NotFoundCache:
+    """已确认不存在的电影代码（负缓存），持久化在 movie_not_found 表
+
+    Args:
+        engine: SQLAlchemy 同步引擎
+        ttl_days: 缓存有效期（天），过期的代码会被重新验证，默认读取 NOT_FOUND_TTL_DAYS（7）
+    """
+
+    # 与 schema.sql 中的定义保持一致
+    SETUP_SQL = [
+        """
+        CREATE TABLE IF NOT EXISTS movie_not_found (
+            code VARCHAR(100) PRIMARY KEY,
+            http_status INTEGER,
+            final_url TEXT,
+            hits INTEGER NOT NULL DEFAULT 1,
+            first_seen_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            checked_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]
+
+    def __init__(self, engine, ttl_days: Optional[float] = None):
+        self.engine = engine
+        if ttl_days is None:
+            ttl_days = float(os.getenv('NOT_FOUND_TTL_DAYS', '7'))
+        self.ttl_seconds = ttl_days * 86400
+        self.lock = threading.Lock()
+        self.checked_at: Dict[str, float] = {}
+        self.skipped = 0
+
+    def load(self) -> int:
+        """建表并加载缓存，返回仍在有效期内的代码数量；数据库不可用时缓存为空"""
+        try:
+            with self.engine.begin() as conn:
+                for statement in self.SETUP_SQL:
+                    conn.execute(text(statement))
+                rows = conn.execute(text(
+                    "SELECT code, EXTRACT(EPOCH FROM checked_at) FROM movie_not_found"
+                )).fetchall()
+        except Exception as e:
+            logger.warning(f"加载404缓存失败，本次不跳过已知404: {e}")
+            return 0
+
+        with self.lock:
+            self.checked_at = {code: float(ts) for code, ts in rows}
+        fresh = sum(1 for code in self.checked_at if self.is_dead(code))
+        logger.info(f"🚫 404缓存: {fresh} 个有效，{len(self.checked_at) - fresh} 个待重新验证")
+        return fresh
+
+    def is_dead(self, code: str) -> bool:
+        with self.lock:
+            checked_at = self.checked_at.get(code)
+        return checked_at is not None and time.time() - checked_at < self.ttl_seconds
+
+    def skip_dead(self, items: Iterable[Any], code_fn: Callable[[Any], str],
+                  on_skip: Optional[Callable[[Any], None]] = None) -> Iterator[Any]:
+        """过滤掉缓存中的代码，items 可以是惰性迭代器"""
+        for item in items:
+            if self.is_dead(code_fn(item)):
+                self.skipped += 1
+                if on_skip:
+                    on_skip(item)
+                continue
+            yield item
+
+    def mark_dead(self, code: str, result: NavigationResult):
+        with self.lock:
+            self.checked_at[code] = time.time()
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text("""
+                    INSERT INTO movie_not_found (code, http_status, final_url)
+                    VALUES (:code, :status, :final_url)
+                    ON CONFLICT (code) DO UPDATE
+                    SET http_status = EXCLUDED.http_status,
+                        final_url = EXCLUDED.final_url,
+                        hits = movie_not_found.hits + 1,
+                        checked_at = CURRENT_TIMESTAMP
+                """), {"code": code, "status": result.status, "final_url": result.final_url})
+        except Exception as e:
+            logger.warning(f"写入404缓存失败: {code}: {e}")
+
+    def mark_alive(self, code: str):
+        """重新验证时页面已恢复，移出缓存"""
+        with self.lock:
+            if self.checked_at.pop(code, None) is None:
+                return
+        logger.info(f"♻️ {code} 已恢复，移出404缓存")
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text("DELETE FROM movie_not_found WHERE code = :code"), {"code": code})
+        except Exception as e:
+            logger.warning(f"删除404缓存失败: {code}: {e}")
+
+    def record(self, code: str, result: NavigationResult):
+        """按导航结果更新缓存；没有拿到状态码时不做判断"""
+        if result.dead:
+            self.mark_dead(code, result)
+        elif result.status is not None and result.status < 400:
+            self.mark_alive(code)
@@ -5,56 +5,57 @@
 """
 
 import time
-import random
 import json
 import asyncio
 from pathlib import Path
 from loguru import logger
 from DrissionPage import ChromiumPage, ChromiumOptions
-from concurrent.futures import ThreadPoolExecutor
 import threading
+from tab_scheduler import TabScheduler
+from tab_lifecycle import TabLifecycleManager
+from concurrency_controller import AdaptiveConcurrency
 
 class ParallelTabsCrawler:
     """并行标签页爬虫"""
     
-    def __init__(self, max_tabs=5):
-        self.max_tabs = max_tabs
+    def __init__(self, max_tabs=None):
+        # max_tabs 为 None 时按主机CPU和内存估算上限，运行中按资源和失败率调整实际并发度
+        self.concurrency = AdaptiveConcurrency.from_env(max_tabs=max_tabs)
+        self.max_tabs = self.concurrency.max_tabs
         self.browser = None
         self.tabs = []
+        self.lifecycle = None
         self.results = []
         self.failed_movies = []
         self.lock = threading.Lock()
         
-    def create_browser_with_tabs(self):
-        """创建浏览器并打开多个标签页"""
-        logger.info(f"🚀 创建浏览器并准备 {self.max_tabs} 个标签页")
-        
-        # 创建浏览器
+    def launch_browser(self):
+        """启动浏览器并建立会话（标签页生命周期管理器重启浏览器时也会调用）"""
         options = ChromiumOptions()
         options.headless(False)  # 显示浏览器便于观察
         options.set_argument('--window-size=1920,1080')
         options.set_argument('--disable-blink-features=AutomationControlled')
         
-        self.browser = ChromiumPage(addr_or_opts=options)
+        browser = ChromiumPage(addr_or_opts=options)
         
         # 首先访问主页建立会话
         logger.info("📱 建立会话...")
-        self.browser.get("https://missav.ai/")
+        browser.get("https://missav.ai/")
         time.sleep(2)
+        return browser
+
+    def create_browser_with_tabs(self):
+        """创建浏览器并打开多个标签页
+
+        标签页按导航次数和内存自动回收，浏览器总内存超出预算时带着cookie重启，
+        self.tabs 中保存的是 TabSlot。
+        """
+        logger.info(f"🚀 创建浏览器并准备 {self.max_tabs} 个标签页")
         
-        # 创建多个标签页
-        self.tabs = [self.browser]  # 第一个标签页就是主页面
-        
-        for i in range(self.max_tabs - 1):
-            try:
-                new_tab = self.browser.new_tab()
-                self.tabs.append(new_tab)
-                logger.info(f"✅ 创建标签页 {i+2}/{self.max_tabs}")
-                time.sleep(0.5)  # 短暂延迟避免创建过快
-            except Exception as e:
-                logger.warning(f"创建标签页 {i+2} 失败: {e}")
-        
-        logger.info(f"🎯 成功创建 {len(self.tabs)} 个标签页")
+        self.lifecycle = TabLifecycleManager(self.launch_browser, tab_count=self.max_tabs)
+        self.tabs = self.lifecycle.start()
+        self.browser = self.lifecycle.browser
+        self.concurrency.memory_fn = self.lifecycle.total_rss_mb
         return len(self.tabs)
     
     def extract_movie_info_from_tab(self, tab, movie_code):
@@ -107,8 +108,11 @@ class ParallelTabsCrawler:
             return None
     
     def crawl_movie_in_tab(self, tab_index, movie_code):
-        """在指定标签页中爬取电影"""
-        tab = self.tabs[tab_index]
+        """在指定标签页中爬取电影，返回电影信息，失败返回None
+
+        需要在 self.lifecycle.use(slot) 内调用，标签页可能已被回收替换。
+        """
+        tab = self.tabs[tab_index].tab
         url = f"https://missav.ai/ja/{movie_code}"
         
         try:
@@ -136,45 +140,55 @@ class ParallelTabsCrawler:
             
             # 提取信息
             movie_info = self.extract_movie_info_from_tab(tab, movie_code)
-            
-            # 线程安全地保存结果
-            with self.lock:
-                if movie_info:
-                    self.results.append(movie_info)
-                    logger.info(f"✅ [标签页{tab_index+1}] {movie_code}: {movie_info.get('title', '未知')[:30]}...")
-                    return True
-                else:
-                    self.failed_movies.append(movie_code)
-                    logger.error(f"❌ [标签页{tab_index+1}] {movie_code}: 信息提取失败")
-                    return False
+            if not movie_info:
+                logger.error(f"❌ [标签页{tab_index+1}] {movie_code}: 信息提取失败")
+            return movie_info
                     
         except Exception as e:
             logger.error(f"❌ [标签页{tab_index+1}] {movie_code}: {e}")
-            with self.lock:
-                self.failed_movies.append(movie_code)
-            return False
+            return None
     
-    def parallel_crawl_batch(self, movie_codes):
-        """并行爬取一批电影"""
+    def parallel_crawl_batch(self, movie_codes, on_progress=None):
+        """并行爬取电影
+
+        所有标签页共享一个队列，做完一个立刻取下一个；
+        单部电影超过截止时间会重新分配给其他标签页，不阻塞整体进度。
+
+        Args:
+            movie_codes: 电影代码列表
+            on_progress: on_progress(已处理数量)，每处理完一部调用一次
+        """
         logger.info(f"🚀 并行处理 {len(movie_codes)} 部电影")
-        
-        # 使用线程池并行处理
-        with ThreadPoolExecutor(max_workers=len(self.tabs)) as executor:
-            futures = []
-            
-            for i, movie_code in enumerate(movie_codes):
-                tab_index = i % len(self.tabs)  # 循环使用标签页
-                future = executor.submit(self.crawl_movie_in_tab, tab_index, movie_code)
-                futures.append((future, movie_code, tab_index))
-            
-            # 等待所有任务完成
-            for future, movie_code, tab_index in futures:
-                try:
-                    success = future.result(timeout=30)  # 30秒超时
-                except Exception as e:
-                    logger.error(f"❌ [标签页{tab_index+1}] {movie_code} 超时或出错: {e}")
-                    with self.lock:
-                        self.failed_movies.append(movie_code)
+
+        def record(movie_code, movie_info):
+            with self.lock:
+                if movie_info:
+                    self.results.append(movie_info)
+                    logger.info(f"✅ {movie_code}: {movie_info.get('title', '未知')[:30]}...")
+                else:
+                    self.failed_movies.append(movie_code)
+                if on_progress:
+                    on_progress(len(self.results) + len(self.failed_movies))
+
+        def record_failure(movie_code, error):
+            logger.error(f"❌ {movie_code} 超时或出错: {error}")
+            record(movie_code, None)
+
+        def work(slot, movie_code):
+            with self.lifecycle.use(slot):
+                return self.crawl_movie_in_tab(slot.index, movie_code)
+
+        scheduler = TabScheduler(
+            tabs=self.tabs,
+            work_fn=work,
+            on_result=record,
+            on_failure=record_failure,
+            item_timeout=60,
+            max_attempts=2,
+            pause_range=(2, 5),
+            concurrency=self.concurrency,
+        )
+        return scheduler.run(movie_codes)
     
     def batch_crawl(self, movie_codes, batch_size=None):
         """批量并行爬取"""
@@ -182,52 +196,31 @@ class ParallelTabsCrawler:
             batch_size = self.max_tabs
         
         logger.info(f"🚀 开始并行批量爬取 {len(movie_codes)} 部电影")
-        logger.info(f"📊 使用 {len(self.tabs)} 个标签页，每批处理 {batch_size} 部")
+        logger.info(f"📊 使用 {len(self.tabs)} 个标签页，每处理 {batch_size} 部保存一次")
         
         start_time = time.time()
         
+        def on_progress(processed):
+            # 每处理完 batch_size 部保存一次中间结果并显示进度
+            if processed % batch_size and processed != len(movie_codes):
+                return
+            self.save_results()
+            elapsed = time.time() - start_time
+            avg_time = elapsed / processed
+            remaining = (len(movie_codes) - processed) * avg_time
+            logger.info(f"📊 进度: {processed}/{len(movie_codes)}, "
+                      f"平均 {avg_time:.1f}秒/部, 预计剩余 {remaining/60:.1f}分钟")
+
         try:
-            # 分批处理
-            for i in range(0, len(movie_codes), batch_size):
-                batch = movie_codes[i:i + batch_size]
-                batch_num = i // batch_size + 1
-                total_batches = (len(movie_codes) + batch_size - 1) // batch_size
-                
-                logger.info(f"\n🎬 批次 {batch_num}/{total_batches}: {len(batch)} 部电影")
-                logger.info(f"📋 {', '.join(batch)}")
-                
-                # 并行处理这一批
-                self.parallel_crawl_batch(batch)
-                
-                # 批次间短暂休息
-                if i + batch_size < len(movie_codes):
-                    rest_time = random.uniform(2, 5)
-                    logger.info(f"😴 批次间休息 {rest_time:.1f} 秒...")
-                    time.sleep(rest_time)
-                
-                # 保存中间结果
-                self.save_results()
-                
-                # 显示进度
-                elapsed = time.time() - start_time
-                processed = min(i + batch_size, len(movie_codes))
-                avg_time = elapsed / processed
-                remaining = (len(movie_codes) - processed) * avg_time
-                
-                logger.info(f"📊 进度: {processed}/{len(movie_codes)}, "
-                          f"平均 {avg_time:.1f}秒/部, 预计剩余 {remaining/60:.1f}分钟")
+            self.parallel_crawl_batch(movie_codes, on_progress=on_progress)
         
         finally:
             # 最终保存
             self.save_results()
             
-            # 关闭浏览器
-            if self.browser:
-                try:
-                    self.browser.quit()
-                    logger.info("🔒 浏览器已关闭")
-                except:
-                    pass
+            # 关闭浏览器（包括重启后的新实例）
+            if self.lifecycle:
+                self.lifecycle.stop()
         
         # 输出统计
         total_time = time.time() - start_time
@@ -273,7 +266,7 @@ def main():
     logger.info("🚀 并行标签页爬虫")
     logger.info(f"📋 准备爬取 {len(test_movies)} 部电影")
     logger.info("⚡ 使用 5 个标签页并行处理")
-    logger.info(f"🕐 预计总时间: ~{len(test_movies)*2/60:.1f} 分钟 (比单线程快5倍)")
+    logger.info(f"🕐 预计总时间: ~{len(test_movies)*2/60:.1f} 分钟 (多标签页并行)")
     
     # 询问是否开始
     start = input(f"\n🚀 开始并行爬取 {len(test_movies)} 部电影? [y/n]: ").lower()
@@ -282,7 +275,7 @@ def main():
         return
     
     # 创建爬虫
-    crawler = ParallelTabsCrawler(max_tabs=5)
+    crawler = ParallelTabsCrawler()
     
     # 创建标签页
     actual_tabs = crawler.create_browser_with_tabs()
@@ -18,8 +18,11 @@ import ssl
 import requests
 import warnings
 from urllib.error import HTTPError, URLError
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "src"))
+from common.utils.http_clients import http_clients
 
 # 禁用 SSL 警告
 requests.packages.urllib3.disable_warnings()
@@ -188,18 +191,8 @@ class M3U8ProxyHandler(http.server.BaseHTTPRequestHandler):
             if referer:
                 headers['Referer'] = referer
             
-            # 创建会话并配置 SSL
-            session = requests.Session()
-            
-            # 配置重试策略
-            retry_strategy = Retry(
-                total=3,
-                backoff_factor=1,
-                status_forcelist=[429, 500, 502, 503, 504],
-            )
-            adapter = HTTPAdapter(max_retries=retry_strategy)
-            session.mount("http://", adapter)
-            session.mount("https://", adapter)
+            # 共享 "media" 配置的连接池（带重试，不验证证书）
+            session = http_clients.session("media")
             
             # 发送请求（禁用 SSL 验证，增加更多选项）
             response = session.get(
@@ -181,6 +181,39 @@ CREATE TABLE IF NOT EXISTS video_progress (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- 创建详情爬取重试队列表（waiting: 等待下次尝试, due: 已到期待领取, dead: 死信）
+CREATE TABLE IF NOT EXISTS movie_detail_retries (
+    code VARCHAR(50) PRIMARY KEY,
+    movie_id INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error_class VARCHAR(30),
+    last_error TEXT,
+    status VARCHAR(20) NOT NULL DEFAULT 'waiting',
+    next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_movie_detail_retries_due ON movie_detail_retries(status, next_attempt_at);
+
+-- 创建404负缓存表（主文档返回404/410或被重定向到首页的代码，过期后重新验证）
+CREATE TABLE IF NOT EXISTS movie_not_found (
+    code VARCHAR(100) PRIMARY KEY,
+    http_status INTEGER,
+    final_url TEXT,
+    hits INTEGER NOT NULL DEFAULT 1,
+    first_seen_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    checked_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 创建URL解析缓存表（原始代码 → 重定向或列表页链接中的最终地址）
+CREATE TABLE IF NOT EXISTS movie_url_resolutions (
+    code VARCHAR(100) PRIMARY KEY,
+    canonical_url TEXT NOT NULL,
+    variants TEXT[] DEFAULT ARRAY[]::TEXT[],
+    source VARCHAR(20) NOT NULL DEFAULT 'redirect',
+    resolved_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- 注意：video_resources 表不存在，因此移除相关触发器
 -- CREATE TRIGGER update_video_resources_timestamp
 --     BEFORE UPDATE ON video_resources
@@ -193,6 +226,22 @@ CREATE TRIGGER update_video_progress_timestamp
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
+-- 插入新电影时通知详情爬取任务（LISTEN movie_inserted），同一事务内的通知会被合并
+CREATE OR REPLACE FUNCTION notify_movie_inserted() RETURNS trigger AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM inserted_movies WHERE status = 'new') THEN
+        PERFORM pg_notify('movie_inserted', '');
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER movies_notify_inserted
+    AFTER INSERT ON movies
+    REFERENCING NEW TABLE AS inserted_movies
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_movie_inserted();
+
 -- 创建爬虫相关索引
 -- 注意：video_resources 和 genre_pages 表不存在，因此移除相关索引
 -- CREATE INDEX idx_video_resources_code ON video_resources(code);
@@ -203,6 +252,7 @@ CREATE INDEX idx_video_progress_status ON video_progress(status);
 
 -- 创建索引
 CREATE INDEX idx_movies_code ON movies(code);
+CREATE INDEX IF NOT EXISTS idx_movies_original_id ON movies(original_id);
 CREATE INDEX idx_movies_release_date ON movies(release_date);
 CREATE INDEX idx_movie_titles_language ON movie_titles(language);
 CREATE INDEX idx_movie_titles_movie_id ON movie_titles(movie_id);
@@ -210,6 +260,9 @@ CREATE INDEX idx_actress_names_language ON actress_names(language);
 CREATE INDEX idx_actress_names_actress_id ON actress_names(actress_id);
 CREATE INDEX idx_genre_names_language ON genre_names(language);
 CREATE INDEX idx_genre_names_genre_id ON genre_names(genre_id);
+-- 名称字典缓存按 (language, name) 批量创建名称，依赖这两个唯一索引
+CREATE UNIQUE INDEX IF NOT EXISTS ux_actress_names_language_name ON actress_names(language, name);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_genre_names_language_name ON genre_names(language, name);
 CREATE INDEX idx_movie_actresses_movie_id ON movie_actresses(movie_id);
 CREATE INDEX idx_movie_actresses_actress_id ON movie_actresses(actress_id);
 CREATE INDEX idx_movie_genres_movie_id ON movie_genres(movie_id);
@@ -271,4 +324,102 @@ BEGIN
     END IF;
     
 END
-$$;
\ No newline at end of file
+$$;
+
+-- 三元组模糊搜索（pg_trgm）
+-- ILIKE '%关键字%' 和 % 相似度运算符都可以走 gin_trgm_ops 索引
+-- 日文/中文需要数据库使用 UTF-8 且非 C 的 locale，CJK 字符才会参与生成三元组
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_movies_title_trgm ON movies USING gin (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_movies_code_trgm ON movies USING gin (code gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_actresses_name_trgm ON actresses USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_actress_names_name_trgm ON actress_names USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_genre_names_name_trgm ON genre_names USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_genres_code_trgm ON genres USING gin (code gin_trgm_ops);
+-- 搜索只查询 movies 和 movie_info 的标题，movie_titles 上不需要三元组索引
+DROP INDEX IF EXISTS idx_movie_titles_title_trgm;
+
+-- movie_info 表由爬虫侧创建，存在时才建索引
+DO $$
+BEGIN
+    IF EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'movie_info') THEN
+        CREATE INDEX IF NOT EXISTS idx_movie_info_title_trgm ON movie_info USING gin (title gin_trgm_ops);
+        -- 每部电影每种语言一行，批量导入按它合并（jsonl_bulk_loader.py）
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_movie_info_code_language ON movie_info (code, language);
+        -- movie_info → 关联表规范化任务按 (updated_at, id) 扫描（crawler/repository/movie_link_repository.py）
+        CREATE INDEX IF NOT EXISTS idx_movie_info_changed ON movie_info ((COALESCE(updated_at, TIMESTAMP 'epoch')), id);
+    END IF;
+END
+$$;
+
+-- keyset 分页使用的复合索引，排序键与 common/db/pagination.py 中的行比较保持一致
+CREATE INDEX IF NOT EXISTS idx_movies_likes_id ON movies ((COALESCE(likes, 0)), id);
+CREATE INDEX IF NOT EXISTS idx_movies_release_date_id ON movies ((COALESCE(release_date, '')), id);
+CREATE INDEX IF NOT EXISTS idx_movie_genres_genre_id_movie_id ON movie_genres(genre_id, movie_id);
+CREATE INDEX IF NOT EXISTS idx_movie_actresses_actress_id_movie_id ON movie_actresses(actress_id, movie_id);
+
+-- 详情爬取队列优先级（与 crawler/repository/crawl_priority_repository.py 保持一致）
+-- 手动请求 > 新发布（90天内线性加分）> 点赞数（对数）> 来源（feed）
+ALTER TABLE movies ADD COLUMN IF NOT EXISTS crawl_priority INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE movies ADD COLUMN IF NOT EXISTS crawl_source VARCHAR(20);
+ALTER TABLE movies ADD COLUMN IF NOT EXISTS crawl_requested_at TIMESTAMP WITH TIME ZONE;
+
+CREATE OR REPLACE FUNCTION movie_crawl_priority(
+    release_date TEXT, likes INTEGER, source TEXT, requested_at TIMESTAMP WITH TIME ZONE
+) RETURNS INTEGER AS $$
+DECLARE
+    score INTEGER := 0;
+    age_days INTEGER;
+BEGIN
+    IF requested_at IS NOT NULL THEN
+        score := score + 1000000;
+    END IF;
+    IF release_date ~ '^\d{4}-\d{2}-\d{2}' THEN
+        BEGIN
+            age_days := CURRENT_DATE - substring(release_date FROM 1 FOR 10)::DATE;
+            score := score + GREATEST(0, 90 - GREATEST(age_days, 0)) * 50;
+        EXCEPTION WHEN others THEN
+            NULL;  -- 无效日期（如 2023-02-30）不加分
+        END;
+    END IF;
+    score := score + round(ln(1 + GREATEST(COALESCE(likes, 0), 0)) * 100)::INTEGER;
+    RETURN score + CASE source WHEN 'feed' THEN 2000 ELSE 0 END;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+CREATE OR REPLACE FUNCTION set_movie_crawl_priority() RETURNS trigger AS $$
+BEGIN
+    IF NEW.status <> 'new' THEN
+        NEW.crawl_requested_at := NULL;
+    END IF;
+    NEW.crawl_priority := movie_crawl_priority(
+        NEW.release_date, NEW.likes, NEW.crawl_source, NEW.crawl_requested_at
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS movies_crawl_priority ON movies;
+CREATE TRIGGER movies_crawl_priority
+    BEFORE INSERT OR UPDATE OF status, likes, release_date, crawl_source, crawl_requested_at
+    ON movies
+    FOR EACH ROW
+    EXECUTE FUNCTION set_movie_crawl_priority();
+
+CREATE INDEX IF NOT EXISTS idx_movies_new_priority ON movies (crawl_priority DESC, id) WHERE status = 'new';
+
+-- 后台同步任务的扫描位置（与 crawler/repository/movie_link_repository.py 保持一致）
+CREATE TABLE IF NOT EXISTS sync_watermarks (
+    name VARCHAR(50) PRIMARY KEY,
+    last_updated_at TIMESTAMP NOT NULL DEFAULT TIMESTAMP 'epoch',
+    last_id INTEGER NOT NULL DEFAULT 0,
+    processed BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 规范化时还关联不上电影的 movie_info 行，电影入库后补关联（与 crawler/repository/movie_link_repository.py 保持一致）
+CREATE TABLE IF NOT EXISTS movie_link_pending (
+    movie_info_id INTEGER PRIMARY KEY,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
@@ -1,11 +1,10 @@
 #!/usr/bin/env python3
 """
-简化版数据库爬虫 - 5个并行，使用parse_movie_page，支持重试
+简化版数据库爬虫 - 按主机资源自适应并行，使用parse_movie_page，支持重试
 """
 
 import json
 import time
-import random
 import re
 import sys
 from pathlib import Path
@@ -28,10 +27,16 @@ logger.add(
     level="INFO",
     format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
 )
-from concurrent.futures import ThreadPoolExecutor
 import threading
+from functools import partial
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
+from crawl_pipeline import CrawlPipeline, JsonlSink
+from tab_scheduler import TabScheduler
+from tab_lifecycle import TabLifecycleManager
+from concurrency_controller import AdaptiveConcurrency
+from page_status import NotFoundCache, open_movie_page
+from url_resolution import UrlResolutionCache
 
 # 导入MovieDetailCrawler和日志配置
 sys.path.append(str(Path(__file__).parent / "src"))
@@ -59,6 +64,8 @@ class SimpleDatabaseCrawler:
     def __init__(self):
         self.browser = None
         self.tabs = []
+        self.lifecycle = None
+        self.concurrency = None
         self.results = []
         self.failed_movies = []
         self.lock = threading.Lock()
@@ -69,6 +76,11 @@ class SimpleDatabaseCrawler:
         self.engine = create_engine(self.db_url)
         self.Session = sessionmaker(bind=self.engine)
         
+        # 已确认不存在的代码，TTL 内不再占用标签页
+        self.not_found_cache = NotFoundCache(self.engine)
+        # 原始代码 → 最终地址，重复爬取时直接打开最终地址
+        self.url_cache = UrlResolutionCache(self.engine)
+        
         # 输出文件
         self.output_file = Path("simple_crawl_results.jsonl")
         
@@ -153,40 +165,51 @@ class SimpleDatabaseCrawler:
         finally:
             session.close()
     
-    def create_browser_with_tabs(self):
-        """创建浏览器并打开5个标签页"""
-        logger.info("🚀 创建浏览器并准备5个标签页")
-        
+    def launch_browser(self):
+        """启动浏览器并建立会话（标签页生命周期管理器重启浏览器时也会调用）"""
         options = ChromiumOptions()
         options.headless(False)
         options.set_argument('--window-size=1920,1080')
         options.set_argument('--disable-blink-features=AutomationControlled')
         
-        self.browser = ChromiumPage(addr_or_opts=options)
-
+        browser = ChromiumPage(addr_or_opts=options)
 
         # 建立会话
         logger.info("📱 建立会话...")
-        self.browser.get("https://missav.ai/")
+        browser.get("https://missav.ai/")
         time.sleep(2)
+        return browser
+
+    def create_browser_with_tabs(self):
+        """创建浏览器并按主机资源打开标签页
+
+        标签页数量上限由 AdaptiveConcurrency 按CPU和内存估算（可用 CRAWLER_MAX_TABS 覆盖），
+        运行中再按资源和失败率调整实际使用的标签页数。
+        标签页由 TabLifecycleManager 管理，按导航次数和内存自动回收，
+        self.tabs 中保存的是 TabSlot，使用时通过 self.lifecycle.use(slot) 取出标签页。
+        """
+        self.concurrency = AdaptiveConcurrency.from_env()
+        logger.info(f"🚀 创建浏览器并准备{self.concurrency.max_tabs}个标签页")
         
-        # 创建5个标签页
-        self.tabs = [self.browser]
-        
-        for i in range(4):  # 再创建4个，总共5个
-            try:
-                time.sleep(0.2)
-                new_tab = self.browser.new_tab()
-                self.tabs.append(new_tab)
-                logger.info(f"✅ 创建标签页 {i+2}/5")
-                time.sleep(0.5)
-            except Exception as e:
-                logger.warning(f"创建标签页 {i+2} 失败: {e}")
-        
-        logger.info(f"🎯 成功创建 {len(self.tabs)} 个标签页")
+        self.lifecycle = TabLifecycleManager(self.launch_browser, tab_count=self.concurrency.max_tabs)
+        self.tabs = self.lifecycle.start()
+        self.browser = self.lifecycle.browser
+        self.concurrency.memory_fn = self.lifecycle.total_rss_mb
         return len(self.tabs)
+
+    def close_browser(self):
+        """关闭浏览器（包括重启后的新实例）"""
+        if self.lifecycle:
+            self.lifecycle.stop()
+        elif self.browser:
+            try:
+                self.browser.quit()
+                logger.info("🔒 浏览器已关闭")
+            except:
+                pass
     
-    def extract_with_parse_movie_page(self, html, movie_id, movie_code, url):
+    @staticmethod
+    def extract_with_parse_movie_page(html, movie_id, movie_code, url):
         """优先提取M3U8的信息提取方法"""
         try:
             if HAS_MOVIE_CRAWLER:
@@ -392,7 +415,8 @@ class SimpleDatabaseCrawler:
                 'error': str(e)
             }
     
-    def check_404_or_not_found(self, html, current_url, original_url=None, movie_code=None):
+    @staticmethod
+    def check_404_or_not_found(html, current_url, original_url=None, movie_code=None):
         """检查页面是否为404或不存在（智能检测）"""
         if not html:
             return True
@@ -454,7 +478,8 @@ class SimpleDatabaseCrawler:
 
         return False
 
-    def create_404_placeholder(self, movie_id, movie_code, movie_url):
+    @staticmethod
+    def create_404_placeholder(movie_id, movie_code, movie_url):
         """创建404占位符"""
         return {
             'id': movie_id,
@@ -467,6 +492,71 @@ class SimpleDatabaseCrawler:
             'page_length': 0
         }
 
+    @staticmethod
+    def create_failed_placeholder(movie_id, movie_code, movie_url, error='Failed after 3 retries'):
+        """创建提取失败占位符"""
+        return {
+            'id': movie_id,
+            'code': movie_code,
+            'url': movie_url,
+            'status': 'failed',
+            'title': 'EXTRACTION_FAILED',
+            'error': error,
+            'timestamp': time.time(),
+            'page_length': 0
+        }
+
+    @staticmethod
+    def process_page(html, current_url, movie_data):
+        """根据已加载的页面生成结果（404检测 + 信息提取）
+
+        不依赖浏览器，流水线模式下在解析进程中执行。
+
+        Returns:
+            结果字典（成功或404占位符），页面不完整需要重试时返回None
+        """
+        movie_id, movie_url, movie_code = movie_data
+
+        if SimpleDatabaseCrawler.check_404_or_not_found(html, current_url, movie_url, movie_code):
+            logger.warning(f"🚫 ID={movie_id}: 检测到404或页面不存在")
+            return SimpleDatabaseCrawler.create_404_placeholder(movie_id, movie_code, movie_url)
+
+        if not html or len(html) <= 10000:
+            logger.warning(f"⚠️ ID={movie_id}: 页面内容不足，重试")
+            return None
+
+        # 检查是否发生了重定向，如果是则使用重定向后的电影代码
+        final_movie_code = movie_code
+        if current_url != movie_url:
+            # 从最终URL提取电影代码
+            try:
+                final_movie_code = current_url.split('/')[-1]
+                logger.info(f"🔄 ID={movie_id}: 使用重定向后的代码: {movie_code} → {final_movie_code}")
+            except:
+                logger.warning(f"⚠️ ID={movie_id}: 无法从重定向URL提取代码，使用原始代码")
+
+        movie_info = SimpleDatabaseCrawler.extract_with_parse_movie_page(html, movie_id, final_movie_code, current_url)
+        if not movie_info:
+            logger.warning(f"⚠️ ID={movie_id}: 信息提取失败，重试")
+            return None
+
+        # 优先检查M3U8 - 有M3U8就算成功
+        m3u8_links = movie_info.get('m3u8_links', [])
+        if len(m3u8_links) > 0:
+            movie_info['status'] = 'success'
+            movie_info['success_reason'] = f'has_m3u8_{len(m3u8_links)}'
+            logger.info(f"✅ ID={movie_id}: 成功提取M3U8 ({len(m3u8_links)}个)")
+            return movie_info
+        if movie_info.get('title') and movie_info.get('title') != "未知标题":
+            # 没有M3U8但有标题等其他信息也算成功
+            movie_info['status'] = 'success'
+            movie_info['success_reason'] = 'has_title_no_m3u8'
+            logger.info(f"✅ ID={movie_id}: 成功提取信息（无M3U8）")
+            return movie_info
+
+        logger.warning(f"⚠️ ID={movie_id}: 信息提取不完整，重试")
+        return None
+
     def crawl_single_movie_with_retry(self, tab, movie_data):
         """爬取单个电影（带重试和404检测，处理重定向）"""
         movie_id, movie_url, movie_code = movie_data
@@ -475,78 +565,12 @@ class SimpleDatabaseCrawler:
             try:
                 logger.info(f"📍 尝试 {attempt+1}/{self.max_retries}: ID={movie_id}, {movie_code}")
 
-                # 访问页面
-                tab.get(movie_url)
-
-                # 简单等待页面加载完成（浏览器自动处理重定向）
-                for check in range(3):
-                    time.sleep(0.3)
-                    html = tab.html
-                    current_url = tab.url
-
-                    # 检查页面是否加载完成
-                    if html and len(html) > 50000:
-                        logger.info(f"✅ ID={movie_id} 页面已加载 ({len(html)} 字符)")
-                        if current_url != movie_url:
-                            logger.info(f"🔄 ID={movie_id} 最终URL: {current_url}")
-                        break
-                    elif check == 4:  # 最后一次检查
-                        logger.warning(f"⏳ ID={movie_id} 页面加载超时，内容长度: {len(html) if html else 0}")
-
-                # 检查是否为404或不存在
-                html = tab.html
-                current_url = tab.url
-
-                if self.check_404_or_not_found(html, current_url, movie_url, movie_code):
-                    logger.warning(f"🚫 ID={movie_id}: 检测到404或页面不存在")
-                    placeholder = self.create_404_placeholder(movie_id, movie_code, movie_url)
-                    return placeholder
-
-                # 提取信息
-                if html and len(html) > 10000:
-                    # 检查是否发生了重定向，如果是则使用重定向后的电影代码
-                    final_movie_code = movie_code
-                    if current_url != movie_url:
-                        # 从最终URL提取电影代码
-                        try:
-                            final_movie_code = current_url.split('/')[-1]
-                            logger.info(f"🔄 ID={movie_id}: 使用重定向后的代码: {movie_code} → {final_movie_code}")
-                        except:
-                            logger.warning(f"⚠️ ID={movie_id}: 无法从重定向URL提取代码，使用原始代码")
-
-                    movie_info = self.extract_with_parse_movie_page(html, movie_id, final_movie_code, current_url)
-
-                    if movie_info:
-                        # 优先检查M3U8 - 有M3U8就算成功
-                        m3u8_links = movie_info.get('m3u8_links', [])
-                        has_m3u8 = len(m3u8_links) > 0
-
-                        if has_m3u8:
-                            movie_info['status'] = 'success'
-                            movie_info['success_reason'] = f'has_m3u8_{len(m3u8_links)}'
-                            logger.info(f"✅ ID={movie_id}: 成功提取M3U8 ({len(m3u8_links)}个)")
-                            return movie_info
-                        elif movie_info.get('title') and movie_info.get('title') != "未知标题":
-                            # 没有M3U8但有标题等其他信息也算成功
-                            movie_info['status'] = 'success'
-                            movie_info['success_reason'] = 'has_title_no_m3u8'
-                            logger.info(f"✅ ID={movie_id}: 成功提取信息（无M3U8）")
-                            return movie_info
-                        else:
-                            logger.warning(f"⚠️ ID={movie_id}: 信息提取不完整，重试")
-                            if attempt < self.max_retries - 1:
-                                time.sleep(0.5)
-                                continue
-                    else:
-                        logger.warning(f"⚠️ ID={movie_id}: 信息提取失败，重试")
-                        if attempt < self.max_retries - 1:
-                            time.sleep(0.5)
-                            continue
-                else:
-                    logger.warning(f"⚠️ ID={movie_id}: 页面内容不足，重试")
-                    if attempt < self.max_retries - 1:
-                        time.sleep(0.5)
-                        continue
+                html, current_url = fetch_movie_page(tab, movie_data, self.not_found_cache, self.url_cache)
+                result = self.process_page(html, current_url, movie_data)
+                if result:
+                    return result
+                if attempt < self.max_retries - 1:
+                    time.sleep(0.5)
 
             except Exception as e:
                 logger.error(f"❌ ID={movie_id} 尝试 {attempt+1} 失败: {e}")
@@ -556,16 +580,7 @@ class SimpleDatabaseCrawler:
 
         logger.error(f"💀 ID={movie_id}: 3次重试均失败")
         # 返回失败占位符
-        return {
-            'id': movie_id,
-            'code': movie_code,
-            'url': movie_url,
-            'status': 'failed',
-            'title': 'EXTRACTION_FAILED',
-            'error': 'Failed after 3 retries',
-            'timestamp': time.time(),
-            'page_length': 0
-        }
+        return self.create_failed_placeholder(movie_id, movie_code, movie_url)
     
     def save_result(self, movie_info):
         """保存单个结果"""
@@ -575,8 +590,26 @@ class SimpleDatabaseCrawler:
         except Exception as e:
             logger.error(f"保存结果失败: {e}")
     
+    def skip_known_404(self, movies):
+        """加载404缓存和URL解析缓存，跳过404缓存中的电影并直接写入404占位符（保证断点继续）"""
+        self.not_found_cache.load()
+        self.url_cache.load()
+
+        def write_placeholder(movie_data):
+            movie_id, movie_url, movie_code = movie_data
+            result = self.create_404_placeholder(movie_id, movie_code, movie_url)
+            result['cached'] = True
+            with self.lock:
+                self.results.append(result)
+                self.save_result(result)
+
+        alive = list(self.not_found_cache.skip_dead(movies, lambda m: m[2], write_placeholder))
+        if self.not_found_cache.skipped:
+            logger.info(f"🚫 跳过 {self.not_found_cache.skipped} 部已知404电影")
+        return alive
+
     def crawl_batch(self, movies):
-        """爬取一批电影（5个并行）"""
+        """爬取一批电影（标签页共享队列并行，并发度自适应调整）"""
         logger.info(f"🚀 开始爬取 {len(movies)} 部电影")
         
         # 创建浏览器
@@ -586,91 +619,70 @@ class SimpleDatabaseCrawler:
         
         start_time = time.time()
         
+        def handle_result(movie_data, result):
+            if not result:
+                # 这种情况不应该发生，但以防万一
+                movie_id, movie_url, movie_code = movie_data
+                result = {
+                    'id': movie_id,
+                    'code': movie_code,
+                    'url': movie_url,
+                    'status': 'error',
+                    'title': 'UNKNOWN_ERROR',
+                    'error': 'Unexpected None result',
+                    'timestamp': time.time(),
+                    'page_length': 0
+                }
+            with self.lock:
+                self.results.append(result)
+                self.save_result(result)
+
+                # 根据状态显示不同信息
+                if result.get('status') == '404':
+                    logger.info(f"🚫 ID={result['id']}: 404 NOT_FOUND")
+                elif result.get('status') == 'failed':
+                    logger.info(f"💀 ID={result['id']}: EXTRACTION_FAILED")
+                elif result.get('status') == 'error':
+                    logger.error(f"❓ ID={result['id']}: UNKNOWN_ERROR")
+                else:
+                    logger.info(f"✅ ID={result['id']}: {result.get('title', '未知')[:30]}...")
+
+        def handle_failure(movie_data, error):
+            # 超时或异常且重新分配次数用完，创建异常占位符
+            movie_id, movie_url, movie_code = movie_data
+            exception_result = {
+                'id': movie_id,
+                'code': movie_code,
+                'url': movie_url,
+                'status': 'exception',
+                'title': 'PROCESSING_EXCEPTION',
+                'error': error,
+                'timestamp': time.time(),
+                'page_length': 0
+            }
+            with self.lock:
+                self.results.append(exception_result)
+                self.save_result(exception_result)
+                logger.error(f"💥 ID={movie_id}: PROCESSING_EXCEPTION")
+
         try:
-            # 分批处理，每批5个
-            for i in range(0, len(movies), 5):
-                batch = movies[i:i + 5]
-                batch_num = i // 5 + 1
-                total_batches = (len(movies) + 4) // 5
-                
-                logger.info(f"\n🎬 批次 {batch_num}/{total_batches}: {len(batch)} 部电影")
-                
-                # 并行处理这一批
-                with ThreadPoolExecutor(max_workers=len(self.tabs)) as executor:
-                    futures = []
-                    
-                    for j, movie_data in enumerate(batch):
-                        tab = self.tabs[j % len(self.tabs)]
-                        future = executor.submit(self.crawl_single_movie_with_retry, tab, movie_data)
-                        futures.append((future, movie_data))
-                    
-                    # 收集结果
-                    for future, movie_data in futures:
-                        movie_id = movie_data[0]
-                        try:
-                            result = future.result(timeout=60)
-                            if result:
-                                with self.lock:
-                                    self.results.append(result)
-                                    self.save_result(result)
-
-                                    # 根据状态显示不同信息
-                                    if result.get('status') == '404':
-                                        logger.info(f"🚫 ID={result['id']}: 404 NOT_FOUND")
-                                    elif result.get('status') == 'failed':
-                                        logger.info(f"💀 ID={result['id']}: EXTRACTION_FAILED")
-                                    else:
-                                        logger.info(f"✅ ID={result['id']}: {result.get('title', '未知')[:30]}...")
-                            else:
-                                # 这种情况不应该发生，但以防万一
-                                movie_id, movie_url, movie_code = movie_data
-                                error_result = {
-                                    'id': movie_id,
-                                    'code': movie_code,
-                                    'url': movie_url,
-                                    'status': 'error',
-                                    'title': 'UNKNOWN_ERROR',
-                                    'error': 'Unexpected None result',
-                                    'timestamp': time.time(),
-                                    'page_length': 0
-                                }
-                                with self.lock:
-                                    self.results.append(error_result)
-                                    self.save_result(error_result)
-                                    logger.error(f"❓ ID={movie_id}: UNKNOWN_ERROR")
-                        except Exception as e:
-                            logger.error(f"❌ ID={movie_id} 处理异常: {e}")
-                            # 创建异常占位符
-                            movie_id, movie_url, movie_code = movie_data
-                            exception_result = {
-                                'id': movie_id,
-                                'code': movie_code,
-                                'url': movie_url,
-                                'status': 'exception',
-                                'title': 'PROCESSING_EXCEPTION',
-                                'error': str(e),
-                                'timestamp': time.time(),
-                                'page_length': 0
-                            }
-                            with self.lock:
-                                self.results.append(exception_result)
-                                self.save_result(exception_result)
-                                logger.error(f"💥 ID={movie_id}: PROCESSING_EXCEPTION")
-                
-                # 批次间休息
-                if i + 5 < len(movies):
-                    rest_time = random.uniform(2, 3)
-                    logger.info(f"😴 批次间休息 {rest_time:.1f} 秒...")
-                    time.sleep(rest_time)
+            # 每个标签页做完一个就取下一个，不再等待整批完成
+            scheduler = TabScheduler(
+                tabs=self.tabs,
+                work_fn=self.lifecycle.wrap(self.crawl_single_movie_with_retry),
+                on_result=handle_result,
+                on_failure=handle_failure,
+                item_timeout=180,
+                max_attempts=2,
+                pause_range=(2, 3),
+                concurrency=self.concurrency,
+                success_fn=lambda result: result.get('status') != 'failed',
+            )
+            scheduler.run(self.skip_known_404(movies))
         
         finally:
             # 关闭浏览器
-            if self.browser:
-                try:
-                    self.browser.quit()
-                    logger.info("🔒 浏览器已关闭")
-                except:
-                    pass
+            self.close_browser()
         
         # 输出统计
         total_time = time.time() - start_time
@@ -702,12 +714,86 @@ class SimpleDatabaseCrawler:
             if len(not_found_movies) > 10:
                 logger.info(f"   ... 还有 {len(not_found_movies)-10} 个")
 
+    def crawl_pipeline(self, movies, parse_workers=2):
+        """流水线模式爬取：标签页只负责抓取，解析在进程池中进行，结果攒批写入JSONL"""
+        logger.info(f"🚀 流水线模式爬取 {len(movies)} 部电影，解析进程: {parse_workers}")
+
+        if self.create_browser_with_tabs() == 0:
+            logger.error("❌ 无法创建标签页")
+            return
+
+        pipeline = CrawlPipeline(
+            tabs=self.tabs,
+            fetch_fn=self.lifecycle.wrap(partial(fetch_movie_page, not_found_cache=self.not_found_cache,
+                                                     url_cache=self.url_cache)),
+            parse_fn=parse_fetched_page,
+            sinks=[JsonlSink(self.output_file)],
+            failure_fn=lambda movie_data, error: self.create_failed_placeholder(
+                movie_data[0], movie_data[2], movie_data[1], error),
+            parse_workers=parse_workers,
+            max_retries=self.max_retries,
+            concurrency=self.concurrency,
+        )
+
+        try:
+            stats = pipeline.run(self.skip_known_404(movies))
+        finally:
+            self.close_browser()
+
+        counts = stats.status_counts
+        logger.info(f"\n{'='*50}")
+        logger.info("📊 爬取完成")
+        logger.info(f"总数: {len(movies)}")
+        logger.info(f"已处理: {stats.persisted}")
+        logger.info(f"✅ 成功: {counts.get('success', 0)}")
+        logger.info(f"🚫 404不存在: {counts.get('404', 0)}")
+        logger.info(f"💀 提取失败: {counts.get('failed', 0)}")
+        logger.info(f"总时间: {(time.time() - stats.started_at)/60:.1f} 分钟")
+        logger.info(f"输出文件: {self.output_file}")
+
+
+def fetch_movie_page(tab, movie_data, not_found_cache=None, url_cache=None):
+    """在标签页中打开电影页面并等待加载，返回 (html, 最终URL)
+
+    主文档返回404或被重定向到首页时立即返回空HTML，由 check_404_or_not_found 生成404占位符。
+    """
+    movie_id, movie_url, movie_code = movie_data
+    if not_found_cache and not_found_cache.is_dead(movie_code):
+        return '', movie_url
+
+    # 访问页面，同时拿到主文档状态码
+    nav = open_movie_page(tab, movie_url, movie_code, not_found_cache, url_cache)
+    if nav.dead:
+        logger.info(f"🚫 ID={movie_id} {nav.reason}，跳过渲染")
+        return '', nav.final_url
+
+    # 简单等待页面加载完成（浏览器自动处理重定向）
+    for check in range(3):
+        time.sleep(0.3)
+        html = tab.html
+        current_url = tab.url
+
+        # 检查页面是否加载完成
+        if html and len(html) > 50000:
+            logger.info(f"✅ ID={movie_id} 页面已加载 ({len(html)} 字符)")
+            if current_url != movie_url:
+                logger.info(f"🔄 ID={movie_id} 最终URL: {current_url}")
+            break
+
+    return tab.html, tab.url
+
+
+def parse_fetched_page(page):
+    """流水线解析阶段，在解析进程中执行"""
+    return SimpleDatabaseCrawler.process_page(page.html, page.final_url, page.item)
+
+
 def main():
     """主函数"""
     
     logger.info("🚀 简化版数据库爬虫")
     logger.info("📊 功能特性:")
-    logger.info("  - 5个标签页并行")
+    logger.info("  - 按CPU、内存和失败率自适应调整标签页数量")
     logger.info("  - 使用parse_movie_page方法")
     logger.info("  - 失败重试3次")
     logger.info("  - 支持断点继续")
@@ -716,6 +802,9 @@ def main():
     limit_input = input("\n🔢 限制处理数量 (回车=不限制): ").strip()
     limit = int(limit_input) if limit_input.isdigit() else None
     
+    # 流水线模式：抓取、解析、保存分阶段并行
+    use_pipeline = input("\n⚙️ 使用流水线模式（进程池解析）? [y/N]: ").strip().lower() == 'y'
+
     # 确认开始
     start = input(f"\n🚀 开始爬取? [y/n]: ").lower()
     if start != 'y':
@@ -735,7 +824,10 @@ def main():
         return
     
     # 开始爬取
-    crawler.crawl_batch(movies)
+    if use_pipeline:
+        crawler.crawl_pipeline(movies)
+    else:
+        crawler.crawl_batch(movies)
 
 if __name__ == "__main__":
     main()
@@ -1,3 +1,5 @@
+import logging
+
 from fastapi import FastAPI
 from app.api.router import api_router  # 保持相对路径
 from app.config import settings  # 保持相对路径
@@ -11,6 +13,19 @@ def create_app(): # 定义一个工厂函数来创建 app 实例
 
     app.include_router(api_router, prefix='/api/v1')
 
+    @app.on_event("startup")
+    async def warm_dimension_cache():
+        """启动时加载类型/演员名称字典，失败时在第一次使用时再加载"""
+        from app.config.database import async_session
+        from common.utils.dimension_cache import dimension_cache
+
+        try:
+            async with async_session() as session:
+                await dimension_cache.ensure_schema(session)
+                await dimension_cache.load(session)
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"名称字典缓存预加载失败: {str(e)}")
+
     @app.get("/")
     def root():
         return {"message": "Welcome to Movie Database API. Go to /docs for documentation."}
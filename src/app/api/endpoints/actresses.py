@@ -1,12 +1,15 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_services
 from common.enums.enums import SupportedLanguage
 from app.models.request.actress_request import ActressCreate, ActressNameCreate, ActressUpdate
 from app.models.response.actress_response import ActressDetailResponse, ActressResponse
-from app.models.response.movie_response import MovieResponse
+from app.models.response.movie_response import MovieCursorPage, MovieResponse
+from app.api.pagination import movie_cursor_page
 from app.services import ServiceFactory
+from app.services.cache_service import cached_response
+from common.utils.response_cache import response_cache, ACTRESSES
 
 
 router = APIRouter()
@@ -20,7 +23,12 @@ async def get_actresses( # Added async
     """
     Retrieve actresses.
     """
-    return await services.actress_service.get_all(skip=skip, limit=limit) # Added await
+    return await cached_response(
+        ACTRESSES,
+        {"view": "list", "skip": skip, "limit": limit},
+        lambda: services.actress_service.get_all(skip=skip, limit=limit),
+        ActressResponse
+    )
 
 @router.post("/", response_model=ActressResponse)
 async def create_actress( # Added async
@@ -30,7 +38,9 @@ async def create_actress( # Added async
     """
     Create new actress.
     """
-    return await services.actress_service.create(actress_in.dict()) # Added await
+    actress = await services.actress_service.create(actress_in.dict()) # Added await
+    await response_cache.invalidate(ACTRESSES)
+    return actress
 
 @router.get("/{actress_id}", response_model=ActressDetailResponse)
 async def get_actress( # Added async
@@ -63,7 +73,9 @@ async def update_actress( # Added async
             status_code=404,
             detail="Actress not found"
         )
-    return await services.actress_service.update(actress_id, actress_in.dict(exclude_unset=True)) # Added await
+    actress = await services.actress_service.update(actress_id, actress_in.dict(exclude_unset=True)) # Added await
+    await response_cache.invalidate(ACTRESSES)
+    return actress
 
 @router.delete("/{actress_id}", response_model=bool)
 async def delete_actress( # Added async
@@ -79,7 +91,9 @@ async def delete_actress( # Added async
             status_code=404,
             detail="Actress not found"
         )
-    return await services.actress_service.delete(actress_id) # Added await
+    deleted = await services.actress_service.delete(actress_id) # Added await
+    await response_cache.invalidate(ACTRESSES)
+    return deleted
 
 @router.post("/{actress_id}/names", response_model=ActressDetailResponse)
 async def add_actress_name( # Added async
@@ -102,6 +116,7 @@ async def add_actress_name( # Added async
         name=name_in.name,
         language=name_in.language
     )
+    await response_cache.invalidate(ACTRESSES)
 
     return await services.actress_service.get_by_id(actress_id) # Added await
 
@@ -123,15 +138,17 @@ async def search_actresses( # Added async
         limit=limit
     )
 
-@router.get("/{actress_id}/movies", response_model=List[MovieResponse])
+@router.get("/{actress_id}/movies", response_model=Union[MovieCursorPage, List[MovieResponse]])
 async def get_actress_movies( # Added async
     actress_id: int = Path(..., title="The ID of the actress"),
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = Query(None, description="游标分页：第一页传空字符串，之后传上一页的 next_cursor"),
     services: ServiceFactory = Depends(get_services)
 ):
     """
     Get all movies for an actress.
+    Pass `cursor` to page with keyset cursors; `skip` is kept for backward compatibility.
     """
     actress = await services.actress_service.get_by_id(actress_id) # Added await
     if not actress:
@@ -139,6 +156,8 @@ async def get_actress_movies( # Added async
             status_code=404,
             detail="Actress not found"
         )
+    if cursor is not None:
+        return await movie_cursor_page(services, cursor, limit, actress_id=actress_id)
     return await services.actress_service.get_movies_by_actress( # Added await
         actress_id=actress_id,
         skip=skip,
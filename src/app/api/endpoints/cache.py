@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+
+from common.utils.response_cache import response_cache
+
+router = APIRouter()
+
+@router.get("/stats")
+async def get_cache_stats():
+    """
+    Get response cache hit ratios.
+    """
+    return response_cache.stats()
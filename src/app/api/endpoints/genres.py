@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -7,8 +7,11 @@ from app.api.deps import get_services
 from common.enums.enums import SupportedLanguage
 from app.models.request.genre_request import GenreCreate, GenreNameCreate, GenreUpdate
 from app.models.response.genre_response import GenreDetailResponse, GenreResponse
-from app.models.response.movie_response import MovieResponse
+from app.models.response.movie_response import MovieCursorPage, MovieResponse
+from app.api.pagination import movie_cursor_page
 from app.services import ServiceFactory
+from app.services.cache_service import cached_response
+from common.utils.response_cache import response_cache, GENRES
 
 router = APIRouter()
 
@@ -21,7 +24,12 @@ async def get_genres( # Added async
     """
     Retrieve genres.
     """
-    return await services.genre_service.get_all(skip=skip, limit=limit) # Added await
+    return await cached_response(
+        GENRES,
+        {"view": "list", "skip": skip, "limit": limit},
+        lambda: services.genre_service.get_all(skip=skip, limit=limit),
+        GenreResponse
+    )
 
 @router.post("/", response_model=GenreResponse)
 async def create_genre( # Added async
@@ -31,7 +39,9 @@ async def create_genre( # Added async
     """
     Create new genre.
     """
-    return await services.genre_service.create(genre_in.dict()) # Added await
+    genre = await services.genre_service.create(genre_in.dict()) # Added await
+    await response_cache.invalidate(GENRES)
+    return genre
 
 @router.get("/{genre_id}", response_model=GenreDetailResponse)
 async def get_genre( # Added async
@@ -64,7 +74,9 @@ async def update_genre( # Added async
             status_code=404,
             detail="Genre not found"
         )
-    return await services.genre_service.update(genre_id, genre_in.dict(exclude_unset=True)) # Added await
+    genre = await services.genre_service.update(genre_id, genre_in.dict(exclude_unset=True)) # Added await
+    await response_cache.invalidate(GENRES)
+    return genre
 
 @router.delete("/{genre_id}", response_model=bool)
 async def delete_genre( # Added async
@@ -80,7 +92,9 @@ async def delete_genre( # Added async
             status_code=404,
             detail="Genre not found"
         )
-    return await services.genre_service.delete(genre_id) # Added await
+    deleted = await services.genre_service.delete(genre_id) # Added await
+    await response_cache.invalidate(GENRES)
+    return deleted
 
 @router.post("/{genre_id}/names", response_model=GenreDetailResponse)
 async def add_genre_name( # Added async
@@ -103,6 +117,7 @@ async def add_genre_name( # Added async
         name=name_in.name,
         language=name_in.language
     )
+    await response_cache.invalidate(GENRES)
 
     return await services.genre_service.get_by_id(genre_id) # Added await
 
@@ -124,15 +139,17 @@ async def search_genres( # Added async
         limit=limit
     )
 
-@router.get("/{genre_id}/movies", response_model=List[MovieResponse])
+@router.get("/{genre_id}/movies", response_model=Union[MovieCursorPage, List[MovieResponse]])
 async def get_genre_movies( # Added async
     genre_id: int = Path(..., title="The ID of the genre"),
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = Query(None, description="游标分页：第一页传空字符串，之后传上一页的 next_cursor"),
     services: ServiceFactory = Depends(get_services)
 ):
     """
     Get all movies for a genre.
+    Pass `cursor` to page with keyset cursors; `skip` is kept for backward compatibility.
     """
     genre = await services.genre_service.get_by_id(genre_id) # Added await
     if not genre:
@@ -140,6 +157,8 @@ async def get_genre_movies( # Added async
             status_code=404,
             detail="Genre not found"
         )
+    if cursor is not None:
+        return await movie_cursor_page(services, cursor, limit, genre_id=genre_id)
     return await services.genre_service.get_movies_by_genre( # Added await
         genre_id=genre_id,
         skip=skip,
@@ -1,24 +1,39 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi.responses import StreamingResponse
 from app.api.deps import get_services
 from common.enums.enums import SupportedLanguage
 from app.models.response.magnet_response import DownloadUrlResponse, MagnetResponse
-from app.models.response.movie_response import MovieDetailResponse, MovieResponse
+from app.models.response.movie_response import MovieCursorPage, MovieDetailResponse, MovieResponse
 from app.models.response.watch_resource_response import WatchUrlResponse
 from app.services import ServiceFactory
+from app.services.cache_service import cached_response
+from app.services.export_service import ExportService
+from app.api.pagination import movie_cursor_page
+from common.utils.response_cache import MOVIES, movie_detail_code, movie_detail_namespace, response_cache
 
 router = APIRouter()
 
-@router.get("/", response_model=List[MovieResponse])
+@router.get("/", response_model=Union[MovieCursorPage, List[MovieResponse]])
 async def get_movies(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="游标分页：第一页传空字符串，之后传上一页的 next_cursor"),
     services: ServiceFactory = Depends(get_services)
 ):
     """
     Retrieve movies.
-    """
-    return await services.movie_service.get_all(skip=skip, limit=limit)
+    Pass `cursor` to page with keyset cursors; `skip` is kept for backward compatibility.
+    """
+    if cursor is not None:
+        return await movie_cursor_page(services, cursor, limit, ordering="id")
+    return await cached_response(
+        MOVIES,
+        {"view": "list", "skip": skip, "limit": limit},
+        lambda: services.movie_service.get_all(skip=skip, limit=limit),
+        MovieResponse
+    )
 
 @router.get("/search/", response_model=List[MovieResponse])
 async def search_movies(
@@ -38,34 +53,67 @@ async def search_movies(
         limit=limit
     )
 
-@router.get("/recent/", response_model=List[MovieResponse])
+@router.get("/recent/", response_model=Union[MovieCursorPage, List[MovieResponse]])
 async def get_recent_movies(
     days: int = Query(30, ge=1, le=365),
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = Query(None, description="游标分页：第一页传空字符串，之后传上一页的 next_cursor"),
     services: ServiceFactory = Depends(get_services)
 ):
     """
     Get recently released movies.
-    """
-    return await services.movie_service.get_recent_releases(
-        days=days,
-        skip=skip,
-        limit=limit
+    Pass `cursor` to page with keyset cursors; `skip` is kept for backward compatibility.
+    """
+    if cursor is not None:
+        return await movie_cursor_page(services, cursor, limit, ordering="recent", days=days)
+    return await cached_response(
+        MOVIES,
+        {"view": "recent", "days": days, "skip": skip, "limit": limit},
+        lambda: services.movie_service.get_recent_releases(
+            days=days,
+            skip=skip,
+            limit=limit
+        ),
+        MovieResponse
     )
 
-@router.get("/popular/", response_model=List[MovieResponse])
+@router.get("/popular/", response_model=Union[MovieCursorPage, List[MovieResponse]])
 async def get_popular_movies(
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = Query(None, description="游标分页：第一页传空字符串，之后传上一页的 next_cursor"),
     services: ServiceFactory = Depends(get_services)
 ):
     """
     Get popular movies based on likes.
+    Pass `cursor` to page with keyset cursors; `skip` is kept for backward compatibility.
+    """
+    if cursor is not None:
+        return await movie_cursor_page(services, cursor, limit, ordering="popular")
+    return await cached_response(
+        MOVIES,
+        {"view": "popular", "skip": skip, "limit": limit},
+        lambda: services.movie_service.get_popular_movies(
+            skip=skip,
+            limit=limit
+        ),
+        MovieResponse
+    )
+
+@router.get("/export")
+async def export_movies(
+    since: Optional[datetime] = Query(None, description="只导出在此时间之后更新过的电影"),
+    after_id: Optional[int] = Query(None, ge=0, description="只导出 id 大于该值的电影，用于断点续传"),
+    yield_per: int = Query(1000, ge=100, le=10000, description="服务端游标每批读取的行数")
+):
     """
-    return await services.movie_service.get_popular_movies(
-        skip=skip,
-        limit=limit
+    Stream the movie catalog as NDJSON, one movie per line, ordered by id.
+    """
+    export_service = ExportService(yield_per=yield_per)
+    return StreamingResponse(
+        export_service.stream_movies_ndjson(since=since, after_id=after_id),
+        media_type="application/x-ndjson"
     )
 
 @router.get("/{language}/{movie_code}", response_model=MovieDetailResponse)
@@ -77,7 +125,12 @@ async def get_movie_by_code(
     """
     Get movie by code.
     """
-    movie = await services.movie_service.get_by_code(movie_code, language)
+    movie = await cached_response(
+        movie_detail_namespace(movie_code),
+        {"view": "detail", "code": movie_code, "language": language},
+        lambda: services.movie_service.get_by_code(movie_code, language),
+        MovieDetailResponse
+    )
     if not movie:
         raise HTTPException(
             status_code=404,
@@ -99,6 +152,8 @@ async def like_movie(
             status_code=404,
             detail="Movie not found"
         )
+    # 点赞数显示在列表和详情中，热门列表的顺序也会变化
+    await response_cache.invalidate_movies([movie_detail_code(movie)], lists=True)
     return movie
 
 @router.get("/{movie_id}/magnets", response_model=List[MagnetResponse])
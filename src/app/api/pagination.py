@@ -0,0 +1,41 @@
+from typing import Optional
+from fastapi import HTTPException
+
+from app.models.response.movie_response import MovieCursorPage, MovieResponse
+from app.services import ServiceFactory
+from app.services.cache_service import cached_response
+from common.utils.response_cache import MOVIES, MOVIE_LINKS
+
+
+async def movie_cursor_page(
+    services: ServiceFactory,
+    cursor: Optional[str],
+    limit: int,
+    **filters
+):
+    """按游标分页返回电影列表（结果走响应缓存），游标无效时返回 400"""
+    async def load():
+        items, next_cursor = await services.movie_service.get_movies_page(
+            cursor=cursor,
+            limit=limit,
+            **filters
+        )
+        return MovieCursorPage(
+            items=[MovieResponse.model_validate(item) for item in items],
+            next_cursor=next_cursor
+        )
+
+    # 按类型、演员筛选的列表依赖关联表，单独失效
+    namespace = MOVIE_LINKS if filters.get("genre_id") is not None or filters.get("actress_id") is not None else MOVIES
+    try:
+        return await cached_response(
+            namespace,
+            {"view": "page", "cursor": cursor, "limit": limit, **filters},
+            load,
+            MovieCursorPage
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
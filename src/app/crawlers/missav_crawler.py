@@ -18,23 +18,61 @@ from app.utils.stealth_utils import StealthBrowser
 
 logger = logging.getLogger(__name__)
 
+
+class _RateLimiter:
+    """Spaces out navigations shared by all contexts of one crawler."""
+    
+    def __init__(self, interval: float, jitter: float = 0.5):
+        self.interval = interval
+        self.jitter = jitter
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def wait(self):
+        if self.interval <= 0:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
 class MissAVCrawler:
     """Crawler for MissAV website."""
     
     BASE_URL = 'https://missav.ai'
     ACTRESS_LIST_URL = f"{BASE_URL}/ja/actresses"
     
-    def __init__(self, headless: bool = False, max_pages: int = 1):
+    def __init__(
+        self,
+        headless: bool = False,
+        max_pages: int = 1,
+        concurrency: int = 1,
+        request_interval: float = 3.0,
+        progress_file: Optional[str] = None,
+    ):
         """Initialize the crawler.
         
         Args:
             headless: Whether to run browser in headless mode
             max_pages: Maximum number of pages to scrape
+            concurrency: Number of browser contexts loading list pages at once
+                (they share one browser); 1 keeps the sequential single-page mode
+            request_interval: Average seconds between page navigations across all
+                contexts in multi-context mode
+            progress_file: JSON file recording completed pages; when set,
+                scrape_all_pages resumes after the last completed page
         """
         self.headless = headless
         self.max_pages = max_pages
+        self.concurrency = max(1, concurrency)
+        self.progress_file = progress_file
         self.browser = None
         self.page = None
+        self._rate_limiter = _RateLimiter(request_interval)
     
     async def __aenter__(self):
         """Async context manager entry."""
@@ -63,25 +101,29 @@ class MissAVCrawler:
         delay = random.uniform(min_seconds, max_seconds)
         await asyncio.sleep(delay)
     
-    async def _scroll_page(self):
+    async def _scroll_page(self, page: Optional[Page] = None):
         """Scroll the page randomly to mimic human behavior."""
-        viewport_height = await self.page.evaluate('window.innerHeight')
+        page = page or self.page
+        viewport_height = await page.evaluate('window.innerHeight')
         scroll_amount = random.randint(
             int(viewport_height * 0.25),
             int(viewport_height * 0.75)
         )
-        await self.page.evaluate(f'window.scrollBy(0, {scroll_amount})')
+        await page.evaluate(f'window.scrollBy(0, {scroll_amount})')
         await self._random_delay(0.5, 1.5)
     
-    async def get_actress_list(self, page_num: int = 1) -> List[Dict]:
+    async def get_actress_list(self, page_num: int = 1, page: Optional[Page] = None) -> List[Dict]:
         """Get list of actresses from a specific page.
         
         Args:
             page_num: Page number to scrape (1-based)
+            page: Page to load it in (defaults to the main page)
             
         Returns:
             List of actress dictionaries with name, profile_url, etc.
         """
+        page = page or self.page
+        concurrent = self.concurrency > 1
         actresses = []
         is_first_page = page_num == 1
         url = f"{self.ACTRESS_LIST_URL}?page={page_num}" if not is_first_page else self.ACTRESS_LIST_URL
@@ -94,11 +136,12 @@ class MissAVCrawler:
             for attempt in range(max_retries):
                 try:
                     # Clear cache and cookies for the first page to avoid any stale data
-                    if is_first_page and attempt == 0:
-                        await self.page.context.clear_cookies()
+                    # (not in multi-context mode, where the contexts share the main context's clearance)
+                    if is_first_page and attempt == 0 and not concurrent:
+                        await page.context.clear_cookies()
                     
                     # Navigate to the URL with a fresh state
-                    await self.page.goto(
+                    await page.goto(
                         url, 
                         timeout=60000,
                         wait_until="domcontentloaded"
@@ -107,7 +150,7 @@ class MissAVCrawler:
                     # Wait for the content to load with multiple possible selectors
                     try:
                         await asyncio.wait_for(
-                            self.page.wait_for_selector(
+                            page.wait_for_selector(
                                 'div.grid.grid-cols-2.gap-4, div.grid.grid-cols-1.gap-4, div.actress-grid, div.actress-item',
                                 timeout=15000,
                                 state="attached"
@@ -116,12 +159,12 @@ class MissAVCrawler:
                         )
                     except (PlaywrightTimeoutError, asyncio.TimeoutError):
                         # If we can't find the grid, try to scroll down to trigger lazy loading
-                        await self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
                         await asyncio.sleep(2)  # Wait for any lazy loading
                         
                         # Try to find the grid again
                         try:
-                            await self.page.wait_for_selector(
+                            await page.wait_for_selector(
                                 'div.grid.grid-cols-2.gap-4, div.grid.grid-cols-1.gap-4, div.actress-grid, div.actress-item',
                                 timeout=5000,
                                 state="attached"
@@ -129,13 +172,13 @@ class MissAVCrawler:
                         except (PlaywrightTimeoutError, asyncio.TimeoutError):
                             if is_first_page:
                                 # If it's the first page and we still can't find the grid, try to reload
-                                await self.page.reload(wait_until="domcontentloaded")
+                                await page.reload(wait_until="domcontentloaded")
                                 await asyncio.sleep(2)
                             else:
                                 raise
                     
                     # Check if we're on a captcha page or error page
-                    title = await self.page.title()
+                    title = await page.title()
                     if any(term in title.lower() for term in ['captcha', 'error', 'not found', '404']):
                         raise Exception(f"Detected {title} page")
                     
@@ -148,13 +191,15 @@ class MissAVCrawler:
                     logger.warning(f"Attempt {attempt + 1} failed: {str(e)}, retrying...")
                     await self._random_delay(2, 5)
             
-            # Scroll randomly to mimic human behavior
-            for _ in range(random.randint(2, 5)):
-                await self._scroll_page()
-                await self._random_delay(0.5, 1.5)
+            # Scroll randomly to mimic human behavior (in multi-context mode the
+            # shared rate limiter already spaces out requests)
+            if not concurrent:
+                for _ in range(random.randint(2, 5)):
+                    await self._scroll_page(page)
+                    await self._random_delay(0.5, 1.5)
             
             # Get page content and parse with lxml
-            content = await self.page.content()
+            content = await page.content()
             tree = etree.HTML(content)
             
             # Initialize cards variable
@@ -193,7 +238,7 @@ class MissAVCrawler:
                 
                 for selector in playwright_selectors:
                     try:
-                        playwright_cards = await self.page.query_selector_all(selector)
+                        playwright_cards = await page.query_selector_all(selector)
                         if playwright_cards:
                             logger.debug(f"Found {len(playwright_cards)} cards with Playwright selector: {selector}")
                             # Convert Playwright elements to lxml elements
@@ -370,17 +415,67 @@ class MissAVCrawler:
             logger.error(f"Error scraping page {page_num}: {str(e)}", exc_info=True)
             return []
     
+    def _load_progress(self) -> Tuple[int, set]:
+        """Return (last contiguous completed page, completed pages beyond it)."""
+        if not self.progress_file or not os.path.exists(self.progress_file):
+            return 0, set()
+        try:
+            with open(self.progress_file, 'r', encoding='utf-8') as f:
+                progress = json.load(f)
+            return int(progress.get('last_completed_page', 0)), set(progress.get('completed_pages', []))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable progress file {self.progress_file}: {e}")
+            return 0, set()
+    
+    def _save_progress(self, last_completed: int, completed: set):
+        if not self.progress_file:
+            return
+        progress = {
+            'last_completed_page': last_completed,
+            'completed_pages': sorted(completed),
+            'updated_at': datetime.datetime.utcnow().isoformat(),
+        }
+        tmp_file = f"{self.progress_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(progress, f)
+        os.replace(tmp_file, self.progress_file)
+    
+    def _mark_completed(self, page_num: int, state: Dict):
+        """Record a finished page and advance the contiguous watermark."""
+        state['completed'].add(page_num)
+        while state['last_completed'] + 1 in state['completed']:
+            state['last_completed'] += 1
+            state['completed'].discard(state['last_completed'])
+        self._save_progress(state['last_completed'], state['completed'])
+    
     async def scrape_all_pages(self) -> AsyncGenerator[Tuple[int, List[Dict]], None]:
         """Scrape all pages of actresses.
         
+        With ``concurrency > 1`` pages are fanned out across several contexts of
+        the shared browser and yielded in completion order (not page order).
+        With a ``progress_file`` pages completed by a previous run are skipped.
+        
         Yields:
             Tuple of (page_number, list_of_actresses) for each page
         """
-        page_num = 1
+        last_completed, completed = self._load_progress()
+        state = {'last_completed': last_completed, 'completed': completed}
+        if last_completed or completed:
+            logger.info(f"Resuming after page {last_completed} ({len(completed)} later pages already done)")
+        
+        if self.concurrency > 1:
+            async for item in self._scrape_pages_concurrently(state):
+                yield item
+            return
+        
+        page_num = state['last_completed'] + 1
         has_more_pages = True
         
         try:
             while has_more_pages and page_num <= self.max_pages:
+                if page_num in state['completed']:
+                    page_num += 1
+                    continue
                 logger.info(f"Processing page {page_num}...")
                 actresses = await self.get_actress_list(page_num)
                 
@@ -389,6 +484,7 @@ class MissAVCrawler:
                     break
                     
                 yield page_num, actresses
+                self._mark_completed(page_num, state)
                 
                 # Check if there's a next page
                 if page_num >= self.max_pages:
@@ -405,7 +501,73 @@ class MissAVCrawler:
         except Exception as e:
             logger.error(f"Error in scrape_all_pages: {str(e)}", exc_info=True)
             raise
-
+    
+    async def _scrape_pages_concurrently(self, state: Dict) -> AsyncGenerator[Tuple[int, List[Dict]], None]:
+        """Fan page numbers out across contexts and yield pages as they complete.
+        
+        An empty page marks the end of the listing: no page after it is started,
+        pages after it that are already loading are still yielded.
+        """
+        pending = (
+            n for n in range(state['last_completed'] + 1, self.max_pages + 1)
+            if n not in state['completed']
+        )
+        stop_after = self.max_pages
+        results: asyncio.Queue = asyncio.Queue()
+        
+        async def worker(page: Page):
+            nonlocal stop_after
+            try:
+                for page_num in pending:
+                    if page_num > stop_after:
+                        break
+                    await self._rate_limiter.wait()
+                    logger.info(f"Processing page {page_num}...")
+                    actresses = await self.get_actress_list(page_num, page)
+                    if not actresses:
+                        if page_num <= stop_after:
+                            logger.warning(f"No actresses found on page {page_num}, stopping pagination")
+                            stop_after = page_num - 1
+                        continue
+                    await results.put((page_num, actresses))
+            finally:
+                await results.put(None)
+        
+        # The main page loads first; once it has a page (and with it the clearance
+        # cookies) the other contexts are opened with a copy of its cookies
+        pages = [self.page]
+        tasks = [asyncio.create_task(worker(self.page))]
+        try:
+            running = 1
+            while running:
+                item = await results.get()
+                if item is None:
+                    running -= 1
+                    continue
+                if len(pages) == 1:
+                    for _ in range(self.concurrency - 1):
+                        page = await self.browser.new_context_page()
+                        pages.append(page)
+                        tasks.append(asyncio.create_task(worker(page)))
+                        running += 1
+                page_num, actresses = item
+                yield page_num, actresses
+                self._mark_completed(page_num, state)
+            # Surface worker exceptions (get_actress_list itself logs and returns [])
+            for task in tasks:
+                task.result()
+        except Exception as e:
+            logger.error(f"Error in scrape_all_pages: {str(e)}", exc_info=True)
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for page in pages[1:]:
+                try:
+                    await page.context.close()
+                except Exception as e:
+                    logger.debug(f"Error closing context: {e}")
 
 async def main():
     """Main function to test the crawler."""
@@ -425,7 +587,12 @@ async def main():
     
     try:
         # Initialize crawler with headless=False so we can see what's happening
-        async with MissAVCrawler(headless=False, max_pages=2) as crawler:
+        async with MissAVCrawler(
+            headless=False,
+            max_pages=2,
+            concurrency=int(os.getenv("MISSAV_CONCURRENCY", "1")),
+            progress_file=os.path.join(output_dir, 'missav_actresses_progress.json'),
+        ) as crawler:
             all_actresses = []
             start_time = datetime.datetime.now()
             
@@ -434,7 +601,7 @@ async def main():
             logger.info("=" * 50)
             
             try:
-                async for page_num, actresses in enumerate(crawler.scrape_all_pages(), 1):
+                async for page_num, actresses in crawler.scrape_all_pages():
                     all_actresses.extend(actresses)
                     logger.info(f"Page {page_num}: Added {len(actresses)} actresses (Total: {len(all_actresses)})")
                     
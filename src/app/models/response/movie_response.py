@@ -23,6 +23,11 @@ class MovieResponse(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
 
+class MovieCursorPage(BaseModel):
+    """游标分页结果，next_cursor 为 None 表示没有下一页"""
+    items: List[MovieResponse] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
+
 class GenrePair(BaseModel):
     genre: GenreResponse
     name: str
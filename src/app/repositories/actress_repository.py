@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from common.db.entity.actress import Actress, ActressName
 from common.enums.enums import SupportedLanguage
+from common.db.search import actress_search_query
 from common.db.entity.movie_actress import MovieActress
 from common.db.entity.movie import Movie
 from app.repositories.base_repository import BaseRepositoryAsync
@@ -30,13 +31,7 @@ class ActressRepository(BaseRepositoryAsync[Actress, int]):
         self, name: str, language: SupportedLanguage = None, skip: int = 0, limit: int = 100
     ) -> List[Actress]:
         """根据名字搜索演员"""
-        query = select(Actress).join(ActressName, Actress.id == ActressName.actress_id)
-        
-        if language:
-            query = query.where(ActressName.language == language)
-        
-        query = query.where(ActressName.name.ilike(f"%{name}%"))
-        query = query.offset(skip).limit(limit)
+        query = actress_search_query(name, language).offset(skip).limit(limit)
         result = await self.db.execute(query)
         return result.scalars().all()
     
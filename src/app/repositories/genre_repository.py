@@ -7,6 +7,8 @@ from fastapi import Depends
 from common.db.entity.genre import Genre, GenreName
 from common.db.entity.movie import Movie
 from common.enums.enums import SupportedLanguage
+from common.db.search import genre_search_query
+from common.utils.dimension_cache import dimension_cache, GENRE
 from sqlalchemy.engine.result import Result
 from sqlalchemy import update
 
@@ -17,13 +19,33 @@ class GenreRepository(BaseRepositoryAsync[Genre, int]):
     async def get_by_name(
         self, name: str, language: SupportedLanguage = None
     ) -> Optional[Genre]:
-        """根据名称获取类型"""
-        query = select(Genre).join(GenreName, Genre.id == GenreName.genre_id).where(
+        """根据名称获取类型（先查名称字典缓存，只按主键取行）"""
+        await dimension_cache.ensure_loaded(self.db)
+        genre_id = dimension_cache.get_id(GENRE, name, language)
+        if genre_id is not None:
+            return await self.db.get(Genre, genre_id)
+
+        # 缓存加载后其他进程新增的名称
+        query = select(Genre, GenreName).join(GenreName, Genre.id == GenreName.genre_id).where(
             GenreName.name == name,
             GenreName.language == language if language else True
         )
         result: Result = await self.db.execute(query)
-        return result.scalars().first()
+        row = result.first()
+        if row is None:
+            return None
+        genre, genre_name = row
+        dimension_cache.add_name(GENRE, genre_name.name, genre.id, genre_name.language)
+        return genre
+
+    async def get_ids_by_names(
+        self, names: List[str], language: SupportedLanguage = None, create: bool = False
+    ) -> Dict[str, int]:
+        """批量把类型名称解析为ID，create 为 True 时一次性创建不存在的名称"""
+        ids = await dimension_cache.resolve_genres(self.db, names, language, create=create)
+        if create:
+            await self.db.commit()
+        return ids
         
     async def get_by_code(
         self, code: str
@@ -36,21 +58,23 @@ class GenreRepository(BaseRepositoryAsync[Genre, int]):
         Returns:
             Optional[Genre]: 找到的类型，如果没有找到则返回None
         """
+        await dimension_cache.ensure_loaded(self.db)
+        genre_id = dimension_cache.get_genre_id_by_code(code)
+        if genre_id is not None:
+            return await self.db.get(Genre, genre_id)
+
         query = select(Genre).filter(Genre.code == code)
         result : Result = await self.db.execute(query)
-        return result.scalars().first()
+        genre = result.scalars().first()
+        if genre is not None:
+            dimension_cache.add_genre_code(genre.code, genre.id)
+        return genre
     
     async def search_by_name(
         self, name: str, language: SupportedLanguage = None, skip: int = 0, limit: int = 100
     ) -> List[Genre]:
         """根据名称搜索类型"""
-        query = select(Genre).join(GenreName, Genre.id == GenreName.genre_id)
-        
-        if language:
-            query = query.filter(GenreName.language == language)
-        
-        query = query.filter(GenreName.name.ilike(f"%{name}%"))
-        query = query.offset(skip).limit(limit)
+        query = genre_search_query(name, language).offset(skip).limit(limit)
         result : Result = await self.db.execute(query)
         return result.scalars().all()
     
@@ -121,6 +145,8 @@ class GenreRepository(BaseRepositoryAsync[Genre, int]):
 
         await self.db.commit()
         await self.db.refresh(db_genre)
+        dimension_cache.add_name(GENRE, name, db_genre.id, language)
+        dimension_cache.add_genre_code(code, db_genre.id)
     
     async def get_popular(
         self, skip: int = 0, limit: int = 100
@@ -10,6 +10,7 @@ from common.db.entity.movie_info import MovieTitle
 from common.db.entity.actress import Actress, ActressName
 from common.db.entity.genre import Genre, GenreName
 from common.db.entity.download import Magnet, WatchUrl
+from common.db.search import movie_search_query
 from app.repositories.base_repository import BaseRepositoryAsync
 from app.config.database import get_db_session
 from fastapi import Depends
@@ -48,13 +49,7 @@ class MovieRepository(BaseRepositoryAsync[Movie, int]):
         self, title: str, language: SupportedLanguage = None, skip: int = 0, limit: int = 100
     ) -> List[Movie]:
         """根据标题搜索影片"""
-        query = select(Movie).join(MovieTitle, Movie.id == MovieTitle.movie_id)
-        
-        if language:
-            query = query.filter(MovieTitle.language == language)
-        
-        query = query.filter(MovieTitle.title.ilike(f"%{title}%"))
-        query = query.order_by(Movie.release_date.desc()).offset(skip).limit(limit)
+        query = movie_search_query(title, language).offset(skip).limit(limit)
         result = await self.db.execute(query)
         return result.scalars().all()
     
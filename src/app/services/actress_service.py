@@ -1,11 +1,12 @@
 from typing import List, Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from common.db.entity.actress import ActressName
+from common.db.entity.actress import ActressName, Actress as ActressRecord
 from common.enums.enums import SupportedLanguage
 from common.db.entity.movie import Movie
 from app.repositories.actress_repository import ActressRepository
 from app.repositories.movie_repository import MovieRepository
 from crawler.models.actress import Actress
+from common.utils.dimension_cache import dimension_cache, ACTRESS
 from .base_service import BaseService
 
 class ActressService(BaseService[Actress]):
@@ -53,12 +54,23 @@ class ActressService(BaseService[Actress]):
         )
     
     async def get_by_name(self, name: str, language: SupportedLanguage = None) -> Optional[Actress]:
-        """根据名字获取演员"""
-        return await self.actress_repository.get_by_name(
-            db=self.db,
-            name=name,
-            language=language
-        )
+        """根据名字获取演员（先查名称字典缓存，只按主键取行）"""
+        await dimension_cache.ensure_loaded(self.db)
+        actress_id = dimension_cache.get_id(ACTRESS, name, language)
+        if actress_id is None:
+            # 缓存加载后其他进程新增的名称
+            ids = await dimension_cache.resolve_actresses(self.db, [name], language, create=False)
+            actress_id = ids.get(name.strip()) if name else None
+        if actress_id is None:
+            return None
+        return await self.db.get(ActressRecord, actress_id)
+
+    async def get_ids_by_names(self, names: List[str], language: SupportedLanguage = None, create: bool = False) -> Dict[str, int]:
+        """批量把演员名称解析为ID，create 为 True 时一次性创建不存在的名称"""
+        ids = await dimension_cache.resolve_actresses(self.db, names, language, create=create)
+        if create:
+            await self.db.commit()
+        return ids
     
     async def create_with_names(self, names: List[Dict[str, Any]]) -> Actress:
         """创建演员及其多语言名称"""
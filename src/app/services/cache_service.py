@@ -0,0 +1,32 @@
+from typing import Any, Awaitable, Callable, Dict, Type
+from pydantic import BaseModel
+
+from common.utils.response_cache import response_cache
+
+
+def _dump(response_model: Type[BaseModel], obj: Any) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    return response_model.model_validate(obj).model_dump(mode="json")
+
+
+async def cached_response(
+    namespace: str,
+    params: Dict[str, Any],
+    loader: Callable[[], Awaitable[Any]],
+    response_model: Type[BaseModel],
+) -> Any:
+    """通过响应缓存读取服务结果
+
+    服务返回的 ORM 对象会先按 response_model 转成可 JSON 序列化的数据再缓存，
+    这样缓存的值不依赖数据库会话，也可以写入共享缓存。
+    """
+    async def load():
+        result = await loader()
+        if isinstance(result, (list, tuple)):
+            return [_dump(response_model, item) for item in result]
+        return _dump(response_model, result)
+
+    return await response_cache.get_or_load(namespace, params, load)
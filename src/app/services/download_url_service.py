@@ -3,6 +3,7 @@ from sqlalchemy import select
 from typing import List, Optional, Dict, Any
 from common.db.entity.download_url import DownloadUrl
 from common.db.entity.movie import Movie
+from common.utils.response_cache import response_cache
 from .base_service import BaseService
 
 
@@ -42,5 +43,6 @@ class DownloadUrlService(BaseService[DownloadUrl]):
 
         self.db.add(download_url)
         await self.db.commit()
+        await response_cache.invalidate_movies([movie_code])
         await self.db.refresh(download_url)
         return download_url
@@ -0,0 +1,107 @@
+import json
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import func, literal_column, or_, select, exists
+
+from app.config.database import async_session
+from common.db.entity.movie import Movie
+from common.db.entity.movie_info import MovieInfo
+
+logger = logging.getLogger(__name__)
+
+
+class ExportService:
+    """目录导出服务，以 NDJSON 流的形式导出电影及其标题、类型、演员和 m3u8 信息
+
+    使用服务端游标（yield_per）逐批读取，内存占用与目录大小无关。
+    导出期间自行持有数据库会话，因为流式响应会在请求依赖结束之后才发送完毕。
+    """
+
+    def __init__(self, yield_per: int = 1000):
+        self.yield_per = yield_per
+
+    def _build_query(self, since: Optional[datetime], after_id: Optional[int]):
+        # 每部电影的各语言详情聚合成一个 JSON 数组，避免一对多 join 打乱流式顺序
+        infos = (
+            select(
+                func.coalesce(
+                    func.json_agg(
+                        func.json_build_object(
+                            "language", MovieInfo.language,
+                            "title", MovieInfo.title,
+                            "genres", MovieInfo.genres,
+                            "actresses", MovieInfo.actresses,
+                            "m3u8_info", MovieInfo.m3u8_info,
+                        )
+                    ),
+                    literal_column("'[]'::json"),
+                )
+            )
+            .where(MovieInfo.code == Movie.code)
+            .scalar_subquery()
+        )
+
+        query = select(Movie, infos.label("infos"))
+        if since is not None:
+            query = query.where(
+                or_(
+                    Movie.updated_at >= since,
+                    exists().where(MovieInfo.code == Movie.code, MovieInfo.updated_at >= since),
+                )
+            )
+        if after_id is not None:
+            query = query.where(Movie.id > after_id)
+        return query.order_by(Movie.id).execution_options(yield_per=self.yield_per)
+
+    @staticmethod
+    def _to_record(movie: Movie, infos) -> dict:
+        if isinstance(infos, str):
+            infos = json.loads(infos)
+        infos = infos or []
+
+        genres, actresses = list(movie.genres or []), list(movie.actresses or [])
+        for info in infos:
+            genres.extend(g for g in info.get("genres") or [] if g not in genres)
+            actresses.extend(a for a in info.get("actresses") or [] if a not in actresses)
+
+        return {
+            "id": movie.id,
+            "code": movie.code,
+            "title": movie.title,
+            "titles": {info["language"]: info["title"] for info in infos if info.get("title")},
+            "release_date": movie.release_date,
+            "duration": movie.duration,
+            "likes": movie.likes,
+            "link": movie.link,
+            "cover_image_url": movie.cover_image_url,
+            "status": movie.status,
+            "genres": genres,
+            "actresses": actresses,
+            "m3u8": {info["language"]: info["m3u8_info"] for info in infos if info.get("m3u8_info")},
+            "updated_at": movie.updated_at.isoformat() if movie.updated_at else None,
+        }
+
+    async def stream_movies_ndjson(
+        self, since: Optional[datetime] = None, after_id: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """逐行产出 NDJSON
+
+        Args:
+            since: 只导出 movies 或 movie_info 在此时间之后更新过的电影
+            after_id: 只导出 id 大于该值的电影，用于中断后续传
+        """
+        count = 0
+        async with async_session() as session:
+            result = await session.stream(self._build_query(since, after_id))
+            async for partition in result.partitions():
+                lines = [
+                    json.dumps(self._to_record(movie, infos), ensure_ascii=False, default=str)
+                    for movie, infos in partition
+                ]
+                count += len(lines)
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+                # 已导出的对象不再需要，避免会话的 identity map 随导出增长
+                session.expunge_all()
+        logger.info(f"NDJSON export finished: {count} movies")
@@ -5,6 +5,7 @@ from sqlalchemy import select
 from common.enums.enums import SupportedLanguage
 from common.db.entity.genre import Genre, GenreName
 from common.db.entity.movie import Movie  # Import select for async queries
+from common.db.search import genre_search_query
 from .base_service import BaseService
 
 class GenreService(BaseService[Genre]):
@@ -12,12 +13,7 @@ class GenreService(BaseService[Genre]):
         super().__init__(db, Genre)
 
     async def search_by_name(self, name: str, language: SupportedLanguage = None, skip: int = 0, limit: int = 20) -> List[Genre]:
-        query = select(Genre).join(GenreName) # Use select instead of db.query
-
-        if language:
-            query = query.where(GenreName.language == language) # Use where instead of filter in SQLAlchemy 2.0+
-
-        query = query.where(GenreName.name.ilike(f"%{name}%")) # Use where instead of filter in SQLAlchemy 2.0+
+        query = genre_search_query(name, language) # 按名称和 code 的三元组相似度排序
         result = await self.db.execute(query.offset(skip).limit(limit)) # Use session.execute() and await
         return result.scalars().all() # Use .scalars().all() for async results
 
@@ -4,6 +4,7 @@ from sqlalchemy import select
 
 from common.db.entity.download import Magnet
 from common.db.entity.movie import Movie # Import select for async queries
+from common.utils.response_cache import response_cache, movie_detail_code
 from .base_service import BaseService
 
 class MagnetService(BaseService[Magnet]):
@@ -31,7 +32,10 @@ class MagnetService(BaseService[Magnet]):
             created_date=created_date
         )
 
+        # 提交后 movie 的属性会过期，先取出详情缓存的代码
+        detail_code = movie_detail_code(movie)
         self.db.add(magnet)
         await self.db.commit() # Await commit
+        await response_cache.invalidate_movies([detail_code])
         await self.db.refresh(magnet) # Await refresh
         return magnet
\ No newline at end of file
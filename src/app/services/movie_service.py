@@ -1,7 +1,7 @@
 import logging
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import date, timedelta
-from sqlalchemy import and_, select, desc, join
+from sqlalchemy import and_, select, desc, join, func
 
 from common.enums.enums import SupportedLanguage
 from common.db.entity.genre import Genre, GenreName
@@ -12,12 +12,22 @@ from common.db.entity.movie_info import MovieTitle
 from common.db.entity.actress import Actress, ActressName
 from common.db.entity.download import Magnet, WatchUrl
 from common.db.entity.download_url import DownloadUrl
+from common.db.search import movie_search_query
+from common.db.pagination import keyset_query, build_page
 from app.models.response.movie_response import MovieDetailResponse
 
 from .base_service import BaseService
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
+# keyset 分页支持的排序方式：(主排序表达式, 从一行取游标值的函数, 是否倒序, 主排序键的类型)
+_PAGE_ORDERINGS = {
+    "id": (None, lambda m: (m.id,), False, int),
+    "recent": (func.coalesce(Movie.release_date, ""), lambda m: (m.release_date or "", m.id), True, str),
+    "popular": (func.coalesce(Movie.likes, 0), lambda m: (m.likes or 0, m.id), True, int),
+}
+
+
 class MovieService(BaseService[Movie]):
     def __init__(self, db: AsyncSession):
         super().__init__(db, Movie)
@@ -150,13 +160,7 @@ class MovieService(BaseService[Movie]):
         skip: int = 0,
         limit: int = 20,
     ) -> List[Movie]:
-        query = select(Movie).join(MovieTitle, Movie.id == MovieTitle.movie_id)
-        query = query.where(MovieTitle.title.ilike(f"%{title}%"))
-
-        if language:
-            query = query.where(MovieTitle.language == language)
-
-        query = query.offset(skip).limit(limit)
+        query = movie_search_query(title, language).offset(skip).limit(limit)
         result = await self.db.execute(query)
         return result.scalars().all()
 
@@ -177,6 +181,46 @@ class MovieService(BaseService[Movie]):
         result = await self.db.execute(query.offset(skip).limit(limit))
         return result.scalars().all()
 
+    async def get_movies_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        ordering: str = "id",
+        days: Optional[int] = None,
+        genre_id: Optional[int] = None,
+        actress_id: Optional[int] = None,
+    ) -> Tuple[List[Movie], Optional[str]]:
+        """按游标分页获取电影
+
+        Args:
+            cursor: 上一页返回的 next_cursor，第一页传 None
+            limit: 每页数量
+            ordering: 排序方式，id（按 id 正序，适合遍历全库）/ recent / popular
+            days: 仅返回最近 days 天发行的电影
+            genre_id: 仅返回该类型的电影
+            actress_id: 仅返回该演员的电影
+
+        Returns:
+            (当前页电影, 下一页游标)
+
+        Raises:
+            ValueError: 游标无效
+        """
+        sort_expr, key, descending, sort_type = _PAGE_ORDERINGS[ordering]
+        query = select(Movie)
+        if days is not None:
+            cutoff_date = date.today() - timedelta(days=days)
+            query = query.where(Movie.release_date >= cutoff_date.isoformat())
+        if genre_id is not None:
+            query = query.join(MovieGenre, Movie.id == MovieGenre.movie_id).where(MovieGenre.genre_id == genre_id)
+        if actress_id is not None:
+            query = query.join(MovieActress, Movie.id == MovieActress.movie_id).where(MovieActress.actress_id == actress_id)
+
+        query = keyset_query(query, Movie.id, cursor, limit, sort_expr=sort_expr, descending=descending,
+                             sort_type=sort_type)
+        result = await self.db.execute(query)
+        return build_page(result.scalars().all(), limit, key)
+
     async def increment_likes(self, movie_id: int) -> Optional[Movie]:
         movie = await self.get_by_id(movie_id)
         if not movie:
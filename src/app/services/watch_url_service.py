@@ -4,6 +4,7 @@ from sqlalchemy import select, asc
 
 from common.db.entity.download import WatchUrl
 from common.db.entity.movie import Movie # Import select and asc
+from common.utils.response_cache import response_cache, movie_detail_code
 from .base_service import BaseService
 
 class WatchUrlService(BaseService[WatchUrl]):
@@ -29,7 +30,10 @@ class WatchUrlService(BaseService[WatchUrl]):
             index=index
         )
 
+        # 提交后 movie 的属性会过期，先取出详情缓存的代码
+        detail_code = movie_detail_code(movie)
         self.db.add(watch_url)
         await self.db.commit() # Await commit
+        await response_cache.invalidate_movies([detail_code])
         await self.db.refresh(watch_url) # Await refresh
         return watch_url
\ No newline at end of file
@@ -0,0 +1,506 @@
+"""
+浏览器会话池
+
+原来每个批次都用新的临时目录（cf_browser_{uuid}_{ts}）启动浏览器，
+每次都要从冷启动的 profile 重新通过 Cloudflare 验证，而且目录从不删除。
+
+这里维护一组固定的 profile 目录：
+- 批次结束时浏览器归还到池中保持运行，下个批次（包括 API 触发的任务）直接复用
+- 浏览器关闭后 profile 目录保留在磁盘上，cf_clearance 等 cookie 随之保留，
+  重新启动时不需要再次完成验证
+- 预热时间记录在 profile 目录的元数据文件中，超过有效期才重新预热
+- 按最后使用时间和总大小回收不再使用的 profile 目录，同时清理旧代码遗留的临时目录
+- 配置了代理池（PROXY_POOL）时，每个 profile 粘性地使用同一个上游代理，
+  浏览器使用期间持有该代理的租约（见 app.utils.proxy_pool）
+"""
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from loguru import logger
+
+from app.utils.drission_utils import CloudflareBypassBrowser
+from app.utils.proxy_pool import ProxyLease, ProxyPool, proxy_pool, redact
+
+try:
+    import fcntl
+except ImportError:  # Windows 上只做进程内互斥
+    fcntl = None
+
+WARMUP_URL = "https://missav.ai/"
+META_FILE = ".pool_meta.json"
+LOCK_FILE = ".pool.lock"
+
+# 旧代码创建、从未删除的临时 profile 目录
+LEGACY_PROFILE_GLOBS = [
+    (Path(tempfile.gettempdir()), "cf_browser_*"),
+    (Path.home() / ".cache", "cloudflare_bypass_browser_parallel_*"),
+]
+
+
+@dataclass
+class _Profile:
+    """一个 profile 目录及其上正在运行的浏览器"""
+    path: Path
+    lock_fd: Optional[int] = None
+    browser: Optional[CloudflareBypassBrowser] = None
+    headless: bool = True
+    in_use: bool = False
+    released_at: float = field(default_factory=time.time)
+    proxy: Optional[str] = None
+    proxy_lease: Optional[ProxyLease] = None
+
+
+class BrowserSessionPool:
+    """预热浏览器会话池
+
+    Args:
+        root_dir: profile 根目录
+        max_profiles: 同时存在的 profile（浏览器）上限
+        max_idle: 归还后保持运行的空闲浏览器上限，超出的浏览器关闭但保留 profile
+        idle_ttl: 空闲浏览器保持运行的最长秒数
+        clearance_ttl: 预热（Cloudflare 验证）有效期，超过后重新访问首页
+        gc_max_age_hours: 超过该时间未使用的 profile 目录会被删除
+        gc_max_total_mb: profile 目录总大小上限，超出时从最久未使用的开始删除
+        proxy_pool: 上游代理池，为 None 或没有配置代理时浏览器直连
+    """
+
+    def __init__(
+        self,
+        root_dir: Optional[str] = None,
+        max_profiles: int = 4,
+        max_idle: int = 2,
+        idle_ttl: float = 900.0,
+        clearance_ttl: float = 1800.0,
+        gc_max_age_hours: float = 72.0,
+        gc_max_total_mb: float = 2048.0,
+        proxy_pool: Optional[ProxyPool] = None,
+    ):
+        self.root_dir = Path(root_dir) if root_dir else Path(tempfile.gettempdir()) / "cf_browser_profiles"
+        self.max_profiles = max(1, max_profiles)
+        self.max_idle = max(0, max_idle)
+        self.idle_ttl = idle_ttl
+        self.clearance_ttl = clearance_ttl
+        self.gc_max_age_hours = gc_max_age_hours
+        self.gc_max_total_mb = gc_max_total_mb
+        self.proxy_pool = proxy_pool
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._profiles: Dict[str, _Profile] = {}
+        self._by_browser: Dict[int, _Profile] = {}
+        self._last_gc = 0.0
+
+    # ---------- 公共接口 ----------
+
+    def acquire(
+        self,
+        headless: bool = True,
+        wait_timeout: Optional[float] = None,
+        **browser_kwargs,
+    ) -> CloudflareBypassBrowser:
+        """取一个已预热的浏览器
+
+        优先复用空闲的运行中浏览器，其次在空闲 profile 上启动新浏览器，
+        profile 数量达到上限时等待其他调用方归还。
+
+        Args:
+            headless: 是否无头模式
+            wait_timeout: 等待空闲 profile 的最长秒数，None 表示一直等待
+            browser_kwargs: 传给 CloudflareBypassBrowser 的其他参数（load_images、timeout、wait_after_cf）
+
+        Raises:
+            TimeoutError: 等待超时
+        """
+        self.collect_garbage()
+        deadline = None if wait_timeout is None else time.monotonic() + wait_timeout
+
+        expired: List[CloudflareBypassBrowser] = []
+        with self._available:
+            while True:
+                profile = self._take_idle(headless, expired) or self._claim_profile()
+                if profile is not None:
+                    profile.in_use = True
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"等待浏览器会话超时（上限 {self.max_profiles} 个）")
+                self._available.wait(remaining)
+        # 关闭浏览器可能需要几秒，不在持有池锁时进行
+        for browser in expired:
+            _quit(browser)
+
+        try:
+            lease = self._lease_proxy(profile, deadline)
+        except TimeoutError:
+            with self._available:
+                profile.in_use = False
+                self._available.notify()
+            raise
+
+        try:
+            browser = self._ensure_browser(profile, headless, browser_kwargs, lease)
+        except Exception:
+            if lease is not None:
+                lease.release()
+            self._discard(profile)
+            raise
+
+        profile.proxy_lease = lease
+        browser.proxy_lease = lease
+        with self._lock:
+            self._by_browser[id(browser)] = profile
+        return browser
+
+    def release(self, browser: Optional[CloudflareBypassBrowser], healthy: bool = True) -> None:
+        """归还浏览器
+
+        Args:
+            browser: acquire 返回的浏览器；不是池中的浏览器时直接关闭
+            healthy: 为 False 时关闭浏览器（profile 仍保留）
+        """
+        if browser is None:
+            return
+        with self._lock:
+            profile = self._by_browser.pop(id(browser), None)
+        if profile is None:
+            _quit(browser)
+            return
+
+        lease, profile.proxy_lease = profile.proxy_lease, None
+        browser.proxy_lease = None
+        if lease is not None:
+            lease.release()
+
+        keep = healthy and _is_alive(browser)
+        _write_meta(profile.path, _read_meta(profile.path))
+        with self._available:
+            idle_running = sum(
+                1 for p in self._profiles.values() if not p.in_use and p.browser is not None
+            )
+            if not keep or idle_running >= self.max_idle:
+                profile.browser = None
+            profile.in_use = False
+            profile.released_at = time.time()
+            self._available.notify()
+        if profile.browser is None:
+            _quit(browser)
+
+    @contextmanager
+    def session(self, headless: bool = True, **browser_kwargs) -> Iterator[CloudflareBypassBrowser]:
+        """acquire / release 的上下文管理器，块内抛出异常时浏览器不会放回运行池"""
+        browser = self.acquire(headless=headless, **browser_kwargs)
+        healthy = True
+        try:
+            yield browser
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            self.release(browser, healthy=healthy)
+
+    def close_idle(self) -> None:
+        """关闭所有空闲浏览器，profile 保留在磁盘上"""
+        with self._lock:
+            idle = [p for p in self._profiles.values() if not p.in_use and p.browser is not None]
+            browsers = [p.browser for p in idle]
+            for p in idle:
+                p.browser = None
+        for browser in browsers:
+            _quit(browser)
+
+    def stats(self) -> Dict[str, int]:
+        """池的使用情况；各代理的健康状况见 proxy_pool.stats()"""
+        with self._lock:
+            return {
+                "profiles": len(self._profiles),
+                "in_use": sum(1 for p in self._profiles.values() if p.in_use),
+                "idle_running": sum(
+                    1 for p in self._profiles.values() if not p.in_use and p.browser is not None
+                ),
+            }
+
+    def collect_garbage(self, force: bool = False) -> int:
+        """回收过期和超出大小预算的 profile 目录，返回删除的目录数
+
+        正在被本进程或其他进程使用（持有锁）的目录不会被删除。
+        """
+        now = time.time()
+        if not force and now - self._last_gc < 600:
+            return 0
+        self._last_gc = now
+
+        candidates = []
+        if self.root_dir.exists():
+            for path in self.root_dir.iterdir():
+                if path.is_dir() and str(path) not in self._profiles:
+                    candidates.append(path)
+        # 默认根目录（临时目录下的 cf_browser_profiles）本身也匹配旧目录的模式，
+        # 根目录、根目录下的目录以及包含根目录的目录都不能当作遗留目录删除
+        root = self.root_dir.resolve()
+        for base, pattern in LEGACY_PROFILE_GLOBS:
+            if base.exists():
+                for path in base.glob(pattern):
+                    resolved = path.resolve()
+                    if not path.is_dir() or resolved == root or root in resolved.parents or resolved in root.parents:
+                        continue
+                    candidates.append(path)
+
+        max_age = self.gc_max_age_hours * 3600
+        entries = []
+        removed = 0
+        for path in candidates:
+            last_used = _last_used(path)
+            if now - last_used > max_age:
+                if _remove_unlocked(path):
+                    removed += 1
+                continue
+            entries.append((last_used, path, _dir_size(path)))
+
+        budget = self.gc_max_total_mb * 1024 * 1024
+        total = sum(size for _, _, size in entries)
+        for last_used, path, size in sorted(entries):
+            if total <= budget:
+                break
+            if _remove_unlocked(path):
+                total -= size
+                removed += 1
+
+        if removed:
+            logger.info(f"🧹 回收了 {removed} 个浏览器 profile 目录")
+        return removed
+
+    # ---------- 内部实现 ----------
+
+    def _take_idle(self, headless: bool, expired: List[CloudflareBypassBrowser]) -> Optional[_Profile]:
+        """取一个空闲 profile，优先已在运行且模式相同的浏览器
+
+        空闲超过 idle_ttl 的浏览器从 profile 上摘下放入 expired，由调用方在释放锁后关闭。
+        """
+        now = time.time()
+        idle = [p for p in self._profiles.values() if not p.in_use]
+        for p in idle:
+            if p.browser is not None and now - p.released_at > self.idle_ttl:
+                expired.append(p.browser)
+                p.browser = None
+        running = [p for p in idle if p.browser is not None and p.headless == headless]
+        if running:
+            return max(running, key=lambda p: p.released_at)
+        return idle[0] if idle else None
+
+    def _claim_profile(self) -> Optional[_Profile]:
+        """分配一个新的 profile 目录，优先复用磁盘上已有（已验证过）的目录"""
+        if len(self._profiles) >= self.max_profiles:
+            return None
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        existing = sorted(
+            (p for p in self.root_dir.glob("profile_*") if p.is_dir() and str(p) not in self._profiles),
+            key=_last_used,
+            reverse=True,
+        )
+        names = {p.name for p in self.root_dir.glob("profile_*")}
+        fresh = (self.root_dir / f"profile_{i}" for i in range(1000) if f"profile_{i}" not in names)
+
+        for path in [*existing, *fresh]:
+            path.mkdir(parents=True, exist_ok=True)
+            lock_fd = _try_lock(path)
+            if lock_fd is False:
+                continue  # 被其他进程占用
+            profile = _Profile(path=path, lock_fd=lock_fd)
+            self._profiles[str(path)] = profile
+            return profile
+        return None
+
+    def _lease_proxy(self, profile: _Profile, deadline: Optional[float]) -> Optional[ProxyLease]:
+        """按 profile 名粘性地取一个上游代理，没有配置代理池时返回 None"""
+        if self.proxy_pool is None or not self.proxy_pool.enabled:
+            return None
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        return self.proxy_pool.acquire(key=profile.path.name, timeout=remaining)
+
+    def _ensure_browser(
+        self, profile: _Profile, headless: bool, browser_kwargs, lease: Optional[ProxyLease] = None
+    ) -> CloudflareBypassBrowser:
+        proxy = lease.url if lease is not None else None
+        browser = profile.browser
+        if browser is not None and (
+            profile.headless != headless or profile.proxy != proxy or not _is_alive(browser)
+        ):
+            _quit(browser)
+            browser = profile.browser = None
+
+        if browser is None:
+            logger.info(f"在 profile {profile.path.name} 上启动浏览器（代理: {redact(proxy)}）")
+            browser = CloudflareBypassBrowser(
+                headless=headless,
+                user_data_dir=str(profile.path),
+                proxy=proxy,
+                load_images=browser_kwargs.get("load_images", False),
+                timeout=browser_kwargs.get("timeout", 30),
+                wait_after_cf=browser_kwargs.get("wait_after_cf", 3),
+            )
+            profile.browser = browser
+            profile.headless = headless
+            profile.proxy = proxy
+        else:
+            # 复用的浏览器按本次调用方的参数调整等待时间
+            if "timeout" in browser_kwargs:
+                browser.timeout = browser_kwargs["timeout"]
+            if "wait_after_cf" in browser_kwargs:
+                browser.wait_after_cf = browser_kwargs["wait_after_cf"]
+
+        # profile 中的 clearance cookie 仍在有效期内时不再访问首页；
+        # cf_clearance 与出口 IP 绑定，换了代理需要重新验证
+        meta = _read_meta(profile.path)
+        if (time.time() - meta.get("warmed_at", 0) > self.clearance_ttl
+                or meta.get("proxy", "direct") != redact(proxy)):
+            browser.proxy_lease = lease
+            meta["proxy"] = redact(proxy)
+            self._warm_up(profile, browser, meta)
+        return browser
+
+    def _warm_up(self, profile: _Profile, browser: CloudflareBypassBrowser, meta: dict) -> None:
+        started = time.time()
+        browser.get(WARMUP_URL, timeout=30, wait_for_full_load=True)
+        cookies = {}
+        try:
+            cookies = browser.get_cookies() or {}
+        except Exception:
+            pass
+        has_clearance = any("cf_clearance" in str(name) for name in _cookie_names(cookies))
+        meta.update(warmed_at=time.time(), has_clearance=has_clearance)
+        _write_meta(profile.path, meta)
+        logger.info(
+            f"profile {profile.path.name} 预热完成，耗时 {time.time() - started:.1f} 秒"
+            f"{'，已获得 cf_clearance' if has_clearance else ''}"
+        )
+
+    def _discard(self, profile: _Profile) -> None:
+        """启动失败的 profile 从池中移除，释放锁"""
+        with self._available:
+            self._profiles.pop(str(profile.path), None)
+            browser, profile.browser = profile.browser, None
+            _unlock(profile.lock_fd)
+            self._available.notify()
+        if browser is not None:
+            _quit(browser)
+
+
+# ---------- 工具函数 ----------
+
+def _quit(browser) -> None:
+    try:
+        browser.quit()
+    except Exception as e:
+        logger.warning(f"关闭浏览器时出错: {e}")
+
+
+def _is_alive(browser) -> bool:
+    if browser is None or getattr(browser, "page", None) is None:
+        return False
+    try:
+        _ = browser.page.url
+        return True
+    except Exception:
+        return False
+
+
+def _cookie_names(cookies) -> List[str]:
+    if isinstance(cookies, dict):
+        return list(cookies.keys())
+    return [c.get("name", "") for c in cookies if isinstance(c, dict)]
+
+
+def _read_meta(path: Path) -> dict:
+    try:
+        with open(path / META_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(path: Path, meta: dict) -> None:
+    meta["last_used"] = time.time()
+    try:
+        with open(path / META_FILE, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    except OSError as e:
+        logger.warning(f"写入 profile 元数据失败: {e}")
+
+
+def _last_used(path: Path) -> float:
+    meta = _read_meta(path)
+    if meta.get("last_used"):
+        return meta["last_used"]
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _try_lock(path: Path):
+    """对 profile 目录加独占锁，返回文件描述符；已被占用返回 False；平台不支持返回 None"""
+    if fcntl is None:
+        return None
+    fd = os.open(str(path / LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return fd
+    except OSError:
+        os.close(fd)
+        return False
+
+
+def _unlock(fd) -> None:
+    if fd is None or fd is False:
+        return
+    try:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def _remove_unlocked(path: Path) -> bool:
+    """目录未被占用时删除"""
+    lock_fd = _try_lock(path)
+    if lock_fd is False:
+        return False
+    try:
+        shutil.rmtree(path, ignore_errors=True)
+        return not path.exists()
+    finally:
+        if lock_fd is not None:
+            try:
+                os.close(lock_fd)
+            except OSError:
+                pass
+
+
+browser_session_pool = BrowserSessionPool(
+    root_dir=os.getenv("BROWSER_PROFILE_ROOT"),
+    max_profiles=int(os.getenv("BROWSER_PROFILE_POOL_SIZE", "4")),
+    max_idle=int(os.getenv("BROWSER_POOL_MAX_IDLE", "2")),
+    idle_ttl=float(os.getenv("BROWSER_POOL_IDLE_TTL_SECONDS", "900")),
+    clearance_ttl=float(os.getenv("BROWSER_CLEARANCE_TTL_SECONDS", "1800")),
+    gc_max_age_hours=float(os.getenv("BROWSER_PROFILE_MAX_AGE_HOURS", "72")),
+    gc_max_total_mb=float(os.getenv("BROWSER_PROFILE_MAX_TOTAL_MB", "2048")),
+    proxy_pool=proxy_pool,
+)
@@ -49,6 +49,8 @@ class CloudflareBypassBrowser:
         self._cf_challenge_solved = False  # 标记是否已经解决了Cloudflare挑战
         self._last_html = None  # 缓存最后一次获取的HTML
         self.wait = self  # 添加wait属性指向self，使browser.wait可用
+        self.proxy_lease = None  # 代理池租约（由 BrowserSessionPool 设置），用于限速和上报代理健康状况
+        self._last_outcome = None
         
         # 立即初始化浏览器
         self._init_browser()
@@ -199,6 +201,28 @@ class CloudflareBypassBrowser:
     def get(self, url: str, wait_for_cf: bool = True, timeout: int = 60, wait_for_full_load: bool = True, dom_ready_timeout: int = 10) -> bool:
         """
         打开URL并处理Cloudflare挑战
+
+        设置了代理池租约时，访问前按代理的频率限制等待，访问后把结果
+        （ok / challenge / blocked / error）上报给代理池用于健康评分。
+        参数和返回值同 _open。
+        """
+        if not self.page:
+            return False
+        lease = self.proxy_lease
+        if lease is not None:
+            lease.wait_turn()
+        self._last_outcome = None
+        success = self._open(url, wait_for_cf, timeout, wait_for_full_load, dom_ready_timeout)
+        if lease is not None:
+            outcome = self._last_outcome or "ok"
+            if outcome == "ok" and not success:
+                outcome = "error"
+            lease.report(outcome)
+        return success
+
+    def _open(self, url: str, wait_for_cf: bool = True, timeout: int = 60, wait_for_full_load: bool = True, dom_ready_timeout: int = 10) -> bool:
+        """
+        打开URL并处理Cloudflare挑战
         
         Args:
             url: 要访问的URL
@@ -320,12 +344,14 @@ class CloudflareBypassBrowser:
             # 检查是否有 Cloudflare 挑战
             if self._is_cloudflare_challenge():
                 logger.info("检测到 Cloudflare 挑战，等待解决中...")
+                self._last_outcome = "challenge"
                 
                 if wait_for_cf:
                     # 等待 Cloudflare 挑战完成
                     cf_passed = self._wait_for_cloudflare_challenge()
                     if not cf_passed:
                         logger.error("Cloudflare 挑战解决失败")
+                        self._last_outcome = "blocked"
                         return False
                     logger.info("Cloudflare 挑战已解决，继续加载页面")
                 else:
@@ -368,6 +394,7 @@ class CloudflareBypassBrowser:
                 
         except Exception as e:
             logger.error(f"访问 {url} 时出错: {str(e)}")
+            self._last_outcome = "error"
             # 即使出错也返回true，允许用户手动解决
             return True
     
@@ -701,15 +728,22 @@ class CloudflareBypassBrowser:
                 except:
                     pass
             
-            # 关闭当前浏览器
-            if self.browser:
+            # 保存cookie（含cf_clearance），重启后写回，避免重新通过Cloudflare验证
+            cookies = []
+            if self.page:
+                try:
+                    cookies = list(self.page.cookies(all_domains=True, all_info=True))
+                except Exception as e:
+                    logger.warning(f"导出cookie失败: {e}")
+            
+            # 关闭当前浏览器，释放所有渲染进程的内存
+            if self.page:
                 try:
-                    self.browser.quit()
+                    self.page.quit()
                 except:
                     pass
             
             # 重置状态
-            self.browser = None
             self.page = None
             self._cf_challenge_solved = False
             
@@ -719,10 +753,18 @@ class CloudflareBypassBrowser:
             # 重新初始化浏览器
             self._init_browser()
             
-            if not self.browser or not self.page:
+            if not self.page:
                 logger.error("浏览器重启失败：无法创建新实例")
                 return False
             
+            if cookies:
+                try:
+                    self.page.set.cookies(cookies)
+                    self._cf_challenge_solved = any(c.get('name') == 'cf_clearance' for c in cookies)
+                    logger.info(f"已恢复 {len(cookies)} 个cookie")
+                except Exception as e:
+                    logger.warning(f"恢复cookie失败: {e}")
+            
             # 如果有之前的URL，尝试重新访问
             if current_url and current_url != "data:,":
                 try:
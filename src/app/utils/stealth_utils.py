@@ -12,6 +12,13 @@ from playwright_stealth import stealth_async
 from loguru import logger
 
 
+# The browser is Chromium, so only Chrome user agents keep the header consistent with the engine
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+]
+
+
 class StealthBrowser:
     """
     A class to handle browser automation with stealth techniques to avoid detection.
@@ -31,6 +38,8 @@ class StealthBrowser:
         self.context = None
         self.page = None
         self.playwright = None
+        # Main context fingerprint (user agent, viewport, locale, geolocation), reused by new contexts
+        self.fingerprint = None
     
     async def __aenter__(self):
         """Async context manager entry."""
@@ -65,54 +74,8 @@ class StealthBrowser:
                 launch_options['proxy'] = self.proxy
             
             self.browser = await self.playwright.chromium.launch(**launch_options)
-            
-            # Create a new context with viewport settings
-            self.context = await self.browser.new_context(
-                viewport={
-                    'width': random.randint(1366, 1920),
-                    'height': random.randint(768, 1080),
-                    'device_scale_factor': 1,
-                },
-                locale='en-US',
-                timezone_id='America/New_York',
-                permissions=['geolocation'],
-                color_scheme='light',
-            )
-            
-            # Create a new page
-            self.page = await self.context.new_page()
-            
-            # Apply stealth settings
-            await stealth_async(self.page)
-            
-            # Set a random user agent
-            user_agents = [
-                'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0',
-                'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15',
-            ]
-            await self.page.set_extra_http_headers({
-                'User-Agent': random.choice(user_agents)
-            })
-            
-            # Set random viewport size
-            await self.page.set_viewport_size({
-                'width': random.randint(1366, 1920),
-                'height': random.randint(768, 1080)
-            })
-            
-            # Set random geolocation
-            await self.context.grant_permissions(['geolocation'])
-            await self.context.set_geolocation({
-                'latitude': random.uniform(-90, 90),
-                'longitude': random.uniform(-180, 180),
-                'accuracy': random.uniform(0, 1)
-            })
-            
-            # Set timezone via CDP session (if needed)
-            # Note: Timezone emulation is not directly supported in Playwright
-            # Consider using a proxy service if timezone emulation is critical
+            self.fingerprint = self._random_fingerprint()
+            self.context, self.page = await self._new_stealth_page()
             
             logger.info("Browser started with stealth configuration")
             return self.page
@@ -122,6 +85,71 @@ class StealthBrowser:
             await self.close()
             raise
     
+    async def new_context_page(self, share_cookies: bool = True) -> Page:
+        """
+        Open another isolated context (with its own page) on the same browser.
+        
+        The new context reuses the main context's user agent, viewport, locale and geolocation.
+        
+        Args:
+            share_cookies: Copy the main context's cookies (e.g. cf_clearance) into the new context
+            
+        Returns:
+            The new context's page; close it with ``await page.context.close()``
+        """
+        context, page = await self._new_stealth_page()
+        if share_cookies and self.context is not None:
+            cookies = await self.context.cookies()
+            if cookies:
+                await context.add_cookies(cookies)
+        return page
+    
+    @staticmethod
+    def _random_fingerprint() -> Dict[str, Any]:
+        """Pick the user agent, viewport, locale and geolocation once per browser."""
+        return {
+            'user_agent': random.choice(USER_AGENTS),
+            'viewport': {
+                'width': random.randint(1366, 1920),
+                'height': random.randint(768, 1080),
+            },
+            'locale': 'en-US',
+            'timezone_id': 'America/New_York',
+            'geolocation': {
+                'latitude': random.uniform(-90, 90),
+                'longitude': random.uniform(-180, 180),
+                'accuracy': random.uniform(0, 1),
+            },
+        }
+    
+    async def _new_stealth_page(self):
+        """Create a context and page with the stealth settings and the browser's fingerprint applied."""
+        fingerprint = self.fingerprint or self._random_fingerprint()
+        
+        # Create a new context with the fingerprint's user agent, viewport and locale
+        context = await self.browser.new_context(
+            user_agent=fingerprint['user_agent'],
+            viewport=fingerprint['viewport'],
+            device_scale_factor=1,
+            locale=fingerprint['locale'],
+            timezone_id=fingerprint['timezone_id'],
+            permissions=['geolocation'],
+            geolocation=fingerprint['geolocation'],
+            color_scheme='light',
+        )
+        
+        # Create a new page
+        page = await context.new_page()
+        
+        # Apply stealth settings
+        await stealth_async(page)
+        
+        # Set timezone via CDP session (if needed)
+        # Note: Timezone emulation is not directly supported in Playwright
+        # Consider using a proxy service if timezone emulation is critical
+        
+        return context, page
+    
     async def close(self):
         """Close the browser and release resources."""
         try:
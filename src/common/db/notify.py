@@ -0,0 +1,116 @@
+"""基于 Postgres LISTEN/NOTIFY 的新电影通知
+
+movies 表的 AFTER INSERT 语句级触发器在插入了 status='new' 的电影时
+向 MOVIE_INSERTED_CHANNEL 发送通知。feed、genre 等各处的插入都会触发，
+不需要在每个写入点各自通知；同一事务内的多次通知会被 Postgres 合并为一次。
+
+详情爬取任务 LISTEN 该频道，有新电影时立即醒来，空闲时不再轮询数据库。
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import asyncpg
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+MOVIE_INSERTED_CHANNEL = "movie_inserted"
+
+# 与 schema.sql 中的定义保持一致
+SETUP_SQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION notify_movie_inserted() RETURNS trigger AS $$
+    BEGIN
+        IF EXISTS (SELECT 1 FROM inserted_movies WHERE status = 'new') THEN
+            PERFORM pg_notify('{MOVIE_INSERTED_CHANNEL}', '');
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS movies_notify_inserted ON movies",
+    """
+    CREATE TRIGGER movies_notify_inserted
+        AFTER INSERT ON movies
+        REFERENCING NEW TABLE AS inserted_movies
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION notify_movie_inserted()
+    """,
+]
+
+
+async def ensure_movie_notify_trigger(session) -> bool:
+    """安装（或更新）新电影通知触发器，失败时返回 False"""
+    try:
+        for statement in SETUP_SQL:
+            await session.execute(text(statement))
+        await session.commit()
+        return True
+    except Exception as e:
+        logger.warning(f"安装新电影通知触发器失败: {e}")
+        await session.rollback()
+        return False
+
+
+def asyncpg_dsn(database_url: str) -> str:
+    """把 SQLAlchemy 的 URL 转成 asyncpg 可用的 DSN"""
+    return database_url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+class PgNotificationListener:
+    """在一条独立的 asyncpg 连接上 LISTEN 一个频道
+
+    收到通知或连接断开时都会唤醒等待方（断开期间可能漏掉通知，唤醒后由调用方重新查询），
+    下一次 wait() 时自动重连。
+    """
+
+    def __init__(self, dsn: str, channel: str, reconnect_delay: float = 5.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._conn: Optional[asyncpg.Connection] = None
+        self._event = asyncio.Event()
+
+    async def start(self) -> bool:
+        """建立连接并开始监听，失败时返回 False"""
+        try:
+            self._conn = await asyncpg.connect(self.dsn)
+            await self._conn.add_listener(self.channel, self._on_notify)
+            self._conn.add_termination_listener(self._on_terminate)
+            logger.info(f"开始监听频道 {self.channel}")
+            return True
+        except Exception as e:
+            logger.warning(f"LISTEN {self.channel} 失败: {e}")
+            await self.close()
+            return False
+
+    async def wait(self, timeout: float) -> bool:
+        """等待通知，收到通知返回 True，超时返回 False"""
+        if self._conn is None or self._conn.is_closed():
+            if not await self.start():
+                await asyncio.sleep(min(timeout, self.reconnect_delay))
+                return False
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._event.clear()
+
+    async def close(self):
+        if self._conn is not None:
+            try:
+                await self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self._event.set()
+
+    def _on_terminate(self, connection):
+        logger.warning(f"频道 {self.channel} 的监听连接已断开，稍后重连")
+        self._event.set()
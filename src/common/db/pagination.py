@@ -0,0 +1,101 @@
+"""Keyset（游标）分页工具
+
+游标是 (排序键, id) 的 base64 编码，对客户端不透明。
+下一页的条件写成行比较 `(排序键, id) < (上一页最后一行的排序键, id)`，
+配合 schema.sql 中对应的复合索引，深分页不需要扫描并丢弃前面的行，
+爬虫插入新数据时也不会出现 offset 窗口漂移导致的重复或遗漏。
+"""
+
+import base64
+import json
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+
+
+def encode_cursor(*values: Any) -> str:
+    """把排序键编码成游标字符串"""
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[List[Any]]:
+    """解析游标，空游标表示第一页
+
+    Raises:
+        ValueError: 游标格式不正确
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception as e:
+        raise ValueError(f"无效的游标: {cursor}") from e
+    if not isinstance(values, list) or not values:
+        raise ValueError(f"无效的游标: {cursor}")
+    return values
+
+
+def _check_value(value: Any, expected: type, cursor: str) -> None:
+    # bool 是 int 的子类，JSON 中的 true/false 不能当作 id
+    if isinstance(value, bool) or not isinstance(value, expected):
+        raise ValueError(f"无效的游标: {cursor}")
+
+
+def keyset_query(query: Select, id_column, cursor: Optional[str], limit: int,
+                 sort_expr=None, descending: bool = True, sort_type: type = (int, float, str)) -> Select:
+    """为查询加上游标条件、排序和 limit
+
+    多取一行用来判断是否还有下一页，配合 build_page 使用。
+
+    Args:
+        query: 基础查询
+        id_column: 唯一且稳定的主键列，作为排序的第二关键字
+        cursor: 上一页返回的 next_cursor，第一页传 None 或空字符串
+        limit: 每页数量
+        sort_expr: 主排序表达式，为 None 时仅按 id 排序
+        descending: 是否倒序
+        sort_type: 游标中主排序键应有的类型
+
+    Raises:
+        ValueError: 游标无效（包括值的类型与排序键不符），不会把错误类型的值交给数据库
+    """
+    values = decode_cursor(cursor)
+    if values:
+        _check_value(values[-1], int, cursor)
+    if sort_expr is None:
+        if values:
+            query = query.where(id_column < values[-1] if descending else id_column > values[-1])
+        order_by = [id_column.desc() if descending else id_column.asc()]
+    else:
+        if values:
+            if len(values) != 2:
+                raise ValueError(f"无效的游标: {cursor}")
+            _check_value(values[0], sort_type, cursor)
+            row, last = tuple_(sort_expr, id_column), tuple_(*values)
+            query = query.where(row < last if descending else row > last)
+        if descending:
+            order_by = [sort_expr.desc(), id_column.desc()]
+        else:
+            order_by = [sort_expr.asc(), id_column.asc()]
+    return query.order_by(*order_by).limit(limit + 1)
+
+
+def build_page(rows: Sequence[Any], limit: int,
+               key: Callable[[Any], Tuple[Any, ...]]) -> Tuple[List[Any], Optional[str]]:
+    """截取一页数据并生成下一页游标
+
+    Args:
+        rows: keyset_query 的查询结果（最多 limit + 1 行）
+        limit: 每页数量
+        key: 从一行数据中取出游标值，需与 keyset_query 的排序键一致
+
+    Returns:
+        (当前页数据, 下一页游标)，没有下一页时游标为 None
+    """
+    items = list(rows[:limit])
+    if len(rows) <= limit or not items:
+        return items, None
+    return items, encode_cursor(*key(items[-1]))
@@ -0,0 +1,125 @@
+"""基于 pg_trgm 的模糊搜索查询构建
+
+所有匹配条件都写成 `col ILIKE '%term%' OR col % term` 的形式，
+两种运算符都可以使用 schema.sql 中的 gin_trgm_ops 索引，不再顺序扫描。
+结果按 similarity() 从高到低排序，同分时按 id 倒序，保证分页稳定。
+
+日文/中文标题依赖数据库使用 UTF-8 且非 C 的 locale，
+此时 pg_trgm 会把 CJK 字符当作单词字符生成三元组。
+"""
+
+from typing import Optional
+
+from sqlalchemy import func, or_, select, union_all
+from sqlalchemy.sql import Select
+
+from common.db.entity.actress import Actress, ActressName
+from common.db.entity.genre import Genre, GenreName
+from common.db.entity.movie import Movie
+from common.db.entity.movie_info import MovieInfo
+
+
+def escape_like(term: str) -> str:
+    """转义 LIKE 通配符"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def trigram_match(column, term: str):
+    """子串匹配或三元组相似匹配，均可走 GIN 三元组索引"""
+    return or_(
+        column.ilike(f"%{escape_like(term)}%", escape="\\"),
+        column.op("%")(term),
+    )
+
+
+def trigram_score(column, term: str):
+    return func.coalesce(func.similarity(column, term), 0)
+
+
+def movie_search_query(term: str, language: Optional[str] = None) -> Select:
+    """按标题（movies / movie_info）和番号搜索电影，按相关度排序"""
+    term = term.strip()
+    info_matches = select(
+        MovieInfo.code.label("code"),
+        trigram_score(MovieInfo.title, term).label("score"),
+    ).where(trigram_match(MovieInfo.title, term))
+    if language:
+        info_matches = info_matches.where(MovieInfo.language == getattr(language, "value", language))
+
+    movie_matches = select(
+        Movie.code.label("code"),
+        func.greatest(
+            trigram_score(Movie.title, term),
+            trigram_score(Movie.code, term),
+        ).label("score"),
+    ).where(or_(trigram_match(Movie.title, term), trigram_match(Movie.code, term)))
+
+    matches = union_all(info_matches, movie_matches).subquery()
+    ranked = (
+        select(matches.c.code, func.max(matches.c.score).label("score"))
+        .group_by(matches.c.code)
+        .subquery()
+    )
+    return (
+        select(Movie)
+        .join(ranked, Movie.code == ranked.c.code)
+        .order_by(ranked.c.score.desc(), Movie.id.desc())
+    )
+
+
+def genre_search_query(term: str, language: Optional[str] = None) -> Select:
+    """按多语言名称和 code 搜索类型，按相关度排序"""
+    term = term.strip()
+    name_matches = select(
+        GenreName.genre_id.label("genre_id"),
+        trigram_score(GenreName.name, term).label("score"),
+    ).where(trigram_match(GenreName.name, term))
+    if language:
+        name_matches = name_matches.where(GenreName.language == language)
+
+    code_matches = select(
+        Genre.id.label("genre_id"),
+        trigram_score(Genre.code, term).label("score"),
+    ).where(trigram_match(Genre.code, term))
+
+    matches = union_all(name_matches, code_matches).subquery()
+    ranked = (
+        select(matches.c.genre_id, func.max(matches.c.score).label("score"))
+        .group_by(matches.c.genre_id)
+        .subquery()
+    )
+    return (
+        select(Genre)
+        .join(ranked, Genre.id == ranked.c.genre_id)
+        .order_by(ranked.c.score.desc(), Genre.id.desc())
+    )
+
+
+def actress_search_query(term: str, language: Optional[str] = None) -> Select:
+    """按多语言名称搜索演员，按相关度排序"""
+    term = term.strip()
+    name_matches = select(
+        ActressName.actress_id.label("actress_id"),
+        trigram_score(ActressName.name, term).label("score"),
+    ).where(trigram_match(ActressName.name, term))
+    if language:
+        name_matches = name_matches.where(ActressName.language == language)
+
+    primary_matches = select(
+        Actress.id.label("actress_id"),
+        trigram_score(Actress.name, term).label("score"),
+    ).where(trigram_match(Actress.name, term))
+    if language:
+        primary_matches = primary_matches.where(Actress.language == language)
+
+    matches = union_all(name_matches, primary_matches).subquery()
+    ranked = (
+        select(matches.c.actress_id, func.max(matches.c.score).label("score"))
+        .group_by(matches.c.actress_id)
+        .subquery()
+    )
+    return (
+        select(Actress)
+        .join(ranked, Actress.id == ranked.c.actress_id)
+        .order_by(ranked.c.score.desc(), Actress.id.desc())
+    )
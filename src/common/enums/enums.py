@@ -26,5 +26,6 @@ class CrawlerStatus(str, enum.Enum):
 class CrawlerTaskType(str, enum.Enum):
     GENRES = "genres"
     GENRES_PAGES = "genres_pages"
+    GENRES_PAGES_FULL = "genres_pages_full"
     MOVIES = "movies"
     ACTRESSES = "actresses"
\ No newline at end of file
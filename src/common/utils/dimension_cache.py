@@ -0,0 +1,327 @@
+"""类型和演员的名称 → ID 字典缓存
+
+关联一部电影的 10～20 个类型和演员时，原来 GenreRepository.get_by_name / get_by_code、
+ActressService.get_by_name 每个名称都要查询一次数据库。这里在进程内按语言缓存：
+
+- genre_names / actress_names 的 名称 → ID 和 ID → 名称，以及 genres 的 code → ID
+- 首次使用（或服务启动时）一次性加载，之后按自增 ID 增量刷新（最多每 refresh_interval 秒一次，
+  或者遇到未知名称时）
+- resolve_genres / resolve_actresses 批量解析一组名称：缓存未命中的先用一次 `= ANY()` 查询确认，
+  仍不存在的用一条 `INSERT ... ON CONFLICT DO NOTHING RETURNING` 语句一次性创建
+- link_genres / link_actresses 把 (movie_id, 维度ID) 用一条 INSERT 批量写入关联表
+
+名称被改名时缓存不会感知（增量刷新只看新行），需要时调用 load() 全量重新加载。
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from common.enums.enums import SupportedLanguage
+
+logger = logging.getLogger(__name__)
+
+GENRE = "genre"
+ACTRESS = "actress"
+
+# 维度 → (主表, 名称表, 名称表中的外键列, 关联表, 关联表中的外键列)
+_TABLES = {
+    GENRE: ("genres", "genre_names", "genre_id", "movie_genres", "genre_id"),
+    ACTRESS: ("actresses", "actress_names", "actress_id", "movie_actresses", "actress_id"),
+}
+
+# 在同一条语句中为每个新名称分配主表 ID，先插入名称表，只为实际插入的名称写主表：
+# 并发插入同名时被 ON CONFLICT 跳过的名称不会留下没有名称的主表行
+# （actresses 表本身也有 name/language 列，需要一起写入）
+_CREATE_SQL = {
+    GENRE: """
+        WITH wanted AS (
+            SELECT DISTINCT name FROM unnest(CAST(:names AS TEXT[])) AS t(name)
+        ), missing AS (
+            SELECT name, nextval(pg_get_serial_sequence('genres', 'id')) AS id
+            FROM wanted w
+            WHERE NOT EXISTS (
+                SELECT 1 FROM genre_names n
+                WHERE n.language = CAST(:language AS supported_language) AND n.name = w.name
+            )
+        ), new_names AS (
+            INSERT INTO genre_names (genre_id, language, name)
+            SELECT id, CAST(:language AS supported_language), name FROM missing
+            ON CONFLICT DO NOTHING
+            RETURNING id, genre_id, name
+        ), new_rows AS (
+            INSERT INTO genres (id) SELECT genre_id FROM new_names
+        )
+        SELECT id, genre_id, name FROM new_names
+    """,
+    ACTRESS: """
+        WITH wanted AS (
+            SELECT DISTINCT name FROM unnest(CAST(:names AS TEXT[])) AS t(name)
+        ), missing AS (
+            SELECT name, nextval(pg_get_serial_sequence('actresses', 'id')) AS id
+            FROM wanted w
+            WHERE NOT EXISTS (
+                SELECT 1 FROM actress_names n
+                WHERE n.language = CAST(:language AS supported_language) AND n.name = w.name
+            )
+        ), new_names AS (
+            INSERT INTO actress_names (actress_id, language, name)
+            SELECT id, CAST(:language AS supported_language), name FROM missing
+            ON CONFLICT DO NOTHING
+            RETURNING id, actress_id, name
+        ), new_rows AS (
+            INSERT INTO actresses (id, name, language)
+            SELECT actress_id, name, CAST(:language AS supported_language) FROM new_names
+        )
+        SELECT id, actress_id, name FROM new_names
+    """,
+}
+
+# 并发插入同名时由唯一索引拦住重复名称；已有重复数据时索引建不起来，只记录警告
+SETUP_SQL = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_genre_names_language_name ON genre_names (language, name)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_actress_names_language_name ON actress_names (language, name)",
+]
+
+
+def _language_value(language) -> str:
+    if isinstance(language, SupportedLanguage):
+        return language.value
+    return language or SupportedLanguage.JAPANESE.value
+
+
+def _clean_names(names: Iterable[Optional[str]]) -> List[str]:
+    seen, cleaned = set(), []
+    for name in names:
+        name = name.strip() if isinstance(name, str) else None
+        if name and name not in seen:
+            seen.add(name)
+            cleaned.append(name)
+    return cleaned
+
+
+class DimensionCache:
+    """类型和演员名称字典的进程内缓存"""
+
+    def __init__(self, refresh_interval: float = 300.0):
+        self.refresh_interval = refresh_interval
+        # (维度, 语言) → {名称: ID} / {ID: 名称}
+        self._ids: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._names: Dict[Tuple[str, str], Dict[int, str]] = {}
+        self._genre_codes: Dict[str, int] = {}
+        # 增量刷新的位置：名称表和 genres 表中已加载的最大 ID
+        self._last_name_row = {GENRE: 0, ACTRESS: 0}
+        self._last_genre_row = 0
+        self._loaded = False
+        self._refreshed_at = 0.0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    async def ensure_schema(self, db) -> None:
+        for statement in SETUP_SQL:
+            try:
+                await db.execute(text(statement))
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.warning("无法创建名称唯一索引（可能已有重复名称）: %s", e)
+
+    async def ensure_loaded(self, db) -> None:
+        if self._loaded:
+            if time.monotonic() - self._refreshed_at > self.refresh_interval:
+                await self.refresh(db)
+            return
+        async with self._lock:
+            if not self._loaded:
+                await self.load(db)
+
+    async def load(self, db) -> None:
+        """全量加载所有语言的类型、演员名称和类型代码"""
+        self._ids, self._names, self._genre_codes = {}, {}, {}
+        self._last_name_row = {GENRE: 0, ACTRESS: 0}
+        self._last_genre_row = 0
+        await self._load_rows(db)
+        self._loaded = True
+        logger.info(
+            "已加载名称字典: %d 个类型名称, %d 个演员名称, %d 个类型代码",
+            sum(len(v) for (kind, _), v in self._ids.items() if kind == GENRE),
+            sum(len(v) for (kind, _), v in self._ids.items() if kind == ACTRESS),
+            len(self._genre_codes),
+        )
+
+    def invalidate(self) -> None:
+        """事务回滚后调用：缓存中可能有未提交的新名称，下次使用时全量重新加载"""
+        self._loaded = False
+
+    async def refresh(self, db) -> None:
+        """只加载上次之后新增的行"""
+        async with self._lock:
+            await self._load_rows(db)
+
+    async def _load_rows(self, db) -> None:
+        for kind, (_, names_table, fk_column, _, _) in _TABLES.items():
+            result = await db.execute(
+                text(f"SELECT id, {fk_column}, CAST(language AS TEXT), name FROM {names_table} "
+                     f"WHERE id > :last_id ORDER BY id"),
+                {"last_id": self._last_name_row[kind]},
+            )
+            for row_id, dimension_id, language, name in result:
+                self._add(kind, language, name, dimension_id)
+                self._last_name_row[kind] = max(self._last_name_row[kind], row_id)
+
+        result = await db.execute(
+            text("SELECT id, code FROM genres WHERE id > :last_id ORDER BY id"),
+            {"last_id": self._last_genre_row},
+        )
+        for genre_id, code in result:
+            if code:
+                self._genre_codes[code] = genre_id
+            self._last_genre_row = max(self._last_genre_row, genre_id)
+        self._refreshed_at = time.monotonic()
+
+    def _add(self, kind: str, language: str, name: str, dimension_id: int) -> None:
+        # 同一语言下重名时保留 ID 最小的（与原来 get_by_name 的 first() 结果一致的可能性最大）
+        ids = self._ids.setdefault((kind, language), {})
+        if name not in ids or dimension_id < ids[name]:
+            ids[name] = dimension_id
+        self._names.setdefault((kind, language), {}).setdefault(dimension_id, name)
+
+    # ---------- 单个查找（只查内存） ----------
+
+    def get_id(self, kind: str, name: Optional[str], language=None) -> Optional[int]:
+        """内存中的名称 → ID；language 为 None 时在所有语言中查找"""
+        if not name:
+            return None
+        name = name.strip()
+        languages = [_language_value(language)] if language else [lang.value for lang in SupportedLanguage]
+        for lang in languages:
+            dimension_id = self._ids.get((kind, lang), {}).get(name)
+            if dimension_id is not None:
+                self.hits += 1
+                return dimension_id
+        self.misses += 1
+        return None
+
+    def get_name(self, kind: str, dimension_id: int, language=None) -> Optional[str]:
+        """ID → 名称，优先 language，没有时返回任一语言的名称"""
+        preferred = _language_value(language)
+        name = self._names.get((kind, preferred), {}).get(dimension_id)
+        if name is not None:
+            return name
+        for (cached_kind, _), names in self._names.items():
+            if cached_kind == kind and dimension_id in names:
+                return names[dimension_id]
+        return None
+
+    def get_genre_id_by_code(self, code: Optional[str]) -> Optional[int]:
+        return self._genre_codes.get(code) if code else None
+
+    def add_genre_code(self, code: Optional[str], genre_id: int) -> None:
+        if code:
+            self._genre_codes[code] = genre_id
+
+    def add_name(self, kind: str, name: str, dimension_id: int, language=None) -> None:
+        """数据库中查到（或新建）名称后补进缓存"""
+        if name:
+            self._add(kind, _language_value(language), name.strip(), dimension_id)
+
+    # ---------- 批量解析 ----------
+
+    async def resolve_genres(self, db, names: Iterable[str], language=None, create: bool = True) -> Dict[str, int]:
+        return await self.resolve(db, GENRE, names, language, create)
+
+    async def resolve_actresses(self, db, names: Iterable[str], language=None, create: bool = True) -> Dict[str, int]:
+        return await self.resolve(db, ACTRESS, names, language, create)
+
+    async def resolve(self, db, kind: str, names: Iterable[str], language=None, create: bool = True) -> Dict[str, int]:
+        """把一组名称解析为 ID，返回 {名称: ID}
+
+        缓存未命中的名称用一次批量查询确认（其他进程新增的名称），create 为 True 时
+        仍不存在的名称在一条语句中创建。调用方负责提交事务。
+        """
+        await self.ensure_loaded(db)
+        language = _language_value(language)
+        names = _clean_names(names)
+        cached = self._ids.get((kind, language), {})
+        resolved = {name: cached[name] for name in names if name in cached}
+        self.hits += len(resolved)
+        missing = [name for name in names if name not in resolved]
+        if not missing:
+            return resolved
+        self.misses += len(missing)
+
+        _, names_table, fk_column, _, _ = _TABLES[kind]
+        lookup_sql = text(
+            f"SELECT {fk_column}, name FROM {names_table} "
+            f"WHERE language = CAST(:language AS supported_language) AND name = ANY(:names) "
+            f"ORDER BY {fk_column}"
+        )
+        result = await db.execute(lookup_sql, {"language": language, "names": missing})
+        for dimension_id, name in result:
+            self._add(kind, language, name, dimension_id)
+            resolved.setdefault(name, dimension_id)
+        missing = [name for name in missing if name not in resolved]
+
+        if missing and create:
+            result = await db.execute(text(_CREATE_SQL[kind]), {"language": language, "names": missing})
+            for row_id, dimension_id, name in result:
+                self._add(kind, language, name, dimension_id)
+                resolved[name] = dimension_id
+            logger.info("新建了 %d 个%s名称", len(missing), "类型" if kind == GENRE else "演员")
+            missing = [name for name in missing if name not in resolved]
+            if missing:
+                # 与其他进程同时插入而被 ON CONFLICT 跳过的名称
+                result = await db.execute(lookup_sql, {"language": language, "names": missing})
+                for dimension_id, name in result:
+                    self._add(kind, language, name, dimension_id)
+                    resolved.setdefault(name, dimension_id)
+        return resolved
+
+    # ---------- 关联表批量写入 ----------
+
+    async def link_genres(self, db, links: Iterable[Tuple[int, int]]) -> int:
+        return await self.link(db, GENRE, links)
+
+    async def link_actresses(self, db, links: Iterable[Tuple[int, int]]) -> int:
+        return await self.link(db, ACTRESS, links)
+
+    @staticmethod
+    async def link(db, kind: str, links: Iterable[Tuple[int, int]]) -> int:
+        """用一条 INSERT 写入一批 (movie_id, 维度ID)，已存在的跳过，返回新写入的行数
+
+        调用方负责提交事务。
+        """
+        links = sorted(set(links))
+        if not links:
+            return 0
+        _, _, _, link_table, fk_column = _TABLES[kind]
+        result = await db.execute(
+            text(f"INSERT INTO {link_table} (movie_id, {fk_column}) "
+                 f"SELECT * FROM unnest(CAST(:movie_ids AS INTEGER[]), CAST(:dimension_ids AS INTEGER[])) "
+                 f"ON CONFLICT DO NOTHING"),
+            {"movie_ids": [movie_id for movie_id, _ in links],
+             "dimension_ids": [dimension_id for _, dimension_id in links]},
+        )
+        return result.rowcount or 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "genre_names": sum(len(v) for (kind, _), v in self._ids.items() if kind == GENRE),
+            "actress_names": sum(len(v) for (kind, _), v in self._ids.items() if kind == ACTRESS),
+            "genre_codes": len(self._genre_codes),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 进程内共享的字典缓存
+dimension_cache = DimensionCache(refresh_interval=float(os.getenv("DIMENSION_CACHE_REFRESH_SECONDS", "300")))
@@ -0,0 +1,289 @@
+"""进程内共享的 HTTP 客户端注册表
+
+原来 create_session() 在每个服务实例（有时每次请求）里新建 requests.Session，
+代理地址写死为 127.0.0.1:7890，FeedService、GenreService、proxy_server 各自维护配置不同的会话。
+这里按名称注册客户端配置（代理、请求头、重试、超时、连接池大小），每个配置在进程内只创建一个会话：
+
+- sync: http_clients.session(name) 返回共享的 requests.Session（线程安全地复用连接池）
+- async: http_clients.async_client(name) 返回当前事件循环上共享的 httpx.AsyncClient
+- 每个配置统计请求数、错误数、状态码分布和延迟，http_clients.stats() 返回汇总
+
+代理地址默认读取 HTTP_PROXY_URL（http://127.0.0.1:7890）。
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:  # httpx 为可选依赖，只有异步客户端需要
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROXY_URL = os.getenv("HTTP_PROXY_URL", "http://127.0.0.1:7890")
+
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9,ja;q=0.8,zh-CN;q=0.7,zh;q=0.6',
+    'Accept-Charset': 'utf-8, iso-8859-1;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Cache-Control': 'no-cache',
+    'Pragma': 'no-cache',
+    'Connection': 'keep-alive',
+    'Referer': 'http://123av.com',
+    'Content-Type': 'text/html; charset=utf-8',
+    'Sec-Ch-Ua': '"Not A(Brand";v="24", "Chromium";v="121"',
+    'Sec-Ch-Ua-Mobile': '?0',
+    'Sec-Ch-Ua-Platform': '"macOS"',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'same-origin',
+    'Sec-Fetch-User': '?1',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+MEDIA_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': '*/*',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Sec-Fetch-Dest': 'empty',
+    'Sec-Fetch-Mode': 'cors',
+    'Sec-Fetch-Site': 'cross-site'
+}
+
+
+@dataclass(frozen=True)
+class HttpProfile:
+    """一组客户端配置
+
+    timeout 为 (连接超时, 读取超时)，调用方没有传 timeout 时使用。
+    """
+    name: str
+    proxy: Optional[str] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    retries: int = 3
+    backoff_factor: float = 1.0
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    timeout: Tuple[float, float] = (5.0, 15.0)
+    pool_connections: int = 10
+    pool_maxsize: int = 10
+    verify: bool = True
+
+
+DEFAULT_PROFILES = [
+    # 站点页面（列表页、ajax 接口），走本地代理
+    HttpProfile("site", proxy=DEFAULT_PROXY_URL, headers=BROWSER_HEADERS),
+    # 同样的请求头但直连
+    HttpProfile("direct", headers=BROWSER_HEADERS),
+    # 播放器页面，一批电影并发获取
+    HttpProfile("player", headers=BROWSER_HEADERS, pool_maxsize=int(os.getenv("M3U8_RESOLVER_WORKERS", "8"))),
+    # 登录后的 feed 页面，cookie 由调用方按请求传入
+    HttpProfile("feed", headers={
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36'
+    }, retries=0),
+    # m3u8/分片代理，目标 CDN 证书不可靠
+    HttpProfile("media", headers=MEDIA_HEADERS, timeout=(10.0, 30.0), verify=False, pool_maxsize=20),
+]
+
+
+class ProfileStats:
+    """单个配置的请求统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.statuses: Dict[int, int] = {}
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, latency: float, status: Optional[int] = None, error: bool = False):
+        with self._lock:
+            self.requests += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            if error:
+                self.errors += 1
+            if status is not None:
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            server_errors = sum(count for status, count in self.statuses.items() if status >= 500)
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "error_rate": round((self.errors + server_errors) / self.requests, 4) if self.requests else 0.0,
+                "avg_latency_ms": round(self.total_latency / self.requests * 1000, 1) if self.requests else 0.0,
+                "max_latency_ms": round(self.max_latency * 1000, 1),
+                "statuses": dict(sorted(self.statuses.items())),
+            }
+
+
+class InstrumentedSession(requests.Session):
+    """带默认超时和统计的 requests.Session"""
+
+    def __init__(self, profile: HttpProfile, stats: ProfileStats):
+        super().__init__()
+        self.profile = profile
+        self.stats = stats
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault("timeout", self.profile.timeout)
+        started = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except Exception:
+            self.stats.record(time.perf_counter() - started, error=True)
+            raise
+        self.stats.record(time.perf_counter() - started, status=response.status_code)
+        return response
+
+
+class HttpClientRegistry:
+    """按名称管理共享的 HTTP 客户端"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, HttpProfile] = {}
+        self._stats: Dict[str, ProfileStats] = {}
+        self._sessions: Dict[str, InstrumentedSession] = {}
+        self._async_clients: Dict[Tuple[str, int], Any] = {}
+        for profile in DEFAULT_PROFILES:
+            self.register(profile)
+
+    def register(self, profile: HttpProfile) -> HttpProfile:
+        """注册（或替换）一个配置；替换时关闭旧会话，下次获取时按新配置创建"""
+        with self._lock:
+            self._profiles[profile.name] = profile
+            self._stats.setdefault(profile.name, ProfileStats())
+            old_session = self._sessions.pop(profile.name, None)
+        if old_session is not None:
+            old_session.close()
+        return profile
+
+    def profile(self, name: str) -> HttpProfile:
+        try:
+            return self._profiles[name]
+        except KeyError:
+            raise KeyError(f"Unknown HTTP client profile: {name}") from None
+
+    def derive(self, base: str, name: str, **overrides) -> HttpProfile:
+        """在已有配置基础上注册一个新配置（已存在时直接返回）"""
+        with self._lock:
+            existing = self._profiles.get(name)
+        if existing is not None:
+            return existing
+        return self.register(replace(self.profile(base), name=name, **overrides))
+
+    def session(self, name: str = "site") -> requests.Session:
+        """返回配置对应的共享 requests.Session"""
+        with self._lock:
+            session = self._sessions.get(name)
+            if session is None:
+                profile = self.profile(name)
+                session = self._build_session(profile, self._stats[name])
+                self._sessions[name] = session
+            return session
+
+    def async_client(self, name: str = "site"):
+        """返回当前事件循环上共享的 httpx.AsyncClient（需要安装 httpx）"""
+        if httpx is None:
+            raise ImportError("httpx is required for async HTTP clients")
+        loop = asyncio.get_running_loop()
+        key = (name, id(loop))
+        with self._lock:
+            client = self._async_clients.get(key)
+            if client is None or client.is_closed:
+                client = self._build_async_client(self.profile(name), self._stats[name])
+                self._async_clients[key] = client
+            return client
+
+    def stats(self) -> Dict[str, Any]:
+        """各配置的请求数、错误率和延迟"""
+        with self._lock:
+            items = list(self._stats.items())
+        return {name: stats.snapshot() for name, stats in items}
+
+    def close(self):
+        """关闭同步会话（异步客户端用 aclose 关闭）"""
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+    async def aclose(self):
+        """关闭当前事件循环上的异步客户端"""
+        loop_id = id(asyncio.get_running_loop())
+        with self._lock:
+            keys = [key for key in self._async_clients if key[1] == loop_id]
+            clients = [self._async_clients.pop(key) for key in keys]
+        for client in clients:
+            await client.aclose()
+
+    @staticmethod
+    def _build_session(profile: HttpProfile, stats: ProfileStats) -> InstrumentedSession:
+        session = InstrumentedSession(profile, stats)
+        if profile.proxy:
+            session.proxies = {'http': profile.proxy, 'https': profile.proxy}
+        retry_strategy = Retry(
+            total=profile.retries,
+            backoff_factor=profile.backoff_factor,
+            status_forcelist=list(profile.retry_statuses),
+        )
+        adapter = HTTPAdapter(
+            max_retries=retry_strategy,
+            pool_connections=profile.pool_connections,
+            pool_maxsize=profile.pool_maxsize,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.verify = profile.verify
+        session.headers.update(profile.headers)
+        return session
+
+    @staticmethod
+    def _build_async_client(profile: HttpProfile, stats: ProfileStats):
+        class InstrumentedAsyncClient(httpx.AsyncClient):
+            async def send(self, request, **kwargs):
+                started = time.perf_counter()
+                try:
+                    response = await super().send(request, **kwargs)
+                except Exception:
+                    stats.record(time.perf_counter() - started, error=True)
+                    raise
+                stats.record(time.perf_counter() - started, status=response.status_code)
+                return response
+
+        connect_timeout, read_timeout = profile.timeout
+        # 指定 transport 时连接池和代理都在 transport 上配置（代理需要 httpx>=0.26）
+        transport_kwargs = {"proxy": profile.proxy} if profile.proxy else {}
+        transport = httpx.AsyncHTTPTransport(
+            verify=profile.verify,
+            limits=httpx.Limits(max_connections=profile.pool_maxsize,
+                                max_keepalive_connections=profile.pool_maxsize),
+            retries=profile.retries,
+            **transport_kwargs,
+        )
+        return InstrumentedAsyncClient(
+            headers=profile.headers,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            transport=transport,
+        )
+
+
+# 进程内共享的注册表
+http_clients = HttpClientRegistry()
@@ -0,0 +1,148 @@
+"""已入库电影的成员索引
+
+重新爬取列表页时，大部分条目都已在 movies 表中，原来逐条插入、靠唯一约束冲突跳过，
+每条都要一次数据库往返。这里在进程内维护规范化代码和 original_id 的集合：
+
+- 首次使用时从 movies 表一次性加载，之后插入成功时同步加入
+- 发现阶段先在内存中批量过滤掉已知条目
+- 剩下的候选再用一次 `= ANY()` 批量查询确认（其他进程在加载之后插入的电影会在这里被过滤），
+  确认存在的同时补进索引
+
+约 100 万部电影时索引占用几十 MB 内存。
+"""
+
+import asyncio
+import logging
+from typing import Iterable, List, Optional, Set
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_code(code: Optional[str]) -> Optional[str]:
+    """去掉空白并统一为大写，空代码返回 None"""
+    if not code:
+        return None
+    code = code.strip().upper()
+    return code or None
+
+
+def _valid_original_id(original_id) -> Optional[int]:
+    # 没有原始ID的电影以 0 入库，不参与判断
+    try:
+        original_id = int(original_id)
+    except (TypeError, ValueError):
+        return None
+    return original_id if original_id > 0 else None
+
+
+class KnownMovieIndex:
+    """movies 表中电影代码和 original_id 的进程内索引"""
+
+    def __init__(self):
+        self._codes: Set[str] = set()
+        self._original_ids: Set[int] = set()
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self.filtered = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    async def ensure_loaded(self, db) -> None:
+        if self._loaded:
+            return
+        async with self._lock:
+            if not self._loaded:
+                await self.load(db)
+
+    async def load(self, db) -> None:
+        """从 movies 表加载全部代码和 original_id"""
+        result = await db.execute(text("SELECT code, original_id FROM movies"))
+        codes, original_ids = set(), set()
+        for code, original_id in result:
+            code = normalize_code(code)
+            if code:
+                codes.add(code)
+            original_id = _valid_original_id(original_id)
+            if original_id:
+                original_ids.add(original_id)
+        self._codes, self._original_ids = codes, original_ids
+        self._loaded = True
+        logger.info("已加载电影索引: %d 个代码, %d 个原始ID", len(codes), len(original_ids))
+
+    def contains(self, code: Optional[str] = None, original_id=None) -> bool:
+        code = normalize_code(code)
+        if code and code in self._codes:
+            return True
+        original_id = _valid_original_id(original_id)
+        return bool(original_id and original_id in self._original_ids)
+
+    def add(self, code: Optional[str] = None, original_id=None) -> None:
+        """电影插入成功（或确认已存在）后加入索引"""
+        code = normalize_code(code)
+        if code:
+            self._codes.add(code)
+        original_id = _valid_original_id(original_id)
+        if original_id:
+            self._original_ids.add(original_id)
+
+    async def filter_new(self, db, movies: Iterable) -> List:
+        """过滤掉已入库的电影（对象需有 code 和 original_id 属性），返回需要插入的电影
+
+        同一批中重复的代码只保留第一个。
+        """
+        await self.ensure_loaded(db)
+
+        candidates, seen = [], set()
+        total = 0
+        for movie in movies:
+            total += 1
+            code = normalize_code(getattr(movie, "code", None))
+            original_id = getattr(movie, "original_id", None)
+            if self.contains(code, original_id) or (code and code in seen):
+                continue
+            if code:
+                seen.add(code)
+            candidates.append(movie)
+
+        if candidates:
+            candidates = await self._confirm_absent(db, candidates)
+
+        skipped = total - len(candidates)
+        self.filtered += skipped
+        if skipped:
+            logger.info("电影索引过滤掉 %d/%d 个已入库的条目", skipped, total)
+        return candidates
+
+    async def _confirm_absent(self, db, candidates: List) -> List:
+        """一次批量查询确认候选确实不在库中（索引可能落后于其他进程的插入）"""
+        codes = set()
+        original_ids = set()
+        for movie in candidates:
+            code = getattr(movie, "code", None)
+            if code:
+                # 唯一约束区分大小写，按原值和大小写变体查询以便使用索引
+                codes.update({code.strip(), code.strip().upper(), code.strip().lower()})
+            original_id = _valid_original_id(getattr(movie, "original_id", None))
+            if original_id:
+                original_ids.add(original_id)
+
+        result = await db.execute(
+            text("SELECT code, original_id FROM movies "
+                 "WHERE code = ANY(:codes) OR original_id = ANY(:original_ids)"),
+            {"codes": list(codes), "original_ids": list(original_ids)},
+        )
+        for code, original_id in result:
+            self.add(code, original_id)
+        return [m for m in candidates
+                if not self.contains(getattr(m, "code", None), getattr(m, "original_id", None))]
+
+
+# 进程内共享的索引
+known_movie_index = KnownMovieIndex()
@@ -0,0 +1,281 @@
+"""响应缓存工具，为公开的列表/详情接口提供读穿透缓存
+
+- 进程内 LRU + TTL，键由命名空间和规范化后的查询参数组成
+- 同一个键的并发未命中只会触发一次加载，其余请求等待同一个结果
+- 可选通过 Redis 兼容存储共享缓存值和命名空间版本号，
+  使爬虫进程写入 movies/movie_info 后能让 API 进程的缓存失效
+- 失效采用命名空间版本号递增，旧版本的键自然失效并被 LRU 淘汰
+- 电影数据按影响范围分成几个命名空间（见 invalidate_movies），爬虫写入一部电影的详情时
+  不会清空所有列表
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis 为可选依赖
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# 命名空间
+MOVIES = "movies"            # 电影列表（全部 / 最近 / 热门）
+MOVIE_LINKS = "movie_links"  # 按类型、演员筛选的电影列表，依赖关联表
+GENRES = "genres"
+ACTRESSES = "actresses"
+# 单部电影详情的命名空间前缀，见 movie_detail_namespace
+MOVIE_DETAIL = "movie"
+
+
+def movie_detail_namespace(code: str) -> str:
+    """单部电影详情的命名空间
+
+    详情接口路径中的代码是 movies.link 的末尾部分，按小写比较；
+    爬虫侧只知道电影代码时用代码本身（两者通常相同）。
+    """
+    return f"{MOVIE_DETAIL}:{code.strip().lower()}"
+
+
+def movie_detail_code(movie: Any) -> Optional[str]:
+    """从 Movie 对象取详情接口使用的代码：优先 link 的末尾部分，没有时用 code"""
+    link = getattr(movie, "link", None)
+    if link:
+        return link.rstrip("/").rsplit("/", 1)[-1]
+    return getattr(movie, "code", None)
+
+
+def normalize_params(params: Dict[str, Any]) -> str:
+    """将查询参数规范化为稳定的字符串：去掉 None、枚举取值、字符串去空白、按键排序"""
+    normalized = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, Enum):
+            value = value.value
+        if isinstance(value, str):
+            value = value.strip()
+        normalized[key] = value
+    return json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class ResponseCache:
+    """读穿透响应缓存
+
+    缓存值必须可以 JSON 序列化（启用 Redis 时会以 JSON 形式写入）。
+    """
+
+    # 启用 Redis 时本地缓存的命名空间版本号的刷新间隔（秒）
+    GENERATION_REFRESH_SECONDS = 1.0
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0,
+                 redis_url: Optional[str] = None, key_prefix: str = "movie_crawler:cache"):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._generations: Dict[str, int] = {}
+        self._generation_checked_at: Dict[str, float] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._redis = None
+
+        if redis_url:
+            if aioredis is None:
+                logger.warning("已配置 CACHE_REDIS_URL 但未安装 redis，仅使用进程内缓存")
+            else:
+                self._redis = aioredis.from_url(redis_url, decode_responses=True)
+
+    def _stat(self, namespace: str) -> Dict[str, int]:
+        if namespace.startswith(f"{MOVIE_DETAIL}:"):
+            # 所有单部电影详情合并统计
+            namespace = MOVIE_DETAIL
+        return self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "coalesced": 0, "invalidations": 0})
+
+    async def _generation(self, namespace: str) -> int:
+        """获取命名空间当前版本号，启用 Redis 时定期与共享版本号同步"""
+        if self._redis is None:
+            return self._generations.get(namespace, 0)
+
+        now = time.monotonic()
+        if now - self._generation_checked_at.get(namespace, 0.0) >= self.GENERATION_REFRESH_SECONDS:
+            try:
+                value = await self._redis.get(f"{self.key_prefix}:gen:{namespace}")
+                self._generations[namespace] = int(value or 0)
+            except Exception as e:
+                logger.warning(f"读取缓存版本号失败 {namespace}: {e}")
+            self._generation_checked_at[namespace] = now
+        return self._generations.get(namespace, 0)
+
+    def _local_get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _local_set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(self, namespace: str, params: Dict[str, Any],
+                          loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        """按命名空间和参数读取缓存，未命中时调用 loader 加载并写入缓存
+
+        Args:
+            namespace: 缓存命名空间，失效以命名空间为单位
+            params: 查询参数，会被规范化后作为键的一部分
+            loader: 未命中时调用的异步加载函数，返回值需可 JSON 序列化
+            ttl: 过期时间（秒），默认使用实例的 ttl
+
+        Returns:
+            缓存的值或新加载的值
+        """
+        ttl = self.ttl if ttl is None else ttl
+        stat = self._stat(namespace)
+        generation = await self._generation(namespace)
+        digest = hashlib.sha1(normalize_params(params).encode("utf-8")).hexdigest()
+        key = f"{self.key_prefix}:{namespace}:{generation}:{digest}"
+
+        found, value = self._local_get(key)
+        if found:
+            stat["hits"] += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            stat["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            if self._redis is not None:
+                try:
+                    raw = await self._redis.get(key)
+                except Exception as e:
+                    logger.warning(f"读取共享缓存失败 {key}: {e}")
+                    raw = None
+                if raw is not None:
+                    value = json.loads(raw)
+                    stat["hits"] += 1
+                    self._local_set(key, value, ttl)
+                    future.set_result(value)
+                    return value
+
+            stat["misses"] += 1
+            value = await loader()
+            self._local_set(key, value, ttl)
+            if self._redis is not None:
+                try:
+                    await self._redis.set(key, json.dumps(value, ensure_ascii=False, default=str), ex=max(1, int(ttl)))
+                except Exception as e:
+                    logger.warning(f"写入共享缓存失败 {key}: {e}")
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 避免没有等待者时出现 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def invalidate(self, *namespaces: str) -> None:
+        """使一个或多个命名空间下的全部缓存失效"""
+        namespaces = set(namespaces)
+        if not namespaces:
+            return
+        for namespace in namespaces:
+            if namespace.startswith(f"{MOVIE_DETAIL}:"):
+                # 单部电影的命名空间数量很多，本地不保留版本号（条目在下面直接删除，
+                # 启用 Redis 时下次读取会重新获取共享版本号）
+                self._generations.pop(namespace, None)
+                self._generation_checked_at.pop(namespace, None)
+                continue
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._stat(namespace)["invalidations"] += 1
+        if any(namespace.startswith(f"{MOVIE_DETAIL}:") for namespace in namespaces):
+            self._stat(MOVIE_DETAIL)["invalidations"] += 1
+        # 键的格式为 前缀:命名空间:版本号:摘要，命名空间本身可能包含冒号
+        start = len(self.key_prefix) + 1
+        for key in [k for k in self._entries if k[start:].rsplit(":", 2)[0] in namespaces]:
+            del self._entries[key]
+
+        if self._redis is not None:
+            ordered = list(namespaces)
+            try:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for namespace in ordered:
+                        pipe.incr(f"{self.key_prefix}:gen:{namespace}")
+                    generations = await pipe.execute()
+                now = time.monotonic()
+                for namespace, generation in zip(ordered, generations):
+                    if namespace.startswith(f"{MOVIE_DETAIL}:"):
+                        continue
+                    self._generations[namespace] = int(generation)
+                    self._generation_checked_at[namespace] = now
+            except Exception as e:
+                logger.warning(f"更新共享缓存版本号失败 {ordered[:5]}: {e}")
+
+    async def invalidate_movies(self, codes: Iterable[Optional[str]] = (),
+                                lists: bool = False, links: bool = False) -> None:
+        """电影数据变化后按影响范围失效
+
+        Args:
+            codes: 变化的电影（详情接口使用的代码，见 movie_detail_code）
+            lists: movies 表中列表会显示的字段变化，或者有新增电影
+            links: movie_genres / movie_actresses 关联变化，按类型、演员筛选的列表失效
+        """
+        namespaces = [movie_detail_namespace(code) for code in codes if code]
+        if lists:
+            namespaces.append(MOVIES)
+        if lists or links:
+            namespaces.append(MOVIE_LINKS)
+        await self.invalidate(*namespaces)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回各命名空间的命中统计和命中率"""
+        namespaces = {}
+        total_hits = total_lookups = 0
+        for namespace, stat in self._stats.items():
+            hits = stat["hits"] + stat["coalesced"]
+            lookups = hits + stat["misses"]
+            total_hits += hits
+            total_lookups += lookups
+            namespaces[namespace] = {
+                **stat,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            }
+        return {
+            "backend": "redis" if self._redis is not None else "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hit_ratio": round(total_hits / total_lookups, 4) if total_lookups else 0.0,
+            "namespaces": namespaces,
+        }
+
+
+# 全局缓存实例，API 进程和爬虫进程共用同一套配置
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024")),
+    ttl=float(os.getenv("CACHE_TTL_SECONDS", "60")),
+    redis_url=os.getenv("CACHE_REDIS_URL") or None,
+)
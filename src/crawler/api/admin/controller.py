@@ -8,6 +8,9 @@ from loguru import logger
 from sqlalchemy import text, select, func
 from common.db.entity.movie_info import MovieInfo
 from crawler.repository.movie_repository import MovieRepository
+from crawler.repository.crawl_priority_repository import CrawlPriorityRepository
+from common.utils.http_clients import http_clients
+from app.utils.proxy_pool import proxy_pool
 
 # 导入服务模块
 from crawler.service.movie_service import MovieService, CrawlerStatus
@@ -43,6 +46,10 @@ class TaskResponse(BaseModel):
     status: Dict[str, Any] = None
 
 
+class CrawlNowRequest(BaseModel):
+    codes: List[str]
+
+
 class MovieResponse(BaseModel):
     id: int
     original_id: int
@@ -360,6 +367,22 @@ async def stop_crawler():
     )
 
 
+@router.get("/http-stats")
+async def get_http_stats():
+    """
+    各 HTTP 客户端配置的请求数、错误率和延迟
+    """
+    return http_clients.stats()
+
+
+@router.get("/proxy-stats")
+async def get_proxy_stats():
+    """
+    代理池中各上游代理的使用数、健康分和隔离状态
+    """
+    return proxy_pool.stats()
+
+
 @router.post("/find-gaps", response_model=List[Dict[str, Any]])
 async def find_movie_gaps(
     batch_size: int = Query(10, description="返回的最大记录数"),
@@ -381,6 +404,32 @@ async def find_movie_gaps(
         )
 
 
+@router.post("/crawl-now", response_model=TaskResponse)
+async def crawl_now(request: CrawlNowRequest):
+    """
+    立即爬取指定电影
+
+    把电影放进详情爬取队列的最前面（快速通道），不存在的代码会新建待处理记录，
+    详情任务收到通知后立即领取
+    """
+    if not request.codes:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="codes 不能为空")
+    try:
+        async with async_session() as session:
+            result = await CrawlPriorityRepository(session).request_now(request.codes)
+        return TaskResponse(
+            success=True,
+            message=f"已加入快速通道: {len(result['queued'])} 个已有电影，新建 {len(result['inserted'])} 个",
+            status=result,
+        )
+    except Exception as e:
+        logger.error(f"加入快速通道时出错: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"加入快速通道时出错: {str(e)}",
+        )
+
+
 # 后台爬虫任务
 async def run_crawler_task(
     batch_size: int, headless: bool, movie_service: MovieService
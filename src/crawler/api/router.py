@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 from crawler.api.admin import crawler_router
-from crawler.api.schedules import movie_detail_job
+from crawler.api.schedules import genre_pages_job, movie_detail_job, movie_link_job
 from crawler.api.admin import controller
 
 api_router = APIRouter()
@@ -10,5 +10,7 @@ api_router.include_router(crawler_router.router, prefix="/admin/movie/crawler",
 
 # 爬虫任务路由
 api_router.include_router(movie_detail_job.router, prefix="/schedules", tags=["schedules"])
+api_router.include_router(movie_link_job.router, prefix="/schedules/movie-links", tags=["schedules"])
+api_router.include_router(genre_pages_job.router, prefix="/schedules/genre-pages", tags=["schedules"])
 
 api_router.include_router(controller.router, prefix="/admin/movie/crawler", tags=["movie-crawler-admin"])
@@ -0,0 +1,174 @@
+from fastapi import APIRouter
+import logging
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+# 获取日志记录器
+logger = logging.getLogger(__name__)
+
+# 控制后台任务的标志
+genre_pages_running = False
+genre_pages_thread = None
+# 下一轮是否做全量扫描（由 /full-sweep 设置）
+full_sweep_requested = False
+# 最近一轮的结果，供状态查询
+last_pass = {}
+
+# 增量扫描的间隔（秒）：每个类型只爬到连续几页没有新电影为止
+INCREMENTAL_INTERVAL_SECONDS = int(os.getenv("GENRE_PAGES_INTERVAL_SECONDS", str(6 * 3600)))
+# 全量扫描的间隔（秒）：每次从第1页爬到最后一页，补上增量扫描停止后才出现在后面页的电影；0 表示只手动触发
+FULL_SWEEP_INTERVAL_SECONDS = int(os.getenv("GENRE_FULL_SWEEP_SECONDS", str(7 * 24 * 3600)))
+
+router = APIRouter()
+
+
+async def run_genre_pages_pass(session_factory, full: bool) -> bool:
+    """爬取一轮所有类型的列表页，在 crawler_progress 中记录任务"""
+    from common.db.entity.crawler import CrawlerProgress
+    from common.enums.enums import CrawlerStatus, CrawlerTaskType
+    from app.repositories.genre_repository import GenreRepository
+    from crawler.parsers.genre_parser import GenreParser
+    from crawler.parsers.movie_parser import MovieParser
+    from crawler.repository.crawler_progress_repository import CrawlerProgressRepository
+    from crawler.repository.movie_crawler_repository import MovieCrawlerRepository
+    from crawler.repository.page_crawler_repository import PageCrawlerRepository
+    from crawler.service.crawler_progress_service import CrawlerProgressService
+    from crawler.service.genre_service import GenreService
+
+    async with session_factory() as session:
+        progress_service = CrawlerProgressService(
+            GenreRepository(session),
+            PageCrawlerRepository(session),
+            MovieCrawlerRepository(session),
+            CrawlerProgressRepository(session),
+        )
+        genre_service = GenreService(
+            GenreRepository(session),
+            progress_service,
+            MovieCrawlerRepository(session),
+            GenreParser(),
+            MovieParser(),
+        )
+        task_type = CrawlerTaskType.GENRES_PAGES_FULL if full else CrawlerTaskType.GENRES_PAGES
+        task = await progress_service.create_crawler_progress(
+            CrawlerProgress(task_type=task_type.value, status=CrawlerStatus.PROCESSING.value)
+        )
+        try:
+            success = await genre_service.process_genres_pages(task.id, incremental=not full)
+        except Exception as e:
+            logger.error(f"Error in genre pages pass: {str(e)}")
+            success = False
+        await progress_service.update_task_status(
+            task.id, CrawlerStatus.COMPLETED.value if success else CrawlerStatus.FAILED.value
+        )
+        return success
+
+
+async def full_sweep_due(session_factory) -> bool:
+    """距上次完成的全量扫描超过 FULL_SWEEP_INTERVAL_SECONDS 时返回 True"""
+    if FULL_SWEEP_INTERVAL_SECONDS <= 0:
+        return False
+    from common.enums.enums import CrawlerStatus, CrawlerTaskType
+    from crawler.repository.crawler_progress_repository import CrawlerProgressRepository
+
+    async with session_factory() as session:
+        last = await CrawlerProgressRepository(session).get_last_update(
+            CrawlerTaskType.GENRES_PAGES_FULL.value, CrawlerStatus.COMPLETED.value
+        )
+    if last is None:
+        return True
+    if last.tzinfo is None:
+        last = last.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - last).total_seconds() > FULL_SWEEP_INTERVAL_SECONDS
+
+
+# API端点：启动类型列表页定时任务
+@router.post("/start")
+async def start_genre_pages_job():
+    global genre_pages_running, genre_pages_thread
+
+    if genre_pages_running and genre_pages_thread and genre_pages_thread.is_alive():
+        return {"status": "warning", "message": "Genre pages job is already running"}
+
+    genre_pages_running = True
+
+    # 后台线程中使用独立的事件循环和会话
+    def run_genre_pages_background():
+        global genre_pages_running
+        from app.config.database import async_session
+
+        async def loop():
+            global full_sweep_requested, last_pass
+            while genre_pages_running:
+                full = full_sweep_requested
+                try:
+                    full = full or await full_sweep_due(async_session)
+                    full_sweep_requested = False
+                    logger.info(f"Starting genre pages pass ({'full sweep' if full else 'incremental'})")
+                    started = time.monotonic()
+                    success = await run_genre_pages_pass(async_session, full)
+                    last_pass = {
+                        "mode": "full" if full else "incremental",
+                        "success": success,
+                        "finished_at": datetime.now(timezone.utc).isoformat(),
+                        "seconds": round(time.monotonic() - started, 1),
+                    }
+                except Exception as e:
+                    logger.error(f"Error in genre pages job: {str(e)}")
+
+                # 分段等待，便于及时退出或响应全量扫描请求
+                waited = 0.0
+                while waited < INCREMENTAL_INTERVAL_SECONDS and genre_pages_running and not full_sweep_requested:
+                    await asyncio.sleep(5)
+                    waited += 5.0
+
+        try:
+            asyncio.run(loop())
+        except Exception as e:
+            logger.error(f"Error in genre pages job thread: {str(e)}")
+            genre_pages_running = False
+
+    genre_pages_thread = threading.Thread(target=run_genre_pages_background, daemon=True)
+    genre_pages_thread.start()
+
+    logger.info("Genre pages job started")
+    return {"status": "success", "message": "Genre pages job started in background"}
+
+
+# API端点：下一轮做全量扫描（任务没有运行时同时启动）
+@router.post("/full-sweep")
+async def request_full_sweep():
+    global full_sweep_requested
+
+    full_sweep_requested = True
+    if genre_pages_running and genre_pages_thread and genre_pages_thread.is_alive():
+        return {"status": "success", "message": "Full sweep scheduled after the current pass"}
+    await start_genre_pages_job()
+    return {"status": "success", "message": "Genre pages job started with a full sweep"}
+
+
+# API端点：停止类型列表页定时任务（正在进行的一轮会爬完）
+@router.post("/stop")
+async def stop_genre_pages_job():
+    global genre_pages_running
+
+    if genre_pages_running and genre_pages_thread and genre_pages_thread.is_alive():
+        genre_pages_running = False
+        return {"status": "success", "message": "Genre pages job will stop after the current pass"}
+
+    return {"status": "warning", "message": "Genre pages job was not running"}
+
+
+# API端点：查看状态
+@router.get("/status")
+async def genre_pages_status():
+    return {
+        "running": bool(genre_pages_running and genre_pages_thread and genre_pages_thread.is_alive()),
+        "full_sweep_requested": full_sweep_requested,
+        "incremental_interval_seconds": INCREMENTAL_INTERVAL_SECONDS,
+        "full_sweep_interval_seconds": FULL_SWEEP_INTERVAL_SECONDS,
+        "last_pass": last_pass,
+    }
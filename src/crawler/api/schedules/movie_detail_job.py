@@ -2,9 +2,10 @@ from fastapi import APIRouter
 import logging
 import asyncio
 import threading
+import time
 from fastapi import Depends
-from common.db.entity.movie import Movie
-from typing import List
+from common.db.entity.movie import Movie, MovieStatus
+from typing import Dict, List
 from crawler.repository.movie_repository import MovieRepository
 from crawler.repository.movie_info_repository import MovieInfoRepository
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -18,6 +19,32 @@ logger = logging.getLogger(__name__)
 crawler_running = False
 crawler_thread = None
 
+# 每次领取的电影数量
+BATCH_SIZE = 5
+# 监听新电影通知时的兜底检查间隔（秒）
+IDLE_FALLBACK_SECONDS = 300
+# 重试扫描器检查到期重试的间隔（秒）
+RETRY_SCAN_SECONDS = 60
+# 失败没能写入重试队列时，在内存中排除这部电影多久（秒）
+FAILED_RETRY_SECONDS = 1800
+# 重新计算待处理电影优先级的间隔（秒），发布时间加分按天衰减
+PRIORITY_REFRESH_SECONDS = 3600
+
+
+async def wait_for_new_movies(listener, timeout: float) -> bool:
+    """分段等待新电影通知，便于及时响应停止请求；listener 为 None 时只是等待"""
+    deadline = time.monotonic() + timeout
+    while crawler_running:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        if listener is None:
+            await asyncio.sleep(min(remaining, 5))
+        elif await listener.wait(min(remaining, 5)):
+            logger.info("New movies inserted, waking up detail crawler")
+            return True
+    return False
+
 router = APIRouter()
 
 # API端点：启动爬虫任务
@@ -35,91 +62,135 @@ async def start_crawler():
     # 定义后台爬虫任务，完全自包含以避免依赖注入问题
     def run_crawler_background():
         async def continuous_crawler():
-            # 创建新的事件循环
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
             # 导入所需的模块
             from app.config.database import async_session
+            from app.config.settings import settings
+            from common.db.notify import (
+                MOVIE_INSERTED_CHANNEL, PgNotificationListener, asyncpg_dsn, ensure_movie_notify_trigger,
+            )
             from crawler.service.movie_detail_crawler_service import MovieDetailCrawlerService
             from crawler.repository.movie_repository import MovieRepository
             from crawler.service.crawler_progress_service import CrawlerProgressService
             from crawler.repository.movie_info_repository import MovieInfoRepository
             from crawler.repository.download_url_repository import DownloadUrlRepository
-            from app.repositories.genre_repository import GenreRepository
-            from crawler.repository.page_crawler_repository import PageCrawlerRepository
-            from crawler.repository.movie_crawler_repository import MovieCrawlerRepository
-            from crawler.repository.crawler_progress_repository import CrawlerProgressRepository
+            from crawler.repository.detail_retry_repository import DetailRetryRepository
+            from crawler.repository.url_resolution_repository import UrlResolutionRepository
+            from crawler.repository.crawl_priority_repository import CrawlPriorityRepository
+            from crawler.service.detail_retry_service import DetailRetryService, run_retry_scanner
             
-            # 持续运行爬虫，直到被停止
-            while crawler_running:
-                try:
-                    # 为每个循环创建新的数据库会话
-                    async with async_session() as new_session:
-                        try:
-                            # 创建所需的仓库实例
-                            progress_service = CrawlerProgressService(new_session)
-                            movie_repo = MovieRepository(new_session)
-                            movie_info_repo = MovieInfoRepository(new_session)
-                            download_url_repo = DownloadUrlRepository(new_session)
-                            genre_repository = GenreRepository(new_session)
-                            page_crawler_repository = PageCrawlerRepository(new_session)
-                            movie_crawler_repository = MovieCrawlerRepository(new_session)
-                            crawler_progress_repository = CrawlerProgressRepository(new_session)
-                            
-                            # 创建 MovieDetailCrawlerService 实例
-                            new_service = MovieDetailCrawlerService(
-                                progress_service,
-                                movie_info_repo,
-                                movie_repo,
-                                download_url_repo
+            listener = PgNotificationListener(asyncpg_dsn(settings.DATABASE_URL), MOVIE_INSERTED_CHANNEL)
+            new_session = None
+            scanner = None
+            # 失败没有写入重试队列的电影 id -> 可以重新领取的时间（兜底，避免同一部电影被反复领取）
+            failed_until: Dict[int, float] = {}
+            
+            async def open_session():
+                """创建长期使用的会话、仓库和服务，只在出错后重建"""
+                session = async_session()
+                movie_repo = MovieRepository(session)
+                retry_service = DetailRetryService(DetailRetryRepository(session))
+                service = MovieDetailCrawlerService(
+                    CrawlerProgressService(session),
+                    MovieInfoRepository(session),
+                    movie_repo,
+                    DownloadUrlRepository(session),
+                    retry_service,
+                    UrlResolutionRepository(session),
+                )
+                return session, movie_repo, service, retry_service
+            
+            try:
+                new_session, movie_repo, new_service, retry_service = await open_session()
+                # 失败的电影写入持久化重试队列，由扫描器在到期时放回队列
+                await DetailRetryRepository(new_session).ensure_schema()
+                # 重定向过的代码直接打开最终地址
+                await UrlResolutionRepository(new_session).ensure_schema()
+                # 按优先级领取：手动请求的、新发布的、热门的电影先爬
+                await CrawlPriorityRepository(new_session).ensure_schema()
+                await CrawlPriorityRepository(new_session).refresh()
+                priority_refreshed_at = time.monotonic()
+                scanner = asyncio.create_task(run_retry_scanner(
+                    async_session, lambda: crawler_running, RETRY_SCAN_SECONDS, MOVIE_INSERTED_CHANNEL,
+                ))
+                trigger_ready = await ensure_movie_notify_trigger(new_session)
+                listening = trigger_ready and await listener.start()
+                # 没有通知时退回到原来的轮询间隔；有通知时只做兜底检查（重试到期时扫描器会发通知）
+                idle_timeout = IDLE_FALLBACK_SECONDS if listening else 10
+                
+                # 持续运行爬虫，直到被停止
+                while crawler_running:
+                    try:
+                        if time.monotonic() - priority_refreshed_at > PRIORITY_REFRESH_SECONDS:
+                            await CrawlPriorityRepository(new_session).refresh()
+                            priority_refreshed_at = time.monotonic()
+                        
+                        now = time.monotonic()
+                        for movie_id in [i for i, until in failed_until.items() if until <= now]:
+                            del failed_until[movie_id]
+                        
+                        # 按优先级领取一批待处理的电影，跳过还在等待重试和已进入死信的
+                        movies: List[Movie] = list(
+                            await movie_repo.get_new_movies(
+                                BATCH_SIZE, exclude_ids=failed_until.keys(), exclude_retrying=True, by_priority=True,
                             )
-                            
-                            # 获取并处理电影详情
+                        )
+                        
+                        # 如果没有电影需要处理，等待新电影通知（或兜底超时）
+                        if not movies:
+                            await wait_for_new_movies(listener if listening else None, idle_timeout)
+                            continue
+                        
+                        # 爬取失败的电影由服务写入重试队列；没能写入的在内存中暂时排除
+                        # （处理中的回滚会让对象过期，先取出 id 和代码）
+                        claimed = [(movie, movie.id, movie.code) for movie in movies]
+                        processed: List[Movie] = await new_service.process_movies(movies)
+                        recorded = new_service.pop_recorded_failures()
+                        for movie, movie_id, movie_code in claimed:
+                            if not any(movie is done for done in processed) and movie_code not in recorded:
+                                failed_until[movie_id] = time.monotonic() + FAILED_RETRY_SECONDS
+                        
+                        # 处理每个电影，为每个电影使用单独的事务
+                        processed_count = 0
+                        for movie in processed:
+                            movie_id, movie_code = movie.id, movie.code
                             try:
-                                movies: List[Movie] = await new_service.process_movies_details_once(1)
-                                
-                                # 如果没有电影需要处理，等待一段时间后再尝试
-                                if not movies or len(movies) == 0:
-                                    logger.info("No movies to process, waiting for 10 seconds before next attempt")
-                                    await asyncio.sleep(10)
-                                    continue
-                                
-                                # 处理每个电影，为每个电影使用单独的事务
-                                processed_count = 0
-                                for movie in movies:
-                                    # 为每个电影创建一个新的事务
-                                    try:
-                                        # 尝试保存电影
-                                        await movie_repo.saveOrUpdate([movie], new_session)
-                                        # 立即提交这个电影的事务
-                                        await new_session.commit()
-                                        processed_count += 1
-                                    except Exception as movie_error:
-                                        logger.error(f"Error saving movie {movie.code if hasattr(movie, 'code') else 'unknown'}: {str(movie_error)}")
-                                        # 回滚事务并继续处理下一个电影
-                                        await new_session.rollback()
-                                        continue
-                                
-                                logger.info(f"Successfully processed {processed_count} out of {len(movies)} movies in background task")
-                            except Exception as process_error:
-                                logger.error(f"Error processing movies: {str(process_error)}")
-                                # 回滚事务
+                                # 详情已保存，移出待处理队列
+                                movie.status = MovieStatus.ONLINE.value
+                                await movie_repo.saveOrUpdate([movie], new_session)
+                                # 立即提交这个电影的事务
+                                await new_session.commit()
+                                processed_count += 1
+                            except Exception as movie_error:
+                                logger.error(f"Error saving movie {movie_code}: {str(movie_error)}")
+                                # 回滚事务并继续处理下一个电影
                                 await new_session.rollback()
-                                # 等待一段时间后继续
-                                await asyncio.sleep(5)
-                        except Exception as session_error:
-                            logger.error(f"Error setting up services: {str(session_error)}")
-                            # 尝试回滚事务
-                            try:
-                                await new_session.rollback()
-                            except:
-                                pass  # 忽略回滚错误
-                    
-                except Exception as e:
-                    logger.error(f"Error in continuous crawler: {str(e)}")
-                    # 出错后等待一段时间再继续
-                    await asyncio.sleep(5)
+                                try:
+                                    await retry_service.record_failure(movie_code, "unknown", str(movie_error))
+                                except Exception as record_error:
+                                    logger.error(f"Error recording retry for movie {movie_code}: {str(record_error)}")
+                                    await new_session.rollback()
+                                    failed_until[movie_id] = time.monotonic() + FAILED_RETRY_SECONDS
+                                continue
+                        
+                        # 长期会话不保留已处理的对象
+                        new_session.expunge_all()
+                        logger.info(f"Successfully processed {processed_count} out of {len(movies)} movies in background task")
+                    except Exception as e:
+                        logger.error(f"Error in continuous crawler: {str(e)}")
+                        # 会话可能已失效，重建会话和仓库后再继续
+                        try:
+                            await new_session.rollback()
+                            await new_session.close()
+                        except Exception:
+                            pass  # 忽略回滚错误
+                        await asyncio.sleep(5)
+                        new_session, movie_repo, new_service, retry_service = await open_session()
+            finally:
+                if scanner is not None:
+                    scanner.cancel()
+                await listener.close()
+                if new_session is not None:
+                    await new_session.close()
         
         # 运行连续爬虫任务
         try:
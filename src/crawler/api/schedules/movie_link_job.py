@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Query
+import logging
+import asyncio
+import threading
+
+# 获取日志记录器
+logger = logging.getLogger(__name__)
+
+# 控制后台任务的标志
+normalizer_running = False
+normalizer_thread = None
+
+# 追上 movie_info 的变化后再次检查的间隔（秒）
+CHECK_INTERVAL_SECONDS = 60
+
+router = APIRouter()
+
+# API端点：启动关联规范化任务
+@router.post("/start")
+async def start_normalizer():
+    global normalizer_running, normalizer_thread
+
+    if normalizer_running and normalizer_thread and normalizer_thread.is_alive():
+        return {"status": "warning", "message": "Movie link normalizer is already running"}
+
+    normalizer_running = True
+
+    # 后台线程中使用独立的事件循环和会话
+    def run_normalizer_background():
+        global normalizer_running
+        from app.config.database import async_session
+        from crawler.service.movie_link_normalizer import run_link_normalizer
+
+        try:
+            asyncio.run(run_link_normalizer(async_session, lambda: normalizer_running, CHECK_INTERVAL_SECONDS))
+        except Exception as e:
+            logger.error(f"Error in movie link normalizer thread: {str(e)}")
+            normalizer_running = False
+
+    normalizer_thread = threading.Thread(target=run_normalizer_background, daemon=True)
+    normalizer_thread.start()
+
+    logger.info("Movie link normalizer started")
+    return {"status": "success", "message": "Movie link normalizer started in background"}
+
+# API端点：停止关联规范化任务
+@router.post("/stop")
+async def stop_normalizer():
+    global normalizer_running
+
+    if normalizer_running and normalizer_thread and normalizer_thread.is_alive():
+        normalizer_running = False
+        normalizer_thread.join(timeout=10)
+        if normalizer_thread.is_alive():
+            logger.warning("Movie link normalizer did not terminate gracefully within timeout")
+        return {"status": "success", "message": "Movie link normalizer stopped"}
+
+    return {"status": "warning", "message": "Movie link normalizer was not running"}
+
+# API端点：查看进度（只读，表由任务启动时创建）
+@router.get("/status")
+async def normalizer_status():
+    from app.config.database import async_session
+    from common.utils.dimension_cache import dimension_cache
+    from crawler.repository.movie_link_repository import MovieLinkRepository
+    from crawler.service.movie_link_normalizer import WATERMARK_NAME
+
+    status = {
+        "running": bool(normalizer_running and normalizer_thread and normalizer_thread.is_alive()),
+        "dimension_cache": dimension_cache.stats(),
+    }
+    async with async_session() as session:
+        repository = MovieLinkRepository(session)
+        try:
+            watermark = await repository.get_watermark(WATERMARK_NAME)
+            status["watermark"] = {"updated_at": watermark[0].isoformat(), "id": watermark[1]}
+            status["pending_rows"] = await repository.count_pending(watermark)
+            status["unresolved_rows"] = await repository.count_unresolved()
+        except Exception as e:
+            # 任务还没启动过时表不存在
+            await session.rollback()
+            logger.warning(f"Movie link normalizer status unavailable: {str(e)}")
+            status["watermark"] = None
+    return status
+
+# API端点：清除位置，从头重新规范化所有 movie_info
+@router.post("/reset")
+async def reset_normalizer(confirm: bool = Query(False, description="确认从头重新扫描")):
+    if not confirm:
+        return {"status": "warning", "message": "Pass confirm=true to rescan all movie_info rows"}
+    from app.config.database import async_session
+    from crawler.repository.movie_link_repository import MovieLinkRepository
+    from crawler.service.movie_link_normalizer import WATERMARK_NAME
+
+    async with async_session() as session:
+        repository = MovieLinkRepository(session)
+        await repository.ensure_schema()
+        await repository.reset_watermark(WATERMARK_NAME)
+    return {"status": "success", "message": "Watermark cleared, next pass rescans all movie_info rows"}
@@ -244,7 +244,8 @@ class DirectMovieCrawler:
         logger.error(f"❌ 所有重试均失败: {url}")
         return {}
 
-    def _validate_content(self, html_content: str, url: str) -> bool:
+    @staticmethod
+    def _validate_content(html_content: str, url: str) -> bool:
         """验证页面内容是否有效"""
         if not html_content or len(html_content) < 10000:
             return False
@@ -6,4 +6,5 @@ class GenrePageProgressUpdate(BaseModel):
         total_pages: Optional[int] = None
         code: Optional[str] = None
         status: Optional[str] = None
-        total_items: Optional[int] = None
\ No newline at end of file
+        total_items: Optional[int] = None
+        crawler_progress_id: Optional[int] = None
\ No newline at end of file
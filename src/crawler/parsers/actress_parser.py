@@ -3,9 +3,27 @@
 import logging
 import re
 from typing import Dict, Any, Optional, List
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 from ..models.actress import Actress
 
+# 电影条目的选择器，按优先级排列：页面上同时存在多种时只取优先级最高的一种
+MOVIE_ITEM_SELECTORS = ['.movie-item', '.video-item', '.item', 'article', '.content-item', '.box-item']
+
+PAGINATION_SELECTORS = ['.pagination', '.pages', '.page-numbers', '.pager']
+
+_CODE_RE = re.compile(r'/([A-Za-z]+-\d+)')
+_FAVOURITE_ID_RE = re.compile(r"Favourite\('movie', (\d+)")
+_PAGE_PARAM_RE = re.compile(r'[?&]page=(\d+)')
+
+
+def build_page_url(url: str, page: int) -> str:
+    """女优作品列表第 page 页的地址"""
+    url = _PAGE_PARAM_RE.sub('', url).rstrip('?&')
+    if page <= 1:
+        return url
+    return f"{url}{'&' if '?' in url else '?'}page={page}"
+
+
 class ActressParser:
     """Parser for actress pages."""
     
@@ -21,12 +39,14 @@ class ActressParser:
     def parse_actress_page(self, html_content: str, url: str) -> Dict[str, Any]:
         """Parse actress detail page.
         
+        整个页面只解析一次，资料、第一页作品和分页信息都从同一棵树中读取。
+
         Args:
             html_content: HTML content of the actress page
             url: URL of the actress page
             
         Returns:
-            dict: Actress data
+            dict: Actress data; 'movies' is the first filmography page, 'total_pages' its page count
         """
         try:
             soup = BeautifulSoup(html_content, 'html.parser')
@@ -68,15 +88,24 @@ class ActressParser:
                     actress_data[key] = value.get_text(strip=True)
             
             # Extract related movies
-            movie_links = self.extract_movie_links(html_content, url)
+            movie_links = self._extract_movies(soup)
             if movie_links:
                 actress_data['movies'] = movie_links
+            actress_data['total_pages'] = self._get_total_pages(soup, bool(movie_links))
             
             return actress_data
             
         except Exception as e:
             self._logger.error(f"Error parsing actress page: {str(e)}")
             return {'url': url, 'error': str(e)}
+
+    def parse_filmography_page(self, html_content: str) -> List[Dict[str, str]]:
+        """Extract movies from a later page of an actress's filmography."""
+        try:
+            return self._extract_movies(BeautifulSoup(html_content, 'html.parser'))
+        except Exception as e:
+            self._logger.error(f"Error parsing filmography page: {str(e)}")
+            return []
     
     def extract_movie_links(self, html_content: str, base_url: str) -> List[Dict[str, str]]:
         """Extract movie links from an actress page.
@@ -89,60 +118,106 @@ class ActressParser:
             list: List of movie data dictionaries
         """
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            movies = []
-            
-            # Try different selectors for movie items
-            selectors = [
-                '.movie-item',
-                '.video-item',
-                '.item',
-                'article',
-                '.content-item'
-            ]
-            
-            for selector in selectors:
-                items = soup.select(selector)
-                if items:
-                    for item in items:
-                        try:
-                            movie = {}
-                            
-                            # Get title
-                            title_elem = item.select_one('h3') or item.select_one('.title') or item.select_one('a')
-                            if title_elem:
-                                movie['title'] = title_elem.get_text(strip=True)
-                            
-                            # Get URL
-                            link = item.select_one('a')
-                            if link:
-                                url = link.get('href', '')
-                                if url:
-                                    if not url.startswith('http'):
-                                        url = f'http://123av.com{url}'
-                                    movie['url'] = url
-                                    
-                                    # Extract code from URL
-                                    code_match = re.search(r'/([A-Z]+-\d+)', url)
-                                    if code_match:
-                                        movie['code'] = code_match.group(1)
-                            
-                            # Get thumbnail
-                            img = item.select_one('img')
-                            if img:
-                                movie['thumbnail'] = img.get('src', '')
-                            
-                            if movie.get('url') and movie.get('title'):
-                                movies.append(movie)
-                                
-                        except Exception as e:
-                            self._logger.error(f"Error processing movie item: {str(e)}")
-                            continue
-                            
-                    break
-            
-            return movies
-            
+            return self._extract_movies(BeautifulSoup(html_content, 'html.parser'))
         except Exception as e:
             self._logger.error(f"Error extracting movie links: {str(e)}")
             return []
+
+    def _extract_movies(self, soup: BeautifulSoup) -> List[Dict[str, str]]:
+        movies = []
+        for item in self._find_movie_items(soup):
+            try:
+                movie = self._parse_movie_item(item)
+                if movie.get('url') and movie.get('title'):
+                    movies.append(movie)
+            except Exception as e:
+                self._logger.error(f"Error processing movie item: {str(e)}")
+                continue
+        return movies
+
+    @staticmethod
+    def _find_movie_items(soup: BeautifulSoup) -> List[Tag]:
+        """一次遍历文档，按 MOVIE_ITEM_SELECTORS 的优先级返回匹配的条目
+
+        与逐个 select 每个选择器的结果相同（取第一个有匹配的选择器），但只遍历一次。
+        """
+        class_priority = {
+            selector[1:]: index for index, selector in enumerate(MOVIE_ITEM_SELECTORS) if selector.startswith('.')
+        }
+        tag_priority = {
+            selector: index for index, selector in enumerate(MOVIE_ITEM_SELECTORS) if not selector.startswith('.')
+        }
+        best = len(MOVIE_ITEM_SELECTORS)
+        items: List[Tag] = []
+        for tag in soup.find_all(True):
+            priority = tag_priority.get(tag.name, best)
+            for css_class in tag.get('class') or ():
+                priority = min(priority, class_priority.get(css_class, best))
+            if priority < best:
+                best, items = priority, [tag]
+            elif priority == best and priority < len(MOVIE_ITEM_SELECTORS):
+                items.append(tag)
+        return items
+
+    @staticmethod
+    def _parse_movie_item(item: Tag) -> Dict[str, str]:
+        movie = {}
+
+        # Get title
+        title_elem = item.find('h3') or item.find(class_='title') or item.find('a')
+        if title_elem:
+            movie['title'] = title_elem.get_text(strip=True)
+
+        # Get URL
+        link = item.find('a')
+        if link:
+            url = link.get('href', '')
+            if url:
+                if not url.startswith('http'):
+                    url = f'http://123av.com{url}'
+                movie['url'] = url
+
+                # Extract code from URL
+                code_match = _CODE_RE.search(url)
+                if code_match:
+                    movie['code'] = code_match.group(1).upper()
+
+        # 列表条目上的收藏按钮带有代码和原始ID
+        favourite = item.find(class_='favourite')
+        if favourite:
+            if favourite.get('data-code'):
+                movie['code'] = favourite['data-code']
+            id_match = _FAVOURITE_ID_RE.search(favourite.get('v-scope', ''))
+            if id_match:
+                movie['original_id'] = id_match.group(1)
+
+        # Get thumbnail
+        img = item.find('img')
+        if img:
+            movie['thumbnail'] = img.get('src', '') or img.get('data-src', '')
+
+        duration = item.find(class_='duration')
+        if duration:
+            movie['duration'] = duration.get_text(strip=True)
+
+        return movie
+
+    @staticmethod
+    def _get_total_pages(soup: BeautifulSoup, has_movies: bool) -> int:
+        """作品列表的总页数，没有分页时为 1（没有作品时为 0）"""
+        for selector in PAGINATION_SELECTORS:
+            pagination = soup.select_one(selector)
+            if not pagination:
+                continue
+            page_numbers = []
+            for link in pagination.find_all('a'):
+                text = link.get_text(strip=True)
+                if text.isdigit():
+                    page_numbers.append(int(text))
+                else:
+                    page_match = _PAGE_PARAM_RE.search(link.get('href', ''))
+                    if page_match:
+                        page_numbers.append(int(page_match.group(1)))
+            if page_numbers:
+                return max(page_numbers)
+        return 1 if has_movies else 0
@@ -3,12 +3,12 @@
 import logging
 import re
 import json
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from bs4 import BeautifulSoup
 from httpx import Response
-from crawler.service.movie_detail_info import _extract_m3u8_from_player
+from crawler.service.m3u8_resolver import m3u8_resolver
 from common.db.entity.movie import Movie
-from crawler.utils.http import create_session
+from common.utils.http_clients import http_clients
 from common.db.entity.movie import MovieStatus
 
 class MovieParser:
@@ -17,7 +17,7 @@ class MovieParser:
     def __init__(self):
         """Initialize MovieParser."""
         self._logger = logging.getLogger(__name__)
-        self._session = create_session(use_proxy=True)
+        self._session = http_clients.session("site")
 
     
     def parse_movie_page(self, movie: Movie, html_content: str, url: str) -> Optional[Movie]:
@@ -145,36 +145,36 @@ class MovieParser:
             self._logger.error(f"Traceback: {traceback.format_exc()}")
             return None
 
-    # todo
-    def get_download_url_and_watch_url(self, movie_id: int) :
-        # Get video URLs info (保持不变)
-        watch_urls_info, download_urls_info = self._get_video_urls(movie_id)
-            
-        # 处理 watch_urls_info - 序列化为JSON字符串
-        if watch_urls_info:
-            m3u8_urls = []
-            for watch_info in watch_urls_info:
-                m3u8_result = _extract_m3u8_from_player(watch_info['url'], movie.cover_image_url)
-                if m3u8_result and m3u8_result.get('m3u8_url'):
-                    m3u8_urls.append({
-                        'index': watch_info['index'],
-                        'name': watch_info['name'],
-                        'url': m3u8_result['m3u8_url']
-                    })
-                # 将列表序列化为JSON字符串
-                movie.watch_urls_info = json.dumps(m3u8_urls)
-        else:
-            movie.watch_urls_info = json.dumps([])
-                
-        # 处理 download_urls_info - 序列化为JSON字符串
-        if download_urls_info:
-            movie.download_urls_info = json.dumps(download_urls_info)
-        else:
-            if movie.magnets is not None:
-                movie.download_urls_info = json.dumps(movie.magnets)
-            else:
-                movie.download_urls_info = json.dumps([])
-        
+    def resolve_video_urls(self, movies: List[Tuple[int, Any, Any]]) -> List[Tuple[str, str]]:
+        """Resolve watch_urls_info (m3u8) and download_urls_info for a batch of movies.
+
+        ajax 接口和所有播放器页面都在 m3u8_resolver 的线程池中并发请求，
+        ajax 接口走 "site" 会话，播放器页面共用 "player" 连接池并按地址缓存。
+        只接收普通值、不访问 ORM 对象，可以在线程池中调用。
+
+        Args:
+            movies: [(原始ID, 封面地址, magnets)]
+
+        Returns:
+            [(watch_urls_info, download_urls_info)]，均为JSON字符串，顺序与 movies 一致
+        """
+        if not movies:
+            return []
+        # Get video URLs info
+        video_urls = m3u8_resolver.map(self._get_video_urls, [movie_id for movie_id, _, _ in movies])
+
+        # 处理 watch_urls_info - 所有电影的播放器地址一起解析
+        m3u8_urls = m3u8_resolver.resolve_watch_urls(
+            [(watch_urls_info, cover_url) for (_, cover_url, _), (watch_urls_info, _) in zip(movies, video_urls)]
+        )
+        results = []
+        for (_, _, magnets), (_, download_urls_info), watch_urls in zip(movies, video_urls, m3u8_urls):
+            # 处理 download_urls_info - 没有下载地址时使用磁力链接
+            if not download_urls_info:
+                download_urls_info = magnets if magnets is not None else []
+            results.append((json.dumps(watch_urls), json.dumps(download_urls_info)))
+        return results
+
     def extract_movie_links(self, html_content: str, base_url: str) -> List[Movie]:
         """Extract movie links from a page.
         
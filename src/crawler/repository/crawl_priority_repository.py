@@ -0,0 +1,168 @@
+import logging
+from typing import Dict, List
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.db.notify import MOVIE_INSERTED_CHANNEL
+
+# 优先级权重：手动请求的电影总是排在最前面，其余按 发布时间 + 热度 + 来源 打分
+REQUESTED_BONUS = 1000000
+# 发布 RECENT_DAYS 天内的电影按新旧线性加分，最新的加 RECENT_DAYS * RECENCY_WEIGHT
+RECENT_DAYS = 90
+RECENCY_WEIGHT = 50
+# 点赞数按对数加分，1万赞约 920 分
+LIKES_WEIGHT = 100
+# 来源加分：feed 中出现的是站点刚推送的新片
+SOURCE_BONUS = {"feed": 2000}
+
+
+def _source_case() -> str:
+    cases = " ".join(f"WHEN '{source}' THEN {bonus}" for source, bonus in SOURCE_BONUS.items())
+    return f"CASE source {cases} ELSE 0 END"
+
+
+class CrawlPriorityRepository:
+    """详情爬取队列的优先级
+
+    movies 上增加三列：
+    - crawl_priority: 由触发器在插入和相关字段变化时计算，待处理（status='new'）的行上有部分索引
+    - crawl_source: 电影的来源（feed、listing、request 等），由知道来源的写入方填写
+    - crawl_requested_at: 管理接口手动请求“立即爬取”的时间，电影离开 new 状态时清空
+
+    发布时间加分会随时间衰减，由详情任务定期调用 refresh() 重新计算待处理行。
+    """
+
+    # 与 schema.sql 中的定义保持一致
+    SETUP_SQL = [
+        "ALTER TABLE movies ADD COLUMN IF NOT EXISTS crawl_priority INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE movies ADD COLUMN IF NOT EXISTS crawl_source VARCHAR(20)",
+        "ALTER TABLE movies ADD COLUMN IF NOT EXISTS crawl_requested_at TIMESTAMP WITH TIME ZONE",
+        f"""
+        CREATE OR REPLACE FUNCTION movie_crawl_priority(
+            release_date TEXT, likes INTEGER, source TEXT, requested_at TIMESTAMP WITH TIME ZONE
+        ) RETURNS INTEGER AS $$
+        DECLARE
+            score INTEGER := 0;
+            age_days INTEGER;
+        BEGIN
+            IF requested_at IS NOT NULL THEN
+                score := score + {REQUESTED_BONUS};
+            END IF;
+            IF release_date ~ '^\\d{{4}}-\\d{{2}}-\\d{{2}}' THEN
+                BEGIN
+                    age_days := CURRENT_DATE - substring(release_date FROM 1 FOR 10)::DATE;
+                    score := score + GREATEST(0, {RECENT_DAYS} - GREATEST(age_days, 0)) * {RECENCY_WEIGHT};
+                EXCEPTION WHEN others THEN
+                    NULL;  -- 无效日期（如 2023-02-30）不加分
+                END;
+            END IF;
+            score := score + round(ln(1 + GREATEST(COALESCE(likes, 0), 0)) * {LIKES_WEIGHT})::INTEGER;
+            RETURN score + {_source_case()};
+        END;
+        $$ LANGUAGE plpgsql STABLE
+        """,
+        """
+        CREATE OR REPLACE FUNCTION set_movie_crawl_priority() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.status <> 'new' THEN
+                NEW.crawl_requested_at := NULL;
+            END IF;
+            NEW.crawl_priority := movie_crawl_priority(
+                NEW.release_date, NEW.likes, NEW.crawl_source, NEW.crawl_requested_at
+            );
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS movies_crawl_priority ON movies",
+        """
+        CREATE TRIGGER movies_crawl_priority
+            BEFORE INSERT OR UPDATE OF status, likes, release_date, crawl_source, crawl_requested_at
+            ON movies
+            FOR EACH ROW
+            EXECUTE FUNCTION set_movie_crawl_priority()
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_movies_new_priority ON movies (crawl_priority DESC, id) WHERE status = 'new'",
+    ]
+
+    REFRESH_SQL = """
+        UPDATE movies
+        SET crawl_priority = movie_crawl_priority(release_date, likes, crawl_source, crawl_requested_at)
+        WHERE status = 'new'
+          AND crawl_priority IS DISTINCT FROM movie_crawl_priority(release_date, likes, crawl_source, crawl_requested_at)
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        初始化爬取优先级仓库
+
+        Args:
+            db: 异步数据库会话
+        """
+        self.db = db
+        self._logger = logging.getLogger(__name__)
+
+    async def ensure_schema(self) -> None:
+        """确保优先级字段、触发器和部分索引存在（幂等）"""
+        for statement in self.SETUP_SQL:
+            await self.db.execute(text(statement))
+        await self.db.commit()
+
+    async def refresh(self) -> int:
+        """重新计算待处理电影的优先级（发布时间加分随时间衰减），返回更新的行数"""
+        result = await self.db.execute(text(self.REFRESH_SQL))
+        await self.db.commit()
+        if result.rowcount:
+            self._logger.info("Refreshed crawl priority of %s pending movies", result.rowcount)
+        return result.rowcount
+
+    async def request_now(self, codes: List[str]) -> Dict[str, List[str]]:
+        """把电影放进快速通道：已有的重新置为 new，不存在的新建一条待处理记录
+
+        同时清掉这些代码的重试等待，并通知详情任务立即领取。
+
+        Returns:
+            {'queued': 已有电影的代码, 'inserted': 新建的代码}
+        """
+        codes = sorted({code.strip() for code in codes if code and code.strip()})
+        if not codes:
+            return {"queued": [], "inserted": []}
+
+        result = await self.db.execute(
+            text("""
+                UPDATE movies
+                SET status = 'new', crawl_requested_at = CURRENT_TIMESTAMP
+                WHERE code = ANY(:codes)
+                RETURNING code
+            """),
+            {"codes": codes},
+        )
+        queued = [row[0] for row in result]
+
+        missing = [code for code in codes if code not in set(queued)]
+        inserted: List[str] = []
+        if missing:
+            result = await self.db.execute(
+                text("""
+                    INSERT INTO movies (code, duration, status, crawl_source, crawl_requested_at)
+                    SELECT code, '00:00:00', 'new', 'request', CURRENT_TIMESTAMP
+                    FROM unnest(CAST(:codes AS VARCHAR[])) AS code
+                    ON CONFLICT (code) DO NOTHING
+                    RETURNING code
+                """),
+                {"codes": missing},
+            )
+            inserted = [row[0] for row in result]
+
+        # 等待中的重试和死信会让领取查询跳过这些电影
+        retries_table = await self.db.execute(text("SELECT to_regclass('movie_detail_retries')"))
+        if retries_table.scalar() is not None:
+            await self.db.execute(
+                text("DELETE FROM movie_detail_retries WHERE code = ANY(:codes)"), {"codes": codes}
+            )
+
+        # 插入会由触发器通知，更新需要单独通知
+        await self.db.execute(text("SELECT pg_notify(:channel, '')"), {"channel": MOVIE_INSERTED_CHANNEL})
+        await self.db.commit()
+        self._logger.info("Fast-lane crawl requested: %s queued, %s inserted", len(queued), len(inserted))
+        return {"queued": queued, "inserted": inserted}
@@ -4,7 +4,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.database import get_db_session
 from app.repositories.base_repository import BaseRepositoryAsync
 from common.db.entity.crawler import CrawlerProgress
-from sqlalchemy import update
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import func, select, update
 
 class CrawlerProgressRepository(BaseRepositoryAsync[CrawlerProgress, int]):
     def __init__(self, db: AsyncSession = Depends(get_db_session)):
@@ -18,6 +20,14 @@ class CrawlerProgressRepository(BaseRepositoryAsync[CrawlerProgress, int]):
         await self.db.refresh(crawler_progress)
         return crawler_progress
 
+    async def get_last_update(self, task_type: str, status: str) -> Optional[datetime]:
+        """某类任务最近一次进入该状态的时间，没有时返回 None"""
+        result = await self.db.execute(
+            select(func.max(CrawlerProgress.last_update))
+            .where(CrawlerProgress.task_type == task_type, CrawlerProgress.status == status)
+        )
+        return result.scalar()
+
     async def update_status(self, crawler_progress: CrawlerProgress):
         """更新爬虫任务状态。
         
@@ -0,0 +1,125 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class DetailRetryRepository:
+    """详情爬取重试队列仓库
+
+    movie_detail_retries 以电影代码为主键记录失败次数、错误分类和下次尝试时间：
+    - waiting: 等待 next_attempt_at 到期，期间不会被领取
+    - due: 已到期，由重试扫描器放回队列，等待领取
+    - dead: 超过最大尝试次数，不再自动重试（死信）
+    爬取成功后删除对应记录。
+    """
+
+    # 与 schema.sql 中的定义保持一致
+    SETUP_SQL = [
+        """
+        CREATE TABLE IF NOT EXISTS movie_detail_retries (
+            code VARCHAR(50) PRIMARY KEY,
+            movie_id INTEGER,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error_class VARCHAR(30),
+            last_error TEXT,
+            status VARCHAR(20) NOT NULL DEFAULT 'waiting',
+            next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_movie_detail_retries_due ON movie_detail_retries(status, next_attempt_at)",
+    ]
+
+    def __init__(self, db: AsyncSession):
+        """
+        初始化重试队列仓库
+
+        Args:
+            db: 异步数据库会话
+        """
+        self.db = db
+        self._logger = logging.getLogger(__name__)
+
+    async def ensure_schema(self) -> None:
+        """确保重试队列表存在（幂等）"""
+        for statement in self.SETUP_SQL:
+            await self.db.execute(text(statement))
+        await self.db.commit()
+
+    async def increment_attempts(self, code: str, error_class: str, error: str) -> int:
+        """记录一次失败并返回累计尝试次数"""
+        result = await self.db.execute(
+            text("""
+                INSERT INTO movie_detail_retries (code, movie_id, attempts, error_class, last_error, status)
+                VALUES (:code, (SELECT id FROM movies WHERE code = :code), 1, :error_class, :error, 'waiting')
+                ON CONFLICT (code) DO UPDATE
+                SET attempts = movie_detail_retries.attempts + 1,
+                    error_class = EXCLUDED.error_class,
+                    last_error = EXCLUDED.last_error,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING attempts
+            """),
+            {"code": code, "error_class": error_class, "error": error[:2000]},
+        )
+        return result.scalar_one()
+
+    async def schedule(self, code: str, attempts: int, error: str,
+                       delay_seconds: Optional[float], dead: bool) -> Optional[datetime]:
+        """设置下次尝试时间或标记为死信，同时同步 video_progress 的重试信息
+
+        Returns:
+            下次尝试时间，死信时为 None
+        """
+        next_attempt_at = None if dead else datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+        await self.db.execute(
+            text("""
+                UPDATE movie_detail_retries
+                SET status = :status, next_attempt_at = COALESCE(:next_attempt_at, next_attempt_at)
+                WHERE code = :code
+            """),
+            {"code": code, "status": "dead" if dead else "waiting", "next_attempt_at": next_attempt_at},
+        )
+        await self.db.execute(
+            text("""
+                UPDATE video_progress
+                SET retry_count = :attempts, last_error = :error,
+                    status = CASE WHEN :dead THEN 'failed' ELSE status END
+                WHERE code = :code
+            """),
+            {"code": code, "attempts": attempts, "error": error[:2000], "dead": dead},
+        )
+        await self.db.commit()
+        return next_attempt_at
+
+    async def clear(self, code: str) -> None:
+        """爬取成功后移出重试队列"""
+        await self.db.execute(text("DELETE FROM movie_detail_retries WHERE code = :code"), {"code": code})
+        await self.db.commit()
+
+    async def release_due(self, limit: int = 500) -> int:
+        """把到期的等待项放回队列，返回放回的数量"""
+        result = await self.db.execute(
+            text("""
+                UPDATE movie_detail_retries
+                SET status = 'due', updated_at = CURRENT_TIMESTAMP
+                WHERE code IN (
+                    SELECT code FROM movie_detail_retries
+                    WHERE status = 'waiting' AND next_attempt_at <= now()
+                    ORDER BY next_attempt_at
+                    LIMIT :limit
+                    FOR UPDATE SKIP LOCKED
+                )
+            """),
+            {"limit": limit},
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    async def status_counts(self) -> Dict[str, int]:
+        """各状态的数量统计"""
+        result = await self.db.execute(
+            text("SELECT status, COUNT(*) FROM movie_detail_retries GROUP BY status")
+        )
+        return {row[0]: row[1] for row in result.fetchall()}
@@ -3,6 +3,7 @@ from typing import Dict, List, Optional, Any
 from sqlalchemy import select, update, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from common.db.entity.download_url import DownloadUrl
+from common.utils.response_cache import response_cache
 
 class DownloadUrlRepository:
     """下载链接仓库类，处理磁力链接和下载URL的数据库操作"""
@@ -31,6 +32,8 @@ class DownloadUrlRepository:
             download_url = DownloadUrl(**download_url_data)
             self.db.add(download_url)
             await self.db.commit()
+            # code 即详情接口使用的代码（link 的末尾部分）
+            await response_cache.invalidate_movies([download_url_data.get('code')])
             await self.db.refresh(download_url)
             return download_url
         except Exception as e:
@@ -73,6 +76,7 @@ class DownloadUrlRepository:
             if download_url:
                 download_url.magnets = magnets
                 await self.db.commit()
+                await response_cache.invalidate_movies([code])
                 await self.db.refresh(download_url)
                 return download_url
             else:
@@ -104,6 +108,7 @@ class DownloadUrlRepository:
             if download_url:
                 await self.db.delete(download_url)
                 await self.db.commit()
+                await response_cache.invalidate_movies([code])
                 return True
             return False
         except Exception as e:
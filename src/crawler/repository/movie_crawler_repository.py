@@ -1,3 +1,4 @@
+import logging
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.database import get_db_session
@@ -6,14 +7,27 @@ from app.repositories.base_repository import BaseRepositoryAsync
 from common.db.entity.movie import Movie
 from typing import List
 from sqlalchemy.exc import IntegrityError
+from common.utils.response_cache import response_cache, movie_detail_code
+from common.utils.known_movie_index import known_movie_index
 
 class MovieCrawlerRepository(BaseRepositoryAsync[VideoProgress, int]):
     def __init__(self, db: AsyncSession = Depends(get_db_session)):
         super().__init__(db)
+        self._logger = logging.getLogger(__name__)
 
 
-    async def save_movies(self, movies: List[Movie]) -> int:
+    async def save_movies(self, movies: List[Movie], prefiltered: bool = False) -> int:
+        # 先用进程内索引批量过滤掉已入库的电影，只对新电影逐条插入
+        # （prefiltered 为 True 时调用方已经用 known_movie_index.filter_new 过滤过）
+        if not prefiltered:
+            try:
+                movies = await known_movie_index.filter_new(self.db, movies)
+            except Exception as e:
+                await self.db.rollback()
+                self._logger.warning(f"电影索引不可用，逐条插入: {str(e)}")
+
         saved_count = 0
+        saved_codes = []
         for movie in movies:
             try:
                 self.db.add(movie)
@@ -21,11 +35,14 @@ class MovieCrawlerRepository(BaseRepositoryAsync[VideoProgress, int]):
                 saved_count += 1
                 # 每一条记录保存成功后立即提交，避免累积事务
                 await self.db.commit()
+                saved_codes.append(movie_detail_code(movie))
+                known_movie_index.add(movie.code, movie.original_id)
             except IntegrityError as e:
                 # 回滚当前事务，但不影响后续处理
                 await self.db.rollback()
                 if "unique constraint" in str(e).lower() or "唯一约束" in str(e).lower() or "duplicate key" in str(e).lower():
-                    # 忽略唯一索引冲突错误，只记录日志
+                    # 忽略唯一索引冲突错误，只记录日志；索引落后于库时补上
+                    known_movie_index.add(movie.code, movie.original_id)
                     self._logger.info(f"忽略唯一索引冲突: {movie.code if hasattr(movie, 'code') else '未知'}")
                 else:
                     # 其他完整性错误仍然记录
@@ -34,5 +51,8 @@ class MovieCrawlerRepository(BaseRepositoryAsync[VideoProgress, int]):
                 self._logger.error(f"保存电影时出错: {str(e)}")
                 # 回滚当前事务，但不影响后续处理
                 await self.db.rollback()
-        
+
+        if saved_count:
+            # 新电影出现在列表中；之前请求过的详情可能缓存了“不存在”
+            await response_cache.invalidate_movies(saved_codes, lists=True)
         return saved_count
\ No newline at end of file
@@ -8,6 +8,7 @@ from app.repositories.base_repository import BaseRepositoryAsync
 from app.config.database import get_db_session
 from common.db.entity.movie_info import MovieInfo, MovieTitle
 from common.db.entity.movie import Movie
+from common.utils.response_cache import response_cache, movie_detail_code
 
 
 class MovieInfoRepository(BaseRepositoryAsync[MovieInfo, int]):
@@ -35,7 +36,8 @@ class MovieInfoRepository(BaseRepositoryAsync[MovieInfo, int]):
         try:
             movie_info = MovieInfo(**movie_info_data)
             self.db.add(movie_info)
-            await self.db.commit() 
+            await self.db.commit()
+            await self._invalidate_details([movie_info_data.get("code")])
             await self.db.refresh(movie_info)
             return movie_info
         except Exception as e:
@@ -81,6 +83,7 @@ class MovieInfoRepository(BaseRepositoryAsync[MovieInfo, int]):
                     setattr(movie_info, key, value)
             
             await self.db.commit()
+            await self._invalidate_details([movie_info_code])
             await self.db.refresh(movie_info)
             return movie_info
         except Exception as e:
@@ -109,6 +112,7 @@ class MovieInfoRepository(BaseRepositoryAsync[MovieInfo, int]):
                     setattr(movie_info, key, value)
             
             await self.db.commit()
+            await self._invalidate_details([code])
             await self.db.refresh(movie_info)
             return movie_info
         except Exception as e:
@@ -150,6 +154,7 @@ class MovieInfoRepository(BaseRepositoryAsync[MovieInfo, int]):
                 self.db.add(movie_info)
                 
             await self.db.commit()
+            await self._invalidate_details([code])
             await self.db.refresh(movie_info)
             return movie_info
         except Exception as e:
@@ -190,6 +195,7 @@ class MovieInfoRepository(BaseRepositoryAsync[MovieInfo, int]):
                 self.db.add(movie_title)
                 
             await self.db.commit()
+            await self._invalidate_details(await self._codes_by_uuid(movie_uuid))
             await self.db.refresh(movie_title)
             return movie_title
         except Exception as e:
@@ -210,4 +216,25 @@ class MovieInfoRepository(BaseRepositoryAsync[MovieInfo, int]):
         """
         query = select(MovieInfo).where(MovieInfo.id == id)
         result = self.db.execute(query)
-        return result.scalar_one_or_none()
\ No newline at end of file
+        return result.scalar_one_or_none()
+
+    async def _codes_by_uuid(self, movie_uuid) -> List[str]:
+        """movie_uuid 对应的电影代码，用于标题变化后使详情缓存失效"""
+        result = await self.db.execute(select(MovieInfo.code).where(MovieInfo.movie_uuid == movie_uuid))
+        return list(result.scalars().all())
+
+    async def _invalidate_details(self, codes: List[Optional[str]]) -> None:
+        """movie_info 按电影代码写入，详情缓存按 movie_detail_code（link 的末尾部分）存放，换算后失效"""
+        codes = [code for code in codes if code]
+        if not codes:
+            return
+        try:
+            result = await self.db.execute(select(Movie.code, Movie.link).where(Movie.code.in_(codes)))
+            movies = result.all()
+        except Exception as e:
+            self._logger.warning(f"Error resolving detail cache keys for {codes}: {str(e)}")
+            movies = []
+        found = {movie.code for movie in movies}
+        await response_cache.invalidate_movies(
+            [movie_detail_code(movie) for movie in movies] + [code for code in codes if code not in found]
+        )
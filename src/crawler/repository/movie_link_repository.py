@@ -0,0 +1,203 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# 扫描位置的起点，updated_at 为空的行按这个时间排序
+EPOCH = datetime(1970, 1, 1)
+
+
+class MovieLinkRepository:
+    """movie_info → movie_genres / movie_actresses 规范化任务的仓库
+
+    - sync_watermarks: 每个后台同步任务一行，记录已处理到的 (updated_at, id) 位置
+    - fetch_changed: 按 (updated_at, id) 的 keyset 顺序读取位置之后变化的 movie_info 行，
+      同时通过 code 关联出 movies.id（movies.code 不唯一，每行聚合为数组）
+    - movie_link_pending: 读取时 movies 中还没有对应电影的行，位置照常推进，
+      之后的每一轮用 fetch_resolved_pending 取出已经能关联上的重新处理
+    """
+
+    # 与 schema.sql 中的定义保持一致
+    SETUP_SQL = [
+        """
+        CREATE TABLE IF NOT EXISTS sync_watermarks (
+            name VARCHAR(50) PRIMARY KEY,
+            last_updated_at TIMESTAMP NOT NULL DEFAULT TIMESTAMP 'epoch',
+            last_id INTEGER NOT NULL DEFAULT 0,
+            processed BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS movie_link_pending (
+            movie_info_id INTEGER PRIMARY KEY,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]
+
+    # movie_info 的扫描索引，大表上用 CONCURRENTLY 创建，不阻塞爬虫写入（不能在事务中执行）
+    CHANGED_INDEX_SQL = """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_movie_info_changed
+            ON movie_info ((COALESCE(updated_at, TIMESTAMP 'epoch')), id)
+    """
+
+    # 每个 movie_info 行对应的所有电影（movies.code 没有唯一约束），没有时为 NULL
+    MOVIES_LATERAL_SQL = """
+        LEFT JOIN LATERAL (
+            SELECT array_agg(m.id ORDER BY m.id) AS movie_ids, array_agg(m.link ORDER BY m.id) AS links
+            FROM movies m
+            WHERE m.code = mi.code
+        ) m ON TRUE
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        初始化规范化任务仓库
+
+        Args:
+            db: 异步数据库会话
+        """
+        self.db = db
+        self._logger = logging.getLogger(__name__)
+
+    async def ensure_schema(self) -> None:
+        """确保位置表和待关联表存在（幂等）"""
+        for statement in self.SETUP_SQL:
+            await self.db.execute(text(statement))
+        await self.db.commit()
+
+    async def ensure_changed_index(self) -> None:
+        """在自动提交的连接上并发创建 movie_info 的扫描索引（幂等）
+
+        上次并发创建中断会留下无效索引，IF NOT EXISTS 会跳过它，这里先删掉再重建。
+        """
+        async with self.db.bind.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            if (await conn.execute(text("SELECT to_regclass('movie_info')"))).scalar() is None:
+                return
+            valid = (await conn.execute(text(
+                "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass('idx_movie_info_changed')"
+            ))).scalar()
+            if valid:
+                return
+            if valid is not None:
+                self._logger.warning("idx_movie_info_changed 无效（上次创建中断），重新创建")
+                await conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS idx_movie_info_changed"))
+            self._logger.info("创建 idx_movie_info_changed（CONCURRENTLY）")
+            await conn.execute(text(self.CHANGED_INDEX_SQL))
+
+    async def get_watermark(self, name: str) -> Tuple[datetime, int]:
+        """返回任务已处理到的 (updated_at, id)，没有记录时从头开始"""
+        result = await self.db.execute(
+            text("SELECT last_updated_at, last_id FROM sync_watermarks WHERE name = :name"),
+            {"name": name},
+        )
+        row = result.first()
+        return (row[0], row[1]) if row else (EPOCH, 0)
+
+    async def save_watermark(self, name: str, last_updated_at: datetime, last_id: int, processed: int) -> None:
+        """推进任务位置（不提交，与本批写入的关联在同一个事务中提交）"""
+        await self.db.execute(
+            text("""
+                INSERT INTO sync_watermarks (name, last_updated_at, last_id, processed)
+                VALUES (:name, :last_updated_at, :last_id, :processed)
+                ON CONFLICT (name) DO UPDATE
+                SET last_updated_at = EXCLUDED.last_updated_at,
+                    last_id = EXCLUDED.last_id,
+                    processed = sync_watermarks.processed + EXCLUDED.processed,
+                    updated_at = CURRENT_TIMESTAMP
+            """),
+            {"name": name, "last_updated_at": last_updated_at, "last_id": last_id, "processed": processed},
+        )
+
+    async def reset_watermark(self, name: str) -> None:
+        """清除任务位置，下次从头重新扫描"""
+        await self.db.execute(text("DELETE FROM sync_watermarks WHERE name = :name"), {"name": name})
+        await self.db.commit()
+
+    async def fetch_changed(self, after: Tuple[datetime, int], limit: int,
+                            lag_seconds: float = 0.0) -> List[Dict[str, Any]]:
+        """读取位置之后变化的一批 movie_info 行
+
+        只读取 lag_seconds 之前更新的行：还没提交的事务可能写入比已读取的行更早的 updated_at，
+        留出一段时间避免位置越过它们。
+        先按位置分页 movie_info 行再关联 movies，每个 movie_info 行只返回一次：同一 code 有多个电影时
+        movie_ids / links 为数组，不会因为 LIMIT 截在重复行之间而让位置跳过剩下的电影。
+        对应的电影不在 movies 中时 movie_ids 为 None。
+        """
+        result = await self.db.execute(
+            text(f"""
+                SELECT mi.id, mi.changed_at, m.movie_ids, mi.code, m.links,
+                       mi.language, mi.genres, mi.tags, mi.actresses
+                FROM (
+                    SELECT id, COALESCE(updated_at, TIMESTAMP 'epoch') AS changed_at,
+                           code, language, genres, tags, actresses
+                    FROM movie_info
+                    WHERE (COALESCE(updated_at, TIMESTAMP 'epoch'), id) > (:after_updated_at, :after_id)
+                      AND COALESCE(updated_at, TIMESTAMP 'epoch')
+                          < (now() AT TIME ZONE 'UTC') - make_interval(secs => :lag_seconds)
+                    ORDER BY COALESCE(updated_at, TIMESTAMP 'epoch'), id
+                    LIMIT :limit
+                ) mi
+                {self.MOVIES_LATERAL_SQL}
+                ORDER BY mi.changed_at, mi.id
+            """),
+            {"after_updated_at": after[0], "after_id": after[1], "limit": limit, "lag_seconds": lag_seconds},
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+    async def add_pending(self, movie_info_ids: List[int]) -> None:
+        """记录还关联不上电影的 movie_info 行（不提交，与位置在同一个事务中提交）"""
+        if not movie_info_ids:
+            return
+        await self.db.execute(
+            text("""
+                INSERT INTO movie_link_pending (movie_info_id)
+                SELECT unnest(CAST(:ids AS INTEGER[]))
+                ON CONFLICT DO NOTHING
+            """),
+            {"ids": movie_info_ids},
+        )
+
+    async def fetch_resolved_pending(self, limit: int) -> List[Dict[str, Any]]:
+        """读取一批现在已能通过 code 关联到 movies 的待关联行，字段与 fetch_changed 相同"""
+        result = await self.db.execute(
+            text(f"""
+                SELECT mi.id, COALESCE(mi.updated_at, TIMESTAMP 'epoch') AS changed_at, m.movie_ids,
+                       mi.code, m.links, mi.language, mi.genres, mi.tags, mi.actresses
+                FROM movie_link_pending p
+                JOIN movie_info mi ON mi.id = p.movie_info_id
+                {self.MOVIES_LATERAL_SQL}
+                WHERE m.movie_ids IS NOT NULL
+                ORDER BY p.movie_info_id
+                LIMIT :limit
+            """),
+            {"limit": limit},
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+    async def remove_pending(self, movie_info_ids: List[int]) -> None:
+        """移除已处理的待关联行（不提交）"""
+        if movie_info_ids:
+            await self.db.execute(
+                text("DELETE FROM movie_link_pending WHERE movie_info_id = ANY(CAST(:ids AS INTEGER[]))"),
+                {"ids": movie_info_ids},
+            )
+
+    async def count_unresolved(self) -> int:
+        """还在等待关联的 movie_info 行数（用于状态查询）"""
+        result = await self.db.execute(text("SELECT COUNT(*) FROM movie_link_pending"))
+        return result.scalar_one()
+
+    async def count_pending(self, after: Tuple[datetime, int]) -> Optional[int]:
+        """位置之后还有多少 movie_info 行（用于状态查询）"""
+        result = await self.db.execute(
+            text("""
+                SELECT COUNT(*) FROM movie_info
+                WHERE (COALESCE(updated_at, TIMESTAMP 'epoch'), id) > (:after_updated_at, :after_id)
+            """),
+            {"after_updated_at": after[0], "after_id": after[1]},
+        )
+        return result.scalar_one()
@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, text
 import json
 
 from common.db.entity.movie import Movie
@@ -8,7 +8,8 @@ from app.config.database import get_db_session
 from fastapi import Depends
 from common.db.entity.movie import MovieStatus
 from sqlalchemy import update
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Collection, Optional
+from common.utils.response_cache import response_cache, movie_detail_code
 
 class MovieRepository(BaseRepositoryAsync[Movie, int]):
     # if insert session use it
@@ -20,17 +21,34 @@ class MovieRepository(BaseRepositoryAsync[Movie, int]):
 
 
     # get status new movie with limit
-    async def get_new_movies(self, limit: int = 100):
+    async def get_new_movies(self, limit: int = 100, exclude_ids: Optional[Collection[int]] = None,
+                             exclude_retrying: bool = False, by_priority: bool = False):
         """
         Get new movies with limit.
         
         Args:
             limit: Number of movies to retrieve
+            exclude_ids: Movie ids to skip (e.g. recently failed ones)
+            exclude_retrying: Skip movies waiting in movie_detail_retries (not yet due, or dead-lettered)
+            by_priority: Highest crawl_priority first (needs CrawlPriorityRepository.ensure_schema)
         
         Returns:
-            List[Movie]: List of new movies
+            List[Movie]: List of new movies, oldest first unless by_priority
         """
-        query = select(Movie).where(Movie.status == MovieStatus.NEW.value).limit(limit)
+        query = select(Movie).where(Movie.status == MovieStatus.NEW.value)
+        if exclude_ids:
+            query = query.where(Movie.id.notin_(list(exclude_ids)))
+        if exclude_retrying:
+            query = query.where(text(
+                "NOT EXISTS (SELECT 1 FROM movie_detail_retries r "
+                "WHERE r.code = movies.code AND r.status IN ('waiting', 'dead'))"
+            ))
+        if by_priority:
+            # 与部分索引 idx_movies_new_priority 的顺序一致
+            query = query.order_by(text("movies.crawl_priority DESC"), Movie.id)
+        else:
+            query = query.order_by(Movie.id)
+        query = query.limit(limit)
         result = await self.db.execute(query)
         return result.scalars().all()
 
@@ -49,6 +67,7 @@ class MovieRepository(BaseRepositoryAsync[Movie, int]):
             
         success_count = 0
         total_count = len(movie_details)
+        changed_codes = []
         
         # 使用提供的会话或实例的默认会话
         use_session = session if session is not None else self.db
@@ -88,6 +107,7 @@ class MovieRepository(BaseRepositoryAsync[Movie, int]):
                 
                 # 记录成功处理的电影
                 success_count += 1
+                changed_codes.append(movie_detail_code(existing_movie or movie_detail))
                 
             except Exception as e:
                 self._logger.error(f"Error processing movie {getattr(movie_detail, 'code', 'unknown')}: {str(e)}")
@@ -96,4 +116,6 @@ class MovieRepository(BaseRepositoryAsync[Movie, int]):
         
         # 返回成功标志（如果至少有一个电影成功处理）
         self._logger.info(f"Successfully processed {success_count} out of {total_count} movies")
+        if success_count:
+            await response_cache.invalidate_movies(changed_codes, lists=True)
         return success_count > 0
\ No newline at end of file
@@ -2,6 +2,7 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.database import get_db_session
 from common.db.entity.crawler import PagesProgress
+from typing import Optional
 from sqlalchemy import select, update
 from sqlalchemy.engine.result import Result
 from app.repositories.base_repository import BaseRepositoryAsync
@@ -14,11 +15,13 @@ class PageCrawlerRepository(BaseRepositoryAsync[PagesProgress, int]):
         super().__init__(db)
 
     async def get_latest_page_by_genre_task(self, genre_id: int, task_id: int) -> int:
+        """返回本任务已爬到的最大页码；每次全量扫描是新任务，因此从第1页开始"""
         result : Result = await self.db.execute(
             select(PagesProgress)
             .filter(
                 PagesProgress.relation_id == genre_id,
-                PagesProgress.page_type == 'genre'
+                PagesProgress.page_type == 'genre',
+                PagesProgress.crawler_progress_id == task_id
             )
             .order_by(PagesProgress.page_number.desc())
             .limit(1)
@@ -29,11 +32,29 @@ class PageCrawlerRepository(BaseRepositoryAsync[PagesProgress, int]):
         else:
             return 0
 
+    async def get_page_progress(self, relation_id: int, page_type: str) -> Optional[PagesProgress]:
+        """按关联ID和页面类型取一条进度记录（用于每个类型只有一行的记录，如增量爬取的高水位）"""
+        result : Result = await self.db.execute(
+            select(PagesProgress)
+            .filter(
+                PagesProgress.relation_id == relation_id,
+                PagesProgress.page_type == page_type
+            )
+            .order_by(PagesProgress.id.desc())
+            .limit(1)
+        )
+        return result.scalars().first()
+
     async def update_page_progress(self, page_progress_id: int, update_values: GenrePageProgressUpdate):
+        values = update_values.model_dump(exclude_none=True)
+        # GenrePageProgressUpdate 的字段名与表列名不完全一致
+        if 'page' in values:
+            values['page_number'] = values.pop('page')
+        values.pop('code', None)
         await self.db.execute(
             update(PagesProgress)
             .where(PagesProgress.id == page_progress_id)
-            .values(update_values.model_dump(exclude_none=True))
+            .values(values)
         )
         await self.db.commit()
         return page_progress_id
@@ -44,13 +65,15 @@ class PageCrawlerRepository(BaseRepositoryAsync[PagesProgress, int]):
         return page_progress.id
 
     #check if exist By relationIdAndPageNumber
-    async def check_exist_by_relation_id_and_page_number(self, genre_id: int, page_number: int) -> bool:
+    async def check_exist_by_relation_id_and_page_number(self, genre_id: int, page_number: int, page_type: str = 'genre') -> Optional[int]:
+        """返回已存在的进度记录ID，不存在时返回 None"""
         result : Result = await self.db.execute(
-            select(PagesProgress)
+            select(PagesProgress.id)
             .filter(
                 PagesProgress.relation_id == genre_id,
+                PagesProgress.page_type == page_type,
                 PagesProgress.page_number == page_number
             )
             .limit(1)
         )
-        return result.scalar() is not None
\ No newline at end of file
+        return result.scalar()
\ No newline at end of file
@@ -0,0 +1,91 @@
+import logging
+from typing import Optional
+from urllib.parse import urlparse, urlunparse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class UrlResolutionRepository:
+    """电影代码 → 规范 URL 的解析缓存仓库
+
+    与根目录 url_resolution.py 共用 movie_url_resolutions 表：
+    导航后发生重定向时记录最终地址，下次爬取同一代码时直接打开最终地址，省掉一次导航。
+    """
+
+    # 与 schema.sql 中的定义保持一致
+    SETUP_SQL = [
+        """
+        CREATE TABLE IF NOT EXISTS movie_url_resolutions (
+            code VARCHAR(100) PRIMARY KEY,
+            canonical_url TEXT NOT NULL,
+            variants TEXT[] DEFAULT ARRAY[]::TEXT[],
+            source VARCHAR(20) NOT NULL DEFAULT 'redirect',
+            resolved_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]
+
+    def __init__(self, db: AsyncSession):
+        """
+        初始化URL解析缓存仓库
+
+        Args:
+            db: 异步数据库会话
+        """
+        self.db = db
+        self._logger = logging.getLogger(__name__)
+
+    async def ensure_schema(self) -> None:
+        """确保解析缓存表存在（幂等）"""
+        for statement in self.SETUP_SQL:
+            await self.db.execute(text(statement))
+        await self.db.commit()
+
+    async def get_canonical_url(self, code: str, language: str) -> Optional[str]:
+        """返回缓存的最终地址（替换成请求的语言），没有缓存时返回 None"""
+        result = await self.db.execute(
+            text("SELECT canonical_url FROM movie_url_resolutions WHERE code = :code"),
+            {"code": code.lower()},
+        )
+        canonical_url = result.scalar_one_or_none()
+        if not canonical_url:
+            return None
+        # 路径形如 /ja/omg-004，按当前爬取的语言替换
+        parsed = urlparse(canonical_url)
+        parts = [p for p in parsed.path.split("/") if p]
+        if len(parts) >= 2:
+            parts[0] = language
+        return urlunparse(parsed._replace(path="/" + "/".join(parts)))
+
+    async def record(self, code: str, requested_url: str, final_url: str) -> bool:
+        """记录重定向结果，最终地址与请求相同或是首页时不记录；返回是否写入"""
+        final_parts = [p for p in urlparse(final_url or "").path.split("/") if p]
+        requested_parts = [p for p in urlparse(requested_url).path.split("/") if p]
+        if len(final_parts) <= 1 or final_parts[-1] == requested_parts[-1]:
+            return False
+
+        canonical_url = urlunparse(urlparse(final_url)._replace(query="", fragment=""))
+        key = code.lower()
+        await self.db.execute(
+            text("""
+                INSERT INTO movie_url_resolutions (code, canonical_url, variants, source)
+                VALUES (:code, :canonical_url, :variants, 'redirect')
+                ON CONFLICT (code) DO UPDATE
+                SET canonical_url = EXCLUDED.canonical_url,
+                    variants = ARRAY(SELECT DISTINCT unnest(movie_url_resolutions.variants || EXCLUDED.variants)),
+                    source = EXCLUDED.source,
+                    resolved_at = CURRENT_TIMESTAMP
+            """),
+            {"code": key, "canonical_url": canonical_url,
+             "variants": sorted({key, final_parts[-1].lower()})},
+        )
+        await self.db.commit()
+        self._logger.info("记录重定向: %s → %s", code, canonical_url)
+        return True
+
+    async def forget(self, code: str) -> None:
+        """缓存的地址失效时删除"""
+        await self.db.execute(
+            text("DELETE FROM movie_url_resolutions WHERE code = :code"), {"code": code.lower()}
+        )
+        await self.db.commit()
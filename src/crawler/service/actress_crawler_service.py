@@ -0,0 +1,182 @@
+"""Actress filmography crawler."""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from fastapi import Depends
+
+from common.db.entity.movie import Movie
+from common.utils.http_clients import http_clients
+from common.utils.known_movie_index import known_movie_index
+from ..parsers.actress_parser import ActressParser, build_page_url
+from ..repository.movie_crawler_repository import MovieCrawlerRepository
+from ..service.crawler_progress_service import CrawlerProgressService
+
+
+class ActressCrawlerService:
+    """Crawl actress pages and feed their filmography into the movie queue.
+
+    女优页只解析一次（资料、第一页作品和总页数），其余作品页按 self._workers 页一组并发获取、
+    按页码顺序处理。每页的作品先用 known_movie_index 批量过滤，新作品插入 movies
+    （status 为 new，即详情爬取队列）。
+
+    每个女优在 pages_progress 中记录一行状态（page_type 'actress_incremental'）：
+    - 从未完整爬过：全量爬取所有作品页，中断后从上次连续完成的页之后继续
+    - 完整爬过：作品按发布时间倒序，遇到第一个已知作品的那一页处理完即停止
+    """
+
+    def __init__(self,
+                 crawler_progress_service: CrawlerProgressService = Depends(CrawlerProgressService),
+                 movie_crawler_repository: MovieCrawlerRepository = Depends(MovieCrawlerRepository)):
+        self._logger : logging.Logger = logging.getLogger(__name__)
+        self._session : requests.Session = http_clients.session("site")
+        self._actress_parser : ActressParser = ActressParser()
+        self._crawler_progress_service : CrawlerProgressService = crawler_progress_service
+        self._movie_crawler_repository : MovieCrawlerRepository = movie_crawler_repository
+        self._workers : int = max(1, int(os.getenv("ACTRESS_PAGE_WORKERS", "4")))
+        self._max_pages : Optional[int] = None  # 默认不限制
+        # 作品列表已完整爬过的女优，状态超过这么多小时没更新才重新增量爬取
+        self._refresh_hours : float = float(os.getenv("ACTRESS_REFRESH_HOURS", "24"))
+
+    async def process_actresses(self, task_id: int, incremental: bool = True, limit: int = 50) -> bool:
+        """Crawl the filmography of the actresses returned by get_actresses_to_process.
+
+        Args:
+            task_id: Crawler task ID
+            incremental: False 时忽略已有状态，全量爬取每个女优的作品列表
+            limit: Maximum number of actresses
+        """
+        actresses = await self._crawler_progress_service.get_actresses_to_process(
+            limit, refresh_after_hours=self._refresh_hours
+        )
+        if not actresses:
+            self._logger.warning("No actresses to process")
+            return False
+
+        total_new = 0
+        for i, actress in enumerate(actresses):
+            self._logger.info(f"Processing actress {i + 1}/{len(actresses)}: {actress['name']}")
+            try:
+                total_new += await self.crawl_actress(actress['id'], actress['url'], task_id, incremental)
+            except Exception as e:
+                self._logger.error(f"Error processing actress {actress['name']}: {str(e)}")
+                continue
+
+        self._logger.info(f"Processed {len(actresses)} actresses, {total_new} new movies queued")
+        return True
+
+    async def crawl_actress(self, actress_id: int, url: str, task_id: Optional[int] = None, incremental: bool = True) -> int:
+        """Crawl one actress's filmography.
+
+        Returns:
+            int: Number of new movies queued
+        """
+        html = await self._fetch(url)
+        if html is None:
+            return 0
+        actress_data = self._actress_parser.parse_actress_page(html, url)
+        if 'error' in actress_data:
+            return 0
+        total_pages : int = actress_data.get('total_pages') or 0
+        if not total_pages:
+            self._logger.info(f"No movies found for actress {actress_id}")
+            return 0
+        last_page = min(total_pages, self._max_pages) if self._max_pages else total_pages
+
+        state = await self._crawler_progress_service.get_actress_watermark(actress_id)
+        stop_on_known = incremental and state is not None and state.status == 'completed'
+        resume_after = state.page_number if incremental and state is not None and not stop_on_known else 0
+        if resume_after:
+            self._logger.info(f"Previous pass of actress {actress_id} stopped at page {resume_after}, resuming after it")
+
+        new_items = 0
+        reached = resume_after
+        status = 'completed'
+        pages: List[Tuple[int, Optional[List[Dict[str, Any]]]]] = [(1, actress_data.get('movies', []))]
+        next_page = max(2, resume_after + 1)
+        stopped = False
+        while pages and not stopped:
+            for page, movies in pages:
+                if movies is None:
+                    # 获取失败，下一轮从这里继续
+                    status = 'failed'
+                    stopped = True
+                    break
+                saved, hit_known = await self._queue_movies(movies)
+                new_items += saved
+                if page > reached:
+                    reached = page
+                    await self._crawler_progress_service.save_actress_watermark(
+                        actress_id, page=reached, total_pages=total_pages,
+                        status='completed' if stop_on_known else 'processing',
+                        total_items=new_items, task_id=task_id
+                    )
+                if stop_on_known and hit_known:
+                    self._logger.info(f"Actress {actress_id}: reached a known title on page {page}, stopping")
+                    stopped = True
+                    break
+
+            batch = list(range(next_page, min(next_page + self._workers, last_page + 1)))
+            next_page += len(batch)
+            pages = list(zip(batch, await self._fetch_pages(url, batch))) if batch and not stopped else []
+
+        if status == 'completed' and not stop_on_known and reached < total_pages:
+            # 受 _max_pages 限制没有爬完，还不能按已知作品提前停止
+            status = 'processing'
+        await self._crawler_progress_service.save_actress_watermark(
+            actress_id, page=reached, total_pages=total_pages,
+            status='completed' if stop_on_known else status, total_items=new_items, task_id=task_id
+        )
+        self._logger.info(f"Actress {actress_id}: {new_items} new movies from {reached}/{total_pages} pages")
+        return new_items
+
+    async def _queue_movies(self, movies: List[Dict[str, Any]]) -> Tuple[int, bool]:
+        """Insert the unknown movies of one page; returns (saved count, whether a known title was seen)."""
+        candidates = [self._to_movie(movie) for movie in movies if movie.get('code')]
+        if not candidates:
+            return 0, False
+        db = self._movie_crawler_repository.db
+        try:
+            new_movies = await known_movie_index.filter_new(db, candidates)
+        except Exception as e:
+            await db.rollback()
+            self._logger.warning(f"电影索引不可用，逐条插入: {str(e)}")
+            return await self._movie_crawler_repository.save_movies(candidates, prefiltered=True), False
+        new_codes = {movie.code for movie in new_movies}
+        hit_known = any(movie.code not in new_codes for movie in candidates)
+        saved = await self._movie_crawler_repository.save_movies(new_movies, prefiltered=True) if new_movies else 0
+        return saved, hit_known
+
+    @staticmethod
+    def _to_movie(movie: Dict[str, Any]) -> Movie:
+        original_id = movie.get('original_id')
+        return Movie(
+            code=movie['code'],
+            title=movie.get('title'),
+            link=movie.get('url'),
+            thumbnail=movie.get('thumbnail'),
+            original_id=int(original_id) if original_id else None,
+            duration=movie.get('duration') or '00:00:00',
+        )
+
+    async def _fetch_pages(self, url: str, pages: List[int]) -> List[Optional[List[Dict[str, Any]]]]:
+        """并发获取一组作品页，返回与 pages 顺序一致的作品列表（获取失败为 None）"""
+        htmls = await asyncio.gather(*(self._fetch(build_page_url(url, page)) for page in pages))
+        return [
+            self._actress_parser.parse_filmography_page(html) if html is not None else None
+            for html in htmls
+        ]
+
+    async def _fetch(self, url: str) -> Optional[str]:
+        try:
+            response = await asyncio.to_thread(self._session.get, url, timeout=10)
+        except Exception as e:
+            self._logger.error(f"Error fetching {url}: {str(e)}")
+            return None
+        if response.status_code != 200:
+            self._logger.error(f"Failed to fetch {url}: HTTP {response.status_code}")
+            return None
+        return response.text
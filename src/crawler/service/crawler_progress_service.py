@@ -1,8 +1,9 @@
 import logging
 import re
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, insert, func
+from sqlalchemy import select, update, delete, insert, func, or_
 from app.repositories.genre_repository import GenreRepository
 from fastapi import Depends
 from common.db.entity.crawler import CrawlerProgress
@@ -15,6 +16,7 @@ from crawler.models.update_progress import GenrePageProgressUpdate
 from common.db.entity.crawler import VideoProgress
 from common.enums.enums import CrawlerStatus
 from common.db.entity.movie import Movie
+from common.utils.known_movie_index import known_movie_index
 
 
 class CrawlerProgressService:
@@ -48,6 +50,7 @@ class CrawlerProgressService:
         Args:
             genre_id: ID of the genre
             code: Optional code of the genre
+            task_id: Crawler task ID, only pages recorded by this task count
 
         Returns:
             int: Last processed page number, 0 if not started
@@ -84,12 +87,14 @@ class CrawlerProgressService:
         """
         try:
             # Query genres table for logging purposes
-            check_exist : bool = await self._page_crawler_repository.check_exist_by_relation_id_and_page_number(genre_id, page)
+            check_exist : Optional[int] = await self._page_crawler_repository.check_exist_by_relation_id_and_page_number(genre_id, page)
             if check_exist:
                 return await self._page_crawler_repository.update_page_progress(
                     page_progress_id=check_exist,
                     update_values=GenrePageProgressUpdate(
-                        page=page, total_pages=total_pages, code=code, status=status, total_items=total_items
+                        page=page, total_pages=total_pages, code=code, status=status, total_items=total_items,
+                        # 之前任务的记录归到本任务，本任务中断后按它续爬
+                        crawler_progress_id=task_id
                     )
                 )
             result : int = await self._page_crawler_repository.create_page_progress(
@@ -108,6 +113,82 @@ class CrawlerProgressService:
             self._logger.error(f"Error creating genre progress: {str(e)}")
             return None
 
+    async def get_genre_watermark(self, genre_id: int) -> Optional[PagesProgress]:
+        """Get the incremental crawl high-water mark of a genre.
+
+        Args:
+            genre_id: ID of the genre
+
+        Returns:
+            PagesProgress: Watermark record (page_type 'genre_incremental'), None if never crawled incrementally
+        """
+        return await self._get_watermark(genre_id, 'genre_incremental')
+
+    async def save_genre_watermark(self, genre_id: int, page: int, total_pages: int, status: str, total_items: int = 0, task_id: int = None):
+        """Create or update the incremental crawl high-water mark of a genre.
+
+        每个类型只保留一行：page_number 为本轮到达的最深页，total_items 为本轮新增的电影数，
+        status 为 'completed' 表示本轮正常停在已知页上，否则下一轮至少要爬到 page_number。
+
+        Args:
+            genre_id: ID of the genre
+            page: Deepest page reached in this pass
+            total_pages: Total number of pages of the genre
+            status: Status of this pass
+            total_items: Number of new movies found in this pass
+            task_id: Crawler task ID
+        """
+        return await self._save_watermark(genre_id, 'genre_incremental', page, total_pages, status, total_items, task_id)
+
+    async def get_actress_watermark(self, actress_id: int) -> Optional[PagesProgress]:
+        """Get the filmography crawl state of an actress.
+
+        Returns:
+            PagesProgress: State record (page_type 'actress_incremental'), None if never crawled
+        """
+        return await self._get_watermark(actress_id, 'actress_incremental')
+
+    async def save_actress_watermark(self, actress_id: int, page: int, total_pages: int, status: str, total_items: int = 0, task_id: int = None):
+        """Create or update the filmography crawl state of an actress.
+
+        每个女优只保留一行：status 为 'completed' 表示作品列表至少完整爬过一次，之后的爬取
+        遇到第一个已知作品即可停止；否则 page_number 为上一轮连续完成的最后一页，下一轮从其后继续。
+        """
+        return await self._save_watermark(actress_id, 'actress_incremental', page, total_pages, status, total_items, task_id)
+
+    async def _get_watermark(self, relation_id: int, page_type: str) -> Optional[PagesProgress]:
+        try:
+            return await self._page_crawler_repository.get_page_progress(relation_id, page_type)
+        except Exception as e:
+            self._logger.error(f"Error getting {page_type} watermark: {str(e)}")
+            return None
+
+    async def _save_watermark(self, relation_id: int, page_type: str, page: int, total_pages: int, status: str, total_items: int = 0, task_id: int = None):
+        try:
+            watermark = await self._page_crawler_repository.get_page_progress(relation_id, page_type)
+            if watermark:
+                await self._page_crawler_repository.update_page_progress(
+                    page_progress_id=watermark.id,
+                    update_values=GenrePageProgressUpdate(
+                        page=page, total_pages=total_pages, status=status, total_items=total_items
+                    )
+                )
+                return watermark.id
+            return await self._page_crawler_repository.create_page_progress(
+                PagesProgress(
+                    crawler_progress_id=task_id or 0,
+                    relation_id=relation_id,
+                    page_type=page_type,
+                    page_number=page,
+                    total_pages=total_pages,
+                    total_items=total_items,
+                    status=status
+                )
+            )
+        except Exception as e:
+            self._logger.error(f"Error saving {page_type} watermark: {str(e)}")
+            return None
+
     async def update_page_progress(self, page_progress_id: int, status: str, processed_items: int = None):
         """Update page progress status and processed items count.
         
@@ -234,6 +315,7 @@ class CrawlerProgressService:
             
             # 提交事务
             await self._movie_crawler_repository.db.commit()
+            known_movie_index.add(code, original_id)
             self._logger.info(f"Saved movie: {title} ({code}) with ID: {movie_id}")
             return movie_id
         except Exception as e:
@@ -247,46 +329,72 @@ class CrawlerProgressService:
             return None
             
             
-    async def get_actresses_to_process(self, limit: int = 50):
+    async def get_actresses_to_process(self, limit: int = 50, refresh_after_hours: Optional[float] = None):
         """获取待处理的女演员列表。
-        
+
+        每个女优一行（取第一个名称），按 actress_incremental 状态排序：从未爬过的在前，
+        其次是状态最久没有更新的。作品列表已完整爬过（completed）的女优跳过，
+        除非指定了 refresh_after_hours 且状态已超过这么多小时没有更新（增量刷新新作品）。
+        地址使用女优列表爬取时保存的站点链接（actresses.link），没有链接的女优跳过。
+
         Args:
             limit: 最大返回数量，默认50条
-            
+            refresh_after_hours: 已完成的女优多少小时后重新返回，None 时不返回已完成的
+
         Returns:
             list: 待处理女演员列表
         """
-           
+
         try:
-            # 这里需要根据实际的数据库结构进行查询
-            # 例如，我们可能需要查询已经处理过的电影中提取的女演员信息
-            # 并返回那些尚未处理详细信息的女演员
-            
-            # 示例实现（需要根据实际情况调整）
             from common.db.entity.actress import Actress, ActressName
-            
-            # 查询女演员及其名称
+
+            # 每个女优的第一个名称
+            name = (
+                select(ActressName.name)
+                .where(ActressName.actress_id == Actress.id)
+                .order_by(ActressName.id)
+                .limit(1)
+                .correlate(Actress)
+                .scalar_subquery()
+            )
+            # 与 get_page_progress 一致：每个女优取最新的一条状态
+            latest_state = (
+                select(PagesProgress.id)
+                .where(
+                    PagesProgress.relation_id == Actress.id,
+                    PagesProgress.page_type == 'actress_incremental'
+                )
+                .order_by(PagesProgress.id.desc())
+                .limit(1)
+                .correlate(Actress)
+                .scalar_subquery()
+            )
+
+            pending = or_(PagesProgress.id.is_(None), PagesProgress.status != CrawlerStatus.COMPLETED.value)
+            if refresh_after_hours is not None:
+                cutoff = datetime.now(timezone.utc) - timedelta(hours=refresh_after_hours)
+                pending = or_(pending, PagesProgress.last_update < cutoff)
+
             result = await self._movie_crawler_repository.db.execute(
-                select(Actress, ActressName)
-                .join(ActressName, Actress.id == ActressName.actress_id)
+                select(Actress.id, name.label("name"), Actress.link)
+                .outerjoin(PagesProgress, PagesProgress.id == latest_state)
+                .where(name.isnot(None), Actress.link.isnot(None), Actress.link != '', pending)
+                .order_by(PagesProgress.last_update.asc().nullsfirst(), Actress.id)
                 .limit(limit)
             )
-            
-            actresses = result.scalars().all()
-            
+
             # 将数据库记录转换为字典列表
             actress_list = []
-            for actress, actressName in actresses:
-                # 构造女演员URL（假设有这个格式）
-                # 注意：实际URL格式可能需要根据网站结构调整
-                url = f"http://123av.com/ja/actress/{actress.id}"
-                
+            for actress_id, actress_name, link in result.all():
+                # 本地ID不是站点的女优ID，使用保存的链接；相对路径与 ActressParser 一样补全域名
+                url = link if link.startswith('http') else f"http://123av.com/{link.lstrip('/')}"
+
                 actress_list.append({
-                    "id": actress.id,
-                    "name": actressName.name,
+                    "id": actress_id,
+                    "name": actress_name,
                     "url": url,
                 })
-                
+
             self._logger.info(f"Found {len(actress_list)} actresses to process")
             return actress_list
         except Exception as e:
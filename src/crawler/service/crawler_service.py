@@ -6,6 +6,7 @@ import asyncio
 from typing import Optional, Dict, Any
 
 from crawler.service.genre_service import GenreService
+from crawler.service.actress_crawler_service import ActressCrawlerService
 from crawler.service.movie_detail_crawler_service import MovieDetailCrawlerService
 from crawler.service.crawler_progress_service import CrawlerProgressService
 from fastapi import Depends
@@ -19,13 +20,15 @@ class CrawlerService:
     def __init__(self,
                  genre_service: GenreService = Depends(GenreService),
                  crawler_progress_service: CrawlerProgressService = Depends(CrawlerProgressService),
-                 movie_detail_crawler_service: MovieDetailCrawlerService = Depends(MovieDetailCrawlerService)):
+                 movie_detail_crawler_service: MovieDetailCrawlerService = Depends(MovieDetailCrawlerService),
+                 actress_crawler_service: ActressCrawlerService = Depends(ActressCrawlerService)):
         """Initialize CrawlerService.
 
         Args:
             genre_service: Genre service instance
             crawler_progress_service: Crawler progress service instance
             movie_detail_crawler_service: Movie detail crawler service instance
+            actress_crawler_service: Actress filmography crawler service instance
         """
         self._logger = logging.getLogger(__name__)
         self._stop_flag = False
@@ -34,6 +37,7 @@ class CrawlerService:
         self._crawler_progress_service = crawler_progress_service
         self._genre_service = genre_service
         self._movie_detail_crawler_service = movie_detail_crawler_service
+        self._actress_crawler_service = actress_crawler_service
         
     async def create_crawler_progress(self, crawler_progress: CrawlerProgress):
         self._logger.info(f"Creating crawler progress: {crawler_progress}")
@@ -48,22 +52,29 @@ class CrawlerService:
             await self._update_status(crawler_progress_id, CrawlerStatus.FAILED.value)
             return False
 
-    # async def initialize_and_startActresses(self):
-    #     """Initialize and start the crawler in background."""
-    #     try:
-    #         await self.initialize()
-    #         await self.startActresses()
-    #     except Exception as e:
-    #         self._logger.error(f"Error in crawler background task: {str(e)}")
-    #         await self._update_status("failed", str(e))
-    #         return False
+    async def initialize_and_startActresses(self, crawler_progress_id: int, incremental: bool = True):
+        """Initialize and start the actress filmography crawler in background.
+
+        Args:
+            crawler_progress_id: Crawler task ID
+            incremental: False 时全量爬取每个女优的作品列表，默认遇到已知作品即停止
+        """
+        await self._update_status(crawler_progress_id, CrawlerStatus.PROCESSING.value)
+        self._logger.info(f"Starting actress processing ({'incremental' if incremental else 'full sweep'})...")
+        await self.startActresses(crawler_progress_id, incremental=incremental)
+        return True
 
     #startGenresPages
-    async def initialize_and_startGenresPages(self, crawler_progress_id: int):
-        """Initialize and start the crawler in background."""
+    async def initialize_and_startGenresPages(self, crawler_progress_id: int, incremental: bool = True):
+        """Initialize and start the crawler in background.
+
+        Args:
+            crawler_progress_id: Crawler task ID
+            incremental: False 时为全量扫描（单独调度），默认只爬每个类型的新页
+        """
         await self._update_status(crawler_progress_id, CrawlerStatus.PROCESSING.value)
-        self._logger.info("Starting genre pages processing...")
-        await self.startGenresPages(crawler_progress_id)
+        self._logger.info(f"Starting genre pages processing ({'incremental' if incremental else 'full sweep'})...")
+        await self.startGenresPages(crawler_progress_id, incremental=incremental)
         self._logger.info(f"已在后台启动类型页面爬取任务，任务ID: {crawler_progress_id}")
         return True
         
@@ -91,9 +102,9 @@ class CrawlerService:
             await self._update_status(crawler_progress_id, CrawlerStatus.FAILED.value)
             return False
 
-    async def startGenresPages(self, crawler_progress_id: int):
+    async def startGenresPages(self, crawler_progress_id: int, incremental: bool = True):
         try:
-            if not await self._genre_service.process_genres_pages(crawler_progress_id):
+            if not await self._genre_service.process_genres_pages(crawler_progress_id, incremental=incremental):
                 await self._update_status(crawler_progress_id, CrawlerStatus.FAILED.value)
                 return False
             return True
@@ -104,6 +115,19 @@ class CrawlerService:
             return False
 
 
+    async def startActresses(self, crawler_progress_id: int, incremental: bool = True):
+        try:
+            if not await self._actress_crawler_service.process_actresses(crawler_progress_id, incremental=incremental):
+                await self._update_status(crawler_progress_id, CrawlerStatus.FAILED.value)
+                return False
+            await self._update_status(crawler_progress_id, CrawlerStatus.COMPLETED.value)
+            return True
+        except Exception as e:
+            error_msg = f"Error processing actresses: {str(e)}"
+            self._logger.error(error_msg)
+            await self._update_status(crawler_progress_id, CrawlerStatus.FAILED.value)
+            return False
+
     async def stop(self, crawler_progress_id: int):
         """Stop the crawling process."""
         self._stop_flag = True
@@ -0,0 +1,120 @@
+"""详情爬取的持久化重试队列
+
+原来失败的电影在 worker 里 sleep 30-60 秒 × 尝试次数后重试，重试期间浏览器和 worker 都闲置。
+现在失败时按错误分类计算下次尝试时间写入 movie_detail_retries，worker 立即处理下一部；
+重试扫描器定期把到期的记录放回队列并唤醒详情任务，超过最大尝试次数的进入死信。
+"""
+
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from crawler.repository.detail_retry_repository import DetailRetryRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """某一类错误的重试策略：第 n 次失败后等待 base_delay * 2^(n-1) 秒（带抖动）"""
+
+    base_delay: float
+    max_attempts: int
+
+
+# 错误分类 -> 重试策略
+RETRY_POLICIES: Dict[str, RetryPolicy] = {
+    # 被 Cloudflare 拦截通常是请求过密，等久一点再试
+    "cloudflare": RetryPolicy(base_delay=1800, max_attempts=6),
+    "timeout": RetryPolicy(base_delay=300, max_attempts=6),
+    "network": RetryPolicy(base_delay=300, max_attempts=6),
+    # 页面结构问题重试多次也没有意义
+    "parse": RetryPolicy(base_delay=3600, max_attempts=3),
+    "not_found": RetryPolicy(base_delay=6 * 3600, max_attempts=2),
+    "unknown": RetryPolicy(base_delay=900, max_attempts=5),
+}
+
+MAX_RETRY_DELAY = 24 * 3600
+JITTER = 0.2
+
+
+def classify_error(message: str) -> str:
+    """按错误信息粗略分类"""
+    message = (message or "").lower()
+    if "cloudflare" in message or "challenge" in message or "403" in message:
+        return "cloudflare"
+    if "404" in message or "not found" in message:
+        return "not_found"
+    if "timeout" in message or "timed out" in message or "超时" in message:
+        return "timeout"
+    if any(word in message for word in ("connection", "network", "disconnected", "连接")):
+        return "network"
+    if "解析" in message or "parse" in message:
+        return "parse"
+    return "unknown"
+
+
+def retry_delay(error_class: str, attempts: int) -> float:
+    """第 attempts 次失败后距离下次尝试的秒数"""
+    policy = RETRY_POLICIES.get(error_class, RETRY_POLICIES["unknown"])
+    delay = min(policy.base_delay * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY)
+    return delay * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+class DetailRetryService:
+    """记录详情爬取的失败与成功"""
+
+    def __init__(self, retry_repository: DetailRetryRepository):
+        self._retry_repository = retry_repository
+
+    async def record_failure(self, code: str, error_class: str, error: str) -> str:
+        """记录一次失败，返回记录后的状态（waiting / dead）"""
+        policy = RETRY_POLICIES.get(error_class, RETRY_POLICIES["unknown"])
+        attempts = await self._retry_repository.increment_attempts(code, error_class, error)
+        dead = attempts >= policy.max_attempts
+        next_attempt_at = await self._retry_repository.schedule(
+            code, attempts, error,
+            None if dead else retry_delay(error_class, attempts),
+            dead,
+        )
+        if dead:
+            logger.warning("电影 %s 已失败 %d 次（%s），进入死信", code, attempts, error_class)
+            return "dead"
+        logger.info("电影 %s 第 %d 次失败（%s），下次尝试时间 %s",
+                    code, attempts, error_class, next_attempt_at.isoformat())
+        return "waiting"
+
+    async def record_success(self, code: str) -> None:
+        await self._retry_repository.clear(code)
+
+
+async def run_retry_scanner(session_factory, is_running: Callable[[], bool],
+                            interval: float = 60.0,
+                            notify_channel: Optional[str] = None) -> None:
+    """定期把到期的重试放回队列
+
+    使用独立的会话，不与详情任务共享。放回了记录且指定了 notify_channel 时
+    发送一次通知，让正在等待新电影的详情任务立即醒来。
+    """
+    while is_running():
+        try:
+            async with session_factory() as session:
+                released = await DetailRetryRepository(session).release_due()
+                if released:
+                    logger.info("重试扫描: %d 部电影到期，放回队列", released)
+                    if notify_channel:
+                        await session.execute(text("SELECT pg_notify(:channel, '')"),
+                                              {"channel": notify_channel})
+                        await session.commit()
+        except Exception as e:
+            logger.error("重试扫描出错: %s", e)
+
+        # 分段等待，便于及时退出
+        waited = 0.0
+        while waited < interval and is_running():
+            await asyncio.sleep(min(5.0, interval - waited))
+            waited += 5.0
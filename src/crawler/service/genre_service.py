@@ -1,12 +1,14 @@
 """Genre processor module for crawling movie genres."""
 
 import logging
+import os
 import time
 from typing import Optional, List, Dict, Any
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from common.db.entity.movie import Movie
-from ..utils.http import create_session
+from common.utils.http_clients import http_clients
+from common.utils.dimension_cache import dimension_cache, GENRE
 from ..service.crawler_progress_service import CrawlerProgressService
 from ..parsers.genre_parser import GenreParser
 from ..parsers.movie_parser import MovieParser
@@ -37,16 +39,20 @@ class GenreService:
             movie_parser: MovieParser instance for parsing movie data
         """
         self._logger : logging.Logger = logging.getLogger(__name__)
-        self._session : requests.Session = create_session(use_proxy=True)
+        self._session : requests.Session = http_clients.session("site")
         self._genre_parser : GenreParser = genre_parser
         self._movie_parser : MovieParser = movie_parser
         self._genre_repository : GenreRepository = genre_repository
         self._crawler_progress_service : CrawlerProgressService = crawler_progress_service
         self._movie_crawler_repository : MovieCrawlerRepository = movie_crawler_repository
+        self._language : SupportedLanguage = SupportedLanguage.JAPANESE
         
         # 限制爬取的类型数量和页数
         self._max_genres : Optional[int] = None  # 默认不限制
         self._max_pages : Optional[int] = None   # 默认不限制
+
+        # 增量模式下连续多少页没有新电影就停止
+        self._incremental_stop_pages : int = int(os.getenv("GENRE_INCREMENTAL_STOP_PAGES", "3"))
         
     # 拆分 genres 处理和 page 处理
     async def process_genres(self, base_url: str, language: str) -> bool:
@@ -83,7 +89,17 @@ class GenreService:
             return False
 
 
-    async def process_genres_pages(self, task_id: int) -> bool:
+    async def process_genres_pages(self, task_id: int, incremental: bool = True) -> bool:
+        """Crawl the listing pages of every genre.
+
+        Args:
+            task_id: Crawler task ID
+            incremental: True 时每个类型从第1页（最新）往后爬，连续 K 页没有新电影就停止；
+                False 时为全量扫描，从本任务的进度（新任务为第1页）一直爬到最后一页
+
+        Returns:
+            bool: True if successful
+        """
         # Process each genre
         all_genres : List[Genre] = await self._genre_repository.get_all()
         max_genres : int = self._max_genres if self._max_genres is not None else len(all_genres)
@@ -101,7 +117,11 @@ class GenreService:
                     continue
                     
                 self._logger.info(f"Processing genre {i+1}/{max_genres}: {genre_code}")
-                
+
+                if incremental:
+                    await self._process_genre_pages_incremental(genre_id, genre_code, genre_urls, task_id)
+                    continue
+
                 # Get current progress
                 current_page : int = await self._crawler_progress_service.get_genre_progress(genre_id, code=genre_code, task_id=task_id)
                 
@@ -122,6 +142,68 @@ class GenreService:
         self._logger.info("Successfully processed all genres")
         return True
 
+    async def _process_genre_pages_incremental(self, genre_id: int, genre_code: str, genre_urls: list, task_id: int) -> int:
+        """Crawl a genre newest-first and stop at the first run of fully-known pages.
+
+        列表按发布时间倒序，新电影只会出现在前面几页。连续 self._incremental_stop_pages 页
+        都没有新电影（save_movies 返回 0）时停止，并在 pages_progress 中记录本轮的高水位。
+        上一轮没有正常结束（中断或页面获取失败）时，本轮至少爬到上一轮到达的页，避免漏掉中间的页。
+
+        Returns:
+            int: Number of new movies saved
+        """
+        total_pages : int = await self._get_total_pages(genre_urls[0])
+        if not total_pages:
+            self._logger.warning(f"Could not determine total pages for genre {genre_code}, skipping")
+            return 0
+        last_page = min(total_pages, self._max_pages) if self._max_pages else total_pages
+
+        watermark = await self._crawler_progress_service.get_genre_watermark(genre_id)
+        resume_to = 0
+        if watermark and watermark.status != 'completed':
+            resume_to = watermark.page_number
+            self._logger.info(f"Previous incremental pass of genre {genre_code} stopped at page {resume_to} ({watermark.status}), resuming past it")
+
+        await self._crawler_progress_service.save_genre_watermark(
+            genre_id, page=max(resume_to, 0), total_pages=total_pages, status='processing', task_id=task_id
+        )
+
+        new_items = 0
+        known_streak = 0
+        page = 0
+        status = 'completed'
+        for page in range(1, last_page + 1):
+            movies : List[Movie] = await self._process_page_get_movies(genre_urls[0], page)
+            if not movies:
+                if page < total_pages:
+                    # 中间页为空多半是请求失败，下一轮从这里继续
+                    self._logger.warning(f"No movies found on page {page} for genre {genre_code}, stopping this pass")
+                    status = 'failed'
+                break
+
+            saved_count : int = await self._movie_crawler_repository.save_movies(movies)
+            new_items += saved_count
+            known_streak = 0 if saved_count else known_streak + 1
+            if page > resume_to:
+                # 中断时下一轮从这里继续
+                await self._crawler_progress_service.save_genre_watermark(
+                    genre_id, page=page, total_pages=total_pages, status='processing',
+                    total_items=new_items, task_id=task_id
+                )
+
+            if page >= resume_to and known_streak >= self._incremental_stop_pages:
+                self._logger.info(f"Genre {genre_code}: {known_streak} consecutive pages without new movies, stopping at page {page}")
+                break
+
+        # 正常结束时 page 为最后一次检查的页，失败时记录失败的前一页
+        reached = page - 1 if status == 'failed' else page
+        await self._crawler_progress_service.save_genre_watermark(
+            genre_id, page=max(reached, resume_to), total_pages=total_pages,
+            status=status, total_items=new_items, task_id=task_id
+        )
+        self._logger.info(f"Genre {genre_code}: {new_items} new movies in {page}/{total_pages} pages")
+        return new_items
+
     async def _process_genre_pages(self, genre_id: int, genre_code: str, genre_urls: list, total_pages: int, current_page: int, task_id: int) -> bool:
         # Create a new progress manager for each page to avoid session conflicts        
         for page in range(current_page + 1, total_pages + 1):
@@ -303,19 +385,12 @@ class GenreService:
             Genre name string
         """
         try:
-            # 获取genre及其名称
-            genre_result = await self._genre_repository.get_with_names(genre_id=genre_id)
-            if genre_result and len(genre_result) == 2:
-                genre, names = genre_result
-                if names:
-                    # 尝试获取当前语言的名称
-                    for name_data in names:
-                        if name_data.language == self._language:
-                            return name_data.name
-                    # 如果没有当前语言的名称，返回第一个名称
-                    return names[0].name
-            # 如果没有找到名称，尝试直接获取genre
-            genre = await self._genre_repository.get(genre_id)
+            # 名称字典缓存：ID → 当前语言的名称，没有时取任一语言的名称
+            await dimension_cache.ensure_loaded(self._genre_repository.db)
+            name = dimension_cache.get_name(GENRE, genre_id, self._language)
+            if name:
+                return name
+            genre = await self._genre_repository.db.get(Genre, genre_id)
             if genre:
                 return f"Genre {genre.code or genre_id}"
             return f"Genre {genre_id}"
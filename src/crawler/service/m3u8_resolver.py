@@ -0,0 +1,257 @@
+"""Concurrent m3u8 resolution for watch (player) URLs.
+
+原来每个播放器地址都新建一个 requests 会话（新的重试适配器、没有连接复用），
+按顺序逐个请求，再用 BeautifulSoup 解析整个页面只为读取 #player 的 v-scope 属性。
+
+M3u8Resolver:
+- 所有请求共用一个 keep-alive 连接池，一批电影的播放器页面并发获取
+- 直接在 HTML 文本中定位 #player 的 v-scope 属性并截取其中的 JSON，找不到时才退回 BeautifulSoup
+- 按播放器地址缓存解析结果（只缓存成功的结果，带过期时间）
+"""
+
+import html
+import json
+import logging
+import os
+import re
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from common.utils.http_clients import http_clients
+
+logger = logging.getLogger(__name__)
+
+
+def build_player_url(player_url: str, cover_url: Any) -> str:
+    """拼接带封面参数的播放器地址"""
+    if cover_url is None:
+        cover_url = ""
+    elif isinstance(cover_url, bytes):
+        cover_url = cover_url.decode('utf-8', errors='replace')
+    elif not isinstance(cover_url, str):
+        cover_url = str(cover_url)
+    return f"{player_url}?poster={urllib.parse.quote(cover_url)}"
+
+
+_V_SCOPE_RE = re.compile(r"""\bv-scope\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+
+
+def _tag_end(html_content: str, tag_start: int) -> int:
+    """返回从 tag_start 开始的标签的结束位置（跳过引号内的 '>'），找不到时返回 -1"""
+    quote = None
+    for index in range(tag_start, len(html_content)):
+        char = html_content[index]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ('"', "'"):
+            quote = char
+        elif char == '>':
+            return index
+    return -1
+
+
+def _extract_json_object(text: str, start: int) -> Optional[Dict[str, Any]]:
+    """从 start 处的 '{' 开始截取一个完整的 JSON 对象（跳过字符串中的括号）"""
+    depth = 0
+    in_string = False
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                try:
+                    return json.loads(text[start:index + 1])
+                except ValueError:
+                    return None
+    return None
+
+
+def scan_player_scope(html_content: str) -> Optional[Dict[str, Any]]:
+    """不解析整个文档，直接定位 <div id="player" v-scope="Player(..., {...})"> 中的 JSON"""
+    for marker in ('id="player"', "id='player'"):
+        pos = html_content.find(marker)
+        if pos != -1:
+            break
+    else:
+        return None
+    tag_start = html_content.rfind('<', 0, pos)
+    if tag_start == -1:
+        return None
+    tag_end = _tag_end(html_content, tag_start)
+    match = _V_SCOPE_RE.search(html_content, tag_start, tag_end) if tag_end != -1 else None
+    if not match:
+        return None
+    v_scope = html.unescape(match.group(1) if match.group(1) is not None else match.group(2))
+    # Player(id, {...})：第一个逗号之后的对象
+    json_start = v_scope.find('{', v_scope.find(','))
+    if json_start == -1:
+        return None
+    return _extract_json_object(v_scope, json_start)
+
+
+def parse_player_scope(html_content: str) -> Optional[Dict[str, Any]]:
+    """先用定向扫描，失败时退回 BeautifulSoup"""
+    data = scan_player_scope(html_content)
+    if data is not None:
+        return data
+    player_div = BeautifulSoup(html_content, 'html.parser').find('div', id='player')
+    v_scope = player_div.get('v-scope', '') if player_div else ''
+    json_start = v_scope.find('{', v_scope.find(',')) if v_scope else -1
+    return _extract_json_object(v_scope, json_start) if json_start != -1 else None
+
+
+class M3u8Resolver:
+    """Resolve player URLs to m3u8/vtt URLs over a shared connection pool.
+
+    Args:
+        max_workers: 并发请求数，默认读取 M3U8_RESOLVER_WORKERS（8），与 http_clients 的 "player" 连接池大小一致
+        cache_ttl: 缓存有效期（秒），默认读取 M3U8_CACHE_TTL（6 小时）
+        cache_size: 最多缓存的播放器地址数
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, cache_ttl: Optional[float] = None,
+                 cache_size: int = 10000, timeout: float = 15):
+        self._max_workers = max_workers or int(os.getenv("M3U8_RESOLVER_WORKERS", "8"))
+        self._cache_ttl = cache_ttl if cache_ttl is not None else float(os.getenv("M3U8_CACHE_TTL", "21600"))
+        self._cache_size = cache_size
+        self._timeout = timeout
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._session = None
+        self._executor = None
+        self.hits = 0
+        self.misses = 0
+
+    def _get_session(self):
+        # 延迟创建，导入模块时不建立连接池
+        with self._lock:
+            if self._session is None:
+                self._session = http_clients.session("player")
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="m3u8-resolver"
+                )
+            return self._session
+
+    def _cached(self, player_url: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            entry = self._cache.get(player_url)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            if time.monotonic() - stored_at > self._cache_ttl:
+                del self._cache[player_url]
+                return None
+            self._cache.move_to_end(player_url)
+            return result
+
+    def _store(self, player_url: str, result: Dict[str, str]) -> None:
+        with self._lock:
+            self._cache[player_url] = (time.monotonic(), result)
+            self._cache.move_to_end(player_url)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _fetch(self, player_url: str, cover_url: Any) -> Dict[str, str]:
+        try:
+            response = self._get_session().get(build_player_url(player_url, cover_url), timeout=self._timeout)
+        except Exception as e:
+            logger.error(f"Error requesting player page {player_url}: {str(e)}")
+            return {}
+        if response.status_code != 200:
+            logger.warning(f"Failed to get player page {player_url}, status code: {response.status_code}")
+            return {}
+
+        data = parse_player_scope(response.text)
+        if not data or 'stream' not in data or 'vtt' not in data:
+            logger.warning(f"No stream data found in player page {player_url}")
+            return {}
+        result = {'m3u8_url': data.get('stream'), 'vtt_url': data.get('vtt')}
+        self._store(player_url, result)
+        return result
+
+    def resolve(self, player_url: str, cover_url: Any = None) -> Dict[str, str]:
+        """解析单个播放器地址，返回 {'m3u8_url', 'vtt_url'}，失败时返回空字典"""
+        if not player_url:
+            logger.warning("Player URL is empty or None")
+            return {}
+        return self.resolve_many([(player_url, cover_url)]).get(player_url, {})
+
+    def resolve_many(self, players: Iterable[Tuple[str, Any]]) -> Dict[str, Dict[str, str]]:
+        """并发解析一批 (播放器地址, 封面地址)，返回 播放器地址 → 结果"""
+        results: Dict[str, Dict[str, str]] = {}
+        pending: Dict[str, Any] = {}
+        for player_url, cover_url in players:
+            if not player_url or player_url in results or player_url in pending:
+                continue
+            cached = self._cached(player_url)
+            if cached is not None:
+                self.hits += 1
+                results[player_url] = cached
+            else:
+                self.misses += 1
+                pending[player_url] = cover_url
+
+        if len(pending) == 1:
+            player_url, cover_url = next(iter(pending.items()))
+            results[player_url] = self._fetch(player_url, cover_url)
+        elif pending:
+            self._get_session()
+            futures = {
+                player_url: self._executor.submit(self._fetch, player_url, cover_url)
+                for player_url, cover_url in pending.items()
+            }
+            for player_url, future in futures.items():
+                results[player_url] = future.result()
+        return results
+
+    def resolve_watch_urls(self, movies: List[Tuple[List[Dict[str, Any]], Any]]) -> List[List[Dict[str, Any]]]:
+        """解析一批电影的 watch_urls_info
+
+        Args:
+            movies: [(watch_urls_info, cover_url)]，watch_urls_info 为 ajax 接口返回的 [{'index', 'name', 'url'}]
+
+        Returns:
+            与输入顺序一致的 [{'index', 'name', 'url': m3u8地址}] 列表，解析失败的条目被跳过
+        """
+        resolved = self.resolve_many(
+            (watch_info['url'], cover_url)
+            for watch_urls_info, cover_url in movies
+            for watch_info in watch_urls_info or []
+        )
+        return [
+            [
+                {'index': watch_info['index'], 'name': watch_info['name'],
+                 'url': resolved[watch_info['url']]['m3u8_url']}
+                for watch_info in watch_urls_info or []
+                if resolved.get(watch_info['url'], {}).get('m3u8_url')
+            ]
+            for watch_urls_info, _ in movies
+        ]
+
+    def map(self, fn, items: Iterable) -> List:
+        """在解析器的线程池中并发执行 fn（用于同一批的其他 HTTP 请求，共用连接池）"""
+        self._get_session()
+        return list(self._executor.map(fn, items))
+
+
+# 进程内共享的解析器
+m3u8_resolver = M3u8Resolver()
@@ -7,7 +7,7 @@ import asyncio
 import json
 import os
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple
 from datetime import datetime
 from urllib.parse import urlparse, urlunparse
 
@@ -15,15 +15,17 @@ from fastapi import Depends
 from src.test.test_drission_movie import MovieDetailCrawler
 
 from app.utils.drission_utils import CloudflareBypassBrowser
+from app.utils.browser_session_pool import browser_session_pool
 from crawler.service.crawler_progress_service import CrawlerProgressService
 from crawler.repository.movie_repository import MovieRepository
 from crawler.repository.movie_info_repository import MovieInfoRepository
 from crawler.repository.download_url_repository import DownloadUrlRepository
+from crawler.repository.url_resolution_repository import UrlResolutionRepository
+from crawler.service.detail_retry_service import DetailRetryService, classify_error
+from crawler.parsers.movie_parser import MovieParser
 from common.db.entity.movie import Movie
 from datetime import datetime
 
-import uuid
-import tempfile 
 class MovieDetailCrawlerService:
     """Crawler for fetching movie details."""
 
@@ -35,12 +37,16 @@ class MovieDetailCrawlerService:
         movie_info_repository: MovieInfoRepository = Depends(MovieInfoRepository),
         movie_repository: MovieRepository = Depends(MovieRepository),
         download_url_repository: DownloadUrlRepository = Depends(DownloadUrlRepository),
+        detail_retry_service: Optional[DetailRetryService] = None,
+        url_resolution_repository: Optional[UrlResolutionRepository] = None,
     ):
         """Initialize DetailCrawler.
 
         Args:
             crawler_progress_service: CrawlerProgressService instance for progress tracking
             movie_repository: MovieRepository instance for database operations
+            detail_retry_service: 持久化重试队列，为 None 时失败不记录、只在当前调用内立即重试
+            url_resolution_repository: 代码 → 最终地址的解析缓存，为 None 时总是按代码拼接地址
         """
         self._logger = logging.getLogger(__name__)
 
@@ -49,6 +55,8 @@ class MovieDetailCrawlerService:
         self._movie_info_repository = movie_info_repository
         self._movie_repository = movie_repository
         self._download_url_repository = download_url_repository
+        self._detail_retry_service = detail_retry_service
+        self._url_resolution_repository = url_resolution_repository
 
         # Debug: check actual types of repositories
         self._logger.info(
@@ -73,6 +81,12 @@ class MovieDetailCrawlerService:
         # Initialize retry counts
         self._retry_counts = {}
 
+        # 播放和下载地址通过站点的 ajax 接口和播放器页面解析
+        self._movie_parser = MovieParser()
+
+        # 已成功写入重试队列的失败电影代码，领取方据此判断哪些失败需要自己在内存中排除
+        self._recorded_failures: Set[str] = set()
+
     # 单次执行的方法
     async def process_movies_details_once(self, limit: int = 100) -> List[Movie]:
         """使用原有HTTP方法处理电影详情
@@ -92,6 +106,17 @@ class MovieDetailCrawlerService:
             self._logger.info("No pending movies to process.")
             return []
 
+        return await self.process_movies(new_movies)
+
+    async def process_movies(self, new_movies: List[Movie]) -> List[Movie]:
+        """处理一批已领取的电影
+
+        Args:
+            new_movies: 待处理的电影
+
+        Returns:
+            List[Movie]: 成功处理的电影列表
+        """
         self._logger.info("Found %s pending movies to process", len(new_movies))
 
         # 处理每个电影
@@ -113,8 +138,39 @@ class MovieDetailCrawlerService:
             processed_count,
             len(new_movies),
         )
+
+        # 整批一起解析播放和下载地址（ajax 查询和播放器页面在 m3u8_resolver 的线程池中并发请求）
+        await self._fill_video_urls(movies_details)
         return movies_details
 
+    async def _fill_video_urls(self, movies: List[Movie]) -> None:
+        """为有站点原始ID的电影填充 watch_urls_info（m3u8）和 download_urls_info
+
+        失败只记录日志，不影响详情的保存。线程池中不能懒加载 ORM 属性（回滚后属性已过期），
+        这里先在事件循环中取出普通值，解析完成后再写回。
+        """
+        batch: List[Tuple[Movie, Tuple[int, Any, Any]]] = []
+        for movie in movies:
+            try:
+                original_id = movie.original_id
+                if original_id:
+                    batch.append((movie, (original_id, movie.cover_image_url, movie.magnets)))
+            except Exception as e:
+                self._logger.warning("读取电影属性失败，跳过播放地址解析: %s", str(e))
+        if not batch:
+            return
+        try:
+            results = await asyncio.get_event_loop().run_in_executor(
+                None, self._movie_parser.resolve_video_urls, [values for _, values in batch]
+            )
+        except Exception as e:
+            self._logger.error("解析播放和下载地址失败: %s", str(e))
+            return
+        for (movie, _), (watch_urls_info, download_urls_info) in zip(batch, results):
+            movie.watch_urls_info = watch_urls_info
+            movie.download_urls_info = download_urls_info
+        self._logger.info("已解析 %d 部电影的播放和下载地址", len(batch))
+
     async def _crawl_single_movie(
         self,
         movie_code: str,
@@ -129,7 +185,8 @@ class MovieDetailCrawlerService:
             movie_code: 电影代码
             language: 语言代码 (ja, en, zh)
             browser: 浏览器实例
-            max_retries: 最大重试次数
+            max_retries: 最大重试次数。重试立即进行，不再退避等待；
+                配置了重试队列时，页面加载失败和异常不在这里重试，交给重试队列按计划重试
 
         Returns:
             Tuple[str, Optional[Dict[str, Any]]]: 元组 (movie_code, movie_info)
@@ -152,19 +209,16 @@ class MovieDetailCrawlerService:
                 return None
 
 
-        # 构建URL
-        url = f"https://missav.ai/{language}/{movie_code}"
+        # 构建URL，有缓存的最终地址（重定向、变体代码）时直接打开
+        requested_url = f"https://missav.ai/{language}/{movie_code}"
+        url = await self._resolve_url(movie_code, language, requested_url)
         self._logger.info(f"正在爬取电影: {movie_code}")
 
         # 实现重试逻辑
         for attempt in range(max_retries + 1):
             try:
-                # 智能延迟：第一次尝试较短延迟，后续尝试增加延迟
-                if attempt > 0:
-                    delay = random.uniform(30, 60) * attempt  # 指数退避延迟
-                    self._logger.info(f"重试前等待 {delay:.1f} 秒 (尝试 {attempt + 1}/{max_retries + 1})")
-                    await asyncio.sleep(delay)
-                else:
+                # 只在首次尝试前随机延迟；失败后的退避由持久化重试队列负责，worker 不在这里空等
+                if attempt == 0:
                     # 首次尝试也添加随机延迟避免检测
                     initial_delay = random.uniform(5, 15)
                     self._logger.info(f"初始延迟 {initial_delay:.1f} 秒以避免检测")
@@ -174,6 +228,7 @@ class MovieDetailCrawlerService:
                 success = browser.get(url, wait_for_cf=True, timeout=180)
                 if not success:
                     raise Exception("页面加载失败，可能被Cloudflare阻止")
+                await self._record_resolution(movie_code, requested_url, getattr(browser.page, "url", None))
 
                 # 页面加载后额外等待，确保内容完全渲染
                 post_load_delay = random.uniform(3, 8)
@@ -291,6 +346,7 @@ class MovieDetailCrawlerService:
                         )
                         await asyncio.sleep(1.0)
                         continue
+                    await self._record_failure(movie_code, "network", "无法获取HTML内容")
                     return movie_code, None
 
                 # 降低HTML内容长度要求，因为有些页面可能比较简洁
@@ -313,6 +369,7 @@ class MovieDetailCrawlerService:
                         )
                         await asyncio.sleep(1.0)
                         continue
+                    await self._record_failure(movie_code, "parse", "解析失败，未获得有效数据")
                     return movie_code, None
 
                 # 提取流媒体URL - 修复正则表达式转义问题
@@ -342,21 +399,82 @@ class MovieDetailCrawlerService:
                 await self._save_to_json(movie_info, movie_code, language)
                 await self._save_to_db(movie_info, movie_code, language)
                 self._logger.info("电影 %s 爬取成功", movie_code)
+                await self._record_success(movie_code)
                 return movie_code, movie_info
 
             except Exception as e:
                 self._logger.error("爬取电影 %s 出错: %s", movie_code, str(e))
-                if attempt < max_retries:
-                    self._logger.info(
-                        "将在 2 秒后重试 (%s/%s)", attempt + 1, max_retries
-                    )
-                    await asyncio.sleep(2.0)
-                else:
-                    self._logger.error("电影 %s 爬取失败，已达到最大重试次数", movie_code)
-                    return movie_code, None
+                if url != requested_url:
+                    # 缓存的地址可能已失效，之后按代码拼接的地址重试
+                    await self._forget_resolution(movie_code)
+                    url = requested_url
+                if self._detail_retry_service is None and attempt < max_retries:
+                    self._logger.info("立即重试 (%s/%s)", attempt + 1, max_retries)
+                    continue
+                await self._record_failure(movie_code, classify_error(str(e)), str(e))
+                return movie_code, None
 
         return movie_code, None
 
+    async def _resolve_url(self, movie_code: str, language: str, url: str) -> str:
+        """查询解析缓存，返回应该直接打开的地址"""
+        if self._url_resolution_repository is None:
+            return url
+        try:
+            canonical_url = await self._url_resolution_repository.get_canonical_url(movie_code, language)
+        except Exception as e:
+            self._logger.error("查询电影 %s 的解析缓存失败: %s", movie_code, str(e))
+            return url
+        if canonical_url and canonical_url != url:
+            self._logger.info("使用缓存的地址: %s → %s", movie_code, canonical_url)
+            return canonical_url
+        return url
+
+    async def _record_resolution(self, movie_code: str, requested_url: str, final_url: Optional[str]) -> None:
+        """导航后发生重定向时记录最终地址"""
+        if self._url_resolution_repository is None or not final_url:
+            return
+        try:
+            await self._url_resolution_repository.record(movie_code, requested_url, final_url)
+        except Exception as e:
+            self._logger.error("记录电影 %s 的解析缓存失败: %s", movie_code, str(e))
+
+    async def _forget_resolution(self, movie_code: str) -> None:
+        if self._url_resolution_repository is None:
+            return
+        try:
+            await self._url_resolution_repository.forget(movie_code)
+        except Exception as e:
+            self._logger.error("删除电影 %s 的解析缓存失败: %s", movie_code, str(e))
+
+    async def _record_failure(self, movie_code: str, error_class: str, error: str) -> None:
+        """配置了重试队列时记录失败，并按错误分类安排下次尝试"""
+        if self._detail_retry_service is None:
+            return
+        try:
+            await self._detail_retry_service.record_failure(movie_code, error_class, error)
+            self._recorded_failures.add(movie_code)
+        except Exception as e:
+            self._logger.error("记录电影 %s 的重试信息失败: %s", movie_code, str(e))
+
+    def pop_recorded_failures(self) -> Set[str]:
+        """返回并清空已写入重试队列的失败电影代码
+
+        没有出现在这里的失败（未配置重试队列、记录出错、或在记录前就中断）不会被
+        领取查询跳过，需要调用方自己暂时排除，否则同一部电影会被反复领取。
+        """
+        recorded, self._recorded_failures = self._recorded_failures, set()
+        return recorded
+
+    async def _record_success(self, movie_code: str) -> None:
+        """爬取成功后移出重试队列"""
+        if self._detail_retry_service is None:
+            return
+        try:
+            await self._detail_retry_service.record_success(movie_code)
+        except Exception as e:
+            self._logger.error("清除电影 %s 的重试信息失败: %s", movie_code, str(e))
+
     async def _save_to_db(
         self, movie_info: Dict[str, Any], movie_code: str, language: str = "ja"
     ) -> None:
@@ -611,49 +729,27 @@ class MovieDetailCrawlerService:
             List[CloudflareBypassBrowser]: 浏览器实例列表
         """
         browsers = []
-        import uuid
-        import tempfile
+        loop = asyncio.get_event_loop()
 
         for i in range(count):
             try:
-                # 为每个浏览器实例创建完全独立的用户数据目录
-                # 使用UUID确保目录名称的唯一性
-                unique_id = str(uuid.uuid4())[:8]
-                timestamp = int(time.time() * 1000)
-
-                # 使用临时目录确保完全隔离
-                temp_dir = (
-                    Path(tempfile.gettempdir())
-                    / f"cf_browser_{i}_{unique_id}_{timestamp}"
-                )
-                temp_dir.mkdir(parents=True, exist_ok=True)
-
-                self._logger.info("为浏览器 %s 创建独立数据目录: %s", i + 1, temp_dir)
-
-                # 创建浏览器实例并优化它
-                browser = CloudflareBypassBrowser(
-                    headless=headless,
-                    user_data_dir=str(temp_dir),
-                    load_images=False,  # 禁用图片加载以提高速度
-                    timeout=30,  # 增加超时时间
-                    wait_after_cf=3,  # 增加Cloudflare后的等待时间
-                )
-
-                # 先访问一次基础页面，通过Cloudflare挑战
-                self._logger.info("浏览器 #{i+1} 正在初始化并通过Cloudflare挑战...")
-                browser.get("https://missav.ai/", timeout=30, wait_for_full_load=True)
-                await asyncio.sleep(
-                    3 if i == 0 else 2
+                # 从会话池取已预热的浏览器，profile 已通过 Cloudflare 验证时无需重新等待
+                # 池已满时不等待，少用几个浏览器
+                browser = await loop.run_in_executor(
+                    None,
+                    lambda: browser_session_pool.acquire(
+                        headless=headless,
+                        wait_timeout=0,
+                        load_images=False,  # 禁用图片加载以提高速度
+                        timeout=30,
+                        wait_after_cf=3,  # 增加Cloudflare后的等待时间
+                    ),
                 )
                 browsers.append(browser)
-                self._logger.info("浏览器 #{i+1} 创建并初始化成功")
-
-                # 每创建一个浏览器后等待一段时间，避免同时创建多个浏览器导致资源竞争
-                if i < count - 1:
-                    await asyncio.sleep(3)  # 增加等待时间
+                self._logger.info("浏览器 #%d 就绪", i + 1)
 
             except Exception as e:
-                self._logger.error("浏览器 #{i+1} 创建失败: %s", str(e))
+                self._logger.error("浏览器 #%d 创建失败: %s", i + 1, str(e))
 
         if len(browsers) < count:
             self._logger.warning(
@@ -727,32 +823,18 @@ class MovieDetailCrawlerService:
         browser = None
 
         try:
-            # 创建单个浏览器实例
-           
-
-            unique_id = str(uuid.uuid4())[:8]
-            timestamp = int(time.time() * 1000)
-            temp_dir = (
-                Path(tempfile.gettempdir())
-                / f"cf_browser_single_{unique_id}_{timestamp}"
-            )
-            temp_dir.mkdir(parents=True, exist_ok=True)
-
-            self._logger.info("创建单浏览器实例，数据目录: %s", temp_dir)
-
-            browser = CloudflareBypassBrowser(
-                headless=headless,
-                user_data_dir=str(temp_dir),
-                load_images=False,  # 禁用图片加载以提高速度
-                timeout=180,  # 增加超时时间以应对严格的Cloudflare检测
-                wait_after_cf=10,  # 增加Cloudflare挑战后的等待时间
+            # 从会话池取已预热的浏览器，跨批次复用同一个 profile
+            browser = await asyncio.get_event_loop().run_in_executor(
+                None,
+                lambda: browser_session_pool.acquire(
+                    headless=headless,
+                    wait_timeout=600,
+                    load_images=False,  # 禁用图片加载以提高速度
+                    timeout=180,  # 增加超时时间以应对严格的Cloudflare检测
+                    wait_after_cf=10,  # 增加Cloudflare挑战后的等待时间
+                ),
             )
-
-            # 初始化浏览器并通过Cloudflare挑战
-            self._logger.info("浏览器正在初始化并通过Cloudflare挑战...")
-            browser.get("https://missav.ai/", timeout=30, wait_for_full_load=True)
-            time.sleep(3)
-            self._logger.info("浏览器初始化完成")
+            self._logger.info("浏览器就绪")
 
             # 顺序处理每部电影
             for i, movie_code in enumerate(movie_codes):
@@ -792,13 +874,10 @@ class MovieDetailCrawlerService:
         except Exception as e:
             self._logger.error("单浏览器爬取过程中出错: %s", str(e))
         finally:
-            # 关闭浏览器实例
+            # 归还浏览器，保持预热状态供下个批次使用
             if browser:
-                try:
-                    browser.quit()
-                    self._logger.info("浏览器已关闭")
-                except Exception as e:
-                    self._logger.warning("关闭浏览器时出错: %s", str(e))
+                browser_session_pool.release(browser)
+                self._logger.info("浏览器已归还会话池")
 
         # 输出爬取结果统计
         self._logger.info(
@@ -922,13 +1001,10 @@ class MovieDetailCrawlerService:
         except Exception as e:
             self._logger.error("批量爬取过程中出错: %s", str(e))
         finally:
-            # 关闭所有浏览器实例
-            for i, browser in enumerate(browsers):
-                try:
-                    browser.quit()
-                    self._logger.info("浏览器 %d 已关闭", i + 1)
-                except Exception as e:
-                    self._logger.warning("关闭浏览器 %d 时出错: %s", i + 1, str(e))
+            # 归还所有浏览器，保持预热状态供下个批次使用
+            for browser in browsers:
+                browser_session_pool.release(browser)
+            self._logger.info("%d 个浏览器已归还会话池", len(browsers))
 
         # 输出爬取结果统计
         self._logger.info(
@@ -995,9 +1071,12 @@ class MovieDetailCrawlerService:
 
         # 使用CloudflareBypassBrowser爬取电影详情
         browser = None
+        healthy = True
         try:
-            # 创建浏览器实例
-            browser = CloudflareBypassBrowser(headless=True)
+            # 从会话池取已预热的浏览器
+            browser = await asyncio.get_event_loop().run_in_executor(
+                None, lambda: browser_session_pool.acquire(headless=True, wait_timeout=600)
+            )
 
             # 爬取电影详情
             movie_code, movie_info = await self._crawl_single_movie(
@@ -1016,17 +1095,12 @@ class MovieDetailCrawlerService:
 
         except Exception as e:
             self._logger.error("Error processing movie %s: %s", movie_code, str(e))
+            healthy = False
+            await self._record_failure(movie_code, classify_error(str(e)), str(e))
             return None
         finally:
             if browser:
-                try:
-                    browser.quit()
-                except Exception as e:
-                    self._logger.error("Error closing browser: %s", str(e))
-                    try:
-                        browser.close()
-                    except:
-                        pass
+                browser_session_pool.release(browser, healthy=healthy)
 
     def modify_url(self, url: str) -> str:
         parsed = urlparse(url)
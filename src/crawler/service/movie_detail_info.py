@@ -1,11 +1,8 @@
 from bs4 import BeautifulSoup
 from typing import Optional, Dict, Any
 import re
-from ..utils.http import create_session
-import urllib
 import logging
 from httpx import Response
-import json
 from sqlalchemy.ext.asyncio import AsyncSession
 
 class MovieDetailInfoService:
@@ -186,145 +183,3 @@ def _get_movie_detail(session, movie: Dict[str, Any], response: Response) -> Dic
         import traceback
         logging.error(f"Traceback: {traceback.format_exc()}")
         return {}
-
-
-def _parse_player_page(html_content):
-    """Parse player page to extract stream data.
-    
-    Args:
-        html_content (str): HTML content of player page
-        
-    Returns:
-        dict: Stream data containing 'stream' and 'vtt' URLs
-    """
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        player_div = soup.find('div', id='player')
-        
-        if not player_div:
-            logging.error("Player div not found")
-            return {}
-            
-        v_scope = player_div.get('v-scope', '')
-        if not v_scope:
-            logging.error("v-scope attribute not found")
-            return {}
-            
-        # Extract JSON data from v-scope
-        json_data = _extract_json_from_vscope(v_scope)
-        if not json_data:
-            return {}
-            
-        if 'stream' not in json_data or 'vtt' not in json_data:
-            logging.error("Stream or VTT URL not found in JSON data")
-            return {}
-            
-        return json_data
-        
-    except Exception as e:
-        logging.error(f"Error parsing player page: {str(e)}")
-        return {}
-
-def _extract_m3u8_from_player(player_url, cover_url):
-        """Extract M3U8 URL from player page.
-        
-        Args:
-            player_url (str): Player page URL
-            cover_url (str): Cover image URL
-            
-        Returns:
-            dict: Dictionary containing m3u8_url and vtt_url
-        """
-        try:
-            # 验证player_url是否有效
-            if not player_url:
-                logging.warning("Player URL is empty or None")
-                return {}
-                
-            # 构造完整的播放器URL
-            # 确保 cover_url 是字符串类型
-            try:
-                if cover_url is None:
-                    cover_url = ""
-                elif isinstance(cover_url, bytes):
-                    cover_url = cover_url.decode('utf-8', errors='replace')
-                elif not isinstance(cover_url, str):
-                    cover_url = str(cover_url)
-                    
-                # 安全地进行 URL 编码
-                try:
-                    encoded_cover = urllib.parse.quote(cover_url)
-                except Exception as encode_error:
-                    logging.warning(f"Error encoding cover URL: {str(encode_error)}. Using empty string instead.")
-                    encoded_cover = ""
-                    
-                full_url = f"{player_url}?poster={encoded_cover}"
-            except Exception as url_error:
-                logging.warning(f"Error constructing player URL: {str(url_error)}. Using original player URL.")
-                full_url = player_url
-            
-            # 获取播放器页面
-            try:
-                response = create_session().get(full_url, timeout=15)  # 增加超时时间
-                if response.status_code != 200:
-                    logging.warning(f"Failed to get player page, status code: {response.status_code}")
-                    return {}
-            except Exception as request_error:
-                logging.error(f"Error requesting player page: {str(request_error)}")
-                return {}
-                
-            # 解析页面获取m3u8 URL
-            try:
-                stream_data = _parse_player_page(response.text)
-                if not stream_data:
-                    logging.warning("No stream data found in player page")
-                    return {}
-                    
-                return {
-                    'm3u8_url': stream_data.get('stream'),
-                    'vtt_url': stream_data.get('vtt')
-                }
-            except Exception as parse_error:
-                logging.error(f"Error parsing player page: {str(parse_error)}")
-                return {}
-            
-        except Exception as e:
-            logging.error(f"Error extracting m3u8 URL: {str(e)}")
-            return {}
-
-def _extract_json_from_vscope(v_scope):
-        """Extract and parse JSON data from v-scope attribute.
-        
-        Args:
-            v_scope (str): v-scope attribute content
-            
-        Returns:
-            dict: Parsed JSON data
-        """
-        try:
-            # Find JSON object in v-scope
-            json_start = v_scope.find('{', v_scope.find(','))
-            if json_start == -1:
-                return {}
-                
-            # Track nested braces to find end of JSON
-            brace_count = 1
-            json_end = json_start + 1
-            
-            while brace_count > 0 and json_end < len(v_scope):
-                if v_scope[json_end] == '{':
-                    brace_count += 1
-                elif v_scope[json_end] == '}':
-                    brace_count -= 1
-                json_end += 1
-                
-            if brace_count > 0:
-                return {}
-                
-            # Parse JSON
-            json_str = v_scope[json_start:json_end].replace('"', '"')
-            return json.loads(json_str)
-            
-        except Exception as e:
-            logging.error(f"Error extracting JSON from v-scope: {str(e)}")
-            return {}
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""movie_info 中的名称数组 → movie_genres / movie_actresses 关联表
+
+详情爬虫把类型、标签和演员以文本数组写入 movie_info，而 API（MovieService.get_by_code）
+从 movie_genres / movie_actresses 关联表读取，这两张表一直没有被填充。
+
+这里按 (updated_at, id) 顺序成批扫描变化的 movie_info 行（位置记录在 sync_watermarks 中），
+每批：
+- 按语言收集所有名称，通过 dimension_cache 一次解析（未知名称一条语句批量创建）
+- 用一条 INSERT 写入本批所有 (movie_id, 类型ID) 和 (movie_id, 演员ID)，已存在的跳过
+- 关联和位置在同一个事务中提交，中断后从上次提交的位置继续
+
+读取时 movies 中还没有对应电影的行记录到 movie_link_pending，位置照常推进；
+之后每一轮先处理完变化的行，再重新处理其中已经能关联上的。
+
+标签（tags）在站点上与类型是同一类分类，没有单独的表，一起写入 movie_genres。
+关联只增不删：movie_info 中移除的名称不会删除已有关联。
+"""
+
+import asyncio
+import logging
+import os
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from common.enums.enums import SupportedLanguage
+from common.utils.dimension_cache import dimension_cache
+from common.utils.response_cache import response_cache, movie_detail_code
+from crawler.repository.movie_link_repository import MovieLinkRepository
+
+logger = logging.getLogger(__name__)
+
+# sync_watermarks 中的任务名
+WATERMARK_NAME = "movie_info_links"
+
+_LANGUAGES = {language.value for language in SupportedLanguage}
+
+
+class MovieLinkNormalizer:
+    """把 movie_info 的 genres / tags / actresses 规范化为关联表"""
+
+    def __init__(self, repository: MovieLinkRepository,
+                 batch_size: Optional[int] = None, lag_seconds: Optional[float] = None):
+        self._repository = repository
+        self._db = repository.db
+        self._batch_size = max(1, batch_size or int(os.getenv("MOVIE_LINK_BATCH_SIZE", "5000")))
+        # 只处理这么多秒之前更新的行，见 MovieLinkRepository.fetch_changed
+        self._lag_seconds = lag_seconds if lag_seconds is not None else float(os.getenv("MOVIE_LINK_LAG_SECONDS", "30"))
+        self._logger = logging.getLogger(__name__)
+
+    async def run(self, max_batches: Optional[int] = None,
+                  is_running: Optional[Callable[[], bool]] = None) -> Dict[str, int]:
+        """处理到没有新变化（或达到 max_batches、is_running 返回 False）为止，返回本次的统计
+
+        先按位置处理变化的行，再处理之前关联不上、现在已有对应电影的行。
+        is_running 在每批之间检查，停止时当前批已提交，下次从提交的位置继续。
+        """
+        totals = {"rows": 0, "skipped": 0, "deferred": 0, "relinked": 0,
+                  "genre_links": 0, "actress_links": 0, "batches": 0}
+        started = time.monotonic()
+        for step in (self.normalize_batch, self.relink_pending_batch):
+            while max_batches is None or totals["batches"] < max_batches:
+                if is_running is not None and not is_running():
+                    break
+                stats = await step()
+                if not stats["rows"]:
+                    break
+                totals["batches"] += 1
+                for key in ("rows", "skipped", "deferred", "relinked", "genre_links", "actress_links"):
+                    totals[key] += stats[key]
+                if stats["rows"] < self._batch_size:
+                    break
+        if totals["rows"]:
+            self._logger.info(
+                "关联规范化: %d 行 movie_info（跳过 %d，等待电影 %d，补关联 %d），"
+                "新增 %d 个类型关联、%d 个演员关联，用时 %.1f 秒",
+                totals["rows"], totals["skipped"], totals["deferred"], totals["relinked"],
+                totals["genre_links"], totals["actress_links"], time.monotonic() - started,
+            )
+        return totals
+
+    async def normalize_batch(self) -> Dict[str, int]:
+        """处理一批变化的 movie_info 行并推进位置
+
+        还没有对应电影的行记录到待关联表，与关联和位置在同一个事务中提交。
+        """
+        stats = self._empty_stats()
+        changed_codes: Set[str] = set()
+        try:
+            watermark = await self._repository.get_watermark(WATERMARK_NAME)
+            rows = await self._repository.fetch_changed(watermark, self._batch_size, self._lag_seconds)
+            if not rows:
+                await self._db.rollback()
+                return stats
+            stats["rows"] = len(rows)
+
+            unresolved = [row["id"] for row in rows if not row["movie_ids"] and row["language"] in _LANGUAGES]
+            stats["deferred"] = len(unresolved)
+            await self._repository.add_pending(unresolved)
+            await self._link_rows(rows, stats, changed_codes)
+
+            last = rows[-1]
+            await self._repository.save_watermark(WATERMARK_NAME, last["changed_at"], last["id"], len(rows))
+            await self._db.commit()
+        except Exception:
+            await self._rollback()
+            raise
+
+        await self._invalidate(stats, changed_codes)
+        return stats
+
+    async def relink_pending_batch(self) -> Dict[str, int]:
+        """处理一批之前关联不上、现在已有对应电影的行，并移出待关联表"""
+        stats = self._empty_stats()
+        changed_codes: Set[str] = set()
+        try:
+            rows = await self._repository.fetch_resolved_pending(self._batch_size)
+            if not rows:
+                await self._db.rollback()
+                return stats
+            stats["rows"] = stats["relinked"] = len(rows)
+            await self._link_rows(rows, stats, changed_codes)
+            await self._repository.remove_pending([row["id"] for row in rows])
+            await self._db.commit()
+        except Exception:
+            await self._rollback()
+            raise
+
+        await self._invalidate(stats, changed_codes)
+        return stats
+
+    async def _link_rows(self, rows: List[Dict], stats: Dict[str, int], changed_codes: Set[str]) -> None:
+        """解析一批行中的名称并写入关联（不提交）"""
+        # 语言 → 本批出现的名称 / 每行的名称
+        genre_names: Dict[str, Set[str]] = {}
+        actress_names: Dict[str, Set[str]] = {}
+        pending: List[Tuple[List[int], str, List[str], List[str]]] = []
+        for row in rows:
+            language = row["language"]
+            if language not in _LANGUAGES:
+                stats["skipped"] += 1
+                continue
+            if not row["movie_ids"]:
+                # 已记录到待关联表（计入 deferred）
+                continue
+            genres = self._names(row["genres"]) + self._names(row["tags"])
+            actresses = self._names(row["actresses"])
+            genre_names.setdefault(language, set()).update(genres)
+            actress_names.setdefault(language, set()).update(actresses)
+            # 同一 code 可能有多个电影，全部关联
+            pending.append((row["movie_ids"], language, genres, actresses))
+            if genres or actresses:
+                changed_codes.update(
+                    movie_detail_code(SimpleNamespace(link=link, code=row["code"])) for link in row["links"]
+                )
+
+        genre_ids = {
+            language: await dimension_cache.resolve_genres(self._db, names, language)
+            for language, names in genre_names.items() if names
+        }
+        actress_ids = {
+            language: await dimension_cache.resolve_actresses(self._db, names, language)
+            for language, names in actress_names.items() if names
+        }
+
+        genre_links: Set[Tuple[int, int]] = set()
+        actress_links: Set[Tuple[int, int]] = set()
+        for movie_ids, language, genres, actresses in pending:
+            for movie_id in movie_ids:
+                ids = genre_ids.get(language, {})
+                genre_links.update((movie_id, ids[name]) for name in genres if name in ids)
+                ids = actress_ids.get(language, {})
+                actress_links.update((movie_id, ids[name]) for name in actresses if name in ids)
+
+        stats["genre_links"] = await dimension_cache.link_genres(self._db, genre_links)
+        stats["actress_links"] = await dimension_cache.link_actresses(self._db, actress_links)
+
+    async def _rollback(self) -> None:
+        await self._db.rollback()
+        # 回滚掉的新名称可能已进入缓存
+        dimension_cache.invalidate()
+
+    @staticmethod
+    async def _invalidate(stats: Dict[str, int], changed_codes: Set[str]) -> None:
+        if stats["genre_links"] or stats["actress_links"]:
+            # 关联只影响详情和按类型、演员筛选的列表
+            await response_cache.invalidate_movies(changed_codes, links=True)
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, int]:
+        return {"rows": 0, "skipped": 0, "deferred": 0, "relinked": 0, "genre_links": 0, "actress_links": 0}
+
+    @staticmethod
+    def _names(values) -> List[str]:
+        return [value.strip() for value in values or [] if isinstance(value, str) and value.strip()]
+
+
+async def run_link_normalizer(session_factory, is_running: Callable[[], bool], interval: float = 60.0) -> None:
+    """后台循环：追上 movie_info 的变化后每 interval 秒检查一次
+
+    使用独立的会话，不与详情任务共享。表和索引只在启动时创建一次，
+    movie_info 的扫描索引用 CONCURRENTLY 创建，不阻塞爬虫写入。
+    """
+    async with session_factory() as session:
+        repository = MovieLinkRepository(session)
+        await repository.ensure_schema()
+        await repository.ensure_changed_index()
+    while is_running():
+        try:
+            async with session_factory() as session:
+                await MovieLinkNormalizer(MovieLinkRepository(session)).run(is_running=is_running)
+        except Exception as e:
+            logger.error("关联规范化出错: %s", e)
+
+        # 分段等待，便于及时退出
+        waited = 0.0
+        while waited < interval and is_running():
+            await asyncio.sleep(min(5.0, interval - waited))
+            waited += 5.0
@@ -1,58 +1,24 @@
 """HTTP utilities for making requests."""
 
 import logging
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+
+from common.utils.http_clients import http_clients
 
 logger = logging.getLogger(__name__)
 
-def create_session(use_proxy=False):
-    """Create a requests session with retry mechanism and headers.
-    
-    Returns:
-        requests.Session: Configured session
-    """
-    session = requests.Session()
+def create_session(use_proxy=False, pool_maxsize=None):
+    """Return a shared session from the HTTP client registry.
     
-    # Add proxy if needed
-    if use_proxy:
-        session.proxies = {
-            'http': 'http://127.0.0.1:7890',
-            'https': 'http://127.0.0.1:7890'
-        }
+    保留给旧代码使用，新代码直接使用 http_clients.session(name)。
     
-    # Configure retry strategy
-    retry_strategy = Retry(
-        total=3,
-        backoff_factor=1,
-        status_forcelist=[429, 500, 502, 503, 504]
-    )
+    Args:
+        use_proxy: Use the proxied "site" profile instead of "direct"
+        pool_maxsize: Keep-alive connections kept per host, a derived profile is registered when it differs
     
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    
-    # Set common headers
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9,ja;q=0.8,zh-CN;q=0.7,zh;q=0.6',
-        'Accept-Charset': 'utf-8, iso-8859-1;q=0.5',
-        'Accept-Encoding': 'gzip, deflate',
-        'Cache-Control': 'no-cache',
-        'Pragma': 'no-cache',
-        'Connection': 'keep-alive',
-        'Referer': 'http://123av.com',
-        'Content-Type': 'text/html; charset=utf-8',
-        'Sec-Ch-Ua': '"Not A(Brand";v="24", "Chromium";v="121"',
-        'Sec-Ch-Ua-Mobile': '?0',
-        'Sec-Ch-Ua-Platform': '"macOS"',
-        'Sec-Fetch-Dest': 'document',
-        'Sec-Fetch-Mode': 'navigate',
-        'Sec-Fetch-Site': 'same-origin',
-        'Sec-Fetch-User': '?1',
-        'Upgrade-Insecure-Requests': '1'
-    })
-    
-    return session
+    Returns:
+        requests.Session: Shared, configured session
+    """
+    name = "site" if use_proxy else "direct"
+    if pool_maxsize and pool_maxsize != http_clients.profile(name).pool_maxsize:
+        name = http_clients.derive(name, f"{name}-pool{pool_maxsize}", pool_maxsize=pool_maxsize).name
+    return http_clients.session(name)
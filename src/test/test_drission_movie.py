@@ -18,6 +18,7 @@ from bs4 import BeautifulSoup
 
 # 因为是单个文件运行，所以直接导入
 from app.utils.drission_utils import CloudflareBypassBrowser
+from app.utils.browser_session_pool import browser_session_pool
 from common.enums.enums import SupportedLanguage
 
 
@@ -94,20 +95,14 @@ class MovieDetailCrawler:
         创建新的浏览器实例，用于并行爬取
         """
         try:
-            instance_id = int(time.time() * 1000)
-            user_data_dir = (
-                Path.home()
-                / ".cache"
-                / f"cloudflare_bypass_browser_parallel_{instance_id}"
-            )
-            user_data_dir.mkdir(exist_ok=True, parents=True)
-            browser = CloudflareBypassBrowser(
+            # 从会话池取已预热的浏览器，用完后通过 browser_session_pool.release 归还
+            # 池满时最多等待 10 分钟（与服务中的调用一致），代理租约也共用这个期限
+            return browser_session_pool.acquire(
                 headless=headless,
-                user_data_dir=str(user_data_dir),
+                wait_timeout=600,
                 load_images=False,
                 timeout=30,
             )
-            return browser
         except ImportError as e:
             logger.error(f"导入CloudflareBypassBrowser出错: {e}")
             raise
@@ -241,11 +236,8 @@ class MovieDetailCrawler:
             return None
         finally:
             if lang_browser:
-                try:
-                    lang_browser.close()  # 使用close而不是quit
-                    logger.debug(f"[{language}]已关闭并行爬取浏览器实例")
-                except Exception:
-                    pass
+                browser_session_pool.release(lang_browser)
+                logger.debug(f"[{language}]已归还并行爬取浏览器实例")
 
     def initialize_field_patterns(self) -> Dict[str, List[str]]:
         return {
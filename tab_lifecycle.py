@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+标签页生命周期管理与内存看门狗
+
+长时间运行的爬虫一直复用同一批标签页，Chromium 渲染进程的内存持续增长，
+最终导致主机开始交换。这里在导航之间主动回收：
+
+- 标签页导航次数达到上限，或 JS 堆超过上限时，用新标签页替换
+- 看门狗定期统计浏览器进程树的总 RSS，超过预算时等所有标签页空闲后重启浏览器，
+  并把 cf_clearance 等 cookie 带到新浏览器，避免重新通过 Cloudflare 验证。
+  等待空闲有期限：调度器放弃卡住的任务后线程仍停在导航中，超时后强制重启，
+  卡住的导航随旧浏览器关闭而失败，内存预算总能生效
+
+回收只发生在 acquire 时（由使用该标签页的线程自己完成）或所有标签页都空闲时
+（强制重启除外）。重启和 park 持有同一把锁，park 不会操作正在被替换的标签页。总 RSS 依赖可选的 psutil，未安装时只按导航次数和 JS 堆回收。
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, List, Optional
+from loguru import logger
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class TabSlot:
+    """一个标签页位置，里面的标签页对象可能在回收时被替换"""
+
+    def __init__(self, index: int, tab: Any, manager: Optional["TabLifecycleManager"] = None):
+        self.index = index
+        self.tab = tab
+        self.manager = manager
+        self.navigations = 0
+        self.heap_mb = 0.0
+        self.created_at = time.time()
+
+    def stop_loading(self):
+        """供调度器在任务超时时停止当前标签页的加载"""
+        stop_loading = getattr(self.tab, 'stop_loading', None)
+        if callable(stop_loading):
+            stop_loading()
+
+    def park(self):
+        """并发度降低时由调度器调用，导航到空白页释放渲染内存
+
+        与浏览器重启持有同一把锁；正在重启时跳过，重启后的标签页本来就是空白页。
+        """
+        if self.manager is None:
+            self.tab.get('about:blank')
+            return
+        with self.manager._cond:
+            if not self.manager._restart_requested:
+                self.tab.get('about:blank')
+
+    def __repr__(self):
+        return f"TabSlot({self.index + 1}, navigations={self.navigations})"
+
+
+class TabLifecycleManager:
+    """管理一个浏览器及其标签页的生命周期
+
+    Args:
+        browser_factory: 创建并预热浏览器（ChromiumPage）的函数，重启时也会调用
+        tab_count: 标签页数量（包括浏览器自带的第一个标签页）
+        max_navigations: 单个标签页导航次数上限，达到后回收
+        max_tab_heap_mb: 单个标签页 JS 堆上限（MB），超过后回收
+        max_total_rss_mb: 浏览器进程树总 RSS 预算（MB），超过后重启浏览器
+        check_interval: 看门狗检查间隔（秒）
+        restart_drain_timeout: 重启前等待所有标签页空闲的最长时间（秒），超时后强制重启
+    """
+
+    def __init__(self, browser_factory: Callable[[], Any],
+                 tab_count: int,
+                 max_navigations: int = 200,
+                 max_tab_heap_mb: float = 512.0,
+                 max_total_rss_mb: float = 4096.0,
+                 check_interval: float = 30.0,
+                 restart_drain_timeout: float = 60.0):
+        self.browser_factory = browser_factory
+        self.tab_count = max(1, tab_count)
+        self.max_navigations = max_navigations
+        self.max_tab_heap_mb = max_tab_heap_mb
+        self.max_total_rss_mb = max_total_rss_mb
+        self.check_interval = check_interval
+        self.restart_drain_timeout = restart_drain_timeout
+
+        self.browser = None
+        self.slots: List[TabSlot] = []
+        self.recycled = 0
+        self.restarts = 0
+        self.restarts_forced = 0
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._restart_requested = False
+        self._stopped = threading.Event()
+        self._watchdog = None
+
+    # ---------- 公共接口 ----------
+
+    def start(self) -> List[TabSlot]:
+        """启动浏览器、创建标签页并启动看门狗"""
+        self.browser = self.browser_factory()
+        self.slots = [TabSlot(i, tab, self) for i, tab in enumerate(self._open_tabs())]
+        logger.info(f"🎯 成功创建 {len(self.slots)} 个标签页")
+
+        self._stopped.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="tab-lifecycle", daemon=True)
+        self._watchdog.start()
+        return self.slots
+
+    def stop(self):
+        """停止看门狗并关闭浏览器"""
+        self._stopped.set()
+        if self.browser:
+            try:
+                self.browser.quit()
+                logger.info("🔒 浏览器已关闭")
+            except Exception:
+                pass
+            self.browser = None
+
+    @property
+    def tabs(self) -> List[Any]:
+        return [slot.tab for slot in self.slots]
+
+    @contextmanager
+    def use(self, slot: TabSlot):
+        """取出标签页进行一次导航
+
+        浏览器正在重启时等待；标签页达到回收条件时先替换成新标签页。
+        """
+        with self._cond:
+            while self._restart_requested:
+                self._cond.wait()
+            self._active += 1
+        try:
+            self._maybe_recycle(slot)
+            slot.navigations += 1
+            yield slot.tab
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def wrap(self, work_fn: Callable[[Any, Any], Any]) -> Callable[[TabSlot, Any], Any]:
+        """把 work_fn(tab, item) 包装成接收 TabSlot 的函数，供 TabScheduler 使用"""
+        def run(slot, item):
+            with self.use(slot) as tab:
+                return work_fn(tab, item)
+        return run
+
+    def total_rss_mb(self) -> Optional[float]:
+        """浏览器进程树的总 RSS（MB），无法获取时返回 None"""
+        pid = _browser_pid(self.browser)
+        if psutil is None or not pid:
+            return None
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+        total = 0
+        for proc in procs:
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / 1024 / 1024
+
+    # ---------- 标签页回收 ----------
+
+    def _open_tabs(self) -> List[Any]:
+        tabs = [self.browser]
+        for i in range(self.tab_count - 1):
+            try:
+                tabs.append(self.browser.new_tab())
+                time.sleep(0.5)
+            except Exception as e:
+                logger.warning(f"创建标签页 {i+2} 失败: {e}")
+        return tabs
+
+    def _maybe_recycle(self, slot: TabSlot):
+        reason = None
+        if self.max_navigations and slot.navigations >= self.max_navigations:
+            reason = f"导航 {slot.navigations} 次"
+        else:
+            slot.heap_mb = _tab_heap_mb(slot.tab)
+            if self.max_tab_heap_mb and slot.heap_mb > self.max_tab_heap_mb:
+                reason = f"JS堆 {slot.heap_mb:.0f}MB"
+        if reason:
+            self._recycle(slot, reason)
+
+    def _recycle(self, slot: TabSlot, reason: str):
+        old = slot.tab
+        try:
+            new = self.browser.new_tab()
+        except Exception as e:
+            logger.warning(f"♻️ [标签页{slot.index+1}] 回收失败，继续使用旧标签页: {e}")
+            slot.navigations = 0
+            return
+
+        slot.tab, slot.navigations, slot.heap_mb, slot.created_at = new, 0, 0.0, time.time()
+        self.recycled += 1
+        try:
+            if old is self.browser:
+                # 浏览器自带的第一个标签页不能关闭，导航到空白页释放渲染进程
+                old.get('about:blank')
+            else:
+                old.close()
+        except Exception:
+            pass
+        logger.info(f"♻️ [标签页{slot.index+1}] 已回收（{reason}）")
+
+    # ---------- 看门狗 ----------
+
+    def _watch(self):
+        while not self._stopped.wait(self.check_interval):
+            rss = self.total_rss_mb()
+            if rss is None:
+                continue
+            heaps = ", ".join(f"{s.index+1}:{s.heap_mb:.0f}MB/{s.navigations}次" for s in self.slots)
+            logger.info(f"🧠 浏览器总RSS {rss:.0f}MB / 预算 {self.max_total_rss_mb:.0f}MB | {heaps}")
+            if self.max_total_rss_mb and rss > self.max_total_rss_mb:
+                self._restart(f"总RSS {rss:.0f}MB 超过预算")
+
+    def _restart(self, reason: str):
+        """等所有标签页空闲后重启浏览器，保留 cookie
+
+        超过 restart_drain_timeout 仍有标签页在导航时强制重启：调度器的看门狗放弃卡住的任务后，
+        线程仍停在 use() 中，一直等下去内存预算就永远不会生效。
+        重启全程持有锁，use() 和 park() 在此期间都不会操作标签页。
+        """
+        deadline = time.monotonic() + self.restart_drain_timeout
+        with self._cond:
+            self._restart_requested = True
+            try:
+                while self._active > 0 and not self._stopped.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(timeout=min(1.0, remaining))
+                if self._stopped.is_set():
+                    return
+                if self._active > 0:
+                    self.restarts_forced += 1
+                    logger.warning(f"⏳ {self.restart_drain_timeout:.0f} 秒内仍有 {self._active} 个标签页在导航"
+                                   f"（可能已卡住），强制重启")
+                logger.warning(f"🔄 重启浏览器: {reason}")
+                cookies = export_cookies(self.browser)
+                try:
+                    self.browser.quit()
+                except Exception:
+                    pass
+
+                self.browser = self.browser_factory()
+                import_cookies(self.browser, cookies)
+                for slot, tab in zip(self.slots, self._open_tabs()):
+                    slot.tab, slot.navigations, slot.heap_mb, slot.created_at = tab, 0, 0.0, time.time()
+                self.restarts += 1
+                logger.info(f"✅ 浏览器已重启，带回 {len(cookies)} 个 cookie")
+            except Exception as e:
+                logger.error(f"💥 浏览器重启失败: {e}")
+            finally:
+                self._restart_requested = False
+                self._cond.notify_all()
+
+
+# ---------- DrissionPage 辅助函数 ----------
+
+def _browser_pid(page) -> Optional[int]:
+    for owner in (getattr(page, 'browser', None), page):
+        pid = getattr(owner, 'process_id', None)
+        if pid:
+            return pid
+    return None
+
+
+def _tab_heap_mb(tab) -> float:
+    """标签页的 JS 堆大小（MB），作为渲染进程内存的近似值"""
+    try:
+        heap = tab.run_js('return (performance.memory && performance.memory.totalJSHeapSize) || 0')
+        return float(heap or 0) / 1024 / 1024
+    except Exception:
+        return 0.0
+
+
+def export_cookies(page) -> list:
+    """导出浏览器所有域名的 cookie（含完整属性）"""
+    if page is None:
+        return []
+    try:
+        return list(page.cookies(all_domains=True, all_info=True))
+    except Exception:
+        pass
+    try:
+        cookies = page.get_cookies(all_domains=True, all_info=True)
+        return list(cookies) if not isinstance(cookies, dict) else [
+            {'name': k, 'value': v} for k, v in cookies.items()
+        ]
+    except Exception as e:
+        logger.warning(f"导出cookie失败: {e}")
+        return []
+
+
+def import_cookies(page, cookies: list):
+    """把导出的 cookie 写入新浏览器"""
+    if not cookies:
+        return
+    try:
+        page.set.cookies(cookies)
+    except Exception as e:
+        logger.warning(f"写入cookie失败: {e}")
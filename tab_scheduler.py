@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+工作窃取式标签页调度器
+
+原来的批量爬虫按标签页数量切成固定批次，等一批全部完成才开始下一批，
+一个卡在 Cloudflare 验证里的页面会让其他标签页全部空等。
+
+这里每个标签页一个线程，做完一个就立刻从共享队列取下一个：
+- 每个任务有截止时间，超时后由看门狗重新分配给其他空闲标签页
+- 超时标签页稍后返回的结果会被丢弃，保证每个任务只产生一次结果
+- 超时次数用完的任务按失败处理，不会拖住整个运行
+- 传入 AdaptiveConcurrency 时，序号超出当前并发度的标签页暂停领取任务
+"""
+
+import time
+import random
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+from loguru import logger
+
+
+@dataclass
+class Lease:
+    """一个标签页正在处理的任务"""
+    item: Any
+    attempt: int
+    tab_index: int
+    started_at: float = field(default_factory=time.monotonic)
+    expired: bool = False
+
+
+@dataclass
+class SchedulerStats:
+    """调度统计"""
+    completed: int = 0
+    failed: int = 0
+    reassigned: int = 0
+    late_discarded: int = 0
+    started_at: float = field(default_factory=time.time)
+
+    def summary(self) -> str:
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        done = self.completed + self.failed
+        return (f"完成={self.completed} 失败={self.failed} 重新分配={self.reassigned} "
+                f"丢弃迟到结果={self.late_discarded} 平均={elapsed / max(done, 1):.1f}秒/部")
+
+
+class TabScheduler:
+    """标签页共享队列调度器
+
+    Args:
+        tabs: 标签页列表，每个标签页一个工作线程
+        work_fn: work_fn(tab, item) -> result，在标签页线程中执行
+        on_result: on_result(item, result)，任务完成时调用（每个任务最多一次）
+        on_failure: on_failure(item, reason)，超时或异常且次数用完时调用
+        item_timeout: 单个任务的截止时间（秒），超时后重新分配
+        max_attempts: 每个任务最多分配次数（含超时和异常）
+        pause_range: 每个标签页处理完一个任务后的随机休息区间（秒），替代原来的批次间休息
+        progress_interval: 进度日志的输出间隔（秒）
+        concurrency: 可选的 AdaptiveConcurrency，调度器上报任务结果并定期让它调整并发度
+        success_fn: success_fn(result) -> bool，判断结果是否算成功（上报给 concurrency），
+            默认结果不为 None 即成功；超时和异常总是算失败
+    """
+
+    def __init__(self, tabs: Sequence[Any],
+                 work_fn: Callable[[Any, Any], Any],
+                 on_result: Optional[Callable[[Any, Any], None]] = None,
+                 on_failure: Optional[Callable[[Any, str], None]] = None,
+                 item_timeout: float = 180.0,
+                 max_attempts: int = 2,
+                 pause_range: Optional[Tuple[float, float]] = None,
+                 progress_interval: float = 30.0,
+                 concurrency: Optional[Any] = None,
+                 success_fn: Optional[Callable[[Any], bool]] = None):
+        if not tabs:
+            raise ValueError("至少需要一个标签页")
+        self.tabs = list(tabs)
+        self.work_fn = work_fn
+        self.on_result = on_result
+        self.on_failure = on_failure
+        self.item_timeout = item_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.pause_range = pause_range
+        self.progress_interval = progress_interval
+        self.concurrency = concurrency
+        self.success_fn = success_fn or (lambda result: result is not None)
+
+        self.lock = threading.Lock()
+        self.stats = SchedulerStats()
+        self._items = iter(())
+        self._exhausted = False
+        self._reassigned = deque()
+        self._leases = {}
+        self._outstanding = 0
+        self._stopped = threading.Event()
+
+    def run(self, items: Iterable[Any]) -> SchedulerStats:
+        """处理全部任务，items 可以是惰性的迭代器，按需读取"""
+        self.stats = SchedulerStats()
+        self._items = iter(items)
+        self._exhausted = False
+        self._stopped.clear()
+
+        workers = [
+            threading.Thread(target=self._worker, args=(i, tab), name=f"tab-worker-{i+1}", daemon=True)
+            for i, tab in enumerate(self.tabs)
+        ]
+        watchdog = threading.Thread(target=self._watchdog, name="tab-watchdog", daemon=True)
+        for t in workers:
+            t.start()
+        watchdog.start()
+
+        try:
+            # 卡住的标签页线程不一定会返回，只等待所有任务有结论
+            while not self._all_done():
+                time.sleep(0.2)
+        finally:
+            self._stopped.set()
+            for t in workers:
+                t.join(timeout=1)
+
+        logger.info(f"📊 调度完成: {self.stats.summary()}")
+        return self.stats
+
+    # ---------- 内部实现 ----------
+
+    def _all_done(self):
+        with self.lock:
+            return self._exhausted and self._outstanding == 0 and not self._reassigned
+
+    def _take(self, tab_index) -> Optional[Lease]:
+        """取下一个任务，重新分配的任务优先；当前没有任务可取时返回None"""
+        with self.lock:
+            if self._reassigned:
+                item, attempt = self._reassigned.popleft()
+            elif not self._exhausted:
+                try:
+                    item, attempt = next(self._items), 1
+                    self._outstanding += 1
+                except StopIteration:
+                    self._exhausted = True
+                    return None
+            else:
+                return None
+            lease = Lease(item=item, attempt=attempt, tab_index=tab_index)
+            self._leases[tab_index] = lease
+            return lease
+
+    def _worker(self, tab_index, tab):
+        parked = False
+        while not self._stopped.is_set():
+            if self.concurrency is not None and tab_index >= self.concurrency.limit:
+                # 超出当前并发度，暂停领取任务
+                if not parked:
+                    parked = True
+                    self._park_tab(tab)
+                if self._all_done():
+                    return
+                time.sleep(1.0)
+                continue
+            parked = False
+
+            lease = self._take(tab_index)
+            if lease is None:
+                if self._all_done():
+                    return
+                time.sleep(0.2)
+                continue
+
+            result, error = None, None
+            try:
+                result = self.work_fn(tab, lease.item)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                logger.error(f"❌ [标签页{tab_index+1}] {lease.item} 处理异常: {error}")
+
+            with self.lock:
+                if self._leases.get(tab_index) is lease:
+                    del self._leases[tab_index]
+                if lease.expired:
+                    # 已被看门狗重新分配，结果作废
+                    self.stats.late_discarded += 1
+                    logger.warning(f"⌛ [标签页{tab_index+1}] {lease.item} 超时后才返回，结果已丢弃")
+                    finish = None
+                elif error is not None and lease.attempt < self.max_attempts:
+                    self._reassigned.append((lease.item, lease.attempt + 1))
+                    self.stats.reassigned += 1
+                    finish = None
+                else:
+                    finish = 'failure' if error is not None else 'result'
+                    if finish == 'failure':
+                        self.stats.failed += 1
+                    else:
+                        self.stats.completed += 1
+                    self._outstanding -= 1
+
+            if not lease.expired:
+                # 超时已由看门狗上报，这里只上报正常返回或异常的结果
+                self._record(error is None and self._is_success(result))
+            if finish == 'result' and self.on_result:
+                self._safe_call(self.on_result, lease.item, result)
+            elif finish == 'failure' and self.on_failure:
+                self._safe_call(self.on_failure, lease.item, error)
+
+            if self.pause_range:
+                time.sleep(random.uniform(*self.pause_range))
+
+    def _watchdog(self):
+        last_report = time.monotonic()
+        while not self._stopped.wait(1.0):
+            now = time.monotonic()
+            expired: List[Lease] = []
+            with self.lock:
+                for tab_index, lease in list(self._leases.items()):
+                    if now - lease.started_at <= self.item_timeout:
+                        continue
+                    lease.expired = True
+                    del self._leases[tab_index]
+                    expired.append(lease)
+                    if lease.attempt < self.max_attempts:
+                        # 放到队首，由下一个空闲标签页接手
+                        self._reassigned.appendleft((lease.item, lease.attempt + 1))
+                        self.stats.reassigned += 1
+                    else:
+                        self.stats.failed += 1
+                        self._outstanding -= 1
+                    self._record(False)
+
+            for lease in expired:
+                retry = lease.attempt < self.max_attempts
+                logger.warning(
+                    f"⏰ [标签页{lease.tab_index+1}] {lease.item} 超过 {self.item_timeout:.0f} 秒"
+                    f"{'，重新分配' if retry else '，放弃'}"
+                )
+                self._stop_tab(lease.tab_index)
+                if not retry and self.on_failure:
+                    self._safe_call(self.on_failure, lease.item, f"timeout after {self.item_timeout:.0f}s")
+
+            if self.concurrency is not None:
+                self.concurrency.maybe_adjust()
+
+            if now - last_report >= self.progress_interval:
+                last_report = now
+                with self.lock:
+                    busy = len(self._leases)
+                status = f" | {self.concurrency.status()}" if self.concurrency is not None else ""
+                logger.info(f"📈 调度进度: 忙碌标签页={busy}/{len(self.tabs)} | {self.stats.summary()}{status}")
+
+    def _is_success(self, result):
+        try:
+            return bool(self.success_fn(result))
+        except Exception:
+            return False
+
+    def _record(self, success):
+        if self.concurrency is not None:
+            self.concurrency.record(success)
+
+    @staticmethod
+    def _park_tab(tab):
+        """暂停的标签页停在空白页，释放渲染内存"""
+        park = getattr(tab, 'park', None)
+        if callable(park):
+            try:
+                park()
+            except Exception:
+                pass
+
+    def _stop_tab(self, tab_index):
+        """尽量让卡住的标签页停止加载，使其尽快回到队列"""
+        stop_loading = getattr(self.tabs[tab_index], 'stop_loading', None)
+        if callable(stop_loading):
+            try:
+                stop_loading()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _safe_call(fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.error(f"❌ 结果回调出错: {e}")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试浏览器会话池的 profile 回收：根目录位于临时目录下并且名字匹配旧目录模式（cf_browser_*）时，
+回收旧目录不能删除根目录和其中正在使用的 profile，也不能把它们重复计入大小预算
+
+不启动浏览器，只在临时目录中构造 profile 目录。
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "src"))
+
+import app.utils.browser_session_pool as pool_module
+from app.utils.browser_session_pool import BrowserSessionPool
+
+
+def make_dir(path: Path, size: int = 0, age_hours: float = 0.0) -> Path:
+    """创建目录（可选写入 size 字节），并把修改时间设置为 age_hours 小时前"""
+    path.mkdir(parents=True, exist_ok=True)
+    if size:
+        (path / "data.bin").write_bytes(b"x" * size)
+    mtime = time.time() - age_hours * 3600
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_gc_keeps_pool_root():
+    tmp = Path(tempfile.mkdtemp())
+    # 与默认配置相同的布局：临时目录 / cf_browser_profiles
+    pool_module.LEGACY_PROFILE_GLOBS = [(tmp, "cf_browser_*")]
+    pool = BrowserSessionPool(root_dir=str(tmp / "cf_browser_profiles"), gc_max_age_hours=1, gc_max_total_mb=1)
+
+    print("🔍 根目录和正在使用的 profile...")
+    with pool._available:
+        profile = pool._claim_profile()
+        profile.in_use = True
+    pool_module._write_meta(profile.path, {"last_used": time.time() - 7200})
+    make_dir(pool.root_dir, age_hours=2)
+
+    legacy_old = make_dir(tmp / "cf_browser_1234_old", size=1024, age_hours=2)
+    legacy_recent = make_dir(tmp / "cf_browser_5678_new", size=2 * 1024 * 1024)
+
+    removed = pool.collect_garbage(force=True)
+
+    assert pool.root_dir.exists(), "回收时删除了会话池根目录"
+    assert profile.path.exists(), "回收时删除了正在使用的 profile"
+    assert not legacy_old.exists(), "过期的旧临时目录没有被删除"
+    assert not legacy_recent.exists(), "超出大小预算的旧临时目录没有被删除"
+    print(f"✅ 删除了 {removed} 个旧目录，根目录和正在使用的 profile 保留")
+
+    print("🔍 根目录不重复计入大小预算...")
+    pool_module._unlock(profile.lock_fd)
+    with pool._available:
+        pool._profiles.clear()
+    make_dir(pool.root_dir / "profile_1", size=600 * 1024)
+    make_dir(pool.root_dir / "profile_2", size=300 * 1024)
+    pool.collect_garbage(force=True)
+    # 两个 profile 合计 0.9 MB，在 1 MB 预算内；根目录被重复计入时总数会超出预算
+    assert (pool.root_dir / "profile_1").exists() and (pool.root_dir / "profile_2").exists(), \
+        "预算内的 profile 被删除（根目录被重复计入）"
+    print("✅ 预算内的 profile 全部保留")
+    return True
+
+
+if __name__ == "__main__":
+    print("🚀 开始测试浏览器会话池回收")
+    print("=" * 50)
+    success = test_gc_keeps_pool_root()
+    print("=" * 50)
+    print("🎉 测试通过" if success else "❌ 测试失败")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试类型列表页的全量扫描：每次全量扫描是新任务，必须从第1页重新爬到最后一页，
+不能从之前任务记录的最大页码继续；同一任务中断后仍从本任务的进度继续
+
+需要数据库（pages_progress / crawler_progress），不访问站点：列表页的获取用假数据代替。
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from sqlalchemy import delete
+
+from app.config.database import async_session
+from common.db.entity.crawler import CrawlerProgress, PagesProgress
+from common.enums.enums import CrawlerStatus, CrawlerTaskType
+from crawler.repository.crawler_progress_repository import CrawlerProgressRepository
+from crawler.repository.page_crawler_repository import PageCrawlerRepository
+from crawler.service.crawler_progress_service import CrawlerProgressService
+from crawler.service.genre_service import GenreService
+
+# 测试用的类型ID，不与真实类型冲突
+TEST_GENRE_ID = -4242
+TOTAL_PAGES = 3
+
+
+class FakeGenreRepository:
+    async def get_all(self):
+        return [SimpleNamespace(id=TEST_GENRE_ID, code="test-full-sweep", urls=["https://example.invalid/genres/test"])]
+
+    async def get_by_code(self, code):
+        return None
+
+
+class FakeMovieRepository:
+    async def save_movies(self, movies):
+        return len(movies)
+
+
+def make_service(session, visited):
+    progress_service = CrawlerProgressService(
+        FakeGenreRepository(), PageCrawlerRepository(session), FakeMovieRepository(), CrawlerProgressRepository(session)
+    )
+    service = GenreService(FakeGenreRepository(), progress_service, FakeMovieRepository(), None, None)
+
+    async def total_pages(url):
+        return TOTAL_PAGES
+
+    async def page_movies(url, page):
+        visited.append(page)
+        return [SimpleNamespace(code=f"TEST-{page}")]
+
+    service._get_total_pages = total_pages
+    service._process_page_get_movies = page_movies
+    return service, progress_service
+
+
+async def run_sweep(session, task_id):
+    visited = []
+    service, _ = make_service(session, visited)
+    await service.process_genres_pages(task_id, incremental=False)
+    return visited
+
+
+async def test_second_full_sweep_starts_at_page_1():
+    async with async_session() as session:
+        _, progress_service = make_service(session, [])
+        task_ids = []
+        try:
+            for _ in range(2):
+                task = await progress_service.create_crawler_progress(CrawlerProgress(
+                    task_type=CrawlerTaskType.GENRES_PAGES_FULL.value, status=CrawlerStatus.PROCESSING.value
+                ))
+                task_ids.append(task.id)
+
+            print("🔍 第一次全量扫描...")
+            first = await run_sweep(session, task_ids[0])
+            assert first == list(range(1, TOTAL_PAGES + 1)), f"第一次全量扫描的页: {first}"
+            print(f"✅ 爬取了第 {first} 页")
+
+            print("🔍 第二次全量扫描（新任务）...")
+            second = await run_sweep(session, task_ids[1])
+            assert second == list(range(1, TOTAL_PAGES + 1)), f"第二次全量扫描没有从第1页开始: {second}"
+            print(f"✅ 重新爬取了第 {second} 页")
+
+            print("🔍 同一任务再次运行（中断后续爬）...")
+            resumed = await run_sweep(session, task_ids[1])
+            assert resumed == [], f"同一任务重复爬取了已完成的页: {resumed}"
+            print("✅ 没有重复爬取")
+        finally:
+            await session.rollback()
+            await session.execute(delete(PagesProgress).where(PagesProgress.relation_id == TEST_GENRE_ID))
+            await session.execute(delete(CrawlerProgress).where(CrawlerProgress.id.in_(task_ids)))
+            await session.commit()
+    return True
+
+
+if __name__ == "__main__":
+    print("🚀 开始测试类型列表页全量扫描")
+    print("=" * 50)
+    success = asyncio.run(test_second_full_sweep_starts_at_page_1())
+    print("=" * 50)
+    print("🎉 测试通过" if success else "❌ 测试失败")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+用本地替身代理测试代理池：粘性分配、并发上限、限速、健康评分和自动隔离
+
+启动三个本地 HTTP 代理：
+- good: 正常返回页面
+- flaky: 一半请求返回 Cloudflare 挑战页
+- dead: 不监听（连接被拒绝）
+"""
+
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from app.utils.proxy_pool import ProxyPool
+
+CHALLENGE_HTML = b"<html><title>Just a moment...</title><div id='challenge-form'></div></html>"
+
+
+def start_stand_in_proxy(behaviour):
+    """启动一个替身代理，返回 (地址, server)"""
+    counter = {"n": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            counter["n"] += 1
+            challenged = behaviour == "flaky" and counter["n"] % 2 == 0
+            body = CHALLENGE_HTML if challenged else f"<html>ok via {behaviour} {self.path}</html>".encode()
+            self.send_response(403 if challenged else 200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}", server
+
+
+def fetch(lease, url="http://missav.test/page"):
+    """通过租约中的代理请求页面，返回结果分类"""
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({"http": lease.url}))
+    lease.wait_turn()
+    try:
+        with opener.open(url, timeout=3) as response:
+            response.read()
+            return "ok"
+    except urllib.error.HTTPError as e:
+        return "challenge" if b"Just a moment" in e.read() else "error"
+    except OSError:
+        return "error"
+
+
+def test_proxy_pool():
+    good_url, good = start_stand_in_proxy("good")
+    flaky_url, flaky = start_stand_in_proxy("flaky")
+    dead_url = "http://127.0.0.1:9"  # discard 端口，通常没有监听
+
+    pool = ProxyPool(
+        proxies=[good_url, flaky_url, dead_url],
+        max_concurrency=2,
+        rate_per_minute=600,  # 每个代理最少间隔 0.1 秒
+        window=10,
+        min_samples=4,
+        quarantine_threshold=0.6,
+        quarantine_seconds=2,
+    )
+
+    print("🔍 粘性分配...")
+    first = {}
+    for key in ("profile_0", "profile_1", "profile_2"):
+        with pool.acquire(key=key) as lease:
+            first[key] = lease.url
+    for key, url in first.items():
+        with pool.acquire(key=key) as lease:
+            assert lease.url == url, f"{key} 换了代理: {url} -> {lease.url}"
+    print(f"✅ 同一个 profile 两次取到同一个代理: {first}")
+
+    print("🔍 并发上限...")
+    leases = [pool.acquire(key="profile_0") for _ in range(2)]
+    try:
+        pool.acquire(key="profile_0", timeout=0.3)
+        raise AssertionError("超过并发上限仍然取到了代理")
+    except TimeoutError:
+        print("✅ 粘性代理已满时等待而不是换代理")
+    for lease in leases:
+        lease.release()
+
+    print("🔍 限速...")
+    with pool.acquire(key="rate") as lease:
+        started = time.monotonic()
+        for _ in range(5):
+            lease.wait_turn()
+        elapsed = time.monotonic() - started
+    assert elapsed >= 0.35, f"限速没有生效: {elapsed:.2f} 秒"
+    print(f"✅ 5 次请求用时 {elapsed:.2f} 秒")
+
+    print("🔍 健康评分和隔离...")
+    for i in range(60):
+        with pool.acquire(key=f"worker_{i % 6}", timeout=5) as lease:
+            lease.report(fetch(lease))
+
+    stats = pool.stats()
+    for url, item in stats.items():
+        print(f"   {url}: {item}")
+    assert stats[dead_url]["quarantines"] >= 1, "不可用的代理没有被隔离"
+    assert stats[good_url]["quarantines"] == 0, "正常代理被隔离了"
+    print("✅ 不可用的代理被隔离，正常代理不受影响")
+
+    print("🔍 隔离到期后重新启用...")
+    time.sleep(2.5)
+    seen = set()
+    for i in range(6):
+        with pool.acquire(key=f"late_{i}") as lease:
+            seen.add(lease.url)
+    assert pool.stats()[dead_url]["samples"] == 0, "隔离结束后没有清空历史"
+    print(f"✅ 隔离结束，当前可分配的代理: {sorted(seen)}")
+
+    good.shutdown()
+    flaky.shutdown()
+    return True
+
+
+if __name__ == "__main__":
+    print("🚀 开始测试代理池")
+    print("=" * 50)
+    success = test_proxy_pool()
+    print("=" * 50)
+    print("🎉 测试通过" if success else "❌ 测试失败")
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+电影代码 -> 规范 URL 的解析缓存
+
+很多代码访问后会被重定向（857omg-004 → omg-004），或者实际页面在变体地址上
+（xxx-uncensored-leak、xxx-chinese-subtitle），每次爬取都要多一次导航。
+这里把观察到的结果保存在 movie_url_resolutions 表：
+
+- 导航后最终 URL 与请求的不同（且不是首页）时，记录 原始代码 → 最终 URL
+- 从列表页保存的 movies.link 预填：movies.code 与链接中的代码不同时，记录 代码 → 链接地址
+
+爬虫导航前先查缓存，再次爬取时直接打开最终地址。
+"""
+
+import threading
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlparse, urlunparse
+from loguru import logger
+from sqlalchemy import text
+
+from page_status import is_home_url
+
+BASE_URL = "https://missav.ai"
+
+# 列表页链接中已知的错误写法
+SLUG_FIXES = {'-uncensored-leaked': '-uncensored-leak'}
+
+
+class Resolution(NamedTuple):
+    canonical_url: str
+    variants: List[str]
+
+
+def slug_of(url: str) -> str:
+    """URL 最后一段路径（电影代码或变体代码）"""
+    parts = [p for p in urlparse(url or '').path.split('/') if p]
+    return parts[-1] if parts else ''
+
+
+def fix_slug(slug: str) -> str:
+    for wrong, right in SLUG_FIXES.items():
+        if slug.endswith(wrong):
+            return slug[:-len(wrong)] + right
+    return slug
+
+
+def normalize_url(url: str) -> str:
+    """去掉查询参数和锚点"""
+    parsed = urlparse(url)
+    return urlunparse(parsed._replace(query='', fragment=''))
+
+
+def url_from_link(link: str, language: str = 'ja') -> Optional[str]:
+    """把 movies.link（dm3/v/xxx、完整 URL 等）转换成电影页地址"""
+    slug = fix_slug(slug_of(link) if '/' in (link or '') else (link or ''))
+    if not slug:
+        return None
+    return f"{BASE_URL}/{language}/{slug}"
+
+
+class UrlResolutionCache:
+    """原始代码 → 规范 URL 及变体列表，持久化在 movie_url_resolutions 表
+
+    Args:
+        engine: SQLAlchemy 同步引擎
+        language: 预填列表页链接时使用的语言
+    """
+
+    # 与 schema.sql 中的定义保持一致
+    SETUP_SQL = [
+        """
+        CREATE TABLE IF NOT EXISTS movie_url_resolutions (
+            code VARCHAR(100) PRIMARY KEY,
+            canonical_url TEXT NOT NULL,
+            variants TEXT[] DEFAULT ARRAY[]::TEXT[],
+            source VARCHAR(20) NOT NULL DEFAULT 'redirect',
+            resolved_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]
+
+    UPSERT_SQL = """
+        INSERT INTO movie_url_resolutions (code, canonical_url, variants, source)
+        VALUES (:code, :canonical_url, :variants, :source)
+        ON CONFLICT (code) DO UPDATE
+        SET canonical_url = EXCLUDED.canonical_url,
+            variants = ARRAY(SELECT DISTINCT unnest(movie_url_resolutions.variants || EXCLUDED.variants)),
+            source = EXCLUDED.source,
+            resolved_at = CURRENT_TIMESTAMP
+    """
+
+    def __init__(self, engine, language: str = 'ja'):
+        self.engine = engine
+        self.language = language
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Resolution] = {}
+        self.hits = 0
+
+    def load(self, seed_from_listings: bool = True) -> int:
+        """建表、用列表页链接预填并加载缓存，返回缓存条数；数据库不可用时缓存为空"""
+        try:
+            with self.engine.begin() as conn:
+                for statement in self.SETUP_SQL:
+                    conn.execute(text(statement))
+                if seed_from_listings:
+                    self._seed_from_listings(conn)
+                rows = conn.execute(text(
+                    "SELECT code, canonical_url, variants FROM movie_url_resolutions"
+                )).fetchall()
+        except Exception as e:
+            logger.warning(f"加载URL解析缓存失败，本次按原始地址导航: {e}")
+            return 0
+
+        with self.lock:
+            self.entries = {code: Resolution(url, list(variants or [])) for code, url, variants in rows}
+        logger.info(f"🧭 URL解析缓存: {len(self.entries)} 条")
+        return len(self.entries)
+
+    def resolve(self, code: str, url: str) -> str:
+        """返回应该直接打开的地址，没有缓存时返回原地址"""
+        with self.lock:
+            entry = self.entries.get(code.lower())
+            if entry is None:
+                return url
+            self.hits += 1
+        return entry.canonical_url
+
+    def variants(self, code: str) -> List[str]:
+        with self.lock:
+            entry = self.entries.get(code.lower())
+        return list(entry.variants) if entry else []
+
+    def record(self, code: str, requested_url: str, final_url: str, source: str = 'redirect'):
+        """导航完成后记录重定向结果；最终地址与请求相同或是首页时不记录"""
+        if not final_url or is_home_url(final_url):
+            return
+        canonical = normalize_url(final_url)
+        if slug_of(canonical) == slug_of(requested_url):
+            return
+        key = code.lower()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry.canonical_url == canonical:
+                return
+            variants = sorted({key, slug_of(canonical).lower()} | set(entry.variants if entry else []))
+            self.entries[key] = Resolution(canonical, variants)
+        logger.info(f"🧭 记录重定向: {code} → {canonical}")
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text(self.UPSERT_SQL), {
+                    "code": key, "canonical_url": canonical, "variants": variants, "source": source,
+                })
+        except Exception as e:
+            logger.warning(f"写入URL解析缓存失败: {code}: {e}")
+
+    def forget(self, code: str):
+        """缓存的地址失效（例如返回404）时删除，下次按原始地址导航"""
+        key = code.lower()
+        with self.lock:
+            if self.entries.pop(key, None) is None:
+                return
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text("DELETE FROM movie_url_resolutions WHERE code = :code"), {"code": key})
+        except Exception as e:
+            logger.warning(f"删除URL解析缓存失败: {code}: {e}")
+
+    def _seed_from_listings(self, conn):
+        """movies.code 与列表页链接中的代码不一致时，记录 代码 → 链接地址"""
+        rows = conn.execute(text("""
+            SELECT m.code, m.link
+            FROM movies m
+            WHERE m.link IS NOT NULL AND m.link != ''
+              AND lower(m.code) != lower(regexp_replace(m.link, '^.*/', ''))
+              AND NOT EXISTS (SELECT 1 FROM movie_url_resolutions r WHERE r.code = lower(m.code))
+        """)).fetchall()
+        seeded = 0
+        for code, link in rows:
+            url = url_from_link(link, self.language)
+            if not url or slug_of(url).lower() == code.lower():
+                continue
+            conn.execute(text(self.UPSERT_SQL), {
+                "code": code.lower(), "canonical_url": url,
+                "variants": sorted({code.lower(), slug_of(url).lower()}), "source": 'listing',
+            })
+            seeded += 1
+        if seeded:
+            logger.info(f"🧭 从列表页链接预填 {seeded} 条URL解析")